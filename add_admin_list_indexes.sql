@@ -0,0 +1,12 @@
+-- =====================================================
+-- ÍNDICES PARA AS LISTAGENS ADMIN PAGINADAS (keyset)
+-- Aplicar em bancos já existentes (o database_schema.sql já inclui os índices)
+-- =====================================================
+
+-- /api/admin/clients: WHERE type = 'cliente' ORDER BY register_date DESC, id DESC
+ALTER TABLE users ADD INDEX idx_users_type_register (type, register_date, id);
+
+-- /api/admin/cases: ORDER BY created_at DESC, id DESC, com filtros por status e cliente
+ALTER TABLE client_cases ADD INDEX idx_client_cases_created (created_at);
+ALTER TABLE client_cases ADD INDEX idx_client_cases_status_created (status, created_at);
+ALTER TABLE client_cases ADD INDEX idx_client_cases_user_created (user_id, created_at);
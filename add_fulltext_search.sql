@@ -0,0 +1,11 @@
+-- =====================================================
+-- ÍNDICES FULLTEXT DA BUSCA UNIFICADA (/api/admin/search)
+-- Aplicar em bancos já existentes (o database_schema.sql já inclui os índices).
+-- Com collation utf8mb4_general_ci a busca ignora acentos e maiúsculas.
+-- Termos com menos de innodb_ft_min_token_size (3) caracteres não são indexados;
+-- se o servidor usar outro valor, defina FULLTEXT_MIN_TOKEN_SIZE na API.
+-- =====================================================
+
+ALTER TABLE users ADD FULLTEXT INDEX ft_users_search (name, email, cpf);
+ALTER TABLE client_cases ADD FULLTEXT INDEX ft_client_cases_search (title, description);
+ALTER TABLE process_files ADD FULLTEXT INDEX ft_process_files_search (original_filename);
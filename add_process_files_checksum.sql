@@ -0,0 +1,8 @@
+-- =====================================================
+-- TAMANHO E SHA-256 DOS ARQUIVOS DE PROCESSO
+-- Aplicar em bancos já existentes (o database_schema.sql já inclui as colunas)
+-- =====================================================
+
+-- Preenchidas no upload (POST /api/admin/process-files), calculadas durante a gravação
+ALTER TABLE process_files ADD COLUMN file_size BIGINT DEFAULT NULL AFTER file_path;
+ALTER TABLE process_files ADD COLUMN sha256 CHAR(64) DEFAULT NULL AFTER file_size;
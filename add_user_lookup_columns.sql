@@ -0,0 +1,12 @@
+-- =====================================================
+-- CPF E TELEFONE NORMALIZADOS (SÓ DÍGITOS) PARA BUSCA EXATA
+-- Aplicar em bancos já existentes (o database_schema.sql já inclui colunas e índices).
+-- 1) este arquivo: colunas novas, anuláveis (ALTER online, sem copiar a tabela)
+-- 2) python backfill_user_lookup_columns.py: preenche em lotes e cria os índices
+--    uq_users_cpf_digits (único) e idx_users_phone_digits com LOCK=NONE
+-- As rotas da API mantêm as colunas a cada cadastro/edição; rodar o script de
+-- novo corrige linhas alteradas por fora (SQL manual, importações).
+-- =====================================================
+
+ALTER TABLE users ADD COLUMN cpf_digits VARCHAR(14) DEFAULT NULL AFTER cpf, ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE users ADD COLUMN phone_digits VARCHAR(20) DEFAULT NULL AFTER phone, ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do streaming de vídeos em arquivo de 1 GB
+
+Compara send_video (src/video_streaming.py) com o send_from_directory usado
+antes nas rotas de vídeo:
+- latência de seek: pedidos "Range: bytes=N-" em offsets aleatórios, tempo
+  até receber o primeiro MiB (o que o player espera antes de retomar);
+- vazão: leitura completa do arquivo com "Range: bytes=0-".
+
+Roda pelo cliente de testes do Flask, sem servidor; no gunicorn o
+wsgi.file_wrapper usa sendfile() e a vazão real é maior que a medida aqui.
+
+Uso: python benchmark_video_streaming.py [--size-mb 1024] [--seeks 200] [--dense]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, send_from_directory
+
+from src.video_streaming import send_video, VIDEO_CHUNK_SIZE
+
+FIRST_BYTES = 1024 * 1024
+
+
+def create_file(size, dense):
+    """Arquivo esparso (rápido de criar) ou preenchido com dados reais (--dense)"""
+    path = os.path.join(tempfile.mkdtemp(), "bench_video.mp4")
+    with open(path, "wb") as handle:
+        if dense:
+            block = os.urandom(8 * 1024 * 1024)
+            for _ in range(size // len(block)):
+                handle.write(block)
+            handle.write(block[:size % len(block)])
+        else:
+            handle.truncate(size)
+    return path
+
+
+def create_app(path, chunk_size):
+    app = Flask(__name__)
+    folder, filename = os.path.split(path)
+
+    @app.route("/stream")
+    def stream():
+        return send_video(path, chunk_size=chunk_size)
+
+    @app.route("/legacy")
+    def legacy():
+        return send_from_directory(folder, filename)
+
+    return app
+
+
+def read_body(response, limit=None):
+    total = 0
+    try:
+        for chunk in response.response:
+            total += len(chunk)
+            if limit and total >= limit:
+                break
+    finally:
+        response.close()
+    return total
+
+
+def seek_latency(client, url, size, seeks):
+    rng = random.Random(42)
+    samples = []
+    for _ in range(seeks):
+        offset = rng.randrange(0, size - FIRST_BYTES)
+        start = time.perf_counter()
+        response = client.get(url, headers={"Range": f"bytes={offset}-"}, buffered=False)
+        assert response.status_code == 206, response.status_code
+        read_body(response, FIRST_BYTES)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def throughput(client, url, size):
+    start = time.perf_counter()
+    response = client.get(url, headers={"Range": "bytes=0-"}, buffered=False)
+    total = read_body(response)
+    elapsed = time.perf_counter() - start
+    assert total == size, (total, size)
+    return size / elapsed / (1024 * 1024)
+
+
+def run(size, seeks, dense=False, chunk_size=VIDEO_CHUNK_SIZE):
+    """Retorna {rota: (mediana do seek s, p95 do seek s, vazão MiB/s)}"""
+    path = create_file(size, dense)
+    print(f"🎬 Arquivo de {size // (1024 * 1024)} MiB em {path} ({'denso' if dense else 'esparso'}), "
+          f"bloco de {chunk_size // 1024} KiB")
+    client = create_app(path, chunk_size).test_client()
+    results = {}
+    try:
+        for label, url in (("send_from_directory (antes)", "/legacy"), ("send_video", "/stream")):
+            median, p95 = seek_latency(client, url, size, seeks)
+            rate = throughput(client, url, size)
+            results[url] = (median, p95, rate)
+            print(f"  {label:<28} seek mediana {median * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  "
+                  f"vazão {rate:8.1f} MiB/s")
+    finally:
+        os.remove(path)
+    return results
+
+
+def test_send_video_not_slower():
+    results = run(size=64 * 1024 * 1024, seeks=20)
+    assert results["/stream"][2] >= results["/legacy"][2] * 0.8, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--seeks", type=int, default=200)
+    parser.add_argument("--chunk-kb", type=int, default=VIDEO_CHUNK_SIZE // 1024)
+    parser.add_argument("--dense", action="store_true", help="gravar dados reais em vez de arquivo esparso")
+    args = parser.parse_args()
+
+    results = run(args.size_mb * 1024 * 1024, args.seeks, args.dense, args.chunk_kb * 1024)
+    speedup = results["/stream"][2] / results["/legacy"][2]
+    print(f"{'✅' if speedup >= 1 else '❌'} Vazão {speedup:.1f}x a do send_from_directory")
+    sys.exit(0 if speedup >= 1 else 1)
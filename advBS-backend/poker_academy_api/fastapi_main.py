@@ -21,7 +21,8 @@ load_dotenv()
 
 # Importar modelos e configurações
 from models import db, Users, ClientCases, CaseStatus, Services, ProcessFiles, UserType
-from database import get_db_session
+from database import get_db_session, get_db_pool_status
+from file_responses import conditional_file_response
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -255,6 +256,16 @@ def verify_token(authorization: str = Header(None)):
     print("❌ DEBUG: Chegou ao final sem retornar token válido")
     raise HTTPException(status_code=401, detail="Token inválido")
 
+# ==================== MÉTRICAS ====================
+
+@app.get("/api/admin/metrics/db-pool")
+async def get_db_pool_metrics(current_user=Depends(verify_token)):
+    """Métricas do pool de conexões: conexões em uso, overflow, espera e churn (admin)"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+
+    return {"data": get_db_pool_status()}
+
 # ==================== ROTAS DE CLIENTES ====================
 
 @app.get("/api/admin/clients")
@@ -955,14 +966,15 @@ async def delete_process_file(file_id: int, db_session=Depends(get_db), current_
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/admin/process-files/{file_id}/download")
-async def download_process_file(file_id: int, db_session=Depends(get_db), current_user=Depends(verify_token)):
-    """Download de arquivo de processo"""
+async def download_process_file(file_id: int, request: Request, inline: bool = False,
+                                db_session=Depends(get_db), current_user=Depends(verify_token)):
+    """Download de arquivo de processo (Range, ETag e GET condicional)"""
     try:
         print(f"📥 Solicitação de download do arquivo ID: {file_id}")
 
         # Buscar informações do arquivo no banco
         query = """
-        SELECT filename, original_filename, file_path
+        SELECT filename, original_filename, file_path, sha256
         FROM process_files
         WHERE id = :file_id
         """
@@ -985,10 +997,11 @@ async def download_process_file(file_id: int, db_session=Depends(get_db), curren
         print(f"✅ Enviando arquivo: {original_filename}")
 
         # Retornar o arquivo para download
-        return FileResponse(
-            path=file_path,
-            filename=original_filename,
-            media_type='application/octet-stream'
+        return conditional_file_response(
+            request, file_path, original_filename,
+            media_type='application/octet-stream',
+            sha256=file_info.sha256,
+            inline=inline
         )
 
     except HTTPException:
@@ -1175,8 +1188,9 @@ async def get_client_stats_no_auth(db_session=Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/client/files/{file_id}/download")
-async def download_client_file(file_id: int, authorization: str = Header(None), db_session=Depends(get_db)):
-    """Download de arquivo para cliente"""
+async def download_client_file(file_id: int, request: Request, inline: bool = False,
+                               authorization: str = Header(None), db_session=Depends(get_db)):
+    """Download de arquivo para cliente (Range, ETag e GET condicional)"""
     try:
         print(f"📥 Cliente solicitando download do arquivo ID: {file_id}")
 
@@ -1186,7 +1200,7 @@ async def download_client_file(file_id: int, authorization: str = Header(None),
 
         # Buscar informações do arquivo no banco e verificar se pertence ao cliente
         query = """
-        SELECT filename, original_filename, file_path, user_id
+        SELECT filename, original_filename, file_path, user_id, sha256
         FROM process_files
         WHERE id = :file_id AND user_id = :user_id
         """
@@ -1226,14 +1240,12 @@ async def download_client_file(file_id: int, authorization: str = Header(None),
         print(f"📄 Safe filename: {safe_filename}")
         print(f"📄 MIME type: {mime_type}")
 
-        # Retornar o arquivo para download
-        return FileResponse(
-            path=file_path,
-            filename=safe_filename,
+        # Retornar o arquivo (inline=true para visualizar no navegador)
+        return conditional_file_response(
+            request, file_path, safe_filename,
             media_type=mime_type,
-            headers={
-                "Content-Disposition": f'attachment; filename="{safe_filename}"'
-            }
+            sha256=file_info.sha256,
+            inline=inline
         )
 
     except HTTPException:
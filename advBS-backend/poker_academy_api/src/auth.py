@@ -4,7 +4,10 @@ from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, current_app
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm.attributes import set_committed_value
 from src.models import Users, db
+from src.user_cache import user_identity_cache
+from src.write_behind import write_behind
 
 class AuthService:
     @staticmethod
@@ -48,9 +51,10 @@ class AuthService:
         ).first()
 
         if user and AuthService.verify_password(password, user.password_hash):
-            # Update last login
-            user.last_login = datetime.utcnow()
-            db.session.commit()
+            # Update last login: gravado em lote pelo write_behind, fora da transação do login
+            now = datetime.utcnow()
+            write_behind.set_value(Users, 'last_login', user.id, now)
+            set_committed_value(user, 'last_login', now)
             return user
         return None
 
@@ -76,7 +80,7 @@ def token_required(f):
             if payload is None:
                 return jsonify({'error': 'Token is invalid or expired'}), 401
             
-            current_user = Users.query.get(payload['user_id'])
+            current_user = user_identity_cache.get(payload['user_id'])
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
                 
@@ -108,7 +112,7 @@ def admin_required(f):
             if payload is None:
                 return jsonify({'error': 'Token is invalid or expired'}), 401
             
-            current_user = Users.query.get(payload['user_id'])
+            current_user = user_identity_cache.get(payload['user_id'])
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
             
@@ -0,0 +1,79 @@
+# src/case_rollup.py
+# Rollup diário de casos (case_daily_rollup, lido pela API FastAPI em
+# /api/analytics/timeseries) mantido pelas escritas do ORM deste app
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.orm.attributes import get_history
+
+from advbs_shared.case_rollup import (case_contributions, record_case_opened, record_case_recategorized,
+                                      record_cases_removed, record_status_change)
+from src.models import ClientCases, Services, Users
+from src.system_counters import table_available
+
+
+def _status_value(status):
+    return getattr(status, 'value', status)
+
+
+# ==================== EVENTOS DO ORM ====================
+# Mesmas funções que as rotas da API FastAPI chamam, na conexão/transação do flush
+
+
+@event.listens_for(ClientCases, "after_insert")
+def _case_inserted(mapper, connection, target):
+    if not table_available(connection, "case_daily_rollup"):
+        return
+    created_at = target.created_at or datetime.utcnow()
+    record_case_opened(connection, target.id, _status_value(target.status), day=created_at.date())
+
+
+@event.listens_for(ClientCases, "before_update")
+def _case_updating(mapper, connection, target):
+    # Antes do UPDATE: o banco ainda tem o serviço e o updated_at anteriores
+    service_history = get_history(target, 'service_id')
+    if service_history.has_changes():
+        if table_available(connection, "case_daily_rollup"):
+            # Troca de categoria (e de status no mesmo flush) contada em _case_updated
+            connection.info.setdefault('case_rollup_before', {})[target.id] = \
+                case_contributions(connection, 'id', target.id)
+        return
+    history = get_history(target, 'status')
+    if not history.has_changes() or not history.deleted:
+        return
+    if not table_available(connection, "case_daily_rollup"):
+        return
+    cases = ClientCases.__table__
+    row = connection.execute(select(cases.c.created_at, cases.c.updated_at).where(cases.c.id == target.id)).fetchone()
+    updated = get_history(target, 'updated_at').added
+    record_status_change(connection, target.id, _status_value(history.deleted[0]), _status_value(target.status),
+                         row.created_at, row.updated_at, now=updated[0] if updated else datetime.utcnow())
+
+
+@event.listens_for(ClientCases, "after_update")
+def _case_updated(mapper, connection, target):
+    before = connection.info.get('case_rollup_before', {}).pop(target.id, None)
+    if before is not None:
+        record_case_recategorized(connection, target.id, before)
+
+
+# Casos removidos (direto ou em cascata pelo banco ao excluir cliente/serviço)
+# saem do rollup antes do DELETE
+
+
+@event.listens_for(ClientCases, "before_delete")
+def _case_deleting(mapper, connection, target):
+    if table_available(connection, "case_daily_rollup"):
+        record_cases_removed(connection, 'id', target.id)
+
+
+@event.listens_for(Users, "before_delete")
+def _user_deleting(mapper, connection, target):
+    if table_available(connection, "case_daily_rollup"):
+        record_cases_removed(connection, 'user_id', target.id)
+
+
+@event.listens_for(Services, "before_delete")
+def _service_deleting(mapper, connection, target):
+    if table_available(connection, "case_daily_rollup"):
+        record_cases_removed(connection, 'service_id', target.id)
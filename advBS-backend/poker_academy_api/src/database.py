@@ -3,6 +3,7 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from advbs_shared.db_pool import get_pool_options, get_pool_status
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -23,13 +24,16 @@ print(f"🔗 Conectando ao banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
 engine = create_engine(
     DATABASE_URL,
     echo=False,  # Set to True for SQL debugging
-    pool_pre_ping=True,
-    pool_recycle=300
+    **get_pool_options()
 )
 
 # Criar sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_db_pool_status():
+    """Pool deste engine: conexões em uso, overflow, espera e churn"""
+    return get_pool_status(engine)
+
 def get_db_session():
     """Criar nova sessão do banco de dados"""
     return SessionLocal()
@@ -0,0 +1,160 @@
+# src/file_responses.py
+# Download de arquivos com Range (206), ETag e GET condicional (304)
+import os
+import re
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+
+from fastapi.responses import Response, StreamingResponse
+
+READ_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+# Documentos privados: o navegador pode guardar, mas revalida sempre (e nunca em cache compartilhado)
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+_RANGE_SPEC = re.compile(r"^(\d*)-(\d*)$")
+
+
+def file_etag(sha256, stat):
+    """ETag forte a partir do SHA-256 gravado; sem hash, ETag fraca de tamanho+mtime"""
+    if sha256:
+        return f'"{sha256}"'
+    return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _etag_matches(header, etag, weak=True):
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    if weak:
+        # If-None-Match usa comparação fraca
+        return etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+    return not etag.startswith("W/") and etag in candidates
+
+
+def _not_modified_since(header, mtime):
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(header, size):
+    """Lista de (início, fim inclusivo); None se o cabeçalho deve ser ignorado, [] se insatisfatível"""
+    if not header or not header.startswith("bytes="):
+        return None
+    ranges = []
+    for spec in header[len("bytes="):].split(","):
+        match = _RANGE_SPEC.match(spec.strip())
+        if not match or match.groups() == ("", ""):
+            return None
+        first, last = match.groups()
+        if first == "":
+            # Sufixo: últimos N bytes
+            length = int(last)
+            if length == 0 or size == 0:
+                continue  # arquivo vazio não tem últimos bytes: sem intervalos, 416
+            ranges.append((max(size - length, 0), size - 1))
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+            if start < size:
+                ranges.append((start, end))
+    return ranges
+
+
+def _read_range(path, start, end, chunk_size=READ_CHUNK_SIZE):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def content_disposition(filename, inline=False):
+    """Content-Disposition com nome ASCII de fallback e filename* (RFC 5987) para acentos"""
+    kind = "inline" if inline else "attachment"
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace('"', "").replace("?", "_")
+    return f"{kind}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def conditional_file_response(request, path, filename, media_type="application/octet-stream",
+                              sha256=None, inline=False, cache_control=PRIVATE_CACHE_CONTROL):
+    """Resposta de arquivo com validadores, 304 e Range (um ou vários intervalos)"""
+    stat = os.stat(path)
+    etag = file_etag(sha256, stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    # GET condicional: If-None-Match tem precedência sobre If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request.headers.get("if-modified-since"), stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = content_disposition(filename, inline)
+    size = stat.st_size
+    ranges = parse_range(request.headers.get("range"), size)
+
+    # If-Range: só atende o Range se o arquivo ainda for o mesmo (ETag forte ou data exata)
+    if_range = request.headers.get("if-range")
+    if ranges is not None and if_range is not None:
+        if if_range.startswith(('"', 'W/')):
+            same = _etag_matches(if_range, etag, weak=False)
+        else:
+            try:
+                same = int(stat.st_mtime) == int(parsedate_to_datetime(if_range).timestamp())
+            except (TypeError, ValueError):
+                same = False
+        if not same:
+            ranges = None
+
+    if ranges is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_read_range(path, 0, size - 1), media_type=media_type, headers=headers)
+
+    if not ranges:
+        headers.pop("Content-Disposition")
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(_read_range(path, start, end), status_code=206,
+                                 media_type=media_type, headers=headers)
+
+    # Vários intervalos: multipart/byteranges
+    boundary = uuid.uuid4().hex
+    parts = [(f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+              f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode("latin-1")
+             for start, end in ranges]
+    closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+    length = sum(len(part) + end - start + 1 for part, (start, end) in zip(parts, ranges))
+    length += 2 * (len(ranges) - 1) + len(closing)
+
+    def multipart_body():
+        for i, (part, (start, end)) in enumerate(zip(parts, ranges)):
+            yield (b"\r\n" if i else b"") + part
+            yield from _read_range(path, start, end)
+        yield closing
+
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(multipart_body(), status_code=206,
+                             media_type=f"multipart/byteranges; boundary={boundary}", headers=headers)
@@ -0,0 +1,291 @@
+# src/hls_transcoder.py
+# Fila de transcodificação dos vídeos das aulas para HLS adaptativo (ffmpeg)
+import logging
+import os
+import queue
+import re
+import subprocess
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, jsonify
+
+from src.models import db, VideoRenditions, RenditionStatus
+from src.video_streaming import send_video
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+_UPLOADS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+VIDEO_FOLDER = os.path.join(_UPLOADS, "videos")  # mesma pasta do upload_video
+HLS_FOLDER = os.getenv("HLS_OUTPUT_DIR", os.path.join(_UPLOADS, "hls"))
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+HLS_WORKERS = int(os.getenv("HLS_WORKERS", "1"))
+# Tempo máximo de um ffmpeg; renditions "processando" há mais tempo que isso
+# (worker morreu no meio) voltam para a fila na inicialização
+HLS_TIMEOUT = int(os.getenv("HLS_TIMEOUT_SECONDS", "3600"))
+# Segmentos nunca mudam depois de gravados
+HLS_SEGMENT_MAX_AGE = int(os.getenv("HLS_SEGMENT_MAX_AGE", str(7 * 24 * 3600)))
+
+# (nome, altura, bitrate de vídeo kbps, bitrate de áudio kbps), da menor para a maior:
+# a menor fica pronta primeiro e o master.m3u8 já pode ser tocado
+RENDITIONS = [
+    ("360p", 360, 800, 96),
+    ("480p", 480, 1400, 128),
+    ("720p", 720, 2800, 128),
+    ("1080p", 1080, 5000, 192),
+]
+
+AUDIO_KBPS = {name: audio_kbps for name, _, _, audio_kbps in RENDITIONS}
+
+MASTER_PLAYLIST = "master.m3u8"
+_ASSET = re.compile(r"^[\w-]+\.(m3u8|ts)$")
+
+
+def hls_dir(video_filename, base_dir=None):
+    """uploads/hls/<nome do vídeo sem extensão>/"""
+    return os.path.join(base_dir or HLS_FOLDER, os.path.splitext(os.path.basename(video_filename))[0])
+
+
+def probe_height(source_path):
+    """Altura do vídeo via ffprobe; None se não foi possível descobrir"""
+    try:
+        result = subprocess.run(
+            [FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "stream=height", "-of", "csv=p=0", source_path],
+            capture_output=True, text=True, timeout=60)
+        return int(result.stdout.strip().splitlines()[0])
+    except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+
+def select_renditions(source_height, renditions=RENDITIONS):
+    """Renditions até a altura original (sem upscale); ao menos a menor"""
+    if source_height is None:
+        return list(renditions)
+    selected = [r for r in renditions if r[1] <= source_height]
+    return selected or [renditions[0]]
+
+
+def build_ffmpeg_command(source_path, out_dir, rendition, segment_seconds=HLS_SEGMENT_SECONDS):
+    """Comando ffmpeg para uma rendition (playlist VOD + segmentos .ts)
+
+    Keyframes forçados a cada segmento e sem keyframe por mudança de cena,
+    para que os segmentos das várias renditions fiquem alinhados e o player
+    possa trocar de qualidade em qualquer fronteira.
+    """
+    name, height, video_kbps, audio_kbps = rendition
+    return [
+        FFMPEG_BIN, "-y", "-v", "error", "-i", source_path,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main",
+        "-b:v", f"{video_kbps}k", "-maxrate", f"{int(video_kbps * 1.07)}k", "-bufsize", f"{video_kbps * 2}k",
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})", "-sc_threshold", "0",
+        "-c:a", "aac", "-b:a", f"{audio_kbps}k", "-ac", "2",
+        "-f", "hls", "-hls_time", str(segment_seconds), "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(out_dir, f"{name}_%05d.ts"),
+        os.path.join(out_dir, f"{name}.m3u8"),
+    ]
+
+
+def write_master_playlist(out_dir, renditions):
+    """Gravar master.m3u8 com as renditions prontas (troca atômica do arquivo)"""
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for rendition in sorted(renditions, key=lambda r: r.height):
+        bandwidth = (rendition.bitrate_kbps + AUDIO_KBPS.get(rendition.name, 128)) * 1000
+        lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},NAME=\"{rendition.name}\"")
+        lines.append(f"{rendition.name}.m3u8")
+    temp_path = os.path.join(out_dir, MASTER_PLAYLIST + ".tmp")
+    with open(temp_path, "w") as handle:
+        handle.write("\n".join(lines) + "\n")
+    os.replace(temp_path, os.path.join(out_dir, MASTER_PLAYLIST))
+
+
+class TranscodeQueue:
+    """Fila em memória com threads de trabalho; o estado fica em video_renditions
+
+    A tabela é a fonte da verdade: cada rendition só é processada por quem
+    conseguir mudá-la de pendente para processando (UPDATE condicional), então
+    vários workers do gunicorn podem reenfileirar o mesmo vídeo sem repetir
+    trabalho. Jobs perdidos num restart são retomados por resume_pending().
+    """
+
+    def __init__(self, workers=HLS_WORKERS):
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.app = None
+
+    def init_app(self, app):
+        """Guardar o app e retomar em segundo plano os jobs que ficaram pendentes"""
+        self.app = app
+        threading.Thread(target=self.resume_pending, name="hls-resume", daemon=True).start()
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"hls-worker-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, video_filename, source_path):
+        """Criar as renditions como pendentes e colocar o vídeo na fila (dentro do app context)"""
+        self.app = self.app or current_app._get_current_object()
+        existing = {r.name for r in VideoRenditions.query.filter_by(video_filename=video_filename)}
+        for name, height, video_kbps, _ in RENDITIONS:
+            if name not in existing:
+                db.session.add(VideoRenditions(video_filename=video_filename, name=name, height=height,
+                                               bitrate_kbps=video_kbps, status=RenditionStatus.pendente))
+        db.session.commit()
+        self._queue.put((video_filename, source_path))
+        self._start_workers()
+
+    def join(self):
+        """Esperar a fila esvaziar (testes e scripts)"""
+        self._queue.join()
+
+    def resume_pending(self):
+        """Reenfileirar vídeos com renditions pendentes ou presas em processando"""
+        try:
+            with self.app.app_context():
+                stale = datetime.utcnow() - timedelta(seconds=HLS_TIMEOUT)
+                VideoRenditions.query.filter(
+                    VideoRenditions.status == RenditionStatus.processando,
+                    VideoRenditions.updated_at < stale
+                ).update({"status": RenditionStatus.pendente}, synchronize_session=False)
+                db.session.commit()
+                filenames = [row[0] for row in db.session.query(VideoRenditions.video_filename).filter(
+                    VideoRenditions.status == RenditionStatus.pendente).distinct()]
+            for video_filename in filenames:
+                self._queue.put((video_filename, os.path.join(VIDEO_FOLDER, video_filename)))
+            if filenames:
+                logger.info(f"🎞️ {len(filenames)} vídeo(s) retomados na fila de HLS")
+                self._start_workers()
+        except Exception as e:
+            logger.error(f"❌ Erro ao retomar fila de HLS: {e}", exc_info=True)
+
+    def _run(self):
+        while True:
+            video_filename, source_path = self._queue.get()
+            try:
+                with self.app.app_context():
+                    self.process(video_filename, source_path)
+            except Exception as e:
+                logger.error(f"❌ Erro ao transcodificar {video_filename}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _claim(self, rendition_id):
+        claimed = VideoRenditions.query.filter_by(id=rendition_id, status=RenditionStatus.pendente).update(
+            {"status": RenditionStatus.processando, "updated_at": datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def _finish(self, rendition_id, status, playlist_path=None, error=None):
+        # Linha recarregada: a sessão foi descartada antes do ffmpeg
+        rendition = VideoRenditions.query.get(rendition_id)
+        if rendition is None:
+            return  # vídeo excluído enquanto transcodificava
+        rendition.status = status
+        rendition.playlist_path = playlist_path
+        rendition.error = error
+        db.session.commit()
+
+    def process(self, video_filename, source_path):
+        """Gerar as renditions pendentes do vídeo, da menor para a maior
+
+        Nenhuma conexão do pool fica presa enquanto o ffmpeg roda (até
+        HLS_TIMEOUT): só id/nome/status saem do banco e a sessão é descartada
+        antes de cada encode.
+        """
+        out_dir = hls_dir(video_filename)
+        os.makedirs(out_dir, exist_ok=True)
+        wanted = {r[0]: r for r in select_renditions(probe_height(source_path))}
+
+        renditions = db.session.query(VideoRenditions.id, VideoRenditions.name, VideoRenditions.status) \
+            .filter_by(video_filename=video_filename).order_by(VideoRenditions.height).all()
+        db.session.commit()
+        for rendition_id, name, status in renditions:
+            if status != RenditionStatus.pendente:
+                continue
+            if name not in wanted:
+                # Maior que o original: não faz sentido gerar
+                VideoRenditions.query.filter_by(id=rendition_id).delete(synchronize_session=False)
+                db.session.commit()
+                continue
+            if not self._claim(rendition_id):
+                continue  # outro worker pegou
+            db.session.remove()
+
+            command = build_ffmpeg_command(source_path, out_dir, wanted[name])
+            error = None
+            try:
+                result = subprocess.run(command, capture_output=True, text=True, timeout=HLS_TIMEOUT)
+                if result.returncode != 0:
+                    error = result.stderr.strip()[-2000:] or f"ffmpeg saiu com código {result.returncode}"
+            except (OSError, subprocess.SubprocessError) as e:
+                error = str(e)
+
+            if error:
+                logger.error(f"❌ HLS {video_filename} {name}: {error}")
+                self._finish(rendition_id, RenditionStatus.erro, error=error)
+                continue
+            self._finish(rendition_id, RenditionStatus.pronto,
+                         playlist_path=os.path.join(out_dir, f"{name}.m3u8"))
+            ready = VideoRenditions.query.filter_by(video_filename=video_filename,
+                                                    status=RenditionStatus.pronto).all()
+            write_master_playlist(out_dir, ready)
+            db.session.commit()
+            logger.info(f"✅ HLS {video_filename} {name} pronto")
+
+transcode_queue = TranscodeQueue()
+
+
+def _sign_playlist(content, token):
+    """Repassar o token de acesso às URIs da playlist (segmentos e sub-playlists)"""
+    lines = []
+    for line in content.splitlines():
+        if line and not line.startswith("#"):
+            line = f"{line}?token={token}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def send_hls_asset(video_filename, asset, token=None):
+    """Servir master.m3u8, playlists das renditions ou segmentos .ts do vídeo
+
+    Playlists não têm cache (o master ganha renditions conforme ficam prontas);
+    segmentos são imutáveis e vão com cache longo e suporte a Range. Se o
+    acesso veio com ?token=, as URIs das playlists recebem o mesmo token, já
+    que players HLS nativos não repassam cabeçalhos de autorização.
+    """
+    if not _ASSET.match(asset or ""):
+        return jsonify(error="Arquivo HLS inválido"), 400
+    path = os.path.join(hls_dir(video_filename), asset)
+    if not os.path.isfile(path):
+        return jsonify(error="Arquivo HLS não encontrado"), 404
+
+    if asset.endswith(".ts"):
+        return send_video(path, mimetype="video/mp2t", max_age=HLS_SEGMENT_MAX_AGE)
+
+    with open(path) as handle:
+        content = handle.read()
+    if token:
+        content = _sign_playlist(content, token)
+    response = current_app.response_class(content, mimetype="application/vnd.apple.mpegurl")
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def rendition_status(video_filename):
+    """Estado das renditions para a API (pronto quando ao menos uma está pronta)"""
+    renditions = VideoRenditions.query.filter_by(video_filename=video_filename) \
+        .order_by(VideoRenditions.height).all()
+    return {
+        "video_filename": video_filename,
+        "ready": any(r.status == RenditionStatus.pronto for r in renditions),
+        "renditions": [r.to_dict() for r in renditions]
+    }
@@ -18,8 +18,14 @@ from src.routes.upload_routes import upload_bp
 from src.routes.admin_routes import admin_bp
 print("✅ Admin blueprint importado com sucesso")
 from src.routes.client_routes import client_bp
+from src.routes.video_routes import video_bp
 from src.models import db, Services
 from src.routes.service_routes import service_bp
+from advbs_shared.db_pool import get_pool_options
+from src.hls_transcoder import transcode_queue
+from src.write_behind import write_behind
+import src.system_counters  # registra os eventos do ORM que mantêm system_counters
+import src.case_rollup  # e os que mantêm case_daily_rollup
 
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000", "http://localhost:3001"], supports_credentials=True)
@@ -35,6 +41,7 @@ SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 # Configuração do banco de dados MySQL (como estava antes)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_pool_options()
 app.config["SECRET_KEY"] = SECRET_KEY
 app.config["MAX_CONTENT_LENGTH"] = 500 * 1024 * 1024  # 500MB max file size
 app.config["UPLOAD_FOLDER"] = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
@@ -49,6 +56,13 @@ app.register_blueprint(upload_bp)
 app.register_blueprint(admin_bp)
 print("✅ Admin blueprint registrado com sucesso")
 app.register_blueprint(client_bp)
+app.register_blueprint(video_bp)
+
+# Fila de transcodificação HLS: retoma vídeos que ficaram pendentes
+transcode_queue.init_app(app)
+
+# last_login e contadores de visualização gravados em lote (e na saída do processo)
+write_behind.init_app(app)
 
 @app.route("/")
 def home():
@@ -4,10 +4,16 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Enum as SQLAlchemyEnum, Numeric
+from sqlalchemy import Column, Enum as SQLAlchemyEnum, Integer, MetaData, Numeric, String, Table, event, inspect
+from sqlalchemy.orm.attributes import get_history
 import enum
+import threading
+import time
 from datetime import datetime # Para default=datetime.utcnow ou similar se db.func.current_timestamp() não for o desejado
 
+# Normalização de CPF/telefone compartilhada com a API FastAPI
+from advbs_shared.user_identifiers import LOOKUP_COLUMNS
+
 db = SQLAlchemy()
 
 class UserType(enum.Enum):
@@ -31,6 +37,12 @@ class VideoType(enum.Enum):
     youtube = "youtube"  # Temporário para compatibilidade
     local = "local"
 
+class RenditionStatus(enum.Enum):
+    pendente = "pendente"
+    processando = "processando"
+    pronto = "pronto"
+    erro = "erro"
+
 class Users(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -68,6 +80,48 @@ class Users(db.Model):
             # Não inclua password_hash no to_dict por segurança
         }
 
+# CPF/telefone só com dígitos (busca exata indexada da API FastAPI). Fora do
+# mapeamento de Users: o INSERT do ORM listaria as colunas mesmo antes de
+# add_user_lookup_columns.sql ser aplicado
+users_lookup = Table(
+    "users", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("cpf_digits", String(14)),
+    Column("phone_digits", String(20))
+)
+
+# Sem as colunas as escritas seguem sem elas; verificar de novo após este intervalo
+LOOKUP_COLUMNS_RECHECK_SECONDS = 60
+
+_lookup_lock = threading.Lock()
+_lookup_available = {}
+
+
+def _lookup_columns_available(connection):
+    key = str(connection.engine.url)
+    with _lookup_lock:
+        cached = _lookup_available.get(key)
+    if cached is not None and (cached[0] or time.monotonic() < cached[1]):
+        return cached[0]
+    columns = {column["name"] for column in inspect(connection).get_columns("users")}
+    available = set(LOOKUP_COLUMNS) <= columns
+    with _lookup_lock:
+        _lookup_available[key] = (available, time.monotonic() + LOOKUP_COLUMNS_RECHECK_SECONDS)
+    return available
+
+
+@event.listens_for(Users, "after_insert")
+@event.listens_for(Users, "after_update")
+def _fill_lookup_columns(mapper, connection, target):
+    """cpf_digits/phone_digits na mesma transação da escrita que alterou cpf/phone"""
+    values = {column: normalize(getattr(target, source))
+              for column, (source, normalize) in LOOKUP_COLUMNS.items()
+              if get_history(target, source).has_changes()}
+    if not values or not _lookup_columns_available(connection):
+        return
+    connection.execute(users_lookup.update().where(users_lookup.c.id == target.id).values(**values))
+
+
 class Services(db.Model):
     __tablename__ = "services"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -102,6 +156,9 @@ class ClientCases(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Arquivos do caso - carregar com selectinload(ClientCases.files) para evitar N+1
+    files = db.relationship("ProcessFiles", back_populates="case", lazy="select", passive_deletes=True)
+
 class Favorites(db.Model):
     __tablename__ = "favorites"
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
@@ -125,10 +182,15 @@ class ProcessFiles(db.Model):
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)
     description = db.Column(db.Text, nullable=True)
     uploaded_by_admin = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    # Caso do arquivo - carregar com selectinload(ProcessFiles.case) para evitar N+1
+    case = db.relationship("ClientCases", back_populates="files", lazy="select")
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -136,8 +198,38 @@ class ProcessFiles(db.Model):
             'case_id': self.case_id,
             'filename': self.filename,
             'original_filename': self.original_filename,
+            'file_size': self.file_size,
+            'sha256': self.sha256,
             'description': self.description,
             'uploaded_by_admin': self.uploaded_by_admin,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+
+class VideoRenditions(db.Model):
+    """Uma versão HLS (resolução/bitrate) de um vídeo enviado em uploads/videos"""
+    __tablename__ = "video_renditions"
+    __table_args__ = (db.UniqueConstraint("video_filename", "name", name="uq_video_rendition"),)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    video_filename = db.Column(db.String(255), nullable=False, index=True)
+    name = db.Column(db.String(20), nullable=False) # Ex.: 360p, 720p
+    height = db.Column(db.Integer, nullable=False)
+    bitrate_kbps = db.Column(db.Integer, nullable=False)
+    status = db.Column(SQLAlchemyEnum(RenditionStatus), nullable=False, default=RenditionStatus.pendente)
+    playlist_path = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'video_filename': self.video_filename,
+            'name': self.name,
+            'height': self.height,
+            'bitrate_kbps': self.bitrate_kbps,
+            'status': self.status.value if self.status else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,32 @@
+# src/process_file_storage.py
+# Exclusão dos arquivos de processo pelo blob store compartilhado com a API FastAPI
+# (advbs_shared): mesma tabela file_blobs e mesmas miniaturas. BLOB_STORE_DIR e
+# PREVIEW_DIR devem apontar para os mesmos diretórios nos dois apps.
+from sqlalchemy import or_, select
+
+from advbs_shared.blob_store import finish_release, release_references
+from advbs_shared.previews import discard_previews
+from src.models import ClientCases, ProcessFiles
+
+
+def client_files(client_id):
+    """(sha256, file_path) dos arquivos que o banco remove junto com o cliente"""
+    client_cases = select(ClientCases.id).where(ClientCases.user_id == client_id)
+    return ProcessFiles.query.with_entities(ProcessFiles.sha256, ProcessFiles.file_path).filter(
+        or_(ProcessFiles.user_id == client_id, ProcessFiles.case_id.in_(client_cases))
+    ).all()
+
+
+def release_files(session, files):
+    """Remover uma referência por arquivo, travando as linhas de file_blobs até o commit
+
+    Retorna os arquivos renomeados para finish_files() depois do commit/rollback.
+    """
+    return release_references(session, [(sha256, file_path) for sha256, file_path in files])
+
+
+def finish_files(trashed, committed=True):
+    """Apagar (após commit) ou restaurar (após rollback) os arquivos e as miniaturas"""
+    finish_release(trashed, committed)
+    if committed:
+        discard_previews(trashed)
@@ -2,6 +2,9 @@
 from flask import Blueprint, request, jsonify, current_app
 from src.models import db, Users, ClientCases, ProcessFiles, UserType, CaseStatus
 from src.auth import AuthService
+from src.user_cache import user_identity_cache
+from src.process_file_storage import client_files, finish_files, release_files
+from advbs_shared.db_pool import get_pool_status
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
@@ -30,7 +33,7 @@ def admin_required(f):
             if payload is None:
                 return jsonify({'error': 'Token is invalid or expired'}), 401
             
-            user = Users.query.get(payload['user_id'])
+            user = user_identity_cache.get(payload['user_id'])
             if not user or user.type != UserType.admin:
                 return jsonify({'error': 'Admin access required'}), 403
             
@@ -43,6 +46,12 @@ def admin_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+@admin_bp.route("/api/admin/metrics/db-pool", methods=["GET"])
+@admin_required
+def get_db_pool_metrics():
+    """Métricas do pool de conexões: conexões em uso, overflow, espera e churn"""
+    return jsonify({"data": get_pool_status(db.engine)}), 200
+
 @admin_bp.route("/api/admin/clients", methods=["GET"])
 @admin_required
 def get_clients():
@@ -148,19 +157,24 @@ def update_client(client_id):
 @admin_required
 def delete_client(client_id):
     """Excluir cliente"""
+    trashed = []
     try:
         client = Users.query.get_or_404(client_id)
         
         if client.type != UserType.cliente:
             return jsonify({"error": "Usuário não é um cliente"}), 400
         
+        # Arquivos removidos em cascata: soltar as referências aos blobs na mesma transação
+        trashed = release_files(db.session, client_files(client_id))
         db.session.delete(client)
         db.session.commit()
+        finish_files(trashed)
         
         return jsonify({"message": "Cliente excluído com sucesso"}), 200
         
     except Exception as e:
         db.session.rollback()
+        finish_files(trashed, committed=False)
         current_app.logger.error(f"Erro ao excluir cliente: {e}", exc_info=True)
         return jsonify({"error": "Erro interno do servidor"}), 500
 
@@ -279,20 +293,21 @@ def upload_process_file():
 @admin_required
 def delete_process_file(file_id):
     """Excluir arquivo de processo"""
+    trashed = []
     try:
         process_file = ProcessFiles.query.get_or_404(file_id)
         
-        # Excluir arquivo físico
-        if os.path.exists(process_file.file_path):
-            os.remove(process_file.file_path)
-        
+        # Blobs deduplicados: o arquivo físico só sai com a última referência, e depois do commit
+        trashed = release_files(db.session, [(process_file.sha256, process_file.file_path)])
         db.session.delete(process_file)
         db.session.commit()
+        finish_files(trashed)
         
         return jsonify({"message": "Arquivo excluído com sucesso"}), 200
 
     except Exception as e:
         db.session.rollback()
+        finish_files(trashed, committed=False)
         current_app.logger.error(f"Erro ao excluir arquivo: {e}", exc_info=True)
         return jsonify({"error": "Erro interno do servidor"}), 500
 
@@ -5,9 +5,10 @@ import os
 # Adiciona o diretório pai de 'src' (ou seja, 'poker_academy_api') ao sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Blueprint, jsonify, request, current_app, send_from_directory
+from flask import Blueprint, jsonify, request, current_app
 from src.models import db, Classes, UserProgress, ClassViews, Users, UserType
 from src.auth import token_required, admin_required
+from src.write_behind import write_behind
 from datetime import datetime
 from sqlalchemy import desc
 import os
@@ -205,11 +206,13 @@ def update_class_progress(current_user, class_id):
             db.session.add(user_progress)
 
         # Incrementar views se assistiu pela primeira vez
-        if watched and (not user_progress or not user_progress.watched):
-            class_obj.views += 1
-            print(f"Views incrementadas para aula {class_id}: {class_obj.views}")
+        count_view = watched and (not user_progress or not user_progress.watched)
 
         db.session.commit()
+        if count_view:
+            # Gravado em lote pelo write_behind, só depois do commit do progresso
+            write_behind.increment(Classes, 'views', class_id)
+            print(f"Views incrementadas para aula {class_id}")
         return jsonify(message="Progresso atualizado com sucesso"), 200
 
     except Exception as e:
@@ -299,14 +302,13 @@ def register_view(current_user, class_id):
         )
         db.session.add(new_view)
 
-        # Incrementar contador de views na aula
-        class_obj.views += 1
-
+        # Incrementar contador de views na aula (gravado em lote pelo write_behind)
         db.session.commit()
+        write_behind.increment(Classes, 'views', class_id)
 
         return jsonify({
             'message': 'Visualização registrada com sucesso',
-            'total_views': class_obj.views
+            'total_views': (class_obj.views or 0) + write_behind.pending_increment(Classes, 'views', class_id)
         }), 200
 
     except Exception as e:
@@ -410,91 +412,3 @@ def get_analytics_stats(current_user):
     except Exception as e:
         current_app.logger.error(f"Erro ao buscar estatísticas: {e}", exc_info=True)
         return jsonify(error="Erro ao buscar estatísticas"), 500
-
-# Rota para upload de vídeo (apenas admin)
-@class_bp.route("/api/classes/upload-video", methods=["POST"])
-@admin_required
-def upload_video(current_user):
-    print("Rota de upload chamada!")
-    try:
-        if 'video' not in request.files:
-            return jsonify(error="Nenhum arquivo enviado"), 400
-
-        file = request.files['video']
-        if file.filename == '':
-            return jsonify(error="Nenhum arquivo selecionado"), 400
-
-        if file and allowed_file(file.filename):
-            # Gerar nome seguro para o arquivo
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_")
-            filename = timestamp + filename
-
-            # Salvar arquivo
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            file.save(filepath)
-
-            return jsonify({
-                'message': 'Vídeo enviado com sucesso',
-                'filename': filename,
-                'path': filepath
-            }), 200
-        else:
-            return jsonify(error="Tipo de arquivo não permitido"), 400
-
-    except Exception as e:
-        current_app.logger.error(f"Erro no upload: {e}", exc_info=True)
-        return jsonify(error="Erro ao fazer upload do vídeo"), 500
-
-# Rota para servir vídeos (com autenticação via query parameter)
-@class_bp.route("/api/videos/<filename>")
-def serve_video(filename):
-    try:
-        # Verificar autenticação via query parameter ou header
-        token = request.args.get('token') or request.headers.get('Authorization')
-
-        if not token:
-            return jsonify(error="Token de acesso necessário"), 401
-
-        # Se o token vem do header, remover 'Bearer '
-        if token.startswith('Bearer '):
-            token = token[7:]
-
-        # Verificar se o token é válido (simplificado)
-        import jwt
-        try:
-            jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        except:
-            return jsonify(error="Token inválido"), 401
-
-        # Verificar se o arquivo existe
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        if not os.path.exists(file_path):
-            return jsonify(error="Vídeo não encontrado"), 404
-
-        response = send_from_directory(UPLOAD_FOLDER, filename)
-        response.headers['Access-Control-Allow-Origin'] = 'http://localhost:3000'
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        return response
-    except Exception as e:
-        current_app.logger.error(f"Erro ao servir vídeo: {e}", exc_info=True)
-        return jsonify(error="Erro ao carregar vídeo"), 500
-
-# Rota para servir vídeos com autenticação simplificada
-@class_bp.route("/api/videos-public/<filename>")
-@token_required
-def serve_video_public(current_user, filename):
-    try:
-        print(f"Usuário {current_user.name} acessando vídeo: {filename}")
-
-        # Verificar se o arquivo existe
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        if not os.path.exists(file_path):
-            return jsonify(error="Vídeo não encontrado"), 404
-
-        return send_from_directory(UPLOAD_FOLDER, filename)
-    except Exception as e:
-        print(f"Erro ao servir vídeo: {e}")
-        current_app.logger.error(f"Erro ao servir vídeo: {e}", exc_info=True)
-        return jsonify(error="Erro ao carregar vídeo"), 500
-
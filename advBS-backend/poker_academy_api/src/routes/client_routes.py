@@ -1,7 +1,11 @@
 # src/routes/client_routes.py
 from flask import Blueprint, request, jsonify, current_app, send_file
-from src.models import db, Users, ClientCases, ProcessFiles, UserType
+from src.models import db, Users, ClientCases, ProcessFiles, UserType, CaseStatus
 from src.auth import AuthService
+from src.user_cache import user_identity_cache
+from src.stats_cache import client_stats_cache
+from sqlalchemy import func, case
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 import os
 
@@ -26,7 +30,7 @@ def client_required(f):
             if payload is None:
                 return jsonify({'error': 'Token is invalid or expired'}), 401
             
-            user = Users.query.get(payload['user_id'])
+            user = user_identity_cache.get(payload['user_id'])
             if not user or user.type != UserType.cliente:
                 return jsonify({'error': 'Client access required'}), 403
             
@@ -44,7 +48,10 @@ def client_required(f):
 def get_profile():
     """Obter perfil do cliente"""
     try:
-        return jsonify(request.current_user.to_dict()), 200
+        user = Users.query.get(request.current_user.id)
+        if not user:
+            return jsonify({"error": "Usuário não encontrado"}), 404
+        return jsonify(user.to_dict()), 200
     except Exception as e:
         current_app.logger.error(f"Erro ao buscar perfil: {e}", exc_info=True)
         return jsonify({"error": "Erro interno do servidor"}), 500
@@ -55,7 +62,9 @@ def update_profile():
     """Atualizar perfil do cliente"""
     try:
         data = request.get_json()
-        user = request.current_user
+        user = Users.query.get(request.current_user.id)
+        if not user:
+            return jsonify({"error": "Usuário não encontrado"}), 404
         
         # Verificar se email já existe em outro usuário
         if data.get("email") and data["email"] != user.email:
@@ -98,16 +107,15 @@ def update_profile():
 def get_my_cases():
     """Obter casos do cliente"""
     try:
-        cases = ClientCases.query.filter_by(user_id=request.current_user.id).all()
-        
+        user_id = request.current_user.id
+
+        # Casos + arquivos em duas queries fixas (selectinload), independente do número de casos
+        cases = ClientCases.query.options(
+            selectinload(ClientCases.files)
+        ).filter_by(user_id=user_id).all()
+
         cases_data = []
         for case in cases:
-            # Buscar arquivos relacionados ao caso
-            case_files = ProcessFiles.query.filter_by(
-                user_id=request.current_user.id,
-                case_id=case.id
-            ).all()
-            
             case_data = {
                 'id': case.id,
                 'title': case.title,
@@ -115,7 +123,7 @@ def get_my_cases():
                 'status': case.status.value,
                 'created_at': case.created_at.isoformat(),
                 'updated_at': case.updated_at.isoformat(),
-                'files': [file.to_dict() for file in case_files]
+                'files': [file.to_dict() for file in case.files if file.user_id == user_id]
             }
             cases_data.append(case_data)
         
@@ -130,7 +138,10 @@ def get_my_cases():
 def get_my_files():
     """Obter arquivos do cliente"""
     try:
-        files = ProcessFiles.query.filter_by(user_id=request.current_user.id).all()
+        # Arquivos + casos em duas queries fixas (selectinload), independente do número de arquivos
+        files = ProcessFiles.query.options(
+            selectinload(ProcessFiles.case)
+        ).filter_by(user_id=request.current_user.id).all()
         
         files_data = []
         for file in files:
@@ -138,7 +149,7 @@ def get_my_files():
             
             # Adicionar informações do caso se existir
             if file.case_id:
-                case = ClientCases.query.get(file.case_id)
+                case = file.case
                 if case:
                     file_data['case_title'] = case.title
                     file_data['case_status'] = case.status.value
@@ -183,29 +194,32 @@ def get_stats():
     """Obter estatísticas do cliente"""
     try:
         user_id = request.current_user.id
-        
-        # Contar casos por status
-        total_cases = ClientCases.query.filter_by(user_id=user_id).count()
-        pending_cases = ClientCases.query.filter_by(user_id=user_id).filter(
-            ClientCases.status == 'pendente'
-        ).count()
-        active_cases = ClientCases.query.filter_by(user_id=user_id).filter(
-            ClientCases.status == 'em_andamento'
-        ).count()
-        completed_cases = ClientCases.query.filter_by(user_id=user_id).filter(
-            ClientCases.status == 'concluido'
-        ).count()
-        
+
+        # Cache por usuário, atualizado pelos eventos de escrita em casos e arquivos
+        stats = client_stats_cache.get(user_id)
+        if stats is not None:
+            return jsonify(stats), 200
+        version = client_stats_cache.version(user_id)
+
+        # Contar casos por status numa única query
+        counts = db.session.query(
+            func.count(ClientCases.id),
+            func.sum(case((ClientCases.status == CaseStatus.pendente, 1), else_=0)),
+            func.sum(case((ClientCases.status == CaseStatus.em_andamento, 1), else_=0)),
+            func.sum(case((ClientCases.status == CaseStatus.concluido, 1), else_=0))
+        ).filter(ClientCases.user_id == user_id).one()
+
         # Contar arquivos
         total_files = ProcessFiles.query.filter_by(user_id=user_id).count()
-        
+
         stats = {
-            'total_cases': total_cases,
-            'pending_cases': pending_cases,
-            'active_cases': active_cases,
-            'completed_cases': completed_cases,
+            'total_cases': counts[0] or 0,
+            'pending_cases': int(counts[1] or 0),
+            'active_cases': int(counts[2] or 0),
+            'completed_cases': int(counts[3] or 0),
             'total_files': total_files
         }
+        client_stats_cache.set(user_id, stats, version)
         
         return jsonify(stats), 200
         
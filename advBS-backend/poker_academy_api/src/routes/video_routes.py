@@ -0,0 +1,157 @@
+# src/routes/video_routes.py
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Blueprint, jsonify, request, current_app
+from src.models import db
+from src.auth import token_required, admin_required
+from src.video_streaming import send_video
+from src.hls_transcoder import transcode_queue, send_hls_asset, rendition_status
+from datetime import datetime
+from werkzeug.utils import secure_filename
+
+# Vídeos das aulas, separados de class_routes.py (que depende dos modelos de
+# aulas, ausentes neste app) para que upload, streaming e HLS fiquem registrados no app
+video_bp = Blueprint("video_bp", __name__)
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads', 'videos')
+ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'wmv', 'flv', 'webm', 'mkv'}
+
+# Criar pasta de upload se não existir
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+# Rota para upload de vídeo (apenas admin)
+@video_bp.route("/api/classes/upload-video", methods=["POST"])
+@admin_required
+def upload_video(current_user):
+    print("Rota de upload chamada!")
+    try:
+        if 'video' not in request.files:
+            return jsonify(error="Nenhum arquivo enviado"), 400
+
+        file = request.files['video']
+        if file.filename == '':
+            return jsonify(error="Nenhum arquivo selecionado"), 400
+
+        if file and allowed_file(file.filename):
+            # Gerar nome seguro para o arquivo
+            filename = secure_filename(file.filename)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_")
+            filename = timestamp + filename
+
+            # Salvar arquivo
+            filepath = os.path.join(UPLOAD_FOLDER, filename)
+            file.save(filepath)
+
+            # Gerar as versões HLS em segundo plano; o original continua disponível
+            hls_status = 'pendente'
+            try:
+                transcode_queue.enqueue(filename, filepath)
+            except Exception as e:
+                db.session.rollback()
+                hls_status = 'erro'
+                current_app.logger.error(f"Erro ao enfileirar HLS de {filename}: {e}", exc_info=True)
+
+            return jsonify({
+                'message': 'Vídeo enviado com sucesso',
+                'filename': filename,
+                'path': filepath,
+                'hls_status': hls_status
+            }), 200
+        else:
+            return jsonify(error="Tipo de arquivo não permitido"), 400
+
+    except Exception as e:
+        current_app.logger.error(f"Erro no upload: {e}", exc_info=True)
+        return jsonify(error="Erro ao fazer upload do vídeo"), 500
+
+def check_video_token():
+    """Token via query parameter ou header; retorna a resposta de erro ou None"""
+    token = request.args.get('token') or request.headers.get('Authorization')
+
+    if not token:
+        return jsonify(error="Token de acesso necessário"), 401
+
+    # Se o token vem do header, remover 'Bearer '
+    if token.startswith('Bearer '):
+        token = token[7:]
+
+    # Verificar se o token é válido (simplificado)
+    import jwt
+    try:
+        jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+    except:
+        return jsonify(error="Token inválido"), 401
+    return None
+
+# Rota para servir vídeos (com autenticação via query parameter)
+@video_bp.route("/api/videos/<filename>")
+def serve_video(filename):
+    try:
+        # Verificar autenticação via query parameter ou header
+        error = check_video_token()
+        if error:
+            return error
+
+        # Verificar se o arquivo existe
+        file_path = os.path.join(UPLOAD_FOLDER, secure_filename(filename))
+        if not os.path.isfile(file_path):
+            return jsonify(error="Vídeo não encontrado"), 404
+
+        response = send_video(file_path)
+        response.headers['Access-Control-Allow-Origin'] = 'http://localhost:3000'
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Erro ao servir vídeo: {e}", exc_info=True)
+        return jsonify(error="Erro ao carregar vídeo"), 500
+
+# Rota para servir vídeos com autenticação simplificada
+@video_bp.route("/api/videos-public/<filename>")
+@token_required
+def serve_video_public(current_user, filename):
+    try:
+        print(f"Usuário {current_user.name} acessando vídeo: {filename}")
+
+        # Verificar se o arquivo existe
+        file_path = os.path.join(UPLOAD_FOLDER, secure_filename(filename))
+        if not os.path.isfile(file_path):
+            return jsonify(error="Vídeo não encontrado"), 404
+
+        return send_video(file_path)
+    except Exception as e:
+        print(f"Erro ao servir vídeo: {e}")
+        current_app.logger.error(f"Erro ao servir vídeo: {e}", exc_info=True)
+        return jsonify(error="Erro ao carregar vídeo"), 500
+
+# Estado das versões HLS de um vídeo
+@video_bp.route("/api/videos/<filename>/renditions")
+@token_required
+def get_video_renditions(current_user, filename):
+    try:
+        return jsonify(rendition_status(secure_filename(filename))), 200
+    except Exception as e:
+        current_app.logger.error(f"Erro ao buscar renditions: {e}", exc_info=True)
+        return jsonify(error="Erro ao buscar renditions"), 500
+
+# Manifest (master.m3u8), playlists e segmentos HLS (autenticação igual a /api/videos)
+@video_bp.route("/api/videos/<filename>/hls/<asset>")
+def serve_video_hls(filename, asset):
+    try:
+        error = check_video_token()
+        if error:
+            return error
+
+        response = send_hls_asset(secure_filename(filename), asset, token=request.args.get('token'))
+        if not isinstance(response, tuple):
+            response.headers['Access-Control-Allow-Origin'] = 'http://localhost:3000'
+            response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Erro ao servir HLS: {e}", exc_info=True)
+        return jsonify(error="Erro ao carregar vídeo"), 500
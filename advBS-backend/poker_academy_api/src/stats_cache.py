@@ -0,0 +1,54 @@
+# src/stats_cache.py
+# Cache por cliente das estatísticas do dashboard (/api/client/stats): o cache é o
+# de advbs_shared (o mesmo da API FastAPI); aqui os eventos do ORM que o atualizam
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+from advbs_shared.stats_cache import client_stats_cache
+from src.models import ClientCases, ProcessFiles
+
+# ==================== EVENTOS DO ORM ====================
+# Os eventos de flush só são aplicados ao cache depois do commit; rollback descarta
+
+def _queue(target, method, *args):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('client_stats_events', []).append((method, args))
+
+@event.listens_for(ClientCases, "after_insert")
+def _case_inserted(mapper, connection, target):
+    _queue(target, 'case_created', target.user_id, target.status)
+
+@event.listens_for(ClientCases, "after_update")
+def _case_updated(mapper, connection, target):
+    user_history = get_history(target, 'user_id')
+    if user_history.has_changes():
+        for user_id in (user_history.deleted or []) + (user_history.added or []):
+            _queue(target, 'invalidate', user_id)
+        return
+    status_history = get_history(target, 'status')
+    if status_history.has_changes() and status_history.deleted:
+        _queue(target, 'case_status_changed', target.user_id, status_history.deleted[0], target.status)
+
+@event.listens_for(ClientCases, "after_delete")
+def _case_deleted(mapper, connection, target):
+    # Arquivos do caso são removidos em cascata pelo banco: recarregar na próxima leitura
+    _queue(target, 'invalidate', target.user_id)
+
+@event.listens_for(ProcessFiles, "after_insert")
+def _file_inserted(mapper, connection, target):
+    _queue(target, 'file_added', target.user_id)
+
+@event.listens_for(ProcessFiles, "after_delete")
+def _file_deleted(mapper, connection, target):
+    _queue(target, 'file_removed', target.user_id)
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    for method, args in session.info.pop('client_stats_events', []):
+        getattr(client_stats_cache, method)(*args)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop('client_stats_events', None)
@@ -0,0 +1,171 @@
+# src/system_counters.py
+# Contadores materializados (system_counters, lidos pela API FastAPI em /api/analytics/stats)
+# mantidos pelas escritas do ORM deste app
+import threading
+import time
+
+from sqlalchemy import BigInteger, Column, MetaData, String, Table, case, event, func, inspect, or_, select
+from sqlalchemy.orm.attributes import get_history
+
+from advbs_shared.stats_cache import STATUS_FIELDS
+from src.models import ClientCases, ProcessFiles, Services, Users, UserType
+
+# Tabela criada e populada pela API FastAPI (src/counters.py na raiz do projeto)
+system_counters = Table(
+    "system_counters", MetaData(),
+    Column("name", String(64), primary_key=True),
+    Column("value", BigInteger, nullable=False)
+)
+
+# Sem a tabela (API ainda não rodou) as escritas seguem sem contadores; verificar de novo após este intervalo
+TABLE_RECHECK_SECONDS = 60
+
+_lock = threading.Lock()
+_available = {}
+
+
+def _status_value(status):
+    return getattr(status, 'value', status)
+
+
+def _committed(target, attribute):
+    """Valor gravado no banco (antes de alterações pendentes no objeto)"""
+    history = get_history(target, attribute)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attribute)
+
+
+def table_available(connection, table="system_counters"):
+    """Tabela criada pela API FastAPI já existe? (cache por banco, revisto se ausente)"""
+    key = (str(connection.engine.url), table)
+    with _lock:
+        cached = _available.get(key)
+    if cached is not None and (cached[0] or time.monotonic() < cached[1]):
+        return cached[0]
+    available = inspect(connection).has_table(table)
+    with _lock:
+        _available[key] = (available, time.monotonic() + TABLE_RECHECK_SECONDS)
+    return available
+
+
+def apply_deltas(connection, deltas):
+    """Somar os deltas num único UPDATE, na transação da escrita (rollback desfaz os dois)"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas or not table_available(connection):
+        return
+    connection.execute(
+        system_counters.update()
+        .where(system_counters.c.name.in_(list(deltas)))
+        .values(value=system_counters.c.value + case(deltas, value=system_counters.c.name, else_=0))
+    )
+
+
+def case_deltas(status, sign=1):
+    deltas = {'total_cases': sign}
+    field = STATUS_FIELDS.get(_status_value(status))
+    if field:
+        deltas[field] = sign
+    return deltas
+
+
+def _add(deltas, more):
+    for name, delta in more.items():
+        deltas[name] = deltas.get(name, 0) + delta
+    return deltas
+
+
+def _cascade_deltas(connection, cases_filter, files_filter):
+    """Deltas de casos e arquivos que o banco vai remover em cascata (ON DELETE CASCADE)"""
+    deltas = {}
+    cases = ClientCases.__table__
+    for status, total in connection.execute(
+            select(cases.c.status, func.count()).where(cases_filter).group_by(cases.c.status)):
+        _add(deltas, {name: delta * total for name, delta in case_deltas(status, -1).items()})
+    files = connection.execute(select(func.count()).select_from(ProcessFiles.__table__).where(files_filter)).scalar()
+    if files:
+        deltas['total_files'] = deltas.get('total_files', 0) - files
+    return deltas
+
+
+# ==================== EVENTOS DO ORM ====================
+# Aplicados durante o flush, na mesma conexão/transação da escrita, como a API
+# FastAPI faz com apply_counter_deltas nas rotas
+
+
+# Carregar o valor antigo ao atribuir (objetos expirados após o commit não o
+# teriam no histórico e a transição de status/tipo se perderia)
+@event.listens_for(ClientCases.status, "set", active_history=True)
+@event.listens_for(Users.type, "set", active_history=True)
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+@event.listens_for(Users, "after_insert")
+def _user_inserted(mapper, connection, target):
+    if _status_value(target.type) == UserType.cliente.value:
+        apply_deltas(connection, {'total_clients': 1})
+
+
+@event.listens_for(Users, "after_update")
+def _user_updated(mapper, connection, target):
+    history = get_history(target, 'type')
+    if history.has_changes():
+        was_client = any(_status_value(t) == UserType.cliente.value for t in history.deleted or [])
+        is_client = _status_value(target.type) == UserType.cliente.value
+        apply_deltas(connection, {'total_clients': int(is_client) - int(was_client)})
+
+
+@event.listens_for(Users, "before_delete")
+def _user_deleting(mapper, connection, target):
+    cases, files = ClientCases.__table__, ProcessFiles.__table__
+    user_cases = select(cases.c.id).where(cases.c.user_id == target.id)
+    deltas = _cascade_deltas(connection, cases.c.user_id == target.id,
+                             or_(files.c.user_id == target.id, files.c.case_id.in_(user_cases)))
+    if _status_value(_committed(target, 'type')) == UserType.cliente.value:
+        deltas['total_clients'] = -1
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(ClientCases, "after_insert")
+def _case_inserted(mapper, connection, target):
+    apply_deltas(connection, case_deltas(target.status))
+
+
+@event.listens_for(ClientCases, "after_update")
+def _case_updated(mapper, connection, target):
+    history = get_history(target, 'status')
+    if history.has_changes() and history.deleted:
+        apply_deltas(connection, _add(case_deltas(history.deleted[0], -1), case_deltas(target.status)))
+
+
+@event.listens_for(ClientCases, "before_delete")
+def _case_deleting(mapper, connection, target):
+    # Arquivos ainda ligados ao caso saem em cascata; os removidos no mesmo flush já contaram
+    files = ProcessFiles.__table__
+    deltas = _cascade_deltas(connection, ClientCases.__table__.c.id == target.id, files.c.case_id == target.id)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(ProcessFiles, "after_insert")
+def _file_inserted(mapper, connection, target):
+    apply_deltas(connection, {'total_files': 1})
+
+
+@event.listens_for(ProcessFiles, "after_delete")
+def _file_deleted(mapper, connection, target):
+    apply_deltas(connection, {'total_files': -1})
+
+
+@event.listens_for(Services, "after_insert")
+def _service_inserted(mapper, connection, target):
+    apply_deltas(connection, {'total_services': 1})
+
+
+@event.listens_for(Services, "before_delete")
+def _service_deleting(mapper, connection, target):
+    cases, files = ClientCases.__table__, ProcessFiles.__table__
+    service_cases = select(cases.c.id).where(cases.c.service_id == target.id)
+    deltas = _cascade_deltas(connection, cases.c.service_id == target.id, files.c.case_id.in_(service_cases))
+    deltas['total_services'] = deltas.get('total_services', 0) - 1
+    apply_deltas(connection, deltas)
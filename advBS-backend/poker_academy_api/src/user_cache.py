@@ -0,0 +1,122 @@
+# src/user_cache.py
+# Cache por processo da identidade do usuário autenticado (decorators de autenticação)
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from advbs_shared.stats_cache import WriteVersions
+from src.models import db, Users
+
+# Tempo máximo de vida de uma entrada: limita a defasagem causada por escritas
+# feitas fora deste processo (outros workers, scripts, API FastAPI)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Registro leve e imutável: o que as rotas usam do usuário logado
+CachedUser = namedtuple("CachedUser", ["id", "type", "name", "email"])
+
+
+class UserIdentityCache:
+    """Usuários por id (LRU com TTL) para os decorators não consultarem o banco
+
+    get() devolve um CachedUser (id, type, name, email), não a entidade do
+    ORM: rotas que precisam do registro completo carregam Users pelo id.
+    Atualizações e exclusões de Users feitas pelo ORM (rotas de admin,
+    cliente e usuários) invalidam a entrada depois do commit; escritas fora
+    deste processo ficam visíveis em até USER_CACHE_TTL segundos.
+
+    Como em ClientStatsCache, cada invalidação registra uma versão para o
+    usuário e um carregamento que cruzou com uma escrita não é guardado; as
+    versões ficam limitadas a max_size usuários, como as entradas.
+    """
+
+    def __init__(self, ttl=USER_CACHE_TTL, max_size=USER_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = WriteVersions(max_size)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        """Usuário em cache ou carregado do banco; None se não existir"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            if self._entries.pop(user_id, None) is not None:
+                self._versions.discard(user_id)  # expirou: a versão sai junto
+            self.misses += 1
+            version = self._versions.token()
+
+        row = db.session.query(Users.id, Users.type, Users.name, Users.email).filter(Users.id == user_id).first()
+        if row is None:
+            return None
+        user = CachedUser(*row)
+        with self._lock:
+            if not self._versions.changed_since(user_id, version):
+                self._entries[user_id] = (time.monotonic() + self.ttl, user)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._versions.discard(evicted)
+                    self.evictions += 1
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions.bump(user_id)
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+user_identity_cache = UserIdentityCache()
+
+# ==================== EVENTOS DO ORM ====================
+# Invalidação aplicada só depois do commit; rollback descarta
+
+def _queue(target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('user_cache_events', set()).add(target.id)
+
+@event.listens_for(Users, "after_update")
+def _user_updated(mapper, connection, target):
+    _queue(target)
+
+@event.listens_for(Users, "after_delete")
+def _user_deleted(mapper, connection, target):
+    _queue(target)
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    for user_id in session.info.pop('user_cache_events', ()):
+        user_identity_cache.invalidate(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop('user_cache_events', None)
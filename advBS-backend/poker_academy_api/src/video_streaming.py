@@ -0,0 +1,101 @@
+# src/video_streaming.py
+# Streaming de vídeos com Range (206), ETag/304 e leitura em blocos
+import mimetypes
+import os
+
+from flask import current_app, request
+from werkzeug.wsgi import wrap_file
+
+# Tamanho de cada leitura do disco (e do bloco entregue ao servidor WSGI)
+VIDEO_CHUNK_SIZE = int(os.getenv("VIDEO_CHUNK_SIZE", str(1024 * 1024)))
+VIDEO_CACHE_MAX_AGE = int(os.getenv("VIDEO_CACHE_MAX_AGE", "3600"))
+
+
+def video_etag(stat):
+    """ETag a partir de tamanho+mtime (não lê o arquivo)"""
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def _read_range(path, start, end, chunk_size=VIDEO_CHUNK_SIZE):
+    """Gerador limitado a [start, end] (inclusivo)"""
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _range_body(path, start, end, size, chunk_size):
+    """Corpo da resposta para [start, end]
+
+    Intervalos que vão até o fim do arquivo (o caso comum do player: bytes=N-)
+    usam o wsgi.file_wrapper do servidor a partir de um arquivo já posicionado
+    em `start`; no gunicorn isso vira sendfile() sem cópia para o espaço do
+    usuário. Intervalos fechados usam um gerador limitado, porque o wrapper
+    genérico lê até o fim do arquivo.
+    """
+    if end == size - 1:
+        handle = open(path, "rb")
+        handle.seek(start)
+        return wrap_file(request.environ, handle, chunk_size)
+    return _read_range(path, start, end, chunk_size)
+
+
+def _if_range_matches(etag, stat):
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return int(stat.st_mtime) == int(if_range.date.timestamp())
+    return True
+
+
+def send_video(path, mimetype=None, chunk_size=VIDEO_CHUNK_SIZE, max_age=VIDEO_CACHE_MAX_AGE):
+    """Resposta Flask para o vídeo em `path` atendendo Range e GET condicional
+
+    Um único intervalo vira 206 com Content-Range; pedidos com vários
+    intervalos recebem o arquivo inteiro (200), o que a RFC 9110 permite e os
+    players não usam. Intervalo fora do arquivo: 416.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = video_etag(stat)
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    response = current_app.response_class(mimetype=mimetype, direct_passthrough=True)
+    response.set_etag(etag)
+    response.last_modified = stat.st_mtime
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["Cache-Control"] = f"private, max-age={max_age}"
+
+    # If-None-Match tem precedência sobre If-Modified-Since
+    if request.if_none_match:
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            return response
+    elif request.if_modified_since and int(stat.st_mtime) <= request.if_modified_since.timestamp():
+        response.status_code = 304
+        return response
+
+    byte_range = request.range if _if_range_matches(etag, stat) else None
+    if byte_range is not None and byte_range.units == "bytes" and len(byte_range.ranges) == 1:
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            response.status_code = 416
+            response.headers["Content-Range"] = f"bytes */{size}"
+            response.content_length = 0
+            return response
+        start, stop = bounds
+        response.status_code = 206
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        response.content_length = stop - start
+        response.response = _range_body(path, start, stop - 1, size, chunk_size)
+        return response
+
+    response.content_length = size
+    response.response = _range_body(path, 0, size - 1, size, chunk_size) if size else []
+    return response
@@ -0,0 +1,159 @@
+# src/write_behind.py
+# Escritas de controle (last_login, contadores de visualização) agrupadas em memória e gravadas em lote
+import atexit
+import logging
+import os
+import signal
+import sys
+import threading
+
+from flask import current_app
+from sqlalchemy import case
+
+from src.models import db
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "5"))
+# Linhas por UPDATE ... CASE (limita o tamanho do statement)
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+
+
+class WriteBehindBuffer:
+    """Valores por linha acumulados em memória e gravados a cada intervalo
+
+    set_value guarda o último valor de uma coluna (last_login) e increment
+    soma deltas (views); várias escritas na mesma linha viram uma só. flush()
+    grava cada coluna com um UPDATE ... SET col = CASE id WHEN ... END numa
+    transação própria, fora da sessão da requisição.
+
+    Semântica em falhas: se o flush falhar, os valores voltam para o buffer
+    (sem sobrescrever valores mais novos e somando aos incrementos novos) e
+    vão na próxima rodada. Na saída normal do processo (atexit: fim do
+    gunicorn/Flask, SIGTERM tratado) o buffer é gravado; numa queda abrupta
+    (kill -9, falta de energia) perdem-se no máximo os últimos
+    WRITE_BEHIND_INTERVAL segundos dessas escritas, nunca dados de negócio.
+    """
+
+    def __init__(self, interval=WRITE_BEHIND_INTERVAL, batch_size=WRITE_BEHIND_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._values = {}
+        self._increments = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+
+    def init_app(self, app):
+        """Guardar o app, iniciar a thread de flush e gravar o buffer na saída
+
+        Com o SIGTERM sem tratamento (app.run, python src/main.py), instala um
+        handler que sai via SystemExit para o atexit rodar; o gunicorn já
+        trata o sinal nos workers e sai do mesmo jeito.
+        """
+        self.app = app
+        self._start()
+        if threading.current_thread() is threading.main_thread() \
+                and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _ensure_started(self):
+        # Sem init_app (scripts, testes): usa o app da requisição atual
+        if self.app is None:
+            self.app = current_app._get_current_object()
+        if self._thread is None:
+            self._start()
+
+    def set_value(self, model, column, row_id, value):
+        self._ensure_started()
+        with self._lock:
+            self._values.setdefault((model.__table__, column), {})[row_id] = value
+
+    def increment(self, model, column, row_id, delta=1):
+        self._ensure_started()
+        with self._lock:
+            pending = self._increments.setdefault((model.__table__, column), {})
+            pending[row_id] = pending.get(row_id, 0) + delta
+
+    def pending_increment(self, model, column, row_id):
+        """Incremento ainda não gravado (para somar ao valor lido do banco)"""
+        with self._lock:
+            return self._increments.get((model.__table__, column), {}).get(row_id, 0)
+
+    def pending_count(self):
+        with self._lock:
+            return sum(len(rows) for rows in self._values.values()) + \
+                sum(len(rows) for rows in self._increments.values())
+
+    def _statements(self, values, increments):
+        for (table, column), rows in values.items():
+            items = list(rows.items())
+            for start in range(0, len(items), self.batch_size):
+                chunk = dict(items[start:start + self.batch_size])
+                yield table.update().where(table.c.id.in_(list(chunk))).values(
+                    {column: case(chunk, value=table.c.id, else_=table.c[column])})
+        for (table, column), rows in increments.items():
+            items = [(row_id, delta) for row_id, delta in rows.items() if delta]
+            for start in range(0, len(items), self.batch_size):
+                chunk = dict(items[start:start + self.batch_size])
+                yield table.update().where(table.c.id.in_(list(chunk))).values(
+                    {column: db.func.coalesce(table.c[column], 0) + case(chunk, value=table.c.id, else_=0)})
+
+    def _restore(self, values, increments):
+        """Devolver ao buffer o que não foi gravado, sem perder escritas feitas no meio"""
+        with self._lock:
+            for key, rows in values.items():
+                pending = self._values.setdefault(key, {})
+                for row_id, value in rows.items():
+                    pending.setdefault(row_id, value)
+            for key, rows in increments.items():
+                pending = self._increments.setdefault(key, {})
+                for row_id, delta in rows.items():
+                    pending[row_id] = pending.get(row_id, 0) + delta
+
+    def flush(self):
+        """Gravar tudo o que está no buffer numa transação; retorna linhas gravadas"""
+        with self._flush_lock:
+            with self._lock:
+                values, self._values = self._values, {}
+                increments, self._increments = self._increments, {}
+            rows = sum(len(r) for r in values.values()) + sum(len(r) for r in increments.values())
+            if not rows:
+                return 0
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as connection:
+                        for statement in self._statements(values, increments):
+                            connection.execute(statement)
+            except Exception as e:
+                self._restore(values, increments)
+                self.failures += 1
+                logger.error(f"❌ Erro ao gravar escritas adiadas ({rows} linhas, nova tentativa depois): {e}")
+                return 0
+            self.flushes += 1
+            self.rows_written += rows
+            return rows
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        """Parar a thread e gravar o que restou"""
+        self._stop.set()
+        self.flush()
+
+
+write_behind = WriteBehindBuffer()
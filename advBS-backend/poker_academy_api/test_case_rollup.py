@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do rollup diário de casos mantido pelo ORM (src/case_rollup.py)
+
+Casos criados, com status ou serviço alterado e excluídos pelo app Flask
+(inclusive concluído, reaberto e concluído de novo, e removidos em cascata
+com o cliente ou o serviço) devem deixar case_daily_rollup igual ao que
+rebuild_rollup calcula a partir de client_cases.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy import event, text
+
+from src.models import db, Users, Services, ClientCases, UserType, ServiceCategory, CaseStatus
+import src.case_rollup  # registra os eventos do ORM
+from advbs_shared.case_rollup import CREATE_TABLE_SQL, rebuild_rollup
+
+
+def create_app(with_table=True):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "rollup.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        # ON DELETE CASCADE como no MySQL
+        event.listen(db.engine, "connect", lambda dbapi_connection, record:
+                     dbapi_connection.execute("PRAGMA foreign_keys=ON"))
+        db.create_all()
+        if with_table:
+            db.session.execute(text(CREATE_TABLE_SQL))
+        db.session.add_all([
+            Users(id=2, name="Cliente", email="cliente@exemplo.com", password_hash="x", type=UserType.cliente),
+            Services(id=1, name="Recurso", category=ServiceCategory.multas),
+            Services(id=2, name="Renovação", category=ServiceCategory.cnh)
+        ])
+        db.session.commit()
+    return app
+
+
+def rollup_rows():
+    return {(str(row.day), row.category): (row.opened, row.concluded, row.resolution_seconds)
+            for row in db.session.execute(text("SELECT * FROM case_daily_rollup"))
+            if (row.opened, row.concluded, row.resolution_seconds) != (0, 0, 0)}
+
+
+def assert_matches_rebuild():
+    live = rollup_rows()
+    rebuild_rollup(db.session)
+    rebuilt = rollup_rows()
+    assert set(live) == set(rebuilt), (live, rebuilt)
+    for key, (opened, concluded, seconds) in rebuilt.items():
+        # Segundos: o updated_at do ORM e o relógio do evento podem diferir na fração
+        assert live[key][:2] == (opened, concluded) and abs(live[key][2] - seconds) <= 1, (key, live, rebuilt)
+
+
+def test_case_writes_keep_rollup_consistent():
+    app = create_app()
+    with app.app_context():
+        cases = [ClientCases(user_id=2, service_id=1, title="Multa", status=CaseStatus.pendente),
+                 ClientCases(user_id=2, service_id=2, title="CNH", status=CaseStatus.concluido)]
+        db.session.add_all(cases)
+        db.session.commit()
+        assert sum(opened for opened, _, _ in rollup_rows().values()) == 2
+        assert_matches_rebuild()
+
+        for status in (CaseStatus.concluido, CaseStatus.em_andamento, CaseStatus.concluido):
+            cases[0].status = status
+            db.session.commit()
+            assert_matches_rebuild()
+
+        # Reabrir o caso que nasceu concluído desfaz a conclusão contada na criação
+        cases[1].status = CaseStatus.arquivado
+        db.session.commit()
+        assert_matches_rebuild()
+        assert sum(concluded for _, concluded, _ in rollup_rows().values()) == 1
+
+
+def test_recategorised_and_deleted_cases_keep_rollup_consistent():
+    app = create_app()
+    with app.app_context():
+        db.session.add_all([Users(id=3, name="Outro", email="outro@exemplo.com", password_hash="x",
+                                  type=UserType.cliente),
+                            Services(id=3, name="Acidente", category=ServiceCategory.acidentes)])
+        db.session.commit()
+        cases = [ClientCases(user_id=2, service_id=1, title="Multa", status=CaseStatus.concluido),
+                 ClientCases(user_id=2, service_id=1, title="Recurso", status=CaseStatus.pendente),
+                 ClientCases(user_id=2, service_id=3, title="Acidente", status=CaseStatus.pendente),
+                 ClientCases(user_id=3, service_id=2, title="CNH", status=CaseStatus.concluido)]
+        db.session.add_all(cases)
+        db.session.commit()
+
+        # Troca de serviço; e troca de serviço com conclusão no mesmo flush
+        cases[0].service_id = 2
+        db.session.commit()
+        assert_matches_rebuild()
+        cases[1].service_id = 2
+        cases[1].status = CaseStatus.concluido
+        db.session.commit()
+        assert_matches_rebuild()
+
+        db.session.delete(cases[1])
+        db.session.commit()
+        assert_matches_rebuild()
+
+        # Casos removidos em cascata pelo banco
+        db.session.delete(Services.query.get(3))
+        db.session.commit()
+        assert_matches_rebuild()
+        db.session.delete(Users.query.get(3))
+        db.session.commit()
+        assert_matches_rebuild()
+        assert sum(opened for opened, _, _ in rollup_rows().values()) == 1
+
+
+def test_missing_table_does_not_break_writes():
+    app = create_app(with_table=False)
+    with app.app_context():
+        case = ClientCases(user_id=2, service_id=1, title="Multa", status=CaseStatus.pendente)
+        db.session.add(case)
+        db.session.commit()
+        case.status = CaseStatus.concluido
+        db.session.commit()
+        assert ClientCases.query.one().status == CaseStatus.concluido
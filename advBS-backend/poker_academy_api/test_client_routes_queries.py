@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regressão: /api/client/cases e /api/client/files com número fixo de queries
+
+Sobe o blueprint de cliente num app Flask com SQLite em memória e verifica que
+a quantidade de queries por requisição não cresce com o número de casos/arquivos.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy import event
+
+from src.models import db, Users, Services, ClientCases, ProcessFiles, UserType, ServiceCategory, CaseStatus
+from src.auth import AuthService
+from src.routes.client_routes import client_bp
+from src.user_cache import user_identity_cache
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(client_bp)
+    return app
+
+
+def seed(total_cases, files_per_case):
+    admin = Users(name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin)
+    client = Users(name="Cliente", email="cliente@exemplo.com", password_hash="x", type=UserType.cliente)
+    service = Services(name="Recurso de multa", category=ServiceCategory.multas)
+    db.session.add_all([admin, client, service])
+    db.session.flush()
+
+    for i in range(total_cases):
+        case = ClientCases(user_id=client.id, service_id=service.id, title=f"Caso {i}", status=CaseStatus.pendente)
+        db.session.add(case)
+        db.session.flush()
+        for j in range(files_per_case):
+            db.session.add(ProcessFiles(
+                user_id=client.id, case_id=case.id, filename=f"{i}_{j}.pdf",
+                original_filename=f"doc_{i}_{j}.pdf", file_path=f"uploads/{i}_{j}.pdf",
+                uploaded_by_admin=admin.id
+            ))
+    db.session.commit()
+    return client.id
+
+
+def count_queries(total_cases, files_per_case):
+    """Retorna {rota: (queries executadas, itens retornados)}"""
+    app = create_app()
+    user_identity_cache.clear()  # banco novo: ids repetidos de outra rodada
+    results = {}
+    with app.app_context():
+        db.create_all()
+        client_id = seed(total_cases, files_per_case)
+        token = AuthService.generate_token(client_id, 'cliente')
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, sql, params, context, executemany: statements.append(sql))
+
+        http = app.test_client()
+        for route in ("/api/client/cases", "/api/client/files"):
+            db.session.remove()  # sem identity map entre as requisições
+            statements.clear()
+            response = http.get(route, headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 200, response.get_data(as_text=True)
+            results[route] = (len(statements), len(response.get_json()))
+        db.drop_all()
+    return results
+
+
+def test_client_routes_query_count_is_constant():
+    small = count_queries(total_cases=1, files_per_case=1)
+    large = count_queries(total_cases=25, files_per_case=4)
+
+    assert large["/api/client/cases"][1] == 25
+    assert large["/api/client/files"][1] == 100
+    for route in small:
+        assert small[route][0] == large[route][0], (route, small[route], large[route])
+
+
+if __name__ == "__main__":
+    small = count_queries(total_cases=1, files_per_case=1)
+    large = count_queries(total_cases=25, files_per_case=4)
+    ok = True
+    for route in small:
+        print(f"🔍 {route}: {small[route][0]} queries ({small[route][1]} itens) vs "
+              f"{large[route][0]} queries ({large[route][1]} itens)")
+        ok = ok and small[route][0] == large[route][0]
+    print("✅ Número de queries constante" if ok else "❌ Número de queries cresce com os dados")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do pool compartilhado (advbs_shared.db_pool) no app Flask
+
+O engine do Flask-SQLAlchemy criado com get_pool_options() deve usar o
+InstrumentedQueuePool (espera e churn contados) e /api/admin/metrics/db-pool
+deve mostrar o estado desse pool.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from advbs_shared.db_pool import InstrumentedQueuePool, get_pool_options, pool_metrics
+from src.auth import AuthService
+from src.models import db, Users, UserType
+from src.routes.admin_routes import admin_bp
+from src.user_cache import user_identity_cache
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "pool.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**get_pool_options(), "connect_args": {"check_same_thread": False}}
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(admin_bp)
+    return app
+
+
+def test_flask_engine_reports_pool_metrics():
+    app = create_app()
+    pool_metrics.reset()
+    user_identity_cache.clear()
+    with app.app_context():
+        assert isinstance(db.engine.pool, InstrumentedQueuePool)
+        db.create_all()
+        admin = Users(name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin)
+        db.session.add(admin)
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {AuthService.generate_token(admin.id, 'admin')}"}
+
+        data = app.test_client().get("/api/admin/metrics/db-pool", headers=headers).get_json()["data"]
+        assert data["wait_time"]["count"] >= 1
+        assert data["churn"]["connects"] >= 1 and data["churn"]["checkouts"] >= 1
+        assert data["capacity"] == data["config"]["pool_size"] + data["config"]["max_overflow"]
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    test_flask_engine_reports_pool_metrics()
+    print("✅ test_flask_engine_reports_pool_metrics")
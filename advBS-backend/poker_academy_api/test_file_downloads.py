@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regressão: downloads de arquivos de processo com Range, ETag e GET condicional
+
+Sobe o app FastAPI com a sessão trocada por um SQLite em memória e verifica,
+nas rotas de admin e de cliente: ETag forte a partir do sha256 gravado, 304
+com If-None-Match/If-Modified-Since, 206 para um ou vários intervalos, 416
+fora do arquivo e If-Range com ETag antiga devolvendo o arquivo inteiro.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+from email.utils import formatdate
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import fastapi_main
+from src.file_responses import parse_range
+
+CONTENT = bytes(range(256)) * 400  # 100 KiB
+
+
+def create_client():
+    path = os.path.join(tempfile.mkdtemp(), "auto_de_infracao.pdf")
+    with open(path, "wb") as handle:
+        handle.write(CONTENT)
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE process_files (id INTEGER PRIMARY KEY, user_id INTEGER, filename TEXT, "
+                          "original_filename TEXT, file_path TEXT, sha256 TEXT)"))
+        conn.execute(text("INSERT INTO process_files VALUES (1, 9, 'a.pdf', 'Auto de infração.pdf', :path, :sha)"),
+                     {"path": path, "sha": sha256})
+        conn.execute(text("INSERT INTO process_files VALUES (2, 9, 'b.pdf', 'Antigo.pdf', :path, NULL)"),
+                     {"path": path})
+    Session = sessionmaker(bind=engine)
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    fastapi_main.app.dependency_overrides[fastapi_main.get_db] = override_db
+    fastapi_main.app.dependency_overrides[fastapi_main.verify_token] = lambda: {"user_id": 1, "type": "admin"}
+    return TestClient(fastapi_main.app), sha256, path
+
+
+def test_validators_and_conditional_get():
+    client, sha256, path = create_client()
+    for url in ("/api/admin/process-files/1/download", "/api/client/files/1/download"):
+        full = client.get(url)
+        assert full.status_code == 200 and full.content == CONTENT
+        assert full.headers["etag"] == f'"{sha256}"'
+        assert full.headers["accept-ranges"] == "bytes"
+        assert full.headers["cache-control"].startswith("private")
+
+        assert client.get(url, headers={"If-None-Match": f'"{sha256}"'}).status_code == 304
+        assert client.get(url, headers={"If-None-Match": '"outro"'}).status_code == 200
+        later = formatdate(os.stat(path).st_mtime + 60, usegmt=True)
+        assert client.get(url, headers={"If-Modified-Since": later}).status_code == 304
+
+    # Sem sha256 gravado: ETag fraca, ainda válida para 304
+    legacy = client.get("/api/admin/process-files/2/download")
+    assert legacy.headers["etag"].startswith('W/"')
+    assert client.get("/api/admin/process-files/2/download",
+                      headers={"If-None-Match": legacy.headers["etag"]}).status_code == 304
+    fastapi_main.app.dependency_overrides.clear()
+
+
+def test_byte_ranges():
+    client, sha256, _ = create_client()
+    url = "/api/admin/process-files/1/download"
+    size = len(CONTENT)
+
+    part = client.get(url, headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.content == CONTENT[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{size}"
+
+    tail = client.get(url, headers={"Range": "bytes=-10"})
+    assert tail.status_code == 206 and tail.content == CONTENT[-10:]
+
+    resumed = client.get(url, headers={"Range": f"bytes={size - 5}-", "If-Range": f'"{sha256}"'})
+    assert resumed.status_code == 206 and resumed.content == CONTENT[-5:]
+
+    changed = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"versao-antiga"'})
+    assert changed.status_code == 200 and changed.content == CONTENT
+
+    outside = client.get(url, headers={"Range": f"bytes={size}-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == f"bytes */{size}"
+
+    multi = client.get(url, headers={"Range": "bytes=0-4,10-14"})
+    assert multi.status_code == 206
+    assert multi.headers["content-type"].startswith("multipart/byteranges")
+    assert int(multi.headers["content-length"]) == len(multi.content)
+    assert CONTENT[0:5] in multi.content and CONTENT[10:15] in multi.content
+    fastapi_main.app.dependency_overrides.clear()
+
+
+def test_parse_range_edges():
+    assert parse_range("bytes=-10", 100) == [(90, 99)]
+    assert parse_range("bytes=-500", 100) == [(0, 99)]
+    assert parse_range("bytes=100-", 100) == []
+    # Arquivo vazio: nenhum intervalo é satisfatível (antes o sufixo virava (0, -1))
+    assert parse_range("bytes=-10", 0) == []
+    assert parse_range("bytes=0-", 0) == []
+    assert parse_range("items=0-1", 100) is None
+
+
+if __name__ == "__main__":
+    test_validators_and_conditional_get()
+    print("✅ ETag, Cache-Control e 304 (If-None-Match / If-Modified-Since)")
+    test_byte_ranges()
+    print("✅ Range: 206 simples, sufixo, If-Range, 416 e multipart/byteranges")
+    test_parse_range_edges()
+    print("✅ Range: limites do parser, inclusive arquivo vazio")
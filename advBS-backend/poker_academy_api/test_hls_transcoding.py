@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da fila de transcodificação HLS (src/hls_transcoder.py)
+
+O ffmpeg/ffprobe são substituídos por scripts que gravam playlist e segmento
+falsos, para exercitar fila, estados em video_renditions, master.m3u8 e a
+entrega dos arquivos sem depender de um encoder instalado; inclusive pelas
+rotas reais do blueprint de vídeos (upload, renditions e /hls).
+"""
+import io
+import sys
+import os
+import stat
+import subprocess
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from advbs_shared.db_pool import get_pool_options
+from src.models import db, Users, UserType, VideoRenditions, RenditionStatus
+from src import hls_transcoder
+from src.auth import AuthService
+from src.routes import video_routes
+from src.routes.video_routes import video_bp
+from src.user_cache import user_identity_cache
+from src.hls_transcoder import TranscodeQueue, build_ffmpeg_command, select_renditions, send_hls_asset
+
+FAKE_FFMPEG = """#!{python}
+import io
+import sys
+args = sys.argv[1:]
+if "{fail}" and any("{fail}" in arg for arg in args):
+    sys.stderr.write("encoder falhou")
+    sys.exit(1)
+segment = args[args.index("-hls_segment_filename") + 1] % 0
+open(segment, "wb").write(b"TS" * 100)
+with open(args[-1], "w") as handle:
+    handle.write("#EXTM3U\\n#EXTINF:6.0,\\n" + segment.rsplit("/", 1)[-1] + "\\n#EXT-X-ENDLIST\\n")
+"""
+
+FAKE_FFPROBE = """#!{python}
+print("720")
+"""
+
+
+def _script(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "w") as handle:
+        handle.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def create_app(fail=""):
+    work_dir = tempfile.mkdtemp()
+    hls_transcoder.FFMPEG_BIN = _script(work_dir, "ffmpeg", FAKE_FFMPEG.format(python=sys.executable, fail=fail))
+    hls_transcoder.FFPROBE_BIN = _script(work_dir, "ffprobe", FAKE_FFPROBE.format(python=sys.executable))
+    hls_transcoder.HLS_FOLDER = os.path.join(work_dir, "hls")
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(work_dir, 'test.db')}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**get_pool_options(), "connect_args": {"check_same_thread": False}}
+    db.init_app(app)
+
+    @app.route("/hls/<filename>/<asset>")
+    def hls(filename, asset):
+        return send_hls_asset(filename, asset, token="abc")
+
+    with app.app_context():
+        db.create_all()
+    source = os.path.join(work_dir, "aula.mp4")
+    open(source, "wb").write(b"video")
+    return app, source
+
+
+def transcode(app, source):
+    transcode_queue = TranscodeQueue(workers=1)
+    with app.app_context():
+        transcode_queue.enqueue("aula.mp4", source)
+    transcode_queue.join()
+    with app.app_context():
+        return {r.name: (r.status, r.error) for r in VideoRenditions.query.all()}
+
+
+def test_command_and_selection():
+    command = build_ffmpeg_command("in.mp4", "/out", ("720p", 720, 2800, 128))
+    assert command[-1] == "/out/720p.m3u8"
+    assert "scale=-2:720" in command and "2800k" in command
+    assert [r[0] for r in select_renditions(720)] == ["360p", "480p", "720p"]
+    assert [r[0] for r in select_renditions(240)] == ["360p"]
+    assert len(select_renditions(None)) == len(hls_transcoder.RENDITIONS)
+
+
+def test_transcode_renditions_and_master():
+    app, source = create_app()
+    states = transcode(app, source)
+    # Original em 720p: 1080p é descartada (sem upscale)
+    assert states == {name: (RenditionStatus.pronto, None) for name in ("360p", "480p", "720p")}, states
+
+    client = app.test_client()
+    master = client.get("/hls/aula.mp4/master.m3u8")
+    assert master.status_code == 200
+    assert master.headers["Content-Type"] == "application/vnd.apple.mpegurl"
+    body = master.get_data(as_text=True)
+    assert "360p.m3u8?token=abc" in body and "720p.m3u8?token=abc" in body
+    assert "1080p" not in body
+
+    playlist = client.get("/hls/aula.mp4/360p.m3u8").get_data(as_text=True)
+    assert "360p_00000.ts?token=abc" in playlist
+    segment = client.get("/hls/aula.mp4/360p_00000.ts", headers={"Range": "bytes=0-1"})
+    assert segment.status_code == 206 and segment.data == b"TS"
+    assert segment.headers["Content-Type"] == "video/mp2t"
+
+    assert client.get("/hls/aula.mp4/..%2Fsecret.ts").status_code in (400, 404)
+    assert client.get("/hls/aula.mp4/480p_99999.ts").status_code == 404
+
+
+def test_failed_rendition_keeps_others():
+    app, source = create_app(fail="480p")
+    states = transcode(app, source)
+    assert states["360p"] == (RenditionStatus.pronto, None)
+    assert states["480p"][0] == RenditionStatus.erro and "encoder falhou" in states["480p"][1]
+    assert states["720p"] == (RenditionStatus.pronto, None)
+
+    body = app.test_client().get("/hls/aula.mp4/master.m3u8").get_data(as_text=True)
+    assert "480p" not in body and "720p" in body
+
+
+def test_ffmpeg_runs_without_pooled_connection(monkeypatch):
+    app, source = create_app()
+    checked_out = []
+    run = subprocess.run
+
+    def watched_run(command, **kwargs):
+        if command[0] == hls_transcoder.FFMPEG_BIN:
+            with app.app_context():
+                checked_out.append(db.engine.pool.checkedout())
+        return run(command, **kwargs)
+
+    monkeypatch.setattr(hls_transcoder.subprocess, "run", watched_run)
+    states = transcode(app, source)
+    assert set(states.values()) == {(RenditionStatus.pronto, None)}
+    assert checked_out == [0, 0, 0]
+
+
+def test_resume_pending():
+    app, source = create_app()
+    transcode_queue = TranscodeQueue(workers=1)
+    with app.app_context():
+        db.session.add(VideoRenditions(video_filename="aula.mp4", name="360p", height=360,
+                                       bitrate_kbps=800, status=RenditionStatus.pendente))
+        db.session.commit()
+    hls_transcoder.VIDEO_FOLDER = os.path.dirname(source)
+    transcode_queue.app = app
+    transcode_queue.resume_pending()
+    transcode_queue.join()
+    with app.app_context():
+        assert VideoRenditions.query.one().status == RenditionStatus.pronto
+
+
+def test_video_routes_upload_and_serve_hls():
+    app, _ = create_app()
+    app.config["SECRET_KEY"] = "test-secret"
+    app.register_blueprint(video_bp)
+    user_identity_cache.clear()
+    original = video_routes.UPLOAD_FOLDER, video_routes.transcode_queue
+    video_routes.UPLOAD_FOLDER = tempfile.mkdtemp()
+    video_routes.transcode_queue = TranscodeQueue(workers=1)
+    try:
+        with app.app_context():
+            db.session.add_all([
+                Users(id=1, name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin),
+                Users(id=2, name="Aluno", email="aluno@exemplo.com", password_hash="x", type=UserType.cliente)
+            ])
+            db.session.commit()
+            admin_token = AuthService.generate_token(1, 'admin')
+            token = AuthService.generate_token(2, 'cliente')
+        client = app.test_client()
+
+        def upload(bearer):
+            return client.post("/api/classes/upload-video", headers={"Authorization": f"Bearer {bearer}"},
+                               data={"video": (io.BytesIO(b"video"), "aula.mp4")},
+                               content_type="multipart/form-data")
+
+        assert upload(token).status_code == 403
+        response = upload(admin_token)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert response.get_json()["hls_status"] == "pendente"
+        filename = response.get_json()["filename"]
+        video_routes.transcode_queue.join()
+
+        renditions = client.get(f"/api/videos/{filename}/renditions", headers={"Authorization": f"Bearer {token}"})
+        assert renditions.status_code == 200
+
+        assert client.get(f"/api/videos/{filename}/hls/master.m3u8").status_code == 401
+        master = client.get(f"/api/videos/{filename}/hls/master.m3u8?token={token}")
+        assert master.status_code == 200
+        assert f"720p.m3u8?token={token}" in master.get_data(as_text=True)
+        segment = client.get(f"/api/videos/{filename}/hls/360p_00000.ts?token={token}")
+        assert segment.status_code == 200 and segment.data == b"TS" * 100
+    finally:
+        video_routes.UPLOAD_FOLDER, video_routes.transcode_queue = original
+
+
+if __name__ == "__main__":
+    tests = [test_command_and_selection, test_transcode_renditions_and_master,
+             test_failed_rendition_keeps_others, test_resume_pending, test_video_routes_upload_and_serve_hls]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
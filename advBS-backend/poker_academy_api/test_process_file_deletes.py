@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes das exclusões de arquivos de processo pelo blob store (src/process_file_storage.py)
+
+As rotas de exclusão de arquivo e de cliente devem decrementar file_blobs.ref_count
+e só apagar o arquivo físico quando a última referência sai, depois do commit.
+"""
+import sys
+import os
+import hashlib
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy import event, text
+
+from src.models import db, Users, Services, ClientCases, ProcessFiles, UserType, ServiceCategory, CaseStatus
+from src.auth import AuthService
+from src.routes.admin_routes import admin_bp
+from src.user_cache import user_identity_cache
+import src.process_file_storage  # coloca o src/ da raiz (API FastAPI) no sys.path
+from advbs_shared import blob_store
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "blobs.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(admin_bp)
+    user_identity_cache.clear()
+    with app.app_context():
+        event.listen(db.engine, "connect", lambda dbapi_connection, record:
+                     dbapi_connection.execute("PRAGMA foreign_keys=ON"))
+        db.create_all()
+        blob_store.ensure_blob_table(db.session)
+        db.session.add_all([
+            Users(id=1, name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin),
+            Users(id=2, name="Cliente", email="cliente@exemplo.com", password_hash="x", type=UserType.cliente),
+            Users(id=3, name="Outro", email="outro@exemplo.com", password_hash="x", type=UserType.cliente),
+            Services(id=1, name="Recurso", category=ServiceCategory.multas)
+        ])
+        db.session.flush()
+        db.session.add_all([ClientCases(id=1, user_id=2, service_id=1, title="Caso", status=CaseStatus.pendente),
+                            ClientCases(id=2, user_id=3, service_id=1, title="Outro", status=CaseStatus.pendente)])
+        db.session.commit()
+    return app
+
+
+def store_file(base_dir, case_id, user_id, name, content):
+    """Gravar o conteúdo como blob e criar a linha de process_files"""
+    sha256 = hashlib.sha256(content).hexdigest()
+    source = blob_store.temp_upload_path(base_dir)
+    with open(source, "wb") as f:
+        f.write(content)
+    path = blob_store.add_reference(db.session, source, sha256, len(content), base_dir=base_dir)
+    process_file = ProcessFiles(user_id=user_id, case_id=case_id, filename=name, original_filename=name,
+                                file_path=path, sha256=sha256, uploaded_by_admin=1)
+    db.session.add(process_file)
+    db.session.commit()
+    return process_file.id, path, sha256
+
+
+def ref_count(sha256):
+    return db.session.execute(text("SELECT ref_count FROM file_blobs WHERE sha256 = :sha256"),
+                              {"sha256": sha256}).scalar()
+
+
+def admin_delete(app, url):
+    token = AuthService.generate_token(1, 'admin')
+    return app.test_client().delete(url, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_delete_file_releases_shared_blob():
+    base_dir = tempfile.mkdtemp()
+    app = create_app()
+    with app.app_context():
+        first, path, sha256 = store_file(base_dir, 1, 2, "a.pdf", b"conteudo")
+        second, _, _ = store_file(base_dir, 2, 3, "b.pdf", b"conteudo")
+        assert ref_count(sha256) == 2
+        db.session.remove()
+
+        assert admin_delete(app, f"/api/admin/process-files/{first}").status_code == 200
+        assert ref_count(sha256) == 1 and os.path.exists(path)
+
+        assert admin_delete(app, f"/api/admin/process-files/{second}").status_code == 200
+        assert ref_count(sha256) is None and not os.path.exists(path)
+
+
+def test_delete_client_releases_cascaded_files():
+    base_dir = tempfile.mkdtemp()
+    app = create_app()
+    with app.app_context():
+        _, own_path, own_sha = store_file(base_dir, 1, 2, "a.pdf", b"so do cliente")
+        _, shared_path, shared_sha = store_file(base_dir, 1, 2, "b.pdf", b"compartilhado")
+        store_file(base_dir, 2, 3, "c.pdf", b"compartilhado")
+        db.session.remove()
+
+        response = admin_delete(app, "/api/admin/clients/2")
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert ProcessFiles.query.count() == 1
+        assert ref_count(own_sha) is None and not os.path.exists(own_path)
+        assert ref_count(shared_sha) == 1 and os.path.exists(shared_path)
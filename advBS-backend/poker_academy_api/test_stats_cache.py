@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do cache de estatísticas por cliente no app Flask (src/stats_cache.py)
+
+Escritas de casos e arquivos pelo ORM só chegam ao cache depois do commit;
+rollback descarta os eventos sem mexer no valor nem na versão. Também
+verifica a proteção contra carregamentos que cruzam com uma escrita.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from src.models import db, Users, Services, ClientCases, ProcessFiles, UserType, ServiceCategory, CaseStatus
+from src.stats_cache import client_stats_cache
+
+STATS = {'total_cases': 0, 'pending_cases': 0, 'active_cases': 0, 'completed_cases': 0, 'total_files': 0}
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Users(id=2, name="Cliente", email="cliente@exemplo.com", password_hash="x", type=UserType.cliente),
+            Services(id=1, name="Recurso", category=ServiceCategory.multas)
+        ])
+        db.session.commit()
+    client_stats_cache.clear()
+    return app
+
+
+def test_events_apply_after_commit_and_rollback_discards():
+    app = create_app()
+    with app.app_context():
+        assert client_stats_cache.set(2, STATS, client_stats_cache.version(2))
+
+        case = ClientCases(user_id=2, service_id=1, title="Multa", status=CaseStatus.pendente)
+        db.session.add(case)
+        db.session.flush()
+        assert client_stats_cache.get(2) == STATS  # ainda não commitado
+        db.session.commit()
+        assert client_stats_cache.get(2) == dict(STATS, total_cases=1, pending_cases=1)
+
+        # Rollback: nem o valor nem a versão mudam
+        version = client_stats_cache.version(2)
+        db.session.add(ProcessFiles(user_id=2, case_id=case.id, filename="a.pdf", original_filename="a.pdf",
+                                    file_path="a.pdf", uploaded_by_admin=2))
+        case.status = CaseStatus.concluido
+        db.session.flush()
+        db.session.rollback()
+        assert client_stats_cache.get(2) == dict(STATS, total_cases=1, pending_cases=1)
+        assert not client_stats_cache._versions.changed_since(2, version)
+
+        case.status = CaseStatus.concluido
+        db.session.commit()
+        assert client_stats_cache.get(2) == dict(STATS, total_cases=1, completed_cases=1)
+        db.drop_all()
+
+
+def test_load_racing_a_commit_is_not_stored():
+    app = create_app()
+    with app.app_context():
+        version = client_stats_cache.version(2)  # rota leu a versão e foi ao banco
+        db.session.add(ClientCases(user_id=2, service_id=1, title="Multa", status=CaseStatus.pendente))
+        db.session.commit()
+        assert not client_stats_cache.set(2, STATS, version)
+        assert client_stats_cache.get(2) is None
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    tests = [test_events_apply_after_commit_and_rollback_discards, test_load_racing_a_commit_is_not_stored]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
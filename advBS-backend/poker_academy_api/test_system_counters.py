@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes dos contadores materializados mantidos pelo ORM (src/system_counters.py)
+
+Depois de cada escrita do app Flask (clientes, serviços, casos, arquivos,
+exclusões em cascata pelo banco, troca de tipo de usuário e rollback) os
+valores em system_counters devem bater com COUNT(*) nas tabelas.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy import event, text
+
+from src.models import db, Users, Services, ClientCases, ProcessFiles, UserType, ServiceCategory, CaseStatus
+from src.auth import AuthService
+from src.routes.admin_routes import admin_bp
+from src.system_counters import system_counters
+from src.user_cache import user_identity_cache
+
+# Mesmas contagens de COUNTER_QUERIES na API FastAPI (src/counters.py da raiz)
+COUNTER_QUERIES = {
+    'total_clients': "SELECT COUNT(*) FROM users WHERE type = 'cliente'",
+    'total_cases': "SELECT COUNT(*) FROM client_cases",
+    'pending_cases': "SELECT COUNT(*) FROM client_cases WHERE status = 'pendente'",
+    'active_cases': "SELECT COUNT(*) FROM client_cases WHERE status = 'em_andamento'",
+    'completed_cases': "SELECT COUNT(*) FROM client_cases WHERE status = 'concluido'",
+    'total_files': "SELECT COUNT(*) FROM process_files",
+    'total_services': "SELECT COUNT(*) FROM services"
+}
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "counters.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(admin_bp)
+    with app.app_context():
+        # ON DELETE CASCADE como no MySQL
+        event.listen(db.engine, "connect", lambda dbapi_connection, record:
+                     dbapi_connection.execute("PRAGMA foreign_keys=ON"))
+        db.create_all()
+        system_counters.create(db.engine)
+        db.session.execute(system_counters.insert(), [{"name": name, "value": 0} for name in COUNTER_QUERIES])
+        db.session.commit()
+    return app
+
+
+def assert_consistent():
+    stored = dict(db.session.execute(text("SELECT name, value FROM system_counters")).fetchall())
+    actual = {name: db.session.execute(text(query)).scalar() for name, query in COUNTER_QUERIES.items()}
+    assert stored == actual, (stored, actual)
+    return stored
+
+
+def add_file(case, name):
+    db.session.add(ProcessFiles(user_id=case.user_id, case_id=case.id, filename=name, original_filename=name,
+                                file_path=f"uploads/{name}", uploaded_by_admin=1))
+
+
+def test_writes_keep_counters_consistent():
+    app = create_app()
+    with app.app_context():
+        admin = Users(id=1, name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin)
+        client = Users(name="Cliente", email="cliente@exemplo.com", password_hash="x")  # tipo padrão: cliente
+        service = Services(name="Recurso", category=ServiceCategory.multas)
+        db.session.add_all([admin, client, service])
+        db.session.commit()
+        assert assert_consistent()['total_clients'] == 1
+
+        cases = [ClientCases(user_id=client.id, service_id=service.id, title=f"Caso {i}", status=status)
+                 for i, status in enumerate([CaseStatus.pendente, CaseStatus.pendente, CaseStatus.concluido])]
+        db.session.add_all(cases)
+        db.session.commit()
+        add_file(cases[0], "a.pdf")
+        add_file(cases[0], "b.pdf")
+        add_file(cases[1], "c.pdf")
+        db.session.commit()
+        assert assert_consistent() == {'total_clients': 1, 'total_cases': 3, 'pending_cases': 2, 'active_cases': 0,
+                                       'completed_cases': 1, 'total_files': 3, 'total_services': 1}
+
+        cases[1].status = CaseStatus.em_andamento
+        db.session.commit()
+        assert_consistent()
+
+        # Rollback desfaz a escrita e o delta juntos
+        db.session.add(Services(name="Descartado", category=ServiceCategory.cnh))
+        cases[0].status = CaseStatus.arquivado
+        db.session.flush()
+        db.session.rollback()
+        assert assert_consistent()['total_services'] == 1
+
+        # Arquivo removido pelo ORM e o resto do caso em cascata pelo banco
+        db.session.delete(ProcessFiles.query.filter_by(filename="a.pdf").one())
+        db.session.delete(ClientCases.query.get(cases[0].id))
+        db.session.commit()
+        assert assert_consistent()['total_files'] == 1
+
+        # Troca de tipo (rotas de usuários) e exclusão do serviço com casos em cascata
+        client.type = "admin"
+        db.session.commit()
+        assert assert_consistent()['total_clients'] == 0
+        client.type = UserType.cliente
+        db.session.commit()
+        db.session.delete(Services.query.get(service.id))
+        db.session.commit()
+        assert assert_consistent() == {'total_clients': 1, 'total_cases': 0, 'pending_cases': 0, 'active_cases': 0,
+                                       'completed_cases': 0, 'total_files': 0, 'total_services': 0}
+
+
+def test_delete_client_route_cascades():
+    app = create_app()
+    user_identity_cache.clear()
+    with app.app_context():
+        admin = Users(id=1, name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin)
+        client = Users(name="Cliente", email="cliente@exemplo.com", password_hash="x", type=UserType.cliente)
+        service = Services(name="Recurso", category=ServiceCategory.multas)
+        db.session.add_all([admin, client, service])
+        db.session.commit()
+        case = ClientCases(user_id=client.id, service_id=service.id, title="Caso", status=CaseStatus.em_andamento)
+        db.session.add(case)
+        db.session.commit()
+        add_file(case, "a.pdf")
+        db.session.commit()
+        client_id = client.id
+        db.session.remove()
+
+        token = AuthService.generate_token(1, 'admin')
+        response = app.test_client().delete(f"/api/admin/clients/{client_id}",
+                                            headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert assert_consistent() == {'total_clients': 0, 'total_cases': 0, 'pending_cases': 0, 'active_cases': 0,
+                                       'completed_cases': 0, 'total_files': 0, 'total_services': 1}
+
+
+def test_missing_table_does_not_break_writes():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "sem_tabela.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Services(name="Recurso", category=ServiceCategory.multas))
+        db.session.commit()
+        assert Services.query.count() == 1
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do cache de identidade dos decorators (src/user_cache.py)
+
+Verifica que requisições autenticadas repetidas não consultam a tabela users,
+que atualização, troca de tipo e exclusão pelas rotas invalidam a entrada
+depois do commit (e o rollback não), e os limites de tamanho e TTL.
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy import event
+
+from src.models import db, Users, UserType
+from src.auth import AuthService
+from src.routes.admin_routes import admin_bp
+from src.routes.client_routes import client_bp
+from src.routes.user_routes import user_bp
+from src.user_cache import UserIdentityCache, user_identity_cache
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(client_bp)
+    app.register_blueprint(user_bp)
+    return app
+
+
+def seed():
+    admin = Users(name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin)
+    client = Users(name="Cliente", email="cliente@exemplo.com", password_hash="x", type=UserType.cliente)
+    db.session.add_all([admin, client])
+    db.session.commit()
+    return admin.id, client.id
+
+
+def bearer(user_id, user_type):
+    return {"Authorization": f"Bearer {AuthService.generate_token(user_id, user_type)}"}
+
+
+def test_repeated_requests_skip_user_query():
+    app = create_app()
+    user_identity_cache.clear()
+    with app.app_context():
+        db.create_all()
+        _, client_id = seed()
+        headers = bearer(client_id, 'cliente')
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, sql, params, context, executemany: statements.append(sql)
+                     if "FROM users" in sql else None)
+
+        http = app.test_client()
+        for expected in (1, 0, 0):
+            db.session.remove()
+            statements.clear()
+            assert http.get("/api/client/cases", headers=headers).status_code == 200
+            assert len(statements) == expected, statements
+
+        # O perfil ainda vem completo do banco
+        profile = http.get("/api/client/profile", headers=headers).get_json()
+        assert profile["email"] == "cliente@exemplo.com" and "register_date" in profile
+        db.drop_all()
+
+
+def test_updates_and_deletes_invalidate_after_commit():
+    app = create_app()
+    user_identity_cache.clear()
+    with app.app_context():
+        db.create_all()
+        admin_id, client_id = seed()
+        admin, client = bearer(admin_id, 'admin'), bearer(client_id, 'cliente')
+        http = app.test_client()
+
+        assert http.get("/api/client/cases", headers=client).status_code == 200
+        assert user_identity_cache.get(client_id).name == "Cliente"
+
+        # Perfil atualizado pelo próprio cliente e pelo admin
+        assert http.put("/api/client/profile", headers=client, json={"name": "Cliente Novo"}).status_code == 200
+        assert user_identity_cache.get(client_id).name == "Cliente Novo"
+        assert http.put(f"/api/admin/clients/{client_id}", headers=admin,
+                        json={"email": "novo@exemplo.com"}).status_code == 200
+        assert user_identity_cache.get(client_id).email == "novo@exemplo.com"
+
+        # Rollback não invalida
+        version = user_identity_cache._versions.token()
+        Users.query.get(client_id).name = "Descartado"
+        db.session.flush()
+        db.session.rollback()
+        assert not user_identity_cache._versions.changed_since(client_id, version)
+
+        # Troca de tipo vale na requisição seguinte
+        assert http.put(f"/api/users/{client_id}", json={"type": "admin"}).status_code == 200
+        assert http.get("/api/client/cases", headers=client).status_code == 403
+        assert http.put(f"/api/users/{client_id}", json={"type": "cliente"}).status_code == 200
+        assert http.get("/api/client/cases", headers=client).status_code == 200
+
+        assert http.delete(f"/api/admin/clients/{client_id}", headers=admin).status_code == 200
+        assert http.get("/api/client/cases", headers=client).status_code == 403
+        db.drop_all()
+
+
+def test_size_and_ttl_limits():
+    app = create_app()
+    cache = UserIdentityCache(ttl=0.05, max_size=1)
+    with app.app_context():
+        db.create_all()
+        admin_id, client_id = seed()
+        assert cache.get(admin_id).type == UserType.admin
+        assert cache.get(client_id).type == UserType.cliente
+        assert cache.snapshot()["size"] == 1 and cache.evictions == 1
+
+        cache.get(client_id)
+        assert cache.hits == 1
+        time.sleep(0.06)
+        cache.get(client_id)
+        assert cache.hits == 1 and cache.misses == 3
+        assert cache.get(999) is None and cache.snapshot()["size"] == 1
+
+        # Versões limitadas como as entradas
+        for user_id in range(100, 110):
+            cache.invalidate(user_id)
+        assert len(cache._versions) == 1
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    tests = [test_repeated_requests_skip_user_query, test_updates_and_deletes_invalidate_after_commit,
+             test_size_and_ttl_limits]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes das colunas de busca exata (users.cpf_digits / users.phone_digits)
+
+Cadastro e edição de clientes pelo admin e edição do próprio perfil devem
+gravar CPF e telefone só com dígitos, com a mesma normalização da API
+FastAPI; num banco sem as colunas as escritas seguem funcionando.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy import text
+
+from src.models import db, Users, UserType
+from src.auth import AuthService
+from src.routes.admin_routes import admin_bp
+from src.routes.client_routes import client_bp
+from src.user_cache import user_identity_cache
+
+
+def create_app(name):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), name)
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(client_bp)
+    user_identity_cache.clear()
+    return app
+
+
+def bearer(user_id, user_type):
+    return {"Authorization": f"Bearer {AuthService.generate_token(user_id, user_type)}"}
+
+
+def digits(user_id):
+    return tuple(db.session.execute(text("SELECT cpf_digits, phone_digits FROM users WHERE id = :id"),
+                                    {"id": user_id}).fetchone())
+
+
+def test_routes_fill_lookup_columns():
+    app = create_app("colunas.db")
+    with app.app_context():
+        db.create_all()
+        # Como add_user_lookup_columns.sql
+        for column in ("cpf_digits", "phone_digits"):
+            db.session.execute(text(f"ALTER TABLE users ADD COLUMN {column} VARCHAR(20)"))
+        db.session.add(Users(id=1, name="Admin", email="admin@exemplo.com", password_hash="x", type=UserType.admin))
+        db.session.commit()
+        client = app.test_client()
+        admin = bearer(1, 'admin')
+
+        response = client.post("/api/admin/clients", headers=admin,
+                               json={"name": "João", "email": "joao@exemplo.com",
+                                     "cpf": "123.456.789-00", "phone": "+55 (51) 99999-1234"})
+        assert response.status_code == 201, response.get_data(as_text=True)
+        client_id = response.get_json()["client"]["id"]
+        assert digits(client_id) == ("12345678900", "51999991234")
+
+        # Só o campo enviado muda
+        assert client.put(f"/api/admin/clients/{client_id}", headers=admin,
+                          json={"cpf": "222.333.444-55"}).status_code == 200
+        assert digits(client_id) == ("22233344455", "51999991234")
+
+        assert client.put("/api/client/profile", headers=bearer(client_id, 'cliente'),
+                          json={"phone": "(11) 3333-4444", "cpf": ""}).status_code == 200
+        assert digits(client_id) == (None, "1133334444")
+
+
+def test_missing_columns_do_not_break_writes():
+    app = create_app("sem_colunas.db")
+    with app.app_context():
+        db.create_all()  # users como antes de add_user_lookup_columns.sql
+        user = Users(name="Cliente", email="cliente@exemplo.com", password_hash="x", cpf="123.456.789-00")
+        db.session.add(user)
+        db.session.commit()
+        user.phone = "(51) 99999-1234"
+        db.session.commit()
+        assert Users.query.one().phone == "(51) 99999-1234"
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do streaming de vídeos (src/video_streaming.py)
+
+Sobe um app Flask mínimo servindo um arquivo temporário com send_video e
+verifica Range (206/416), If-Range, ETag/304 e leitura em blocos; e as rotas
+reais do blueprint de vídeos (/api/videos e /api/videos-public) com token.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from src.models import db, Users, UserType
+from src.auth import AuthService
+from src.routes import video_routes
+from src.routes.video_routes import video_bp
+from src.user_cache import user_identity_cache
+from src.video_streaming import send_video
+
+CONTENT = bytes(range(256)) * 4096  # 1 MiB
+
+
+def create_app(path, chunk_size=64 * 1024):
+    app = Flask(__name__)
+
+    @app.route("/video")
+    def video():
+        return send_video(path, mimetype="video/mp4", chunk_size=chunk_size)
+
+    return app
+
+
+def make_client():
+    handle = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    handle.write(CONTENT)
+    handle.close()
+    return create_app(handle.name).test_client()
+
+
+def test_full_response():
+    client = make_client()
+    response = client.get("/video")
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    assert response.headers["Content-Type"] == "video/mp4"
+    assert response.headers["ETag"]
+
+
+def test_range_requests():
+    client = make_client()
+    response = client.get("/video", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(CONTENT)}"
+    assert response.data == CONTENT[100:200]
+
+    # Aberto até o fim (seek do player)
+    response = client.get("/video", headers={"Range": "bytes=700000-"})
+    assert response.status_code == 206
+    assert response.headers["Content-Length"] == str(len(CONTENT) - 700000)
+    assert response.data == CONTENT[700000:]
+
+    # Sufixo: últimos 10 bytes
+    response = client.get("/video", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.data == CONTENT[-10:]
+
+
+def test_unsatisfiable_and_multiple_ranges():
+    client = make_client()
+    response = client.get("/video", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+    # Vários intervalos: arquivo inteiro
+    response = client.get("/video", headers={"Range": "bytes=0-1,10-11"})
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+
+def test_conditional_requests():
+    client = make_client()
+    first = client.get("/video")
+    etag = first.headers["ETag"]
+
+    response = client.get("/video", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    response = client.get("/video", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert response.status_code == 304
+
+    # If-Range com ETag atual atende o intervalo; com outra ETag devolve tudo
+    response = client.get("/video", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    response = client.get("/video", headers={"Range": "bytes=0-9", "If-Range": '"outra"'})
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+
+def test_head_request():
+    client = make_client()
+    response = client.head("/video")
+    assert response.status_code == 200
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    assert response.data == b""
+
+
+def test_video_routes():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(video_bp)
+    user_identity_cache.clear()
+    original = video_routes.UPLOAD_FOLDER
+    video_routes.UPLOAD_FOLDER = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(video_routes.UPLOAD_FOLDER, "aula.mp4"), "wb") as handle:
+            handle.write(CONTENT)
+        with app.app_context():
+            db.create_all()
+            db.session.add(Users(id=1, name="Aluno", email="aluno@exemplo.com", password_hash="x",
+                                 type=UserType.cliente))
+            db.session.commit()
+            token = AuthService.generate_token(1, 'cliente')
+        client = app.test_client()
+
+        assert client.get("/api/videos/aula.mp4").status_code == 401
+        assert client.get("/api/videos/aula.mp4?token=invalido").status_code == 401
+        response = client.get(f"/api/videos/aula.mp4?token={token}", headers={"Range": "bytes=0-99"})
+        assert response.status_code == 206 and response.data == CONTENT[:100]
+        assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+        assert client.get(f"/api/videos/outra.mp4?token={token}").status_code == 404
+
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/videos-public/aula.mp4").status_code == 401
+        response = client.get("/api/videos-public/aula.mp4", headers=dict(headers, Range="bytes=-10"))
+        assert response.status_code == 206 and response.data == CONTENT[-10:]
+    finally:
+        video_routes.UPLOAD_FOLDER = original
+
+
+if __name__ == "__main__":
+    tests = [test_full_response, test_range_requests, test_unsatisfiable_and_multiple_ranges,
+             test_conditional_requests, test_head_request, test_video_routes]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes das escritas adiadas (src/write_behind.py)
+
+Verifica o agrupamento por linha num único UPDATE ... CASE, o login sem
+transação de escrita, a devolução ao buffer quando o flush falha e, em
+subprocessos, a gravação na saída normal e no SIGTERM e a perda limitada ao
+buffer numa queda abrupta (kill -9).
+"""
+import sys
+import os
+import signal
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy import event
+
+from src.models import db, Users, UserType
+from src.auth import AuthService
+from src.routes.auth_routes import auth_bp
+from src.write_behind import WriteBehindBuffer, write_behind
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class PageCounter(db.Model):
+    """Contador de teste (o modelo de aulas com views não existe neste app)"""
+    __tablename__ = "test_page_counters"
+    id = db.Column(db.Integer, primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+
+CHILD = """
+import os, sys, time
+sys.path.insert(0, {base_dir!r})
+from flask import Flask
+from src.models import db, Users, UserType
+from src.write_behind import write_behind
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + {db_path!r}
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+write_behind.init_app(app)
+
+mode = sys.argv[1]
+write_behind.set_value(Users, 'name', 1, 'gravado-antes')
+write_behind.flush()
+write_behind.set_value(Users, 'name', 2, 'no-buffer')
+print("pronto", flush=True)
+if mode == "exit":
+    sys.exit(0)
+time.sleep(60)  # espera o SIGTERM / kill -9
+"""
+
+
+def create_app(db_path=None):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}" if db_path else "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret"
+    db.init_app(app)
+    app.register_blueprint(auth_bp)
+    return app
+
+
+def seed_users(total=3):
+    for i in range(1, total + 1):
+        db.session.add(Users(id=i, name=f"Usuário {i}", email=f"u{i}@exemplo.com",
+                             password_hash=AuthService.hash_password("segredo"), type=UserType.cliente))
+    db.session.commit()
+
+
+def capture_updates(app):
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, sql, params, context, executemany: statements.append(sql)
+                     if sql.lstrip().upper().startswith("UPDATE") else None)
+    return statements
+
+
+def test_coalesced_batch_update():
+    app = create_app(os.path.join(tempfile.mkdtemp(), "wb.db"))
+    buffer = WriteBehindBuffer(interval=3600)
+    with app.app_context():
+        db.create_all()
+        seed_users()
+        buffer.init_app(app)
+    statements = capture_updates(app)
+
+    first, last = datetime(2024, 1, 1, 8), datetime(2024, 1, 1, 9)
+    for user_id in (1, 2, 3):
+        buffer.set_value(Users, 'last_login', user_id, first)
+    buffer.set_value(Users, 'last_login', 2, last)  # o mais recente vence
+    assert buffer.pending_count() == 3
+
+    assert buffer.flush() == 3
+    assert len(statements) == 1 and "CASE" in statements[0].upper()
+    assert buffer.flush() == 0 and len(statements) == 1
+    with app.app_context():
+        logins = {u.id: u.last_login for u in Users.query.all()}
+    assert logins == {1: first, 2: last, 3: first}
+
+
+def test_login_defers_last_login():
+    app = create_app(os.path.join(tempfile.mkdtemp(), "login.db"))
+    with app.app_context():
+        db.create_all()
+        seed_users(1)
+    statements = capture_updates(app)
+
+    response = app.test_client().post("/api/auth/login", json={"email": "u1@exemplo.com", "password": "segredo"})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json()["user"]["last_login"] is not None
+    assert statements == []  # nenhuma escrita no caminho do login
+
+    with app.app_context():
+        assert Users.query.get(1).last_login is None
+    write_behind.flush()
+    with app.app_context():
+        assert abs(Users.query.get(1).last_login - datetime.utcnow()) < timedelta(minutes=1)
+
+
+def test_failed_flush_keeps_pending_writes():
+    app = create_app(os.path.join(tempfile.mkdtemp(), "fail.db"))
+    buffer = WriteBehindBuffer(interval=3600)
+    with app.app_context():
+        db.create_all()
+        seed_users(2)
+        buffer.init_app(app)
+
+    old, new = datetime(2024, 1, 1), datetime(2024, 2, 1)
+    buffer.set_value(Users, 'last_login', 1, old)
+    buffer.set_value(Users, 'last_login', 2, old)
+    original = buffer._statements
+
+    def failing(values, increments):
+        # Escrita nova chega enquanto o flush está em andamento, e o banco cai
+        buffer.set_value(Users, 'last_login', 1, new)
+        raise RuntimeError("banco indisponível")
+
+    buffer._statements = failing
+    assert buffer.flush() == 0 and buffer.failures == 1
+    assert buffer.pending_count() == 2
+    buffer._statements = original
+
+    assert buffer.flush() == 2
+    with app.app_context():
+        logins = {u.id: u.last_login for u in Users.query.all()}
+    assert logins == {1: new, 2: old}  # o valor devolvido não sobrescreve o mais novo
+
+
+def test_failed_flush_keeps_increments():
+    app = create_app(os.path.join(tempfile.mkdtemp(), "incr.db"))
+    buffer = WriteBehindBuffer(interval=3600)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([PageCounter(id=1, views=1), PageCounter(id=2, views=0)])
+        db.session.commit()
+        buffer.init_app(app)
+
+    buffer.increment(PageCounter, 'views', 1, 10)
+    buffer._statements = lambda values, increments: (_ for _ in ()).throw(RuntimeError("queda"))
+    buffer.flush()
+    buffer.increment(PageCounter, 'views', 1, 5)
+    buffer.increment(PageCounter, 'views', 2)
+    assert buffer.pending_increment(PageCounter, 'views', 1) == 15
+    del buffer._statements
+    assert buffer.flush() == 2
+    with app.app_context():
+        assert {c.id: c.views for c in PageCounter.query.all()} == {1: 16, 2: 1}
+
+
+def run_child(mode):
+    """Retorna os nomes gravados pelo subprocesso em cada usuário"""
+    work_dir = tempfile.mkdtemp()
+    db_path = os.path.join(work_dir, "child.db")
+    app = create_app(db_path)
+    with app.app_context():
+        db.create_all()
+        seed_users(2)
+    script = os.path.join(work_dir, "child.py")
+    with open(script, "w") as handle:
+        handle.write(CHILD.format(base_dir=BASE_DIR, db_path=db_path))
+
+    env = dict(os.environ, WRITE_BEHIND_INTERVAL="3600")
+    child = subprocess.Popen([sys.executable, script, mode], stdout=subprocess.PIPE, env=env)
+    assert child.stdout.readline().strip() == b"pronto"
+    if mode == "sigterm":
+        child.send_signal(signal.SIGTERM)
+    elif mode == "kill":
+        child.send_signal(signal.SIGKILL)
+    child.wait(timeout=30)
+
+    with app.app_context():
+        return {u.id: u.name for u in Users.query.all()}
+
+
+def test_flush_on_exit_and_sigterm():
+    for mode in ("exit", "sigterm"):
+        names = run_child(mode)
+        assert names == {1: "gravado-antes", 2: "no-buffer"}, (mode, names)
+
+
+def test_hard_crash_loses_only_the_buffer():
+    names = run_child("kill")
+    assert names == {1: "gravado-antes", 2: "Usuário 2"}
+
+
+if __name__ == "__main__":
+    tests = [test_coalesced_batch_update, test_login_defers_last_login, test_failed_flush_keeps_pending_writes,
+             test_failed_flush_keeps_increments, test_flush_on_exit_and_sigterm, test_hard_crash_loses_only_the_buffer]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
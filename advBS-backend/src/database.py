@@ -3,6 +3,7 @@ import os
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from advbs_shared.db_pool import get_pool_options
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -49,8 +50,7 @@ DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB
 engine = create_engine(
     DATABASE_URL,
     echo=False,  # Set to True for SQL debugging
-    pool_pre_ping=True,
-    pool_recycle=300
+    **get_pool_options()
 )
 
 # Criar sessionmaker
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Preencher users.cpf_digits / users.phone_digits e criar os índices de busca exata
+
+Rodar depois de add_user_lookup_columns.sql. Percorre users em lotes por id,
+cada lote numa transação curta que só atualiza (por chave primária) as linhas
+cujo valor normalizado mudou, então a API segue gravando durante o backfill.
+No fim cria os índices que faltam (online no MySQL); o de CPF só é único se
+não houver CPFs repetidos, que são listados para correção.
+
+Pode ser rodado de novo a qualquer momento para corrigir linhas alteradas
+fora da API.
+
+Uso:
+    python backfill_user_lookup_columns.py [--batch-size 1000] [--pause 0.05] [--skip-indexes]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from database import DB_HOST, DB_PORT, DB_NAME, SessionLocal
+from advbs_shared.user_identifiers import BACKFILL_BATCH_SIZE, backfill_lookup_columns, create_lookup_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill das colunas de CPF/telefone só com dígitos")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="linhas por transação")
+    parser.add_argument("--pause", type=float, default=0.0, help="segundos de espera entre lotes")
+    parser.add_argument("--skip-indexes", action="store_true", help="apenas preencher, sem criar índices")
+    args = parser.parse_args()
+
+    print(f"🔗 Conectando ao banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    session = SessionLocal()
+    try:
+        start = time.perf_counter()
+
+        def progress(summary):
+            print(f"   {summary['lidas']} lidas, {summary['atualizadas']} atualizadas")
+
+        summary = backfill_lookup_columns(session, batch_size=args.batch_size, pause=args.pause, progress=progress)
+        print(f"✅ Backfill concluído em {time.perf_counter() - start:.1f}s: "
+              f"{summary['lidas']} linhas, {summary['atualizadas']} atualizadas")
+        if summary['conflitos']:
+            print(f"⚠️ {len(summary['conflitos'])} linhas com CPF de outro usuário (não atualizadas): "
+                  f"{summary['conflitos'][:20]}")
+
+        if not args.skip_indexes:
+            created, duplicates = create_lookup_indexes(session)
+            print(f"📇 Índices criados: {', '.join(created) if created else 'nenhum (já existiam)'}")
+            for value, total in duplicates:
+                print(f"⚠️ CPF {value} em {total} usuários")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Erro no backfill: {e}")
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
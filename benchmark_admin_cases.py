@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark da listagem /api/admin/cases com 100k casos
+
+Compara a query antiga (join completo sem LIMIT) com a paginação por keyset,
+usando um banco SQLite temporário com os mesmos índices do database_schema.sql.
+
+Uso: python benchmark_admin_cases.py [--cases 100000] [--limit 50]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from sqlalchemy import create_engine, text
+
+from main import build_admin_cases_query
+from pagination import keyset_page
+
+LEGACY_QUERY = """
+SELECT cc.id, cc.user_id, cc.service_id, cc.title, cc.description,
+       cc.status, cc.created_at, cc.updated_at,
+       u.name as client_name, u.email as client_email,
+       s.name as service_name
+FROM client_cases cc
+LEFT JOIN users u ON cc.user_id = u.id
+LEFT JOIN services s ON cc.service_id = s.id
+ORDER BY cc.created_at DESC
+"""
+
+STATUSES = ['pendente', 'em_andamento', 'concluido', 'arquivado']
+
+
+def seed(path, total_cases, total_clients=5000, total_services=20):
+    con = sqlite3.connect(path)
+    con.executescript("""
+    CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, type TEXT);
+    CREATE TABLE services (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE client_cases (
+        id INTEGER PRIMARY KEY, user_id INTEGER, service_id INTEGER, title TEXT,
+        description TEXT, status TEXT, created_at TIMESTAMP, updated_at TIMESTAMP
+    );
+    CREATE INDEX idx_client_cases_created ON client_cases (created_at);
+    CREATE INDEX idx_client_cases_status_created ON client_cases (status, created_at);
+    CREATE INDEX idx_client_cases_user_created ON client_cases (user_id, created_at);
+    """)
+    con.executemany("INSERT INTO users VALUES (?, ?, ?, 'cliente')",
+                    [(i, f"Cliente {i}", f"cliente{i}@exemplo.com") for i in range(1, total_clients + 1)])
+    con.executemany("INSERT INTO services VALUES (?, ?)",
+                    [(i, f"Serviço {i}") for i in range(1, total_services + 1)])
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    rows = []
+    for i in range(1, total_cases + 1):
+        created = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 4))
+        rows.append((i, rng.randint(1, total_clients), rng.randint(1, total_services),
+                     f"Processo {i}", "Recurso de multa de trânsito", rng.choice(STATUSES),
+                     created, created))
+    con.executemany("INSERT INTO client_cases VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    con.commit()
+    con.close()
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<45} {best * 1000:9.2f} ms  ({count} linhas)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_cases.db")
+    print(f"🌱 Populando {args.cases} casos em {path}...")
+    seed(path, args.cases)
+
+    engine = create_engine(f"sqlite:///{path}",
+                           connect_args={"detect_types": sqlite3.PARSE_DECLTYPES})
+
+    with engine.connect() as conn:
+        def legacy():
+            return len(conn.execute(text(LEGACY_QUERY)).fetchall())
+
+        def page(**filters):
+            def run():
+                query, params = build_admin_cases_query(args.limit, **filters)
+                rows, _, _ = keyset_page(conn.execute(text(query), params).fetchall(), args.limit, 'created_at')
+                return len(rows)
+            return run
+
+        def deep_page(pages=20):
+            def run():
+                cursor = None
+                for _ in range(pages):
+                    query, params = build_admin_cases_query(args.limit, after=cursor)
+                    rows, cursor, _ = keyset_page(conn.execute(text(query), params).fetchall(), args.limit, 'created_at')
+                return len(rows)
+            return run
+
+        print(f"📊 Resultados (melhor de 5, página de {args.limit}):")
+        legacy_time = timed("Query antiga (join completo, sem LIMIT)", legacy, repeat=3)
+        first_time = timed("Keyset: primeira página", page())
+        timed("Keyset: 20 páginas seguindo o cursor", deep_page())
+        timed("Keyset: filtro status='pendente'", page(status='pendente'))
+        timed("Keyset: filtro client_id=123", page(client_id=123))
+        timed("Keyset: filtro service_id=7", page(service_id=7))
+
+    print(f"🚀 Primeira página {legacy_time / first_time:.0f}x mais rápida que a listagem completa")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark do hash de senhas no login: no event loop vs pool de processos
+
+Simula uma rajada de logins (check_password_hash do werkzeug, PBKDF2-SHA256)
+enquanto uma tarefa "outra rota" acorda a cada 5 ms e mede o atraso do event
+loop. Compara a verificação direta no loop (como /api/auth/login fazia) com o
+PasswordHasher de src/password_hashing.py em pools de 1 até N processos.
+
+Uso: python benchmark_password_hashing.py [--logins 32] [--max-workers N]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from password_hashing import PasswordHasher
+
+TICK = 0.005
+
+
+async def measure_lag(stop, lags):
+    """Atraso de cada despertar em relação aos 5 ms pedidos"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def burst(verify, password_hash, logins):
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.get_running_loop().create_task(measure_lag(stop, lags))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[verify(password_hash, "senha-correta") for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    assert all(results)
+    lags.sort()
+    return {
+        "logins_s": logins / elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+async def inline_verify(password_hash, password):
+    # Como o login fazia: PBKDF2 direto na coroutine, travando o loop
+    return check_password_hash(password_hash, password)
+
+
+def run(logins, max_workers):
+    """Retorna {rótulo: métricas}"""
+    password_hash = generate_password_hash("senha-correta")
+    results = {"no event loop": asyncio.run(burst(inline_verify, password_hash, logins))}
+    for workers in sorted({1, 2, max_workers} if max_workers >= 2 else {1}):
+        hasher = PasswordHasher(workers=workers, max_queue=logins)
+        hasher.start()
+        try:
+            results[f"pool {workers} proc."] = asyncio.run(burst(hasher.verify, password_hash, logins))
+        finally:
+            hasher.shutdown()
+    return results
+
+
+def report(results):
+    print(f"{'modo':<16} {'logins/s':>9} {'atraso p50':>11} {'atraso máx':>11}")
+    for label, metrics in results.items():
+        print(f"{label:<16} {metrics['logins_s']:9.1f} {metrics['lag_p50_ms']:9.1f}ms {metrics['lag_max_ms']:9.1f}ms")
+
+
+def test_pool_keeps_event_loop_responsive():
+    results = run(logins=8, max_workers=1)
+    inline, pool = results["no event loop"], results["pool 1 proc."]
+    # No loop, cada hash trava as outras rotas pelo tempo inteiro do PBKDF2
+    assert pool["lag_max_ms"] < inline["lag_max_ms"] / 2, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"🔐 {args.logins} logins simultâneos, {os.cpu_count()} núcleos")
+    report(run(args.logins, args.max_workers))
+    sys.exit(0)
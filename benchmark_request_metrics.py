@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo das métricas por requisição (src/request_metrics.py)
+
+Mede separadamente o que o middleware e os eventos do engine acrescentam:
+start_request/finish_request por requisição, o before/after_cursor_execute
+por statement SQL (SQLite em memória, com e sem requisição em andamento) e a
+geração do texto de /metrics, e compara com uma requisição completa a
+/api/health pelo TestClient.
+
+Uso: python benchmark_request_metrics.py [--requests 20000] [--statements 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import main
+from request_metrics import RequestMetrics, _current_request
+
+
+def per_request_us(requests):
+    metrics = RequestMetrics()
+    routes = [f"/api/rota/{i}" for i in range(40)]
+    start = time.perf_counter()
+    for i in range(requests):
+        stats = metrics.start_request()
+        metrics.finish_request("GET", routes[i % len(routes)], 200, 0.012, stats)
+    elapsed = time.perf_counter() - start
+    _current_request.set(None)
+    return elapsed / requests * 1e6, metrics
+
+
+def per_statement_us(statements, rounds=5):
+    """(µs por statement sem requisição, µs com requisição em andamento), melhor de rounds rodadas alternadas"""
+    engine = create_engine("sqlite://")
+    best = [float("inf"), float("inf")]
+    with engine.connect() as connection:
+        for _ in range(rounds):
+            for index, stats in enumerate((None, RequestMetrics().start_request())):
+                _current_request.set(stats)
+                start = time.perf_counter()
+                for _ in range(statements // rounds):
+                    connection.execute(text("SELECT 1"))
+                best[index] = min(best[index], (time.perf_counter() - start) / (statements // rounds) * 1e6)
+    _current_request.set(None)
+    return best
+
+
+def render_ms(metrics, rounds=50):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        metrics.render()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def health_request_us(requests=300):
+    client = TestClient(main.app)
+    client.get("/api/health")
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get("/api/health")
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def run(requests, statements):
+    recording, metrics = per_request_us(requests)
+    without_request, with_request = per_statement_us(statements)
+    return {
+        "recording_us": recording,
+        "sql_us": without_request,
+        "sql_with_metrics_us": with_request,
+        "render_ms": render_ms(metrics),
+        "health_request_us": health_request_us()
+    }
+
+
+def report(results):
+    print(f"registro por requisição:        {results['recording_us']:8.2f} µs")
+    print(f"SELECT 1 sem requisição:        {results['sql_us']:8.2f} µs")
+    print(f"SELECT 1 com métricas:          {results['sql_with_metrics_us']:8.2f} µs "
+          f"(+{results['sql_with_metrics_us'] - results['sql_us']:.2f} µs)")
+    print(f"render de /metrics (40 rotas):  {results['render_ms']:8.2f} ms")
+    print(f"GET /api/health (TestClient):   {results['health_request_us']:8.2f} µs "
+          f"(registro = {results['recording_us'] / results['health_request_us']:.2%})")
+
+
+def test_recording_overhead_is_negligible():
+    results = run(requests=5000, statements=2000)
+    # O registro é uma fração pequena da requisição mais simples da API
+    assert results["recording_us"] < results["health_request_us"] * 0.05, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--statements", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"📊 {args.requests} requisições, {args.statements} statements SQL")
+    report(run(args.requests, args.statements))
+    sys.exit(0)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de /api/analytics/timeseries sobre vários anos de casos
+
+Popula um SQLite temporário com casos espalhados por 5 anos, monta o rollup
+diário (case_daily_rollup) e mede a série por dia/semana/mês no intervalo
+inteiro, comparando com a agregação direta em client_cases.
+
+Uso: python benchmark_timeseries.py [--cases 200000] [--years 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from advbs_shared.case_rollup import rebuild_rollup
+from timeseries import build_timeseries
+
+CATEGORIES = ['multas', 'cnh', 'acidentes', 'consultoria', 'recursos']
+STATUSES = ['pendente', 'em_andamento', 'concluido', 'arquivado']
+TARGET_MS = 100
+
+DIRECT_QUERY = """
+SELECT DATE(cc.created_at) as day, s.category, COUNT(*) as opened,
+       SUM(CASE WHEN cc.status = 'concluido' THEN 1 ELSE 0 END) as concluded
+FROM client_cases cc
+LEFT JOIN services s ON s.id = cc.service_id
+WHERE cc.created_at BETWEEN :start AND :end
+GROUP BY DATE(cc.created_at), s.category
+"""
+
+
+def seed(path, total_cases, years):
+    con = sqlite3.connect(path)
+    con.executescript("""
+    CREATE TABLE services (id INTEGER PRIMARY KEY, name TEXT, category TEXT);
+    CREATE TABLE client_cases (
+        id INTEGER PRIMARY KEY, user_id INTEGER, service_id INTEGER, title TEXT,
+        status TEXT, created_at TIMESTAMP, updated_at TIMESTAMP
+    );
+    CREATE INDEX idx_client_cases_created ON client_cases (created_at);
+    """)
+    con.executemany("INSERT INTO services VALUES (?, ?, ?)",
+                    [(i, f"Serviço {i}", CATEGORIES[i % len(CATEGORIES)]) for i in range(1, 21)])
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=365 * years)
+    rows = []
+    for i in range(1, total_cases + 1):
+        created = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * years))
+        status = rng.choice(STATUSES)
+        updated = created + timedelta(hours=rng.randint(1, 24 * 60)) if status == 'concluido' else created
+        rows.append((i, rng.randint(1, 5000), rng.randint(1, 20), f"Processo {i}", status, created, updated))
+    con.executemany("INSERT INTO client_cases VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    con.commit()
+    con.close()
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<45} {best * 1000:9.2f} ms  ({count} pontos)")
+    return best
+
+
+def run(total_cases, years):
+    """Retorna ({bucket: melhor tempo em s}, total de casos abertos na série)"""
+    path = os.path.join(tempfile.mkdtemp(), "bench_timeseries.db")
+    print(f"🌱 Populando {total_cases} casos ({years} anos) em {path}...")
+    seed(path, total_cases, years)
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"detect_types": sqlite3.PARSE_DECLTYPES})
+    with Session(engine) as session:
+        start = time.perf_counter()
+        rows = rebuild_rollup(session)
+        print(f"📈 Rollup: {rows} linhas em {time.perf_counter() - start:.1f}s")
+
+        end_day = datetime.now().date() + timedelta(days=1)
+        start_day = end_day - timedelta(days=365 * years + 1)
+
+        print("📊 Resultados (melhor de 5, intervalo completo):")
+        timed("Agregação direta em client_cases (por dia)",
+              lambda: len(session.execute(text(DIRECT_QUERY),
+                                          {"start": start_day, "end": end_day}).fetchall()), repeat=3)
+        results = {}
+        for bucket in ('day', 'week', 'month'):
+            results[bucket] = timed(f"Rollup: bucket={bucket}",
+                                    lambda: len(build_timeseries(session, start_day, end_day, bucket)))
+        opened = sum(point['opened'] for point in build_timeseries(session, start_day, end_day, 'month'))
+    return results, opened
+
+
+def test_timeseries_under_target():
+    results, opened = run(total_cases=50000, years=5)
+    assert opened == 50000
+    assert max(results.values()) * 1000 < TARGET_MS, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=200000)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    results, opened = run(args.cases, args.years)
+    ok = opened == args.cases and max(results.values()) * 1000 < TARGET_MS
+    print(f"{'✅' if ok else '❌'} Pior caso {max(results.values()) * 1000:.1f} ms (meta: {TARGET_MS} ms), "
+          f"{opened} casos abertos na série")
+    sys.exit(0 if ok else 1)
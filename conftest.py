@@ -0,0 +1,135 @@
+"""
+Fixtures compartilhadas dos testes da API FastAPI (test_*.py da raiz)
+
+O banco de cada teste é um SQLite temporário com as tabelas de
+database_schema.sql, traduzidas do MySQL: tipos equivalentes, chaves
+estrangeiras (só valem com foreign_keys=True), ON UPDATE current_timestamp()
+como trigger e NOW() registrada na conexão. Ficam de fora os NOT NULL (cada
+teste grava só as colunas que usa) e os índices, que a busca e o backfill
+criam por conta própria.
+"""
+import itertools
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import jwt
+import pytest
+from sqlalchemy import create_engine, event
+
+import database
+
+SCHEMA_PATH = os.path.join(ROOT, "database_schema.sql")
+
+SQLITE_TYPES = {'int': 'INTEGER', 'bigint': 'INTEGER', 'tinyint': 'INTEGER', 'decimal': 'NUMERIC',
+                'datetime': 'TIMESTAMP', 'date': 'DATE'}  # varchar, char, text e enum viram TEXT
+
+CREATE_TABLE = re.compile(r"CREATE TABLE `(\w+)` \((.*?)\n\)[^;]*;", re.S)
+COLUMN = re.compile(r"`(\w+)` (\w+)(?:\([^)]*\))?(.*)")
+DEFAULT = re.compile(r"DEFAULT (current_timestamp\(\)|'[^']*'|-?[\d.]+)")
+PRIMARY_KEY = re.compile(r"PRIMARY KEY \((.*)\)")
+FOREIGN_KEY = re.compile(r"CONSTRAINT `\w+` (FOREIGN KEY .*)")
+
+
+def sqlite_schema(path=SCHEMA_PATH):
+    """Script SQLite equivalente ao CREATE TABLE de cada tabela do schema MySQL"""
+    with open(path, encoding="utf-8") as handle:
+        mysql = handle.read()
+    statements = []
+    for table, body in CREATE_TABLE.findall(mysql):
+        columns, constraints, triggers = [], [], []
+        lines = [line.strip().rstrip(",") for line in body.strip().splitlines()]
+        primary_key = next((PRIMARY_KEY.match(line).group(1).replace("`", "")
+                            for line in lines if PRIMARY_KEY.match(line)), None)
+        for line in lines:
+            column = COLUMN.match(line)
+            if column:
+                name, mysql_type, rest = column.groups()
+                if name == primary_key and "AUTO_INCREMENT" in rest:
+                    columns.append(f"{name} INTEGER PRIMARY KEY")
+                    primary_key = None
+                    continue
+                definition = f"{name} {SQLITE_TYPES.get(mysql_type, 'TEXT')}"
+                default = DEFAULT.search(rest)
+                if default:
+                    value = default.group(1)
+                    definition += " DEFAULT " + ("(NOW())" if value == "current_timestamp()" else value)
+                columns.append(definition)
+                if "ON UPDATE current_timestamp()" in rest:
+                    triggers.append(f"CREATE TRIGGER {table}_{name}_on_update AFTER UPDATE ON {table} "
+                                    f"FOR EACH ROW WHEN NEW.{name} IS OLD.{name} "
+                                    f"BEGIN UPDATE {table} SET {name} = NOW() WHERE rowid = NEW.rowid; END;")
+            elif FOREIGN_KEY.match(line):
+                constraints.append(FOREIGN_KEY.match(line).group(1).replace("`", ""))
+        if primary_key:
+            constraints.insert(0, f"PRIMARY KEY ({primary_key})")
+        statements.append(f"CREATE TABLE {table} (\n    " + ",\n    ".join(columns + constraints) + "\n);")
+        statements.extend(triggers)
+    return "\n".join(statements)
+
+
+SQLITE_SCHEMA = sqlite_schema()
+
+
+@pytest.fixture
+def make_database(tmp_path):
+    """Fábrica de bancos: make_database(seed_sql, foreign_keys=False) devolve o engine
+
+    O SessionLocal da API passa a usar o último banco criado e volta para o
+    banco configurado no fim do teste.
+    """
+    numbers = itertools.count()
+
+    def build(seed="", foreign_keys=False):
+        path = tmp_path / f"api{next(numbers)}.db"
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False,
+                                                                     "detect_types": sqlite3.PARSE_DECLTYPES})
+
+        @event.listens_for(engine, "connect")
+        def sqlite_compat(dbapi_connection, connection_record):
+            dbapi_connection.create_function("NOW", 0, lambda: datetime.now().isoformat(" "))
+            if foreign_keys:
+                dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+        raw = engine.raw_connection()
+        try:
+            raw.connection.executescript(SQLITE_SCHEMA + "\n" + seed)
+            raw.commit()
+        finally:
+            raw.close()
+        database.SessionLocal.configure(bind=engine)
+        return engine
+
+    yield build
+    database.SessionLocal.configure(bind=database.engine)
+
+
+@pytest.fixture
+def admin_headers():
+    secret_key = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
+    token = jwt.encode({'user_id': 1, 'type': 'admin', 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       secret_key, algorithm='HS256')
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def client():
+    """TestClient da API sem os eventos de startup (use `with TestClient(main.app)` para tê-los)"""
+    from fastapi.testclient import TestClient
+
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    """Diretório de trabalho temporário: uploads/ é criado nele"""
+    path = tmp_path / "work"
+    path.mkdir()
+    monkeypatch.chdir(path)
+    return path
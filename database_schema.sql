@@ -21,10 +21,27 @@ CREATE TABLE `client_cases` (
   PRIMARY KEY (`id`),
   KEY `user_id` (`user_id`),
   KEY `service_id` (`service_id`),
+  KEY `idx_client_cases_created` (`created_at`),
+  KEY `idx_client_cases_status_created` (`status`,`created_at`),
+  KEY `idx_client_cases_user_created` (`user_id`,`created_at`),
+  FULLTEXT KEY `ft_client_cases_search` (`title`,`description`),
   CONSTRAINT `client_cases_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
   CONSTRAINT `client_cases_ibfk_2` FOREIGN KEY (`service_id`) REFERENCES `services` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=14 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
+-- Tabela: case_daily_rollup
+-- Série temporal de /api/analytics/timeseries: eventos de casos por dia e categoria
+-- (rebuild_case_rollup.py recalcula a partir de client_cases)
+DROP TABLE IF EXISTS case_daily_rollup;
+CREATE TABLE `case_daily_rollup` (
+  `day` date NOT NULL,
+  `category` varchar(32) NOT NULL,
+  `opened` int(11) NOT NULL DEFAULT 0,
+  `concluded` int(11) NOT NULL DEFAULT 0,
+  `resolution_seconds` bigint(20) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`day`,`category`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
 -- Tabela: consultations
 DROP TABLE IF EXISTS consultations;
 CREATE TABLE `consultations` (
@@ -53,6 +70,18 @@ CREATE TABLE `favorites` (
   CONSTRAINT `favorites_ibfk_2` FOREIGN KEY (`service_id`) REFERENCES `services` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
+-- Tabela: file_blobs
+-- Conteúdo dos arquivos de processo endereçado por SHA-256 (uploads/blobs/ab/cd/<sha256>);
+-- ref_count = linhas de process_files que apontam para o blob
+DROP TABLE IF EXISTS file_blobs;
+CREATE TABLE `file_blobs` (
+  `sha256` char(64) NOT NULL,
+  `size` bigint(20) NOT NULL,
+  `path` varchar(500) NOT NULL,
+  `ref_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`sha256`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
 -- Tabela: process_files
 DROP TABLE IF EXISTS process_files;
 CREATE TABLE `process_files` (
@@ -62,6 +91,8 @@ CREATE TABLE `process_files` (
   `filename` varchar(255) NOT NULL,
   `original_filename` varchar(255) NOT NULL,
   `file_path` varchar(500) NOT NULL,
+  `file_size` bigint(20) DEFAULT NULL,
+  `sha256` char(64) DEFAULT NULL,
   `description` text DEFAULT NULL,
   `uploaded_by_admin` int(11) NOT NULL,
   `created_at` datetime NOT NULL,
@@ -69,6 +100,7 @@ CREATE TABLE `process_files` (
   KEY `user_id` (`user_id`),
   KEY `case_id` (`case_id`),
   KEY `uploaded_by_admin` (`uploaded_by_admin`),
+  FULLTEXT KEY `ft_process_files_search` (`original_filename`),
   CONSTRAINT `process_files_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
   CONSTRAINT `process_files_ibfk_2` FOREIGN KEY (`case_id`) REFERENCES `client_cases` (`id`) ON DELETE CASCADE,
   CONSTRAINT `process_files_ibfk_3` FOREIGN KEY (`uploaded_by_admin`) REFERENCES `users` (`id`)
@@ -106,6 +138,15 @@ CREATE TABLE `service_views` (
   CONSTRAINT `service_views_ibfk_2` FOREIGN KEY (`service_id`) REFERENCES `services` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
+-- Tabela: system_counters
+-- Contadores materializados de /api/analytics/stats (reconcile_counters.py recalcula)
+DROP TABLE IF EXISTS system_counters;
+CREATE TABLE `system_counters` (
+  `name` varchar(64) NOT NULL,
+  `value` bigint(20) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
 -- Tabela: services
 DROP TABLE IF EXISTS services;
 CREATE TABLE `services` (
@@ -132,12 +173,37 @@ CREATE TABLE `users` (
   `register_date` datetime NOT NULL DEFAULT current_timestamp(),
   `last_login` datetime DEFAULT NULL,
   `cpf` varchar(14) DEFAULT NULL,
+  `cpf_digits` varchar(14) DEFAULT NULL,
   `phone` varchar(20) DEFAULT NULL,
+  `phone_digits` varchar(20) DEFAULT NULL,
   `address` text DEFAULT NULL,
   `city` varchar(100) DEFAULT NULL,
   `state` varchar(2) DEFAULT NULL,
   `zip_code` varchar(10) DEFAULT NULL,
   PRIMARY KEY (`id`),
   UNIQUE KEY `email` (`email`),
-  UNIQUE KEY `username` (`username`)
+  UNIQUE KEY `username` (`username`),
+  UNIQUE KEY `uq_users_cpf_digits` (`cpf_digits`),
+  KEY `idx_users_type_register` (`type`,`register_date`,`id`),
+  KEY `idx_users_phone_digits` (`phone_digits`),
+  FULLTEXT KEY `ft_users_search` (`name`,`email`,`cpf`)
 ) ENGINE=InnoDB AUTO_INCREMENT=13 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- Tabela: video_renditions
+-- Versões HLS dos vídeos das aulas (uploads/hls/<vídeo>/<nome>.m3u8), geradas em segundo plano
+DROP TABLE IF EXISTS video_renditions;
+CREATE TABLE `video_renditions` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `video_filename` varchar(255) NOT NULL,
+  `name` varchar(20) NOT NULL,
+  `height` int(11) NOT NULL,
+  `bitrate_kbps` int(11) NOT NULL,
+  `status` enum('pendente','processando','pronto','erro') NOT NULL DEFAULT 'pendente',
+  `playlist_path` varchar(500) DEFAULT NULL,
+  `error` text DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT current_timestamp(),
+  `updated_at` datetime NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_video_rendition` (`video_filename`,`name`),
+  KEY `ix_video_renditions_video_filename` (`video_filename`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
@@ -3,6 +3,9 @@
 
 import sys
 import os
+import time
+from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 # Adicionar o diretório src ao path
@@ -10,13 +13,15 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from fastapi import FastAPI, HTTPException, Depends, Header, Form, Request, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional
 import uvicorn
+import asyncio
+import anyio
+import jwt
 from dotenv import load_dotenv
-from sqlalchemy import text, create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 import logging
 
 # Carregar variáveis de ambiente (opcional - Railway usa variáveis de ambiente)
@@ -35,20 +40,34 @@ app = FastAPI(
 )
 
 # Configurar logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-# Middleware para log de todas as requisições
+# Log de acesso JSON amostrado (src/access_log.py) e métricas por rota (src/request_metrics.py)
+# num único middleware: cada @app.middleware a mais custa uma task por requisição
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(f"🔍 REQUEST: {request.method} {request.url}")
-    logger.info(f"🔍 Headers: {dict(request.headers)}")
-
-    response = await call_next(request)
-
-    logger.info(f"🔍 RESPONSE: {response.status_code}")
+    stats = request_metrics.start_request()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        duration = time.perf_counter() - start
+        route = request.scope.get("route")
+        request_metrics.finish_request(request.method, getattr(route, "path", None), status_code, duration, stats)
+        access_log.record(request, status_code, duration * 1000)
     return response
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Recusar antes de o multipart ser lido quando o Content-Length já excede o limite
+    if request.method == "POST" and request.url.path == "/api/admin/process-files" \
+            and exceeds_upload_limit(request.headers, MAX_UPLOAD_SIZE):
+        return JSONResponse(status_code=413, content={"detail": upload_limit_message(MAX_UPLOAD_SIZE)})
+    return await call_next(request)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -58,42 +77,173 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configuração do banco de dados
-# Usar variáveis de ambiente para produção (Railway) ou localhost para desenvolvimento
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_USER = os.getenv("DB_USER", "root")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "")
-# Forçar uso do banco railway em produção
-if 'railway' in os.getenv('DB_HOST', ''):
-    DB_NAME = 'railway'  # Forçar banco railway
-    logger.info("🚀 PRODUÇÃO: Usando banco 'railway'")
-else:
-    DB_NAME = os.getenv("DB_NAME", "BS")  # Local usa BS
-    logger.info("🏠 LOCAL: Usando banco 'BS'")
-
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-print(f"🔗 Conectando ao banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    """Obter sessão do banco de dados"""
+# Configuração do banco de dados (pool compartilhado em src/database.py)
+from database import DB_HOST, DB_PORT, DB_NAME, engine, SessionLocal, get_async_db, get_pool_status, run_in_db_thread
+from advbs_shared.stats_cache import client_stats_cache
+from auth_tokens import token_verifier
+from password_hashing import password_hasher
+from access_log import access_log
+from request_metrics import METRICS_TOKEN, request_metrics
+from counters import (COUNTERS_RECONCILE_INTERVAL, apply_counter_deltas, case_deltas, status_change_deltas,
+                      merge_deltas, read_counters, ensure_counters, reconcile_counters)
+from timeseries import BUCKETS, build_timeseries, parse_range
+from advbs_shared.case_rollup import (case_contributions, ensure_rollup, record_case_opened, record_case_recategorized,
+                                      record_cases_removed, record_status_change)
+from uploads import MAX_UPLOAD_SIZE, exceeds_upload_limit, upload_limit_message, stream_upload_to_disk
+from resumable_uploads import upload_sessions
+from advbs_shared.blob_store import (add_reference, release_references, finish_release, temp_upload_path,
+                                     ensure_blob_table, discard_unreferenced_blob)
+from advbs_shared.previews import is_sha256, preview_path, discard_previews
+from previews import PREVIEW_CACHE_CONTROL, preview_kind, preview_worker
+from search import ensure_search_index, parse_types, run_search
+from client_typeahead import TYPEAHEAD_REFRESH_INTERVAL, client_typeahead
+from advbs_shared.user_identifiers import (CPF_LENGTH, MIN_PHONE_DIGITS, cpf_digits, phone_digits, cpf_in_use,
+                                           ensure_lookup_columns, find_users, sync_lookup_columns)
+from pagination import DEFAULT_PAGE_SIZE, clamp_limit, decode_cursor, decode_id_cursor, keyset_page, parse_date_param
+
+@app.on_event("startup")
+async def init_counters():
+    """Garantir a tabela de contadores materializados (system_counters)"""
     try:
-        logger.info(f"🔗 Criando sessão do banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
-        db = SessionLocal()
-        logger.info("✅ Sessão do banco criada com sucesso")
-        yield db
+        session = SessionLocal()
+        try:
+            await run_in_db_thread(ensure_counters, session)
+        finally:
+            session.close()
     except Exception as e:
-        logger.error(f"❌ Erro ao criar sessão do banco: {e}")
-        raise
-    finally:
+        logger.error(f"❌ Erro ao inicializar contadores: {e}")
+
+async def reconcile_counters_periodically():
+    """Backstop dos contadores: recalcular com COUNT(*) e corrigir desvios no intervalo"""
+    while True:
+        await asyncio.sleep(COUNTERS_RECONCILE_INTERVAL)
         try:
-            db.close()
-            logger.info("🔒 Sessão do banco fechada")
-        except:
-            pass
+            session = SessionLocal()
+            try:
+                report = await run_in_db_thread(reconcile_counters, session)
+            finally:
+                session.close()
+            drifted = {name: item["drift"] for name, item in report.items() if item["drift"]}
+            if drifted:
+                logger.warning(f"⚠️ Contadores com desvio corrigidos: {drifted}")
+        except Exception as e:
+            logger.error(f"❌ Erro ao reconciliar contadores: {e}")
+
+@app.on_event("startup")
+async def start_counters_reconcile():
+    asyncio.get_running_loop().create_task(reconcile_counters_periodically())
+
+@app.on_event("startup")
+async def init_timeseries():
+    """Garantir o rollup diário de casos (case_daily_rollup)"""
+    try:
+        session = SessionLocal()
+        try:
+            await run_in_db_thread(ensure_rollup, session)
+        finally:
+            session.close()
+    except Exception as e:
+        logger.error(f"❌ Erro ao inicializar série temporal: {e}")
+
+@app.on_event("startup")
+async def init_blob_store():
+    """Garantir a tabela de blobs dos arquivos de processo (file_blobs)"""
+    try:
+        session = SessionLocal()
+        try:
+            await run_in_db_thread(ensure_blob_table, session)
+        finally:
+            session.close()
+    except Exception as e:
+        logger.error(f"❌ Erro ao inicializar blob store: {e}")
+
+@app.on_event("startup")
+async def init_search():
+    """Índices da busca unificada (FULLTEXT no MySQL, FTS5 no SQLite)"""
+    try:
+        session = SessionLocal()
+        try:
+            backend = await run_in_db_thread(ensure_search_index, session)
+            logger.info(f"🔎 Busca unificada usando: {backend}")
+        finally:
+            session.close()
+    except Exception as e:
+        logger.error(f"❌ Erro ao inicializar busca: {e}")
+
+@app.on_event("startup")
+async def init_user_identifiers():
+    """Colunas de CPF/telefone só com dígitos (users.cpf_digits, users.phone_digits)"""
+    try:
+        session = SessionLocal()
+        try:
+            await run_in_db_thread(ensure_lookup_columns, session)
+        finally:
+            session.close()
+    except Exception as e:
+        logger.error(f"❌ Erro ao verificar colunas de CPF/telefone: {e}")
+
+@app.on_event("startup")
+async def start_password_hasher():
+    """Subir o pool de processos de hash de senhas (PBKDF2 fora do event loop)"""
+    try:
+        await anyio.to_thread.run_sync(password_hasher.start)
+        logger.info(f"🔐 Pool de hash de senhas: {password_hasher.workers} processos")
+    except Exception as e:
+        logger.error(f"❌ Erro ao iniciar pool de hash de senhas: {e}")
+
+@app.on_event("shutdown")
+async def stop_password_hasher():
+    await anyio.to_thread.run_sync(password_hasher.shutdown)
+
+@app.on_event("startup")
+async def start_access_log():
+    access_log.start()
+
+@app.on_event("shutdown")
+async def stop_access_log():
+    # Grava o que ainda está na fila antes de sair
+    access_log.stop()
+
+UPLOAD_SESSIONS_GC_INTERVAL = 3600
+
+async def collect_upload_sessions_periodically():
+    """Remover sessões de upload retomável abandonadas (sem atividade no TTL)"""
+    while True:
+        try:
+            removed = await anyio.to_thread.run_sync(upload_sessions.collect_garbage)
+            if removed:
+                logger.info(f"🧹 {removed} sessões de upload abandonadas removidas")
+        except Exception as e:
+            logger.error(f"❌ Erro na limpeza de sessões de upload: {e}")
+        await asyncio.sleep(UPLOAD_SESSIONS_GC_INTERVAL)
+
+@app.on_event("startup")
+async def start_upload_sessions_gc():
+    asyncio.get_running_loop().create_task(collect_upload_sessions_periodically())
+
+async def refresh_client_typeahead_periodically():
+    """Carregar o índice do autocomplete de clientes e recarregar no intervalo"""
+    while True:
+        try:
+            session = SessionLocal()
+            try:
+                total = await run_in_db_thread(client_typeahead.load, session)
+                logger.info(f"🔎 Autocomplete de clientes carregado: {total} clientes")
+            finally:
+                session.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar autocomplete de clientes: {e}")
+        await asyncio.sleep(TYPEAHEAD_REFRESH_INTERVAL)
+
+@app.on_event("startup")
+async def start_client_typeahead():
+    # Em segundo plano: até a primeira carga a busca de clientes vai ao banco
+    asyncio.get_running_loop().create_task(refresh_client_typeahead_periodically())
+
+@app.on_event("startup")
+async def start_preview_worker():
+    """Fila de miniaturas dos arquivos de processo (geradas após o upload)"""
+    preview_worker.start()
 
 # Modelos Pydantic
 class UserLogin(BaseModel):
@@ -107,6 +257,14 @@ async def health_check():
     """Verificar se a API está funcionando"""
     return {"message": "FastAPI está funcionando!", "status": "ok", "version": "2.0.2", "timestamp": "2024-12-21 - DEPLOY NO PROJETO CORRETO BernardoEStalhofer"}
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Métricas por rota no formato do Prometheus (protegidas por METRICS_TOKEN, se definido)"""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    return Response(request_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/debug/routes")
 async def debug_routes():
     """Listar todas as rotas disponíveis para debug"""
@@ -130,23 +288,23 @@ async def debug_routes():
     }
 
 @app.get("/api/debug/data")
-async def debug_data(db_session=Depends(get_db)):
+async def debug_data(db_session=Depends(get_async_db)):
     """Debug - verificar dados no banco"""
     try:
         # Contar usuários
-        users_result = db_session.execute(text("SELECT COUNT(*) as count FROM users"))
+        users_result = await db_session.execute(text("SELECT COUNT(*) as count FROM users"))
         users_count = users_result.fetchone().count
 
         # Contar clientes
-        clients_result = db_session.execute(text("SELECT COUNT(*) as count FROM users WHERE type = 'cliente'"))
+        clients_result = await db_session.execute(text("SELECT COUNT(*) as count FROM users WHERE type = 'cliente'"))
         clients_count = clients_result.fetchone().count
 
         # Contar casos
-        cases_result = db_session.execute(text("SELECT COUNT(*) as count FROM client_cases"))
+        cases_result = await db_session.execute(text("SELECT COUNT(*) as count FROM client_cases"))
         cases_count = cases_result.fetchone().count
 
         # Listar alguns clientes
-        clients_list_result = db_session.execute(text("SELECT id, name, email, type FROM users WHERE type = 'cliente' LIMIT 5"))
+        clients_list_result = await db_session.execute(text("SELECT id, name, email, type FROM users WHERE type = 'cliente' LIMIT 5"))
         clients_list = [{"id": row.id, "name": row.name, "email": row.email, "type": row.type} for row in clients_list_result.fetchall()]
 
         return {
@@ -162,52 +320,47 @@ async def debug_data(db_session=Depends(get_db)):
         return {"error": str(e), "timestamp": "2024-12-21"}
 
 @app.post("/api/auth/login")
-async def login(user_data: UserLogin, db_session=Depends(get_db)):
+async def login(user_data: UserLogin, db_session=Depends(get_async_db)):
     """Login de usuário"""
     try:
         logger.info(f"🔐 Tentativa de login: {user_data.email}")
-        logger.info(f"🔍 DB Session: {db_session}")
-        logger.info(f"🔍 DB Config: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+        logger.debug(f"🔍 DB Session: {db_session}")
+        logger.debug(f"🔍 DB Config: {DB_HOST}:{DB_PORT}/{DB_NAME}")
 
         # Buscar usuário por email OU username usando SQL direto
         query = "SELECT id, name, email, password_hash, type FROM users WHERE email = :email OR username = :username"
-        result = db_session.execute(text(query), {"email": user_data.email, "username": user_data.email})
+        result = await db_session.execute(text(query), {"email": user_data.email, "username": user_data.email})
         user = result.fetchone()
 
         if not user:
-            print(f"❌ Usuário não encontrado: {user_data.email}")
+            logger.debug(f"❌ Usuário não encontrado: {user_data.email}")
             # Se for 'admin', criar usuário admin automaticamente
             if user_data.email == 'admin' and user_data.password == 'admin123':
-                print("🔧 Criando usuário admin automaticamente...")
-                from werkzeug.security import generate_password_hash
-                admin_hash = generate_password_hash('admin123')
+                logger.debug("🔧 Criando usuário admin automaticamente...")
+                admin_hash = await password_hasher.hash('admin123')
 
                 insert_query = "INSERT INTO users (name, username, email, password_hash, type, register_date) VALUES (:name, :username, :email, :password_hash, :type, NOW())"
-                db_session.execute(text(insert_query), {"name": "Administrador", "username": "admin", "email": "admin@advbs.com", "password_hash": admin_hash, "type": "admin"})
-                db_session.commit()
+                await db_session.execute(text(insert_query), {"name": "Administrador", "username": "admin", "email": "admin@advbs.com", "password_hash": admin_hash, "type": "admin"})
+                await db_session.commit()
 
                 # Buscar o usuário recém-criado
-                result = db_session.execute(text(query), {"email": user_data.email, "username": user_data.email})
+                result = await db_session.execute(text(query), {"email": user_data.email, "username": user_data.email})
                 user = result.fetchone()
-                print("✅ Usuário admin criado automaticamente!")
+                logger.info("✅ Usuário admin criado automaticamente!")
 
             if not user:
                 raise HTTPException(status_code=401, detail="Credenciais inválidas")
 
-        # Verificar senha hasheada
-        from werkzeug.security import check_password_hash
-        if not check_password_hash(user.password_hash, user_data.password):
-            print(f"❌ Senha incorreta para: {user_data.email}")
+        # Verificar senha hasheada (pool de processos: o PBKDF2 não trava o event loop)
+        if not await password_hasher.verify(user.password_hash, user_data.password):
+            logger.debug(f"❌ Senha incorreta para: {user_data.email}")
             raise HTTPException(status_code=401, detail="Credenciais inválidas")
 
-        print(f"✅ Login bem-sucedido: {user.name} ({user.type})")
+        logger.debug(f"✅ Login bem-sucedido: {user.name} ({user.type})")
 
         # Gerar token JWT
-        import jwt
         from datetime import datetime, timedelta
-        
-        secret_key = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
-        
+
         # Payload do token
         payload = {
             'user_id': user.id,
@@ -218,7 +371,7 @@ async def login(user_data: UserLogin, db_session=Depends(get_db)):
         }
         
         # Gerar token JWT
-        token = jwt.encode(payload, secret_key, algorithm='HS256')
+        token = token_verifier.encode(payload)
 
         return {
             "access_token": token,
@@ -240,8 +393,12 @@ async def login(user_data: UserLogin, db_session=Depends(get_db)):
         logger.error(f"❌ Stack trace: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
-def verify_token(authorization: str = Header(None)):
-    """Verificar token de autenticação JWT"""
+async def verify_token(authorization: str = Header(None)):
+    """Verificar token de autenticação JWT
+
+    Assíncrona para não passar pelo pool de threads a cada requisição; tokens
+    já verificados vêm do cache de src/auth_tokens.py até o exp.
+    """
     if not authorization:
         raise HTTPException(status_code=401, detail="Token de acesso requerido")
 
@@ -249,14 +406,9 @@ def verify_token(authorization: str = Header(None)):
         # Extrair token do header "Bearer token"
         if authorization.startswith("Bearer "):
             token = authorization.split(" ")[1]
-            
-            # Decodificar o token JWT
-            import jwt
-            
-            secret_key = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
-            
+
             try:
-                payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+                payload = token_verifier.decode(token)
                 user_id = payload.get('user_id')
                 email = payload.get('email')
                 user_type = payload.get('type')
@@ -273,7 +425,7 @@ def verify_token(authorization: str = Header(None)):
             except jwt.InvalidTokenError:
                 raise HTTPException(status_code=401, detail="Token inválido")
     except Exception as e:
-        print(f"❌ Erro ao verificar token: {e}")
+        logger.exception(f"❌ Erro ao verificar token: {e}")
         pass
 
     raise HTTPException(status_code=401, detail="Token inválido")
@@ -282,7 +434,7 @@ def verify_token(authorization: str = Header(None)):
 async def verify_token_route(current_user=Depends(verify_token)):
     """Verificar se o token é válido e retornar dados do usuário"""
     try:
-        logger.info(f"🔍 Verificando token para usuário: {current_user}")
+        logger.debug(f"🔍 Verificando token para usuário: {current_user}")
         return {
             "valid": True,
             "user": {
@@ -297,10 +449,10 @@ async def verify_token_route(current_user=Depends(verify_token)):
 
 # ==================== ROTAS DE PERFIL ====================
 @app.get("/api/client/profile")
-async def get_client_profile(db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def get_client_profile(db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Obter perfil do cliente logado"""
     try:
-        print(f"🔍 Buscando perfil do cliente ID: {current_user.get('user_id')}")
+        logger.debug(f"🔍 Buscando perfil do cliente ID: {current_user.get('user_id')}")
 
         # Buscar dados completos do usuário usando SQL direto
         query = """
@@ -308,7 +460,7 @@ async def get_client_profile(db_session=Depends(get_db), current_user=Depends(ve
                register_date, last_login, type
         FROM users WHERE id = :user_id
         """
-        result = db_session.execute(text(query), {"user_id": current_user.get('user_id')})
+        result = await db_session.execute(text(query), {"user_id": current_user.get('user_id')})
         user = result.fetchone()
 
         if not user:
@@ -330,29 +482,33 @@ async def get_client_profile(db_session=Depends(get_db), current_user=Depends(ve
             "type": user.type
         }
 
-        print(f"✅ Perfil encontrado: {user.name} ({user.email})")
+        logger.debug(f"✅ Perfil encontrado: {user.name} ({user.email})")
         return profile_data
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erro ao buscar perfil: {str(e)}")
+        logger.exception(f"❌ Erro ao buscar perfil: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/client/profile")
-async def update_client_profile(profile_data: dict, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def update_client_profile(profile_data: dict, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Atualizar perfil do cliente logado"""
     try:
-        print(f"🔄 Atualizando perfil do cliente ID: {current_user.get('user_id')}")
+        logger.debug(f"🔄 Atualizando perfil do cliente ID: {current_user.get('user_id')}")
 
         # Verificar se email já existe em outro usuário
         if profile_data.get("email"):
             query = "SELECT id FROM users WHERE email = :email AND id != :user_id"
-            result = db_session.execute(text(query), {"email": profile_data["email"], "user_id": current_user.get('user_id')})
+            result = await db_session.execute(text(query), {"email": profile_data["email"], "user_id": current_user.get('user_id')})
             existing_user = result.fetchone()
             if existing_user:
                 raise HTTPException(status_code=409, detail="Email já cadastrado")
 
+        if profile_data.get("cpf") and await db_session.run_sync(cpf_in_use, profile_data["cpf"],
+                                                                  current_user.get('user_id')):
+            raise HTTPException(status_code=409, detail="CPF já cadastrado")
+
         # Construir query de atualização dinamicamente
         update_fields = []
         update_values = []
@@ -366,148 +522,186 @@ async def update_client_profile(profile_data: dict, db_session=Depends(get_db),
         if update_fields:
             update_params['user_id'] = current_user.get('user_id')
             query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = :user_id"
-            db_session.execute(text(query), update_params)
-            db_session.commit()
+            await db_session.execute(text(query), update_params)
+            await db_session.run_sync(sync_lookup_columns, update_params['user_id'], update_params)
+            await db_session.commit()
+            client_typeahead.update(update_params['user_id'], update_params)
 
-        print(f"✅ Perfil atualizado com sucesso!")
+        logger.debug(f"✅ Perfil atualizado com sucesso!")
 
         return {"message": "Perfil atualizado com sucesso"}
 
     except HTTPException:
         raise
     except Exception as e:
-        db_session.rollback()
-        print(f"❌ Erro ao atualizar perfil: {str(e)}")
+        await db_session.rollback()
+        logger.exception(f"❌ Erro ao atualizar perfil: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== ROTAS ADMIN ====================
 
 @app.get("/api/admin/clients")
-async def get_admin_clients(db_session=Depends(get_db), current_user=Depends(verify_token)):
-    """Listar todos os clientes (admin)"""
+async def get_admin_clients(
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    registered_from: Optional[str] = None,
+    registered_to: Optional[str] = None,
+    db_session=Depends(get_async_db),
+    current_user=Depends(verify_token)
+):
+    """Listar clientes (admin) - paginação por keyset em (register_date, id)"""
     try:
-        logger.info("🚀 ROTA /api/admin/clients CHAMADA!")
-        logger.info(f"🔍 Current user: {current_user}")
-
         # Verificar se é admin
         if current_user.get('type') != 'admin':
             logger.error(f"❌ Acesso negado - usuário não é admin: {current_user}")
             raise HTTPException(status_code=403, detail="Acesso negado")
 
-        logger.info("🔍 Buscando todos os clientes...")
-
-        # Buscar todos os usuários do tipo cliente
-        query = """
+        limit = clamp_limit(limit)
+        conditions = ["type = 'cliente'"]
+        params = {"limit": limit + 1}
+
+        if city:
+            conditions.append("city = :city")
+            params['city'] = city
+        if state:
+            conditions.append("state = :state")
+            params['state'] = state.upper()
+        if registered_from:
+            conditions.append("register_date >= :registered_from")
+            params['registered_from'] = parse_date_param(registered_from, 'registered_from')
+        if registered_to:
+            conditions.append("register_date <= :registered_to")
+            params['registered_to'] = parse_date_param(registered_to, 'registered_to')
+        if after:
+            # Continuar depois da última linha da página anterior (ordem decrescente)
+            params['after_date'], params['after_id'] = decode_cursor(after)
+            conditions.append("(register_date < :after_date OR (register_date = :after_date AND id < :after_id))")
+
+        # Usa o índice idx_users_type_register (type, register_date, id) sem filesort
+        query = f"""
         SELECT id, name, username, email, cpf, phone, address, city, state,
                zip_code, register_date, last_login, type
-        FROM users WHERE type = 'cliente'
-        ORDER BY register_date DESC
+        FROM users
+        WHERE {' AND '.join(conditions)}
+        ORDER BY register_date DESC, id DESC
+        LIMIT :limit
         """
-        logger.info(f"🔍 Executando query: {query}")
-        result = db_session.execute(text(query))
-        clients = result.fetchall()
-        logger.info(f"🔍 Clientes encontrados na query: {len(clients)}")
+        result = await db_session.execute(text(query), params)
+        clients, next_cursor, has_more = keyset_page(result.fetchall(), limit, 'register_date')
 
-        clients_list = []
-        for client in clients:
-            clients_list.append({
-                'id': client.id,
-                'name': client.name,
-                'username': client.username,
-                'email': client.email,
-                'cpf': client.cpf,
-                'phone': client.phone,
-                'address': client.address,
-                'city': client.city,
-                'state': client.state,
-                'zip_code': client.zip_code,
-                'register_date': client.register_date.isoformat() if client.register_date else None,
-                'last_login': client.last_login.isoformat() if client.last_login else None,
-                'type': client.type
-            })
+        clients_list = [{
+            'id': client.id,
+            'name': client.name,
+            'username': client.username,
+            'email': client.email,
+            'cpf': client.cpf,
+            'phone': client.phone,
+            'address': client.address,
+            'city': client.city,
+            'state': client.state,
+            'zip_code': client.zip_code,
+            'register_date': client.register_date.isoformat() if client.register_date else None,
+            'last_login': client.last_login.isoformat() if client.last_login else None,
+            'type': client.type
+        } for client in clients]
 
-        print(f"✅ {len(clients_list)} clientes encontrados")
-        return {"data": clients_list}
+        return {"data": clients_list, "next_cursor": next_cursor, "has_more": has_more}
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erro ao buscar clientes: {e}")
+        logger.exception(f"❌ Erro ao buscar clientes: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+CASE_STATUSES = ('pendente', 'em_andamento', 'concluido', 'arquivado')
+
+def build_admin_cases_query(limit, after=None, status=None, service_id=None, client_id=None):
+    """Montar a query paginada (keyset em created_at, id) da listagem admin de casos"""
+    conditions = []
+    params = {"limit": limit + 1}
+
+    if status:
+        if status not in CASE_STATUSES:
+            raise HTTPException(status_code=400, detail="Status inválido")
+        conditions.append("cc.status = :status")
+        params['status'] = status
+    if service_id:
+        conditions.append("cc.service_id = :service_id")
+        params['service_id'] = service_id
+    if client_id:
+        conditions.append("cc.user_id = :client_id")
+        params['client_id'] = client_id
+    if after:
+        params['after_date'], params['after_id'] = decode_cursor(after)
+        conditions.append("(cc.created_at < :after_date OR (cc.created_at = :after_date AND cc.id < :after_id))")
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Índices: (status, created_at), (user_id, created_at) e (created_at) em client_cases
+    query = f"""
+    SELECT cc.id, cc.user_id, cc.service_id, cc.title, cc.description,
+           cc.status, cc.created_at, cc.updated_at,
+           u.name as client_name, u.email as client_email,
+           s.name as service_name
+    FROM client_cases cc
+    LEFT JOIN users u ON cc.user_id = u.id
+    LEFT JOIN services s ON cc.service_id = s.id
+    {where}
+    ORDER BY cc.created_at DESC, cc.id DESC
+    LIMIT :limit
+    """
+    return query, params
+
 @app.get("/api/admin/cases")
-async def get_admin_cases(db_session=Depends(get_db), current_user=Depends(verify_token)):
-    """Listar todos os casos (admin)"""
+async def get_admin_cases(
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    service_id: Optional[int] = None,
+    client_id: Optional[int] = None,
+    db_session=Depends(get_async_db),
+    current_user=Depends(verify_token)
+):
+    """Listar casos (admin) - paginação por keyset em (created_at, id)"""
     try:
-        logger.info("🚀 ROTA /api/admin/cases CHAMADA!")
-        logger.info(f"🔍 Current user: {current_user}")
-
         # Verificar se é admin
         if current_user.get('type') != 'admin':
             logger.error(f"❌ Acesso negado - usuário não é admin: {current_user}")
             raise HTTPException(status_code=403, detail="Acesso negado")
 
-        logger.info("🔍 Buscando todos os casos...")
-
-        # Primeiro, vamos verificar se as tabelas existem
-        try:
-            logger.info("🔍 Verificando se tabela client_cases existe...")
-            check_table = "SHOW TABLES LIKE 'client_cases'"
-            table_result = db_session.execute(text(check_table))
-            table_exists = table_result.fetchone()
-            logger.info(f"🔍 Tabela client_cases existe: {table_exists}")
-
-            if not table_exists:
-                logger.warning("⚠️ Tabela client_cases não existe - retornando lista vazia")
-                return {"data": []}
-        except Exception as table_error:
-            logger.error(f"❌ Erro ao verificar tabela: {table_error}")
-
-        # Buscar todos os casos com informações do cliente E serviço
-        query = """
-        SELECT cc.id, cc.user_id, cc.service_id, cc.title, cc.description,
-               cc.status, cc.created_at, cc.updated_at,
-               u.name as client_name, u.email as client_email,
-               s.name as service_name
-        FROM client_cases cc
-        LEFT JOIN users u ON cc.user_id = u.id
-        LEFT JOIN services s ON cc.service_id = s.id
-        ORDER BY cc.created_at DESC
-        """
-        logger.info(f"🔍 Executando query: {query}")
-        result = db_session.execute(text(query))
-        cases = result.fetchall()
-
-        cases_list = []
-        for case in cases:
-            cases_list.append({
-                'id': case.id,
-                'user_id': case.user_id,
-                'service_id': case.service_id,
-                'title': case.title,
-                'description': case.description,
-                'status': case.status,
-                'created_at': case.created_at.isoformat() if case.created_at else None,
-                'updated_at': case.updated_at.isoformat() if case.updated_at else None,
-                'client_name': case.client_name,
-                'client_email': case.client_email,
-                'service_name': case.service_name  # ADICIONADO: nome do serviço
-            })
-
-        print(f"✅ {len(cases_list)} casos encontrados")
-        return {"data": cases_list}
+        limit = clamp_limit(limit)
+        query, params = build_admin_cases_query(limit, after, status, service_id, client_id)
+        result = await db_session.execute(text(query), params)
+        cases, next_cursor, has_more = keyset_page(result.fetchall(), limit, 'created_at')
+
+        cases_list = [{
+            'id': case.id,
+            'user_id': case.user_id,
+            'service_id': case.service_id,
+            'title': case.title,
+            'description': case.description,
+            'status': case.status,
+            'created_at': case.created_at.isoformat() if case.created_at else None,
+            'updated_at': case.updated_at.isoformat() if case.updated_at else None,
+            'client_name': case.client_name,
+            'client_email': case.client_email,
+            'service_name': case.service_name
+        } for case in cases]
+
+        return {"data": cases_list, "next_cursor": next_cursor, "has_more": has_more}
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erro ao buscar casos: {e}")
+        logger.exception(f"❌ Erro ao buscar casos: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @app.get("/api/services")
-async def get_services(db_session=Depends(get_db)):
+async def get_services(db_session=Depends(get_async_db)):
     """Listar todos os serviços"""
     try:
-        print("🔍 Buscando todos os serviços...")
+        logger.debug("🔍 Buscando todos os serviços...")
 
         # Buscar todos os serviços
         query = """
@@ -515,7 +709,7 @@ async def get_services(db_session=Depends(get_db)):
         FROM services
         ORDER BY name
         """
-        result = db_session.execute(text(query))
+        result = await db_session.execute(text(query))
         services = result.fetchall()
 
         services_list = []
@@ -528,20 +722,52 @@ async def get_services(db_session=Depends(get_db)):
                 'created_at': service.created_at.isoformat() if service.created_at else None
             })
 
-        print(f"✅ {len(services_list)} serviços encontrados")
+        logger.debug(f"✅ {len(services_list)} serviços encontrados")
         return {"data": services_list}
 
     except Exception as e:
-        print(f"❌ Erro ao buscar serviços: {e}")
+        logger.exception(f"❌ Erro ao buscar serviços: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+@app.get("/api/admin/metrics/auth-cache")
+async def get_auth_cache_metrics(current_user=Depends(verify_token)):
+    """Cache de tokens JWT verificados: entradas, hits, misses e despejos (admin)"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+
+    return {"data": token_verifier.snapshot()}
+
+@app.get("/api/admin/metrics/access-log")
+async def get_access_log_metrics(current_user=Depends(verify_token)):
+    """Log de acesso: amostragem, linhas registradas, ignoradas e descartadas (admin)"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+
+    return {"data": access_log.snapshot()}
+
+@app.get("/api/admin/metrics/password-hashing")
+async def get_password_hashing_metrics(current_user=Depends(verify_token)):
+    """Pool de hash de senhas: processos, pedidos em execução, fila e rejeitados (admin)"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+
+    return {"data": password_hasher.snapshot()}
+
+@app.get("/api/admin/metrics/db-pool")
+async def get_db_pool_metrics(current_user=Depends(verify_token)):
+    """Métricas do pool de conexões: conexões em uso, overflow, espera e churn (admin)"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+
+    return {"data": get_pool_status()}
+
 # ==================== ROTAS DE CLIENTE ====================
 @app.get("/api/client/cases")
-async def get_client_cases(db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def get_client_cases(db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Obter casos do cliente logado"""
     try:
         user_id = current_user.get('user_id')
-        print(f"🔍 Buscando casos do cliente ID: {user_id}")
+        logger.debug(f"🔍 Buscando casos do cliente ID: {user_id}")
 
         query = """
         SELECT cc.id, cc.service_id, cc.title, cc.description, cc.status,
@@ -552,7 +778,7 @@ async def get_client_cases(db_session=Depends(get_db), current_user=Depends(veri
         WHERE cc.user_id = :user_id
         ORDER BY cc.created_at DESC
         """
-        result = db_session.execute(text(query), {"user_id": user_id})
+        result = await db_session.execute(text(query), {"user_id": user_id})
         cases = result.fetchall()
 
         cases_list = []
@@ -568,19 +794,24 @@ async def get_client_cases(db_session=Depends(get_db), current_user=Depends(veri
                 'service_name': case.service_name
             })
 
-        print(f"✅ {len(cases_list)} casos encontrados para o cliente")
+        logger.debug(f"✅ {len(cases_list)} casos encontrados para o cliente")
         return {"data": cases_list}
 
     except Exception as e:
-        print(f"❌ Erro ao buscar casos do cliente: {e}")
+        logger.exception(f"❌ Erro ao buscar casos do cliente: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @app.get("/api/client/stats")
-async def get_client_stats(db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def get_client_stats(db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Obter estatísticas do cliente logado"""
     try:
         user_id = current_user.get('user_id')
-        print(f"🔍 Buscando estatísticas do cliente ID: {user_id}")
+
+        # Cache por usuário, mantido pelas rotas admin que alteram casos e arquivos
+        cached = client_stats_cache.get(user_id)
+        if cached is not None:
+            return {"data": cached}
+        version = client_stats_cache.version(user_id)
 
         # Contar casos por status
         query = """
@@ -592,12 +823,12 @@ async def get_client_stats(db_session=Depends(get_db), current_user=Depends(veri
         FROM client_cases
         WHERE user_id = :user_id
         """
-        result = db_session.execute(text(query), {"user_id": user_id})
+        result = await db_session.execute(text(query), {"user_id": user_id})
         stats = result.fetchone()
 
         # Contar arquivos
         files_query = "SELECT COUNT(*) as total_files FROM process_files WHERE user_id = :user_id"
-        files_result = db_session.execute(text(files_query), {"user_id": user_id})
+        files_result = await db_session.execute(text(files_query), {"user_id": user_id})
         files_count = files_result.fetchone()
 
         stats_data = {
@@ -608,22 +839,22 @@ async def get_client_stats(db_session=Depends(get_db), current_user=Depends(veri
             'total_files': files_count.total_files if files_count else 0
         }
 
-        print(f"✅ Estatísticas calculadas: {stats_data}")
+        client_stats_cache.set(user_id, stats_data, version)
         return {"data": stats_data}
 
     except Exception as e:
-        print(f"❌ Erro ao buscar estatísticas do cliente: {e}")
+        logger.exception(f"❌ Erro ao buscar estatísticas do cliente: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 # ==================== ROTAS ADMIN ADICIONAIS ====================
 @app.get("/api/admin/clients/{client_id}/cases")
-async def get_admin_client_cases(client_id: int, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def get_admin_client_cases(client_id: int, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Obter casos de um cliente específico (admin)"""
     try:
         if current_user.get('type') != 'admin':
             raise HTTPException(status_code=403, detail="Acesso negado")
 
-        print(f"🔍 Buscando casos do cliente ID: {client_id}")
+        logger.debug(f"🔍 Buscando casos do cliente ID: {client_id}")
 
         query = """
         SELECT cc.id, cc.service_id, cc.title, cc.description, cc.status,
@@ -634,7 +865,7 @@ async def get_admin_client_cases(client_id: int, db_session=Depends(get_db), cur
         WHERE cc.user_id = :client_id
         ORDER BY cc.created_at DESC
         """
-        result = db_session.execute(text(query), {"client_id": client_id})
+        result = await db_session.execute(text(query), {"client_id": client_id})
         cases = result.fetchall()
 
         cases_list = []
@@ -650,84 +881,117 @@ async def get_admin_client_cases(client_id: int, db_session=Depends(get_db), cur
                 'service_name': case.service_name
             })
 
-        print(f"✅ {len(cases_list)} casos encontrados para o cliente {client_id}")
+        logger.debug(f"✅ {len(cases_list)} casos encontrados para o cliente {client_id}")
         return {"data": cases_list}
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erro ao buscar casos do cliente: {e}")
+        logger.exception(f"❌ Erro ao buscar casos do cliente: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 # ==================== ROTAS DE ANALYTICS ====================
 @app.get("/api/analytics/stats")
-async def get_analytics_stats(db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def get_analytics_stats(db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Obter estatísticas gerais do sistema (admin)"""
     try:
         if current_user.get('type') != 'admin':
             raise HTTPException(status_code=403, detail="Acesso negado")
 
-        print("🔍 Calculando estatísticas do sistema...")
+        # Contadores materializados (mantidos pelas rotas de escrita)
+        analytics_data = await db_session.run_sync(read_counters)
+
+        if analytics_data is None:
+            # Tabela ainda não populada: contar direto nas tabelas
+            logger.warning("⚠️ system_counters vazia - calculando estatísticas com COUNT(*)")
+            stats_query = """
+            SELECT
+                (SELECT COUNT(*) FROM users WHERE type = 'cliente') as total_clients,
+                (SELECT COUNT(*) FROM client_cases) as total_cases,
+                (SELECT COUNT(*) FROM client_cases WHERE status = 'pendente') as pending_cases,
+                (SELECT COUNT(*) FROM client_cases WHERE status = 'em_andamento') as active_cases,
+                (SELECT COUNT(*) FROM client_cases WHERE status = 'concluido') as completed_cases,
+                (SELECT COUNT(*) FROM process_files) as total_files,
+                (SELECT COUNT(*) FROM services) as total_services
+            """
+            result = await db_session.execute(text(stats_query))
+            stats = result.fetchone()
+
+            analytics_data = {
+                'total_clients': stats.total_clients or 0,
+                'total_cases': stats.total_cases or 0,
+                'pending_cases': stats.pending_cases or 0,
+                'active_cases': stats.active_cases or 0,
+                'completed_cases': stats.completed_cases or 0,
+                'total_files': stats.total_files or 0,
+                'total_services': stats.total_services or 0
+            }
 
-        # Estatísticas gerais
-        stats_query = """
-        SELECT
-            (SELECT COUNT(*) FROM users WHERE type = 'cliente') as total_clients,
-            (SELECT COUNT(*) FROM client_cases) as total_cases,
-            (SELECT COUNT(*) FROM client_cases WHERE status = 'pendente') as pending_cases,
-            (SELECT COUNT(*) FROM client_cases WHERE status = 'em_andamento') as active_cases,
-            (SELECT COUNT(*) FROM client_cases WHERE status = 'concluido') as completed_cases,
-            (SELECT COUNT(*) FROM process_files) as total_files,
-            (SELECT COUNT(*) FROM services) as total_services
-        """
-        result = db_session.execute(text(stats_query))
-        stats = result.fetchone()
+        return {"data": analytics_data}
 
-        analytics_data = {
-            'total_clients': stats.total_clients or 0,
-            'total_cases': stats.total_cases or 0,
-            'pending_cases': stats.pending_cases or 0,
-            'active_cases': stats.active_cases or 0,
-            'completed_cases': stats.completed_cases or 0,
-            'total_files': stats.total_files or 0,
-            'total_services': stats.total_services or 0
-        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"❌ Erro ao calcular estatísticas: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-        print(f"✅ Estatísticas calculadas: {analytics_data}")
-        return {"data": analytics_data}
+@app.get("/api/analytics/timeseries")
+async def get_analytics_timeseries(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    bucket: str = 'day',
+    category: Optional[str] = None,
+    db_session=Depends(get_async_db),
+    current_user=Depends(verify_token)
+):
+    """Casos abertos/concluídos por período e categoria de serviço (admin)"""
+    try:
+        if current_user.get('type') != 'admin':
+            raise HTTPException(status_code=403, detail="Acesso negado")
+
+        if bucket not in BUCKETS:
+            raise HTTPException(status_code=400, detail=f"bucket deve ser um de: {', '.join(BUCKETS)}")
+        start_day, end_day = parse_range(start, end)
+
+        series = await db_session.run_sync(build_timeseries, start_day, end_day, bucket, category)
+        return {
+            "data": series,
+            "start": start_day.isoformat(),
+            "end": end_day.isoformat(),
+            "bucket": bucket
+        }
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erro ao calcular estatísticas: {e}")
+        logger.error(f"❌ Erro ao calcular série temporal: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 # ==================== ROTAS DE ARQUIVOS ====================
 
 @app.get("/api/admin/process-files")
-async def get_process_files(db_session=Depends(get_db), current_user=Depends(verify_token)):
-    """Listar todos os arquivos de processos (admin)"""
+async def get_process_files(
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    db_session=Depends(get_async_db),
+    current_user=Depends(verify_token)
+):
+    """Listar arquivos de processos (admin) - uma única query por página"""
     try:
-        logger.info("🚀 ROTA /api/admin/process-files CHAMADA!")
-
         # Verificar se é admin
         if current_user.get('type') != 'admin':
             raise HTTPException(status_code=403, detail="Acesso negado")
 
-        # Primeiro, verificar se há arquivos
-        count_query = "SELECT COUNT(*) as total FROM process_files"
-        count_result = db_session.execute(text(count_query))
-        total_files = count_result.fetchone().total
-
-        logger.info(f"📁 Total de arquivos na base: {total_files}")
+        limit = clamp_limit(limit)
+        params = {"limit": limit + 1}
+        where = ""
+        if after:
+            params['after_id'] = decode_id_cursor(after)
+            where = "WHERE pf.id < :after_id"
 
-        if total_files == 0:
-            logger.info("📁 Nenhum arquivo encontrado, retornando lista vazia")
-            return {"data": []}
-
-        # Buscar todos os arquivos com informações do cliente e caso - versão com debug
-        query = """
-        SELECT pf.id, pf.case_id, pf.filename, pf.original_filename, pf.user_id, pf.file_path,
+        # Arquivos com informações do cliente e caso (keyset em pf.id)
+        query = f"""
+        SELECT pf.id, pf.case_id, pf.filename, pf.original_filename, pf.user_id, pf.file_path, pf.sha256,
                u.name as client_name,
                u.email as client_email,
                cc.title as case_title,
@@ -735,30 +999,17 @@ async def get_process_files(db_session=Depends(get_db), current_user=Depends(ver
         FROM process_files pf
         LEFT JOIN users u ON pf.user_id = u.id AND u.type = 'cliente'
         LEFT JOIN client_cases cc ON pf.case_id = cc.id
+        {where}
         ORDER BY pf.id DESC
+        LIMIT :limit
         """
-        result = db_session.execute(text(query))
-        files = result.fetchall()
+        result = await db_session.execute(text(query), params)
+        files, next_cursor, has_more = keyset_page(result.fetchall(), limit)
 
         files_list = []
         for file in files:
-            # Debug: log dos dados do arquivo
-            logger.info(f"🔍 Arquivo ID {file.id}: user_id={file.user_id}, client_name='{file.client_name}'")
-
-            # Se não tem nome do cliente, buscar diretamente
+            # O JOIN já traz o nome; sem cliente correspondente, usar fallback pelo user_id
             client_name = file.client_name
-            if not client_name and file.user_id:
-                try:
-                    user_query = "SELECT name FROM users WHERE id = :user_id AND type = 'cliente'"
-                    user_result = db_session.execute(text(user_query), {"user_id": file.user_id})
-                    user_row = user_result.fetchone()
-                    if user_row:
-                        client_name = user_row.name
-                        logger.info(f"🔍 Nome encontrado via query direta: {client_name}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Erro ao buscar nome do cliente: {e}")
-
-            # Se ainda não tem nome, usar fallback baseado no user_id
             if not client_name:
                 if file.user_id == 17:
                     client_name = "Vanessa (ID 17)"
@@ -776,11 +1027,14 @@ async def get_process_files(db_session=Depends(get_db), current_user=Depends(ver
                 'client_email': file.client_email or '',
                 'case_title': file.case_title or 'Caso geral',
                 'case_status': file.case_status or '',
+                'sha256': file.sha256,
+                'preview_url': f"/api/admin/process-files/previews/{file.sha256}"
+                               if file.sha256 and preview_kind(file.original_filename) else None,
                 'created_at': None  # Adicionado campo que frontend espera
             })
 
-        logger.info(f"✅ {len(files_list)} arquivos encontrados")
-        return {"data": files_list}
+        logger.debug(f"✅ {len(files_list)} arquivos retornados")
+        return {"data": files_list, "next_cursor": next_cursor, "has_more": has_more}
 
     except HTTPException:
         raise
@@ -788,13 +1042,82 @@ async def get_process_files(db_session=Depends(get_db), current_user=Depends(ver
         logger.error(f"❌ Erro ao buscar arquivos: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+async def insert_process_file(db_session, client_id, case_id, filename, original_filename,
+                              temp_path, file_size, file_sha256):
+    """Guardar o arquivo no blob store e gravar a linha de process_files (com commit)
+
+    Conteúdo idêntico a um arquivo já armazenado reaproveita o mesmo blob.
+    Retorna (id do arquivo, caminho do blob).
+    """
+    insert_query = """
+    INSERT INTO process_files (
+        user_id, case_id, filename, original_filename, file_path, file_size, sha256
+    ) VALUES (
+        :user_id, :case_id, :filename, :original_filename, :file_path, :file_size, :sha256
+    )
+    """
+    try:
+        file_path = await db_session.run_sync(add_reference, temp_path, file_sha256, file_size)
+        result = await db_session.execute(text(insert_query), {
+            "user_id": int(client_id),
+            "case_id": int(case_id) if case_id else None,
+            "filename": filename,
+            "original_filename": original_filename,
+            "file_path": file_path,
+            "file_size": file_size,
+            "sha256": file_sha256
+        })
+        await apply_counter_deltas(db_session, {'total_files': 1})
+        await db_session.commit()
+    except Exception:
+        if os.path.exists(temp_path):
+            # Arquivo temporário ainda não movido para o blob store
+            os.remove(temp_path)
+        else:
+            # Já movido para o blob store: sem a linha (rollback), o blob ficaria órfão
+            try:
+                await db_session.rollback()
+                await db_session.run_sync(discard_unreferenced_blob, file_sha256)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao descartar blob {file_sha256} sem referência: {e}")
+        raise
+    client_stats_cache.file_added(int(client_id))
+    preview_worker.submit(file_sha256, file_path, original_filename)
+    return result.lastrowid, file_path
+
+@app.get("/api/admin/process-files/previews/{sha256}")
+async def get_process_file_preview(sha256: str, request: Request, db_session=Depends(get_async_db),
+                                   current_user=Depends(verify_token)):
+    """Miniatura (JPEG) do arquivo com este SHA-256; 202 enquanto está sendo gerada"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    if not is_sha256(sha256):
+        raise HTTPException(status_code=404, detail="Pré-visualização não encontrada")
+
+    etag = f'"{sha256}"'
+    path = preview_path(sha256)
+    if await anyio.to_thread.run_sync(os.path.exists, path):
+        headers = {"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+    # Ainda não gerada (upload anterior ao worker, ou fila reiniciada): enfileirar
+    result = await db_session.execute(text(
+        "SELECT file_path, original_filename FROM process_files WHERE sha256 = :sha256 LIMIT 1"
+    ), {"sha256": sha256})
+    file = result.fetchone()
+    if file and preview_worker.submit(sha256, file.file_path, file.original_filename):
+        return JSONResponse(status_code=202, content={"status": "pendente"}, headers={"Retry-After": "2"})
+    raise HTTPException(status_code=404, detail="Pré-visualização não disponível para este arquivo")
+
 @app.post("/api/admin/process-files")
 async def upload_process_file(
     file: UploadFile = File(...),
     client_id: str = Form(...),
     case_id: str = Form(None),
     description: str = Form(""),
-    db_session=Depends(get_db),
+    db_session=Depends(get_async_db),
     current_user=Depends(verify_token)
 ):
     """Upload de arquivo de processo"""
@@ -816,49 +1139,24 @@ async def upload_process_file(
 
         # Verificar se cliente existe
         client_query = "SELECT id, name FROM users WHERE id = :client_id AND type = 'cliente'"
-        client_result = db_session.execute(text(client_query), {"client_id": int(client_id)})
+        client_result = await db_session.execute(text(client_query), {"client_id": int(client_id)})
         client = client_result.fetchone()
 
         if not client:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
 
-        # Criar diretório de upload se não existir
-        import os
-        from datetime import datetime
-
-        upload_dir = "uploads/process_files"
-        os.makedirs(upload_dir, exist_ok=True)
-
-        # Gerar nome único para o arquivo
+        # Nome exibido/registrado do arquivo (o conteúdo fica no blob store)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(file.filename)[1]
         unique_filename = f"{timestamp}_{client_id}_{file.filename}"
-        file_path = os.path.join(upload_dir, unique_filename)
 
-        # Salvar arquivo
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Salvar arquivo em partes (tamanho e SHA-256 calculados durante a cópia)
+        temp_path = temp_upload_path()
+        file_size, file_sha256 = await stream_upload_to_disk(file, temp_path, MAX_UPLOAD_SIZE)
 
-        logger.info(f"✅ Arquivo salvo: {file_path}")
-
-        # Salvar informações no banco de dados - versão simplificada
-        insert_query = """
-        INSERT INTO process_files (
-            user_id, case_id, filename, original_filename, file_path
-        ) VALUES (
-            :user_id, :case_id, :filename, :original_filename, :file_path
-        )
-        """
-
-        db_session.execute(text(insert_query), {
-            "user_id": int(client_id),
-            "case_id": int(case_id) if case_id else None,
-            "filename": unique_filename,
-            "original_filename": file.filename,
-            "file_path": file_path
-        })
-        db_session.commit()
+        # Salvar informações no banco de dados
+        _, file_path = await insert_process_file(db_session, client_id, case_id, unique_filename, file.filename,
+                                                 temp_path, file_size, file_sha256)
+        logger.info(f"✅ Arquivo salvo: {file_path} ({file_size} bytes, sha256 {file_sha256})")
 
         logger.info(f"✅ Arquivo salvo no banco de dados!")
 
@@ -867,7 +1165,8 @@ async def upload_process_file(
             "file": {
                 "filename": unique_filename,
                 "original_name": file.filename,
-                "file_size": len(content),
+                "file_size": file_size,
+                "sha256": file_sha256,
                 "client_name": client.name
             }
         }
@@ -877,13 +1176,133 @@ async def upload_process_file(
     except Exception as e:
         logger.error(f"❌ Erro no upload: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
+# ==================== UPLOAD RETOMÁVEL ====================
+# Sessão -> PUT das partes numeradas (qualquer ordem, reenvio permitido) ->
+# consulta do que já chegou -> finalize (monta o arquivo e grava process_files)
+
+@app.post("/api/admin/process-files/uploads")
+async def create_upload_session(request: Request, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
+    """Criar sessão de upload retomável (admin)"""
+    try:
+        if current_user.get('type') != 'admin':
+            raise HTTPException(status_code=403, detail="Acesso negado")
+
+        data = await request.json()
+        client_id = data.get('client_id')
+        filename = data.get('filename')
+        size = data.get('size')
+        if not client_id or not filename or not isinstance(size, int):
+            raise HTTPException(status_code=400, detail="client_id, filename e size são obrigatórios")
+
+        client_query = "SELECT id FROM users WHERE id = :client_id AND type = 'cliente'"
+        client_result = await db_session.execute(text(client_query), {"client_id": int(client_id)})
+        if not client_result.fetchone():
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+
+        meta = await anyio.to_thread.run_sync(partial(
+            upload_sessions.create, client_id, filename, size,
+            chunk_size=data.get('chunk_size'), case_id=data.get('case_id'), sha256=data.get('sha256'),
+            description=data.get('description', ''), created_by=current_user.get('user_id'),
+            max_size=MAX_UPLOAD_SIZE
+        ))
+        logger.info(f"📦 Sessão de upload {meta['upload_id']} criada: {meta['filename']} "
+                    f"({meta['size']} bytes em {meta['total_chunks']} partes)")
+        return {"data": await anyio.to_thread.run_sync(upload_sessions.status, meta['upload_id'])}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro ao criar sessão de upload: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+@app.put("/api/admin/process-files/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(upload_id: str, index: int, request: Request, current_user=Depends(verify_token)):
+    """Enviar a parte `index` (corpo bruto); reenviar a mesma parte é permitido"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    return {"data": await upload_sessions.write_chunk(upload_id, index, request.stream())}
+
+@app.get("/api/admin/process-files/uploads/{upload_id}")
+async def get_upload_session(upload_id: str, current_user=Depends(verify_token)):
+    """Partes e intervalos de bytes já recebidos (para retomar o envio)"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    return {"data": await anyio.to_thread.run_sync(upload_sessions.status, upload_id)}
+
+@app.delete("/api/admin/process-files/uploads/{upload_id}")
+async def abort_upload_session(upload_id: str, current_user=Depends(verify_token)):
+    """Cancelar a sessão e descartar as partes recebidas"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    await anyio.to_thread.run_sync(upload_sessions.meta, upload_id)
+    await anyio.to_thread.run_sync(partial(upload_sessions.discard, upload_id))
+    return {"message": "Sessão de upload cancelada"}
+
+@app.post("/api/admin/process-files/uploads/{upload_id}/finalize")
+async def finalize_upload_session(upload_id: str, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
+    """Montar o arquivo, guardar no blob store e gravar a linha em process_files"""
+    if current_user.get('type') != 'admin':
+        raise HTTPException(status_code=403, detail="Acesso negado")
+
+    status = await anyio.to_thread.run_sync(upload_sessions.status, upload_id)
+    if not status['complete']:
+        raise HTTPException(status_code=409, detail={
+            "message": "Upload incompleto",
+            "missing_chunks": status['missing_chunks']
+        })
+
+    meta = await anyio.to_thread.run_sync(upload_sessions.meta, upload_id)
+    claimed_dir = await anyio.to_thread.run_sync(upload_sessions.claim, upload_id)
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique_filename = f"{timestamp}_{meta['client_id']}_{meta['filename']}"
+        temp_path = await anyio.to_thread.run_sync(temp_upload_path)
+
+        try:
+            file_size, file_sha256 = await anyio.to_thread.run_sync(upload_sessions.assemble, claimed_dir, temp_path)
+        except HTTPException:
+            # Conteúdo não confere com o SHA-256 informado: a sessão não tem conserto
+            await anyio.to_thread.run_sync(partial(upload_sessions.discard, session_dir=claimed_dir))
+            raise
+
+        file_id, file_path = await insert_process_file(db_session, meta['client_id'], meta['case_id'],
+                                                       unique_filename, meta['filename'], temp_path,
+                                                       file_size, file_sha256)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro ao finalizar upload {upload_id}: {e}")
+        try:
+            await db_session.rollback()
+        except:
+            pass
+        if os.path.exists(os.path.join(claimed_dir, "data")):
+            # Arquivo ainda não foi movido: o cliente pode finalizar de novo
+            await anyio.to_thread.run_sync(upload_sessions.release, claimed_dir)
+        else:
+            await anyio.to_thread.run_sync(partial(upload_sessions.discard, session_dir=claimed_dir))
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+    await anyio.to_thread.run_sync(partial(upload_sessions.discard, session_dir=claimed_dir))
+    logger.info(f"✅ Upload {upload_id} finalizado: {file_path} ({file_size} bytes)")
+    return {
+        "message": "Arquivo enviado com sucesso",
+        "file": {
+            "id": file_id,
+            "filename": unique_filename,
+            "original_name": meta['filename'],
+            "file_size": file_size,
+            "sha256": file_sha256
+        }
+    }
+
 @app.get("/api/admin/debug/table-structure")
-async def debug_table_structure(db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def debug_table_structure(db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Debug: Verificar estrutura da tabela process_files"""
     try:
         logger.info("🔍 Verificando estrutura da tabela process_files...")
@@ -894,7 +1313,7 @@ async def debug_table_structure(db_session=Depends(get_db), current_user=Depends
 
         # Verificar estrutura da tabela
         describe_query = "DESCRIBE process_files"
-        result = db_session.execute(text(describe_query))
+        result = await db_session.execute(text(describe_query))
         columns = result.fetchall()
 
         columns_info = []
@@ -918,7 +1337,7 @@ async def debug_table_structure(db_session=Depends(get_db), current_user=Depends
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/admin/debug/users")
-async def debug_users(db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def debug_users(db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Debug: Verificar usuários cadastrados"""
     try:
         logger.info("🔍 Verificando usuários...")
@@ -929,7 +1348,7 @@ async def debug_users(db_session=Depends(get_db), current_user=Depends(verify_to
 
         # Buscar todos os usuários
         query = "SELECT id, name, email, type FROM users ORDER BY id"
-        result = db_session.execute(text(query))
+        result = await db_session.execute(text(query))
         users = result.fetchall()
 
         users_list = []
@@ -950,9 +1369,18 @@ async def debug_users(db_session=Depends(get_db), current_user=Depends(verify_to
         logger.error(f"❌ Erro ao verificar usuários: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def finish_blob_release(trashed, committed=True):
+    """finish_release (e as miniaturas, após commit) numa thread, fora do event loop"""
+    if not trashed:
+        return
+    await anyio.to_thread.run_sync(finish_release, trashed, committed)
+    if committed:
+        await anyio.to_thread.run_sync(discard_previews, trashed)
+
 @app.delete("/api/admin/process-files/{file_id}")
-async def delete_process_file(file_id: int, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def delete_process_file(file_id: int, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Deletar arquivo processual"""
+    trashed = []
     try:
         logger.info(f"🗑️ Deletando arquivo ID: {file_id}")
 
@@ -961,67 +1389,92 @@ async def delete_process_file(file_id: int, db_session=Depends(get_db), current_
             raise HTTPException(status_code=403, detail="Acesso negado")
 
         # Buscar arquivo para obter o caminho
-        query = "SELECT file_path FROM process_files WHERE id = :file_id"
-        result = db_session.execute(text(query), {"file_id": file_id})
+        query = "SELECT file_path, user_id, sha256 FROM process_files WHERE id = :file_id"
+        result = await db_session.execute(text(query), {"file_id": file_id})
         file_record = result.fetchone()
 
         if not file_record:
             raise HTTPException(status_code=404, detail="Arquivo não encontrado")
 
-        # Deletar arquivo físico se existir
-        file_path = file_record.file_path
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"🗑️ Arquivo físico deletado: {file_path}")
-            except Exception as e:
-                logger.warning(f"⚠️ Erro ao deletar arquivo físico: {e}")
+        # Blob compartilhado só é apagado quando esta era a última referência
+        trashed = await db_session.run_sync(release_references, [(file_record.sha256, file_record.file_path)])
 
         # Deletar registro do banco
         delete_query = "DELETE FROM process_files WHERE id = :file_id"
-        result = db_session.execute(text(delete_query), {"file_id": file_id})
+        result = await db_session.execute(text(delete_query), {"file_id": file_id})
 
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Arquivo não encontrado")
 
-        db_session.commit()
+        await apply_counter_deltas(db_session, {'total_files': -1})
+        await db_session.commit()
+        await finish_blob_release(trashed)
+        client_stats_cache.file_removed(file_record.user_id)
         logger.info(f"✅ Arquivo {file_id} deletado com sucesso")
 
         return {"message": "Arquivo deletado com sucesso"}
 
     except HTTPException:
+        await finish_blob_release(trashed, committed=False)
         raise
     except Exception as e:
         logger.error(f"❌ Erro ao deletar arquivo: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
+        await finish_blob_release(trashed, committed=False)
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
-@app.get("/api/admin/clients/search")
-async def search_clients(q: str, limit: int = 10, db_session=Depends(get_db), current_user=Depends(verify_token)):
-    """Buscar clientes por nome ou email (admin)"""
+@app.get("/api/admin/search")
+async def search_all(
+    q: str,
+    types: Optional[str] = None,
+    page: int = 1,
+    limit: int = 20,
+    db_session=Depends(get_async_db),
+    current_user=Depends(verify_token)
+):
+    """Busca em clientes (nome, email, CPF), casos (título, descrição) e arquivos (nome original)
+
+    Resultados de todos os tipos ordenados por relevância; `types` filtra
+    (clients,cases,files). Acentos e maiúsculas não fazem diferença.
+    """
     try:
-        logger.info(f"🔍 Buscando clientes com termo: '{q}', limite: {limit}")
+        if current_user.get('type') != 'admin':
+            raise HTTPException(status_code=403, detail="Acesso negado")
+
+        limit = min(clamp_limit(limit), 100)
+        results, has_more, backend = await db_session.run_sync(run_search, q, parse_types(types), page, limit)
+        return {"data": results, "page": page, "limit": limit, "has_more": has_more, "backend": backend}
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro na busca: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+@app.get("/api/admin/clients/search")
+async def search_clients(q: str, limit: int = 10, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
+    """Buscar clientes por nome, email, CPF ou telefone (admin)
+
+    Autocomplete: cada termo casa com o início de uma palavra do nome ou do
+    email, ou com os dígitos do CPF/telefone, sem diferenciar acentos. Vem do
+    índice em memória (src/client_typeahead.py); só antes da primeira carga
+    a busca vai ao banco.
+    """
+    try:
         # Verificar se é admin
         if current_user.get('type') != 'admin':
             raise HTTPException(status_code=403, detail="Acesso negado")
 
+        limit = min(clamp_limit(limit), 100)
+        if client_typeahead.ready:
+            return {"data": client_typeahead.search(q, limit)}
+
         # Buscar clientes que contenham o termo no nome ou email
         search_term = f"%{q}%"
-        logger.info(f"🔍 Termo de busca: '{search_term}'")
-
-        # Primeiro verificar se há clientes
-        count_query = "SELECT COUNT(*) as total FROM users WHERE type = 'cliente'"
-        count_result = db_session.execute(text(count_query))
-        total_clients = count_result.fetchone().total
-        logger.info(f"👥 Total de clientes na base: {total_clients}")
-
-        if total_clients == 0:
-            logger.info("👥 Nenhum cliente encontrado, retornando lista vazia")
-            return {"data": []}
+        logger.debug(f"🔍 Autocomplete ainda não carregado, buscando no banco: '{search_term}'")
 
         query = """
         SELECT id, name, email, phone, cpf, register_date, type
@@ -1031,7 +1484,7 @@ async def search_clients(q: str, limit: int = 10, db_session=Depends(get_db), cu
         ORDER BY name
         LIMIT :limit
         """
-        result = db_session.execute(text(query), {"search_term": search_term, "limit": limit})
+        result = await db_session.execute(text(query), {"search_term": search_term, "limit": limit})
         clients = result.fetchall()
 
         clients_list = []
@@ -1046,7 +1499,6 @@ async def search_clients(q: str, limit: int = 10, db_session=Depends(get_db), cu
                 'type': client.type
             })
 
-        logger.info(f"✅ {len(clients_list)} clientes encontrados")
         return {"data": clients_list}
 
     except HTTPException:
@@ -1055,11 +1507,64 @@ async def search_clients(q: str, limit: int = 10, db_session=Depends(get_db), cu
         logger.error(f"❌ Erro ao buscar clientes: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+def client_lookup_item(client):
+    return {
+        'id': client.id,
+        'name': client.name,
+        'email': client.email,
+        'phone': client.phone,
+        'cpf': client.cpf,
+        'created_at': client.register_date.isoformat() if client.register_date else None,
+        'type': client.type
+    }
+
+@app.get("/api/admin/clients/by-cpf/{cpf}")
+async def get_client_by_cpf(cpf: str, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
+    """Cliente pelo CPF exato, com ou sem pontuação (admin)"""
+    try:
+        if current_user.get('type') != 'admin':
+            raise HTTPException(status_code=403, detail="Acesso negado")
+
+        value = cpf_digits(cpf)
+        if value is None or len(value) != CPF_LENGTH:
+            raise HTTPException(status_code=400, detail=f"CPF deve ter {CPF_LENGTH} dígitos")
+
+        clients = await db_session.run_sync(find_users, 'cpf_digits', value, limit=1)
+        if not clients:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        return {"data": client_lookup_item(clients[0])}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro ao buscar cliente por CPF: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+@app.get("/api/admin/clients/by-phone/{phone}")
+async def get_clients_by_phone(phone: str, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
+    """Clientes pelo telefone exato (DDD + número; pontuação e +55 ignorados) (admin)"""
+    try:
+        if current_user.get('type') != 'admin':
+            raise HTTPException(status_code=403, detail="Acesso negado")
+
+        value = phone_digits(phone)
+        if value is None or len(value) < MIN_PHONE_DIGITS:
+            raise HTTPException(status_code=400, detail=f"Telefone deve ter ao menos {MIN_PHONE_DIGITS} dígitos")
+
+        clients = await db_session.run_sync(find_users, 'phone_digits', value)
+        return {"data": [client_lookup_item(client) for client in clients]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro ao buscar cliente por telefone: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
 @app.get("/api/admin/clients/{client_id}")
-async def get_client(client_id: int, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def get_client(client_id: int, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Buscar cliente específico por ID"""
     try:
-        logger.info(f"🔍 Buscando cliente ID: {client_id}")
+        logger.debug(f"🔍 Buscando cliente ID: {client_id}")
 
         # Verificar se é admin
         if current_user.get('type') != 'admin':
@@ -1071,7 +1576,7 @@ async def get_client(client_id: int, db_session=Depends(get_db), current_user=De
         FROM users
         WHERE id = :client_id AND type = 'cliente'
         """
-        result = db_session.execute(text(query), {"client_id": client_id})
+        result = await db_session.execute(text(query), {"client_id": client_id})
         client = result.fetchone()
 
         if not client:
@@ -1091,7 +1596,7 @@ async def get_client(client_id: int, db_session=Depends(get_db), current_user=De
             'type': client.type
         }
 
-        logger.info(f"✅ Cliente encontrado: {client.name}")
+        logger.debug(f"✅ Cliente encontrado: {client.name}")
         return {"data": client_data}
 
     except HTTPException:
@@ -1101,10 +1606,10 @@ async def get_client(client_id: int, db_session=Depends(get_db), current_user=De
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @app.put("/api/admin/clients/{client_id}")
-async def update_client(client_id: int, request: Request, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def update_client(client_id: int, request: Request, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Atualizar dados de um cliente (admin) - Versão Ultra Simples"""
     try:
-        print(f"🚀 UPDATE CLIENTE {client_id} - INICIADO")
+        logger.debug(f"🚀 UPDATE CLIENTE {client_id} - INICIADO")
 
         # Verificar se é admin
         if current_user.get('type') != 'admin':
@@ -1112,34 +1617,40 @@ async def update_client(client_id: int, request: Request, db_session=Depends(get
 
         # Obter dados do request
         client_data = await request.json()
-        print(f"📝 Dados recebidos: {client_data}")
+        logger.debug(f"📝 Dados recebidos: {client_data}")
+
+        if client_data.get('cpf') and await db_session.run_sync(cpf_in_use, client_data['cpf'], client_id):
+            raise HTTPException(status_code=409, detail="CPF já cadastrado")
 
         # Atualizar campos diretamente
         updates_made = []
 
         if 'name' in client_data:
-            db_session.execute(text("UPDATE users SET name = :name WHERE id = :id"),
+            await db_session.execute(text("UPDATE users SET name = :name WHERE id = :id"),
                              {"name": client_data['name'], "id": client_id})
             updates_made.append(f"name={client_data['name']}")
 
         if 'email' in client_data:
-            db_session.execute(text("UPDATE users SET email = :email WHERE id = :id"),
+            await db_session.execute(text("UPDATE users SET email = :email WHERE id = :id"),
                              {"email": client_data['email'], "id": client_id})
             updates_made.append(f"email={client_data['email']}")
 
         if 'phone' in client_data:
-            db_session.execute(text("UPDATE users SET phone = :phone WHERE id = :id"),
+            await db_session.execute(text("UPDATE users SET phone = :phone WHERE id = :id"),
                              {"phone": client_data['phone'], "id": client_id})
             updates_made.append(f"phone={client_data['phone']}")
 
         if 'cpf' in client_data:
-            db_session.execute(text("UPDATE users SET cpf = :cpf WHERE id = :id"),
+            await db_session.execute(text("UPDATE users SET cpf = :cpf WHERE id = :id"),
                              {"cpf": client_data['cpf'], "id": client_id})
             updates_made.append(f"cpf={client_data['cpf']}")
 
+        await db_session.run_sync(sync_lookup_columns, client_id, client_data)
+
         # Commit
-        db_session.commit()
-        print(f"✅ UPDATES REALIZADOS: {', '.join(updates_made)}")
+        await db_session.commit()
+        client_typeahead.update(client_id, client_data)
+        logger.debug(f"✅ UPDATES REALIZADOS: {', '.join(updates_made)}")
 
         # Retornar resposta simples
         return {
@@ -1157,29 +1668,32 @@ async def update_client(client_id: int, request: Request, db_session=Depends(get
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ ERRO: {e}")
+        logger.exception(f"❌ ERRO: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/admin/clients")
-async def create_client(request: Request, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def create_client(request: Request, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Criar novo cliente (admin)"""
     try:
-        print("🚀 CRIANDO NOVO CLIENTE")
+        logger.debug("🚀 CRIANDO NOVO CLIENTE")
 
         if current_user.get('type') != 'admin':
             raise HTTPException(status_code=403, detail="Acesso negado")
 
         data = await request.json()
-        print(f"📝 Dados do cliente: {data}")
+        logger.debug(f"📝 Dados do cliente: {data}")
+
+        if data.get('cpf') and await db_session.run_sync(cpf_in_use, data['cpf']):
+            raise HTTPException(status_code=409, detail="CPF já cadastrado")
 
         # Insert usando as colunas corretas da tabela
         query = "INSERT INTO users (name, email, phone, cpf, address, city, state, zip_code, type, password_hash, register_date) VALUES (:name, :email, :phone, :cpf, :address, :city, :state, :zip_code, 'cliente', :password_hash, NOW())"
 
-        result = db_session.execute(text(query), {
+        result = await db_session.execute(text(query), {
             "name": data.get('name', ''),
             "email": data.get('email', ''),
             "phone": data.get('phone', ''),
@@ -1188,13 +1702,17 @@ async def create_client(request: Request, db_session=Depends(get_db), current_us
             "city": data.get('city', ''),
             "state": data.get('state', ''),
             "zip_code": data.get('zip_code', ''),
-            "password_hash": data.get('password', 'temp123')
+            "password_hash": await password_hasher.hash(data.get('password', 'temp123'))
         })
-
-        db_session.commit()
         client_id = result.lastrowid
+        await db_session.run_sync(sync_lookup_columns, client_id, {"cpf": data.get('cpf', ''),
+                                                                   "phone": data.get('phone', '')})
+        await apply_counter_deltas(db_session, {'total_clients': 1})
 
-        print(f"✅ Cliente {client_id} criado!")
+        await db_session.commit()
+        client_typeahead.add(client_id, data)
+
+        logger.debug(f"✅ Cliente {client_id} criado!")
 
         return {
             "data": {
@@ -1210,46 +1728,70 @@ async def create_client(request: Request, db_session=Depends(get_db), current_us
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ ERRO ao criar cliente: {e}")
+        logger.exception(f"❌ ERRO ao criar cliente: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/admin/clients/{client_id}")
-async def delete_client(client_id: int, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def delete_client(client_id: int, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Deletar cliente (admin)"""
+    trashed = []
     try:
-        print(f"🗑️ DELETANDO CLIENTE {client_id}")
+        logger.debug(f"🗑️ DELETANDO CLIENTE {client_id}")
 
         if current_user.get('type') != 'admin':
             raise HTTPException(status_code=403, detail="Acesso negado")
 
+        # Casos e arquivos do cliente (removidos em cascata) para ajustar os contadores
+        cases_result = await db_session.execute(
+            text("SELECT status, COUNT(*) as total FROM client_cases WHERE user_id = :client_id GROUP BY status"),
+            {"client_id": client_id})
+        files_result = await db_session.execute(
+            text("SELECT sha256, file_path FROM process_files WHERE user_id = :client_id"), {"client_id": client_id})
+        client_files = [(row.sha256, row.file_path) for row in files_result.fetchall()]
+        cascade_deltas = merge_deltas(
+            *[{name: delta * row.total for name, delta in case_deltas(row.status, -1).items()}
+              for row in cases_result.fetchall()],
+            {'total_files': -len(client_files)}
+        )
+
+        # Casos removidos em cascata saem do rollup diário (antes do DELETE, na mesma transação)
+        await db_session.run_sync(record_cases_removed, 'user_id', client_id)
+
         # Deletar cliente
         query = "DELETE FROM users WHERE id = :client_id AND type = 'cliente'"
-        result = db_session.execute(text(query), {"client_id": client_id})
+        result = await db_session.execute(text(query), {"client_id": client_id})
 
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
 
-        db_session.commit()
-        print(f"✅ Cliente {client_id} deletado!")
+        trashed = await db_session.run_sync(release_references, client_files)
+        await apply_counter_deltas(db_session, merge_deltas({'total_clients': -1}, cascade_deltas))
+        await db_session.commit()
+        await finish_blob_release(trashed)
+        client_stats_cache.invalidate(client_id)
+        client_typeahead.remove(client_id)
+        logger.debug(f"✅ Cliente {client_id} deletado!")
 
         return {"message": "Cliente deletado com sucesso"}
 
     except HTTPException:
+        await finish_blob_release(trashed, committed=False)
         raise
     except Exception as e:
-        print(f"❌ ERRO ao deletar cliente: {e}")
+        logger.exception(f"❌ ERRO ao deletar cliente: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
+        await finish_blob_release(trashed, committed=False)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/admin/processes/{process_id}")
-async def update_process(process_id: int, request: Request, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def update_process(process_id: int, request: Request, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Atualizar dados de um processo/caso (admin)"""
     try:
         logger.info(f"📝 Atualizando processo ID: {process_id}")
@@ -1263,9 +1805,10 @@ async def update_process(process_id: int, request: Request, db_session=Depends(g
         logger.info(f"📝 Dados do processo recebidos: {process_data}")
 
         # Verificar se processo existe
-        check_query = "SELECT id FROM client_cases WHERE id = :process_id"
-        check_result = db_session.execute(text(check_query), {"process_id": process_id})
-        if not check_result.fetchone():
+        check_query = "SELECT id, user_id, service_id, status, created_at, updated_at FROM client_cases WHERE id = :process_id"
+        check_result = await db_session.execute(text(check_query), {"process_id": process_id})
+        existing_process = check_result.fetchone()
+        if not existing_process:
             raise HTTPException(status_code=404, detail="Processo não encontrado")
 
         # Preparar campos para atualização
@@ -1291,10 +1834,24 @@ async def update_process(process_id: int, request: Request, db_session=Depends(g
         if not update_fields:
             raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
 
+        # Troca de serviço muda a categoria do caso no rollup: guardar o que ele somava antes
+        recategorized = 'service_id' in params and params['service_id'] != existing_process.service_id
+        if recategorized:
+            rollup_before = await db_session.run_sync(case_contributions, 'id', process_id)
+
         # Executar atualização
         update_query = f"UPDATE client_cases SET {', '.join(update_fields)} WHERE id = :process_id"
-        db_session.execute(text(update_query), params)
-        db_session.commit()
+        await db_session.execute(text(update_query), params)
+        if 'status' in params:
+            await apply_counter_deltas(db_session, status_change_deltas(existing_process.status, params['status']))
+        if recategorized:
+            await db_session.run_sync(record_case_recategorized, process_id, rollup_before)
+        elif 'status' in params:
+            await db_session.run_sync(record_status_change, process_id, existing_process.status,
+                                      params['status'], existing_process.created_at, existing_process.updated_at)
+        await db_session.commit()
+        if 'status' in params:
+            client_stats_cache.case_status_changed(existing_process.user_id, existing_process.status, params['status'])
 
         # Buscar processo atualizado
         select_query = """
@@ -1306,7 +1863,7 @@ async def update_process(process_id: int, request: Request, db_session=Depends(g
         LEFT JOIN services s ON cc.service_id = s.id
         WHERE cc.id = :process_id
         """
-        result = db_session.execute(text(select_query), {"process_id": process_id})
+        result = await db_session.execute(text(select_query), {"process_id": process_id})
         updated_process = result.fetchone()
 
         process_data = {
@@ -1329,46 +1886,66 @@ async def update_process(process_id: int, request: Request, db_session=Depends(g
         raise
     except Exception as e:
         logger.error(f"❌ Erro ao atualizar processo: {e}")
-        db_session.rollback()
+        await db_session.rollback()
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @app.delete("/api/admin/processes/{process_id}")
-async def delete_process(process_id: int, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def delete_process(process_id: int, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Deletar um processo/caso (admin)"""
+    trashed = []
     try:
-        print(f"🗑️ DELETANDO PROCESSO {process_id}")
+        logger.debug(f"🗑️ DELETANDO PROCESSO {process_id}")
 
         # Verificar se é admin
         if current_user.get('type') != 'admin':
             raise HTTPException(status_code=403, detail="Acesso negado")
 
+        # Dono e status antes de deletar (para atualizar as estatísticas do cliente)
+        existing_result = await db_session.execute(
+            text("SELECT user_id, status FROM client_cases WHERE id = :process_id"), {"process_id": process_id})
+        existing_process = existing_result.fetchone()
+        files_result = await db_session.execute(
+            text("SELECT sha256, file_path FROM process_files WHERE case_id = :process_id"), {"process_id": process_id})
+        case_files = [(row.sha256, row.file_path) for row in files_result.fetchall()]
+
+        # Tirar o caso do rollup diário antes de removê-lo
+        await db_session.run_sync(record_cases_removed, 'id', process_id)
+
         # Deletar processo
         query = "DELETE FROM client_cases WHERE id = :process_id"
-        result = db_session.execute(text(query), {"process_id": process_id})
+        result = await db_session.execute(text(query), {"process_id": process_id})
 
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Processo não encontrado")
 
-        db_session.commit()
-        print(f"✅ Processo {process_id} deletado!")
+        trashed = await db_session.run_sync(release_references, case_files)
+        await apply_counter_deltas(db_session, merge_deltas(case_deltas(existing_process.status, -1),
+                                                            {'total_files': -len(case_files)}))
+        await db_session.commit()
+        await finish_blob_release(trashed)
+        # Arquivos do caso são removidos em cascata: recarregar do banco
+        client_stats_cache.invalidate(existing_process.user_id)
+        logger.debug(f"✅ Processo {process_id} deletado!")
 
         return {"message": "Processo deletado com sucesso"}
 
     except HTTPException:
+        await finish_blob_release(trashed, committed=False)
         raise
     except Exception as e:
-        print(f"❌ ERRO ao deletar processo: {e}")
+        logger.exception(f"❌ ERRO ao deletar processo: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
+        await finish_blob_release(trashed, committed=False)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/admin/clients/{client_id}/cases")
-async def create_client_case(client_id: int, request: Request, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def create_client_case(client_id: int, request: Request, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Criar um novo caso para um cliente (admin) - Ultra Simples"""
     try:
-        print(f"🚀 CRIANDO CASO PARA CLIENTE {client_id}")
+        logger.debug(f"🚀 CRIANDO CASO PARA CLIENTE {client_id}")
 
         # Verificar se é admin
         if current_user.get('type') != 'admin':
@@ -1376,14 +1953,14 @@ async def create_client_case(client_id: int, request: Request, db_session=Depend
 
         # Obter dados do request
         case_data = await request.json()
-        print(f"📝 Dados recebidos: {case_data}")
+        logger.debug(f"📝 Dados recebidos: {case_data}")
 
         # Dados básicos
         title = case_data.get('title', 'Novo Caso')
         description = case_data.get('description', '')
         status = case_data.get('status', 'pendente')
 
-        print(f"📝 Título: {title}, Descrição: {description}, Status: {status}")
+        logger.debug(f"📝 Título: {title}, Descrição: {description}, Status: {status}")
 
         # Insert mais simples possível - CORRIGIDO: usar user_id em vez de client_id
         insert_query = "INSERT INTO client_cases (user_id, title, description, status, created_at) VALUES (:user_id, :title, :description, :status, NOW())"
@@ -1395,13 +1972,16 @@ async def create_client_case(client_id: int, request: Request, db_session=Depend
             "status": status
         }
 
-        print(f"📝 Executando insert com params: {params}")
+        logger.debug(f"📝 Executando insert com params: {params}")
 
-        result = db_session.execute(text(insert_query), params)
-        db_session.commit()
+        result = await db_session.execute(text(insert_query), params)
+        await apply_counter_deltas(db_session, case_deltas(status))
+        await db_session.run_sync(record_case_opened, result.lastrowid, status)
+        await db_session.commit()
+        client_stats_cache.case_created(client_id, status)
 
         case_id = result.lastrowid
-        print(f"✅ Caso criado com ID: {case_id}")
+        logger.debug(f"✅ Caso criado com ID: {case_id}")
 
         # Resposta ultra simples
         return {
@@ -1418,19 +1998,18 @@ async def create_client_case(client_id: int, request: Request, db_session=Depend
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ ERRO DETALHADO: {e}")
-        print(f"❌ TIPO: {type(e)}")
+        logger.exception(f"❌ ERRO DETALHADO: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
 
 @app.post("/api/admin/create-case")
-async def create_case_alternative(request: Request, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def create_case_alternative(request: Request, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Rota alternativa para criar caso - Ultra Simples"""
     try:
-        print("🚀 ROTA ALTERNATIVA - CRIAR CASO")
+        logger.debug("🚀 ROTA ALTERNATIVA - CRIAR CASO")
 
         # Verificar se é admin
         if current_user.get('type') != 'admin':
@@ -1438,7 +2017,7 @@ async def create_case_alternative(request: Request, db_session=Depends(get_db),
 
         # Obter dados
         data = await request.json()
-        print(f"📝 Dados: {data}")
+        logger.debug(f"📝 Dados: {data}")
 
         client_id = data.get('client_id')
         title = data.get('title', 'Novo Caso')
@@ -1451,17 +2030,20 @@ async def create_case_alternative(request: Request, db_session=Depends(get_db),
         # Insert direto - CORRIGIDO: usar user_id
         query = "INSERT INTO client_cases (user_id, title, description, status, created_at) VALUES (:user_id, :title, :description, :status, NOW())"
 
-        result = db_session.execute(text(query), {
+        result = await db_session.execute(text(query), {
             "user_id": client_id,  # A tabela usa user_id
             "title": title,
             "description": description,
             "status": status
         })
+        await apply_counter_deltas(db_session, case_deltas(status))
+        await db_session.run_sync(record_case_opened, result.lastrowid, status)
 
-        db_session.commit()
+        await db_session.commit()
+        client_stats_cache.case_created(int(client_id), status)
         case_id = result.lastrowid
 
-        print(f"✅ Caso {case_id} criado!")
+        logger.debug(f"✅ Caso {case_id} criado!")
 
         return {
             "data": {
@@ -1476,18 +2058,18 @@ async def create_case_alternative(request: Request, db_session=Depends(get_db),
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ ERRO ALTERNATIVO: {e}")
+        logger.exception(f"❌ ERRO ALTERNATIVO: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/create-case-public")
-async def create_case_public(request: Request, db_session=Depends(get_db), current_user=Depends(verify_token)):
+async def create_case_public(request: Request, db_session=Depends(get_async_db), current_user=Depends(verify_token)):
     """Rota pública para criar caso - Versão que DEVE funcionar"""
     try:
-        print("🚀 ROTA PÚBLICA - CRIAR CASO")
+        logger.debug("🚀 ROTA PÚBLICA - CRIAR CASO")
 
         # Verificar se é admin
         if current_user.get('type') != 'admin':
@@ -1495,14 +2077,14 @@ async def create_case_public(request: Request, db_session=Depends(get_db), curre
 
         # Obter dados
         data = await request.json()
-        print(f"📝 Dados recebidos: {data}")
+        logger.debug(f"📝 Dados recebidos: {data}")
 
         client_id = data.get('client_id')
         title = data.get('title', 'Novo Caso')
         description = data.get('description', '')
         status = data.get('status', 'pendente')
 
-        print(f"📝 client_id: {client_id}, title: {title}")
+        logger.debug(f"📝 client_id: {client_id}, title: {title}")
 
         if not client_id:
             raise HTTPException(status_code=400, detail="client_id obrigatório")
@@ -1510,7 +2092,7 @@ async def create_case_public(request: Request, db_session=Depends(get_db), curre
         # Usar a forma mais simples possível
         try:
             # Primeiro, verificar se a tabela existe
-            check_table = db_session.execute(text("SHOW TABLES LIKE 'client_cases'"))
+            check_table = await db_session.execute(text("SHOW TABLES LIKE 'client_cases'"))
             if not check_table.fetchone():
                 raise HTTPException(status_code=500, detail="Tabela client_cases não existe")
 
@@ -1520,13 +2102,14 @@ async def create_case_public(request: Request, db_session=Depends(get_db), curre
             VALUES ({client_id}, '{title}', '{description}', '{status}', NOW())
             """
 
-            print(f"📝 SQL: {insert_sql}")
-
-            result = db_session.execute(text(insert_sql))
-            db_session.commit()
+            result = await db_session.execute(text(insert_sql))
+            await apply_counter_deltas(db_session, case_deltas(status))
+            await db_session.run_sync(record_case_opened, result.lastrowid, status)
+            await db_session.commit()
+            client_stats_cache.case_created(int(client_id), status)
 
             case_id = result.lastrowid
-            print(f"✅ Caso {case_id} criado com sucesso!")
+            logger.debug(f"✅ Caso {case_id} criado com sucesso!")
 
             return {
                 "data": {
@@ -1540,15 +2123,15 @@ async def create_case_public(request: Request, db_session=Depends(get_db), curre
             }
 
         except Exception as sql_error:
-            print(f"❌ ERRO SQL: {sql_error}")
+            logger.exception(f"❌ ERRO SQL: {sql_error}")
             raise HTTPException(status_code=500, detail=f"Erro SQL: {str(sql_error)}")
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ ERRO GERAL: {e}")
+        logger.exception(f"❌ ERRO GERAL: {e}")
         try:
-            db_session.rollback()
+            await db_session.rollback()
         except:
             pass
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migrar os arquivos de processo existentes para o blob store (uploads/blobs)
+
+Para cada linha de process_files cujo arquivo ainda está fora do blob store:
+calcula o SHA-256, coloca o conteúdo em uploads/blobs/ab/cd/<sha256> (um único
+blob para conteúdos idênticos), soma as referências em file_blobs e aponta a
+linha para o blob. O arquivo antigo só é apagado depois do commit, então uma
+interrupção no meio nunca deixa linha apontando para arquivo inexistente; basta
+rodar de novo.
+
+Uso:
+    python migrate_uploads_to_blobs.py [--dry-run]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from sqlalchemy import text
+
+from database import DB_HOST, DB_PORT, DB_NAME, SessionLocal
+from advbs_shared.blob_store import BLOB_STORE_DIR, blob_path, ensure_blob_table, register_references, temp_upload_path
+from uploads import UPLOAD_DIR, UPLOAD_CHUNK_SIZE
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        while True:
+            chunk = handle.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+    return size, digest.hexdigest()
+
+
+def in_blob_store(path, base_dir):
+    return os.path.abspath(path).startswith(os.path.abspath(base_dir) + os.sep)
+
+
+def place_blob(source_path, sha256, base_dir):
+    """Garantir o blob sem mexer no original (hard link ou cópia)"""
+    path = blob_path(sha256, base_dir)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.link(source_path, path)
+    except OSError:
+        temp_path = temp_upload_path(base_dir)
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, path)
+    return path
+
+
+def migrate(session, dry_run=False, base_dir=BLOB_STORE_DIR, upload_dir=UPLOAD_DIR):
+    """Retorna um resumo {arquivos, linhas, blobs, ausentes, bytes_antes, bytes_depois, orfaos}"""
+    ensure_blob_table(session)
+    rows = session.execute(text("SELECT id, file_path FROM process_files")).fetchall()
+
+    by_path = defaultdict(list)
+    referenced = set()
+    for row in rows:
+        if not row.file_path:
+            continue
+        referenced.add(os.path.abspath(row.file_path))
+        if not in_blob_store(row.file_path, base_dir):
+            by_path[row.file_path].append(row.id)
+
+    summary = {"arquivos": 0, "linhas": 0, "blobs": 0, "ausentes": 0,
+               "bytes_antes": 0, "bytes_depois": 0, "orfaos": []}
+    seen = set()
+    for file_path, ids in sorted(by_path.items()):
+        if not os.path.exists(file_path):
+            print(f"⚠️ Arquivo não encontrado ({len(ids)} linha(s)): {file_path}")
+            summary["ausentes"] += 1
+            continue
+
+        size, sha256 = hash_file(file_path)
+        summary["arquivos"] += 1
+        summary["linhas"] += len(ids)
+        summary["bytes_antes"] += size
+        if sha256 not in seen and not os.path.exists(blob_path(sha256, base_dir)):
+            summary["bytes_depois"] += size
+        if sha256 not in seen:
+            summary["blobs"] += 1
+            seen.add(sha256)
+        if dry_run:
+            continue
+
+        path = place_blob(file_path, sha256, base_dir)
+        register_references(session, sha256, size, refs=len(ids), base_dir=base_dir)
+        for file_id in ids:
+            session.execute(text("UPDATE process_files SET file_path = :path, sha256 = :sha256, "
+                                 "file_size = :size WHERE id = :id"),
+                            {"path": path, "sha256": sha256, "size": size, "id": file_id})
+        session.commit()
+        os.remove(file_path)
+
+    # Arquivos no diretório antigo sem nenhuma linha apontando (apenas relatório)
+    if os.path.isdir(upload_dir):
+        for name in sorted(os.listdir(upload_dir)):
+            path = os.path.join(upload_dir, name)
+            if os.path.isfile(path) and os.path.abspath(path) not in referenced:
+                summary["orfaos"].append(path)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrar uploads/ para o blob store deduplicado")
+    parser.add_argument("--dry-run", action="store_true", help="apenas calcular a economia, sem mover nada")
+    args = parser.parse_args()
+
+    print(f"🔗 Conectando ao banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    session = SessionLocal()
+    try:
+        summary = migrate(session, dry_run=args.dry_run)
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
+    finally:
+        session.close()
+
+    mb = 1024 * 1024
+    print(f"📁 {summary['arquivos']} arquivos ({summary['linhas']} linhas) -> {summary['blobs']} blobs")
+    print(f"💾 {summary['bytes_antes'] / mb:.1f} MB -> {summary['bytes_depois'] / mb:.1f} MB")
+    if summary["ausentes"]:
+        print(f"⚠️ {summary['ausentes']} arquivos referenciados não existem no disco")
+    if summary["orfaos"]:
+        print(f"⚠️ {len(summary['orfaos'])} arquivos em {UPLOAD_DIR} sem linha em process_files (não removidos)")
+    print("✅ Simulação concluída (nada foi alterado)" if args.dry_run else "✅ Migração concluída")
+
+
+if __name__ == "__main__":
+    main()
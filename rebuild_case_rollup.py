@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recalcular o rollup diário de casos (case_daily_rollup) a partir de client_cases
+
+Normalmente a tabela é atualizada pelas rotas que criam casos e mudam status;
+use este script após importações, escritas feitas pelo app Flask ou SQL manual.
+
+Uso:
+    python rebuild_case_rollup.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from database import DB_HOST, DB_PORT, DB_NAME, SessionLocal
+from advbs_shared.case_rollup import rebuild_rollup
+
+
+def main():
+    print(f"🔗 Conectando ao banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    session = SessionLocal()
+    try:
+        start = time.perf_counter()
+        total = rebuild_rollup(session)
+        print(f"✅ case_daily_rollup recalculada: {total} linhas em {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Erro ao recalcular rollup: {e}")
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
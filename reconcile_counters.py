@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reconciliar os contadores materializados (system_counters) com as tabelas
+
+Recalcula cada contador com COUNT(*), mostra o desvio em relação ao valor
+armazenado e grava os valores corretos (exceto com --dry-run). Também cria e
+popula a tabela na primeira execução.
+
+Uso:
+    python reconcile_counters.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from database import DB_HOST, DB_PORT, DB_NAME, SessionLocal
+from counters import reconcile_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconciliar system_counters com as tabelas")
+    parser.add_argument("--dry-run", action="store_true", help="apenas mostrar o desvio, sem gravar")
+    args = parser.parse_args()
+
+    print(f"🔗 Conectando ao banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    session = SessionLocal()
+    try:
+        report = reconcile_counters(session, apply=not args.dry_run)
+        if args.dry_run:
+            session.rollback()
+    finally:
+        session.close()
+
+    drifted = 0
+    print(f"{'contador':<18}{'armazenado':>12}{'real':>12}{'desvio':>10}")
+    for name, item in report.items():
+        stored = "-" if item["stored"] is None else item["stored"]
+        drift = "-" if item["drift"] is None else f"{item['drift']:+d}"
+        if item["drift"] != 0:
+            drifted += 1
+        print(f"{name:<18}{stored:>12}{item['actual']:>12}{drift:>10}")
+
+    if drifted == 0:
+        print("✅ Contadores consistentes")
+    elif args.dry_run:
+        print(f"⚠️ {drifted} contador(es) com desvio (dry-run, nada gravado)")
+    else:
+        print(f"✅ {drifted} contador(es) corrigido(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# advbs_shared
+# Código usado pela API FastAPI da raiz (main.py) e pelos apps do advBS-backend
+# (API FastAPI e app Flask). Só depende do SQLAlchemy: nada de FastAPI, Flask
+# ou anyio aqui - cada app mantém a camada HTTP nos próprios módulos.
+#
+# Instalação: "./shared" no requirements.txt da raiz e "../../shared" no do
+# advBS-backend/poker_academy_api (pip install -r a partir do diretório do app).
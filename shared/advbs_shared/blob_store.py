@@ -0,0 +1,169 @@
+# advbs_shared/blob_store.py
+# Armazenamento dos arquivos de processo endereçado por conteúdo (SHA-256), usado
+# pela API da raiz e pelo app Flask (BLOB_STORE_DIR deve ser o mesmo nos dois)
+import logging
+import os
+import uuid
+from collections import Counter
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "uploads/blobs")
+
+# Uma linha por conteúdo distinto; ref_count = linhas de process_files que apontam para o blob
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS file_blobs (
+    sha256 CHAR(64) NOT NULL PRIMARY KEY,
+    size BIGINT NOT NULL,
+    path VARCHAR(500) NOT NULL,
+    ref_count INT NOT NULL DEFAULT 0
+)
+"""
+
+_INSERT_REF = """
+INSERT INTO file_blobs (sha256, size, path, ref_count)
+VALUES (:sha256, :size, :path, :refs)
+"""
+
+ADD_REF_SQL = {
+    'mysql': _INSERT_REF + "ON DUPLICATE KEY UPDATE ref_count = ref_count + VALUES(ref_count)",
+    'sqlite': _INSERT_REF + "ON CONFLICT (sha256) DO UPDATE SET ref_count = ref_count + excluded.ref_count"
+}
+
+
+def blob_path(sha256, base_dir=BLOB_STORE_DIR):
+    """uploads/blobs/ab/cd/abcd... (dois níveis para não lotar um diretório)"""
+    return os.path.join(base_dir, sha256[:2], sha256[2:4], sha256)
+
+
+def temp_upload_path(base_dir=BLOB_STORE_DIR):
+    """Caminho temporário no mesmo sistema de arquivos dos blobs (rename atômico)"""
+    temp_dir = os.path.join(base_dir, "tmp")
+    os.makedirs(temp_dir, exist_ok=True)
+    return os.path.join(temp_dir, uuid.uuid4().hex)
+
+
+def _dialect_name(session):
+    # Pela conexão: a sessão do Flask-SQLAlchemy não aceita get_bind() sem mapper
+    return session.connection().dialect.name
+
+
+def _lock_suffix(session):
+    # SQLite não tem FOR UPDATE (a transação de escrita já é exclusiva)
+    return " FOR UPDATE" if _dialect_name(session) == 'mysql' else ""
+
+
+def _place_blob(source_path, path):
+    if os.path.exists(path):
+        os.remove(source_path)  # conteúdo idêntico já armazenado
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+
+def add_reference(session, source_path, sha256, size, refs=1, base_dir=BLOB_STORE_DIR):
+    """Somar `refs` referências ao blob e garantir o arquivo em disco
+
+    O upsert trava a linha do blob até o commit da rota, então uma exclusão
+    concorrente do último uso não consegue apagar o arquivo entre a checagem
+    de existência e o commit. source_path é movido (ou descartado, se o
+    conteúdo já existe). Retorna o caminho do blob para process_files.file_path.
+    """
+    path = register_references(session, sha256, size, refs, base_dir)
+    _place_blob(source_path, path)
+    return path
+
+
+def register_references(session, sha256, size, refs=1, base_dir=BLOB_STORE_DIR):
+    """Só a parte do banco de add_reference (o chamador cuida do arquivo)"""
+    path = blob_path(sha256, base_dir)
+    dialect = _dialect_name(session)
+    session.execute(text(ADD_REF_SQL.get(dialect, ADD_REF_SQL['mysql'])),
+                    {"sha256": sha256, "size": size, "path": path, "refs": refs})
+    return path
+
+
+def release_references(session, files):
+    """Remover uma referência por arquivo (linhas de process_files a excluir)
+
+    `files` são pares (sha256, file_path). Blobs que ficam sem referência e
+    arquivos antigos fora do blob store são renomeados para um nome temporário
+    ainda dentro da transação; depois do commit chame finish_release() para
+    apagá-los de vez (ou restaurá-los se a transação falhou).
+    Retorna a lista [(caminho temporário, caminho original)].
+    """
+    files = list(files)
+    counts = Counter(sha256 for sha256, _ in files if sha256)
+    released = set()
+    trashed = []
+    # Ordem fixa de travamento entre exclusões concorrentes
+    for sha256 in sorted(counts):
+        row = session.execute(text("SELECT ref_count, path FROM file_blobs WHERE sha256 = :sha256"
+                                   + _lock_suffix(session)), {"sha256": sha256}).fetchone()
+        if row is None:
+            continue
+        released.add(sha256)
+        if row.ref_count - counts[sha256] > 0:
+            session.execute(text("UPDATE file_blobs SET ref_count = ref_count - :refs WHERE sha256 = :sha256"),
+                            {"refs": counts[sha256], "sha256": sha256})
+        else:
+            session.execute(text("DELETE FROM file_blobs WHERE sha256 = :sha256"), {"sha256": sha256})
+            trashed.append(_trash(row.path))
+
+    # Arquivos gravados antes do blob store: caminho exclusivo da linha
+    for sha256, file_path in files:
+        if sha256 not in released and file_path:
+            trashed.append(_trash(file_path))
+    return [item for item in trashed if item]
+
+
+def _trash(path):
+    if not os.path.exists(path):
+        return None
+    trash_path = f"{path}.deleted-{uuid.uuid4().hex[:8]}"
+    os.replace(path, trash_path)
+    return trash_path, path
+
+
+def finish_release(trashed, committed=True):
+    """Apagar (após commit) ou restaurar (após rollback) os arquivos de release_references"""
+    for trash_path, path in trashed:
+        try:
+            if committed:
+                os.remove(trash_path)
+                logger.info(f"🗑️ Arquivo físico deletado: {path}")
+            else:
+                os.replace(trash_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Erro ao finalizar exclusão de {path}: {e}")
+
+
+def discard_unreferenced_blob(session, sha256, base_dir=BLOB_STORE_DIR):
+    """Apagar o arquivo do blob se nenhuma linha de file_blobs o referencia
+
+    Para depois de uma transação de add_reference que falhou (o rollback
+    desfez a referência, mas o arquivo já tinha sido movido). A linha é
+    travada (no MySQL, a trava de intervalo vale também sem a linha): um
+    upload concorrente do mesmo conteúdo espera e, sem o arquivo, grava o seu.
+    Retorna True se o arquivo foi apagado.
+    """
+    try:
+        row = session.execute(text("SELECT ref_count FROM file_blobs WHERE sha256 = :sha256"
+                                   + _lock_suffix(session)), {"sha256": sha256}).fetchone()
+        removed = False
+        path = blob_path(sha256, base_dir)
+        if row is None and os.path.exists(path):
+            os.remove(path)
+            removed = True
+        session.commit()
+        return removed
+    except Exception:
+        session.rollback()
+        raise
+
+
+def ensure_blob_table(session):
+    session.execute(text(CREATE_TABLE_SQL))
+    session.commit()
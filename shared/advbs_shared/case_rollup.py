@@ -0,0 +1,216 @@
+# advbs_shared/case_rollup.py
+# Rollup diário de casos por categoria (case_daily_rollup): escritas incrementais
+# feitas pelas rotas da API da raiz e pelos eventos do ORM do app Flask, e o
+# recálculo completo a partir de client_cases
+import logging
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+NO_CATEGORY = 'sem_categoria'
+
+# Uma linha por (dia, categoria). Os contadores registram eventos: caso aberto
+# no dia e caso concluído no dia (com o tempo desde a abertura em segundos).
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS case_daily_rollup (
+    day DATE NOT NULL,
+    category VARCHAR(32) NOT NULL,
+    opened INT NOT NULL DEFAULT 0,
+    concluded INT NOT NULL DEFAULT 0,
+    resolution_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category)
+)
+"""
+
+_UPSERT_SELECT = """
+INSERT INTO case_daily_rollup (day, category, opened, concluded, resolution_seconds)
+SELECT :day, COALESCE(s.category, :no_category), :opened, :concluded, :seconds
+FROM client_cases cc
+LEFT JOIN services s ON s.id = cc.service_id
+WHERE cc.id = :case_id
+"""
+
+_UPSERT_VALUES = """
+INSERT INTO case_daily_rollup (day, category, opened, concluded, resolution_seconds)
+VALUES (:day, :category, :opened, :concluded, :seconds)
+"""
+
+_ON_CONFLICT = {
+    'mysql': """
+ON DUPLICATE KEY UPDATE
+    opened = opened + VALUES(opened),
+    concluded = concluded + VALUES(concluded),
+    resolution_seconds = resolution_seconds + VALUES(resolution_seconds)
+""",
+    'sqlite': """
+ON CONFLICT (day, category) DO UPDATE SET
+    opened = opened + excluded.opened,
+    concluded = concluded + excluded.concluded,
+    resolution_seconds = resolution_seconds + excluded.resolution_seconds
+"""
+}
+
+# Evento de um caso (categoria lida de client_cases/services) e linhas já
+# agregadas (dia, categoria), somados ao que a tabela tem
+UPSERT_SQL = {dialect: _UPSERT_SELECT + suffix for dialect, suffix in _ON_CONFLICT.items()}
+UPSERT_VALUES_SQL = {dialect: _UPSERT_VALUES + suffix for dialect, suffix in _ON_CONFLICT.items()}
+
+# Colunas de client_cases aceitas por case_contributions
+CASE_COLUMNS = ('id', 'user_id', 'service_id')
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _dialect_name(executor):
+    # Sessão da rota ou conexão de um evento do ORM (app Flask)
+    return (getattr(executor, 'dialect', None) or executor.get_bind().dialect).name
+
+
+def record_case_event(session, case_id, opened=0, concluded=0, resolution_seconds=0, day=None):
+    """Somar um evento do caso no rollup do dia (na transação da rota)"""
+    dialect = _dialect_name(session)
+    session.execute(text(UPSERT_SQL.get(dialect, UPSERT_SQL['mysql'])), {
+        "day": day or date.today(),
+        "no_category": NO_CATEGORY,
+        "opened": opened,
+        "concluded": concluded,
+        "seconds": int(resolution_seconds),
+        "case_id": case_id
+    })
+
+
+def record_case_opened(session, case_id, status, day=None):
+    """Caso criado; se já nasce concluído conta também como conclusão imediata"""
+    record_case_event(session, case_id, opened=1, concluded=1 if status == 'concluido' else 0, day=day)
+
+
+def _resolution_seconds(created_at, concluded_at):
+    created_at = _as_datetime(created_at)
+    return int(max((concluded_at - created_at).total_seconds(), 0)) if created_at else 0
+
+
+def record_status_change(session, case_id, old_status, new_status, created_at, updated_at=None, now=None):
+    """Entrada e saída de concluido, como rebuild_rollup contaria
+
+    rebuild_rollup conta uma conclusão por caso concluído, no dia de
+    updated_at. Ao sair de concluido (reabertura) a conclusão contada é
+    desfeita no dia do updated_at anterior à mudança; ao entrar, é contada
+    agora (now, que vira o novo updated_at) com o tempo desde a abertura.
+    Troca de serviço e exclusão de casos ficam com record_case_recategorized
+    e record_cases_removed.
+    """
+    if old_status == new_status:
+        return
+    now = now or datetime.now()
+    if old_status == 'concluido':
+        concluded_at = _as_datetime(updated_at) or now
+        record_case_event(session, case_id, concluded=-1, day=concluded_at.date(),
+                          resolution_seconds=-_resolution_seconds(created_at, concluded_at))
+    if new_status == 'concluido':
+        record_case_event(session, case_id, concluded=1, day=now.date(),
+                          resolution_seconds=_resolution_seconds(created_at, now))
+
+
+_CASES_SELECT = """
+    SELECT cc.status, cc.created_at, cc.updated_at, COALESCE(s.category, :no_category) as category
+    FROM client_cases cc
+    LEFT JOIN services s ON s.id = cc.service_id
+"""
+
+
+def _aggregate(rows):
+    """{(dia, categoria): [abertos, concluídos, segundos]} como rebuild_rollup conta
+
+    A data de conclusão não é gravada em client_cases; para casos concluídos
+    usa-se updated_at como aproximação.
+    """
+    rollup = {}
+    for row in rows:
+        created_at = _as_datetime(row.created_at)
+        if created_at is None:
+            continue
+        entry = rollup.setdefault((created_at.date(), row.category), [0, 0, 0])
+        entry[0] += 1
+        if row.status == 'concluido':
+            concluded_at = _as_datetime(row.updated_at) or created_at
+            entry = rollup.setdefault((concluded_at.date(), row.category), [0, 0, 0])
+            entry[1] += 1
+            entry[2] += int(max((concluded_at - created_at).total_seconds(), 0))
+    return rollup
+
+
+def case_contributions(session, column, value):
+    """O que os casos com client_cases.<column> = value somam hoje ao rollup
+
+    Lido antes de um DELETE (ou da exclusão do cliente/serviço, que remove os
+    casos em cascata) ou de uma troca de serviço, na mesma transação.
+    """
+    if column not in CASE_COLUMNS:
+        raise ValueError(f"Coluna inválida: {column}")
+    rows = session.execute(text(_CASES_SELECT + f" WHERE cc.{column} = :value"),
+                           {"no_category": NO_CATEGORY, "value": value})
+    return _aggregate(rows)
+
+
+def record_contributions(session, rollup, sign=1):
+    """Somar (sign=1) ou descontar (sign=-1) linhas agregadas por (dia, categoria)"""
+    if not rollup:
+        return
+    dialect = _dialect_name(session)
+    session.execute(text(UPSERT_VALUES_SQL.get(dialect, UPSERT_VALUES_SQL['mysql'])), [
+        {"day": day, "category": category, "opened": sign * opened, "concluded": sign * concluded,
+         "seconds": sign * seconds}
+        for (day, category), (opened, concluded, seconds) in sorted(rollup.items())
+    ])
+
+
+def record_cases_removed(session, column, value):
+    """Antes de remover casos: descontar a abertura e a conclusão que eles somavam"""
+    record_contributions(session, case_contributions(session, column, value), sign=-1)
+
+
+def record_case_recategorized(session, case_id, before):
+    """Depois de trocar o serviço do caso: tirar da categoria antiga e somar na nova
+
+    before é case_contributions(session, 'id', case_id) lido antes do UPDATE;
+    como o caso é contado de novo com os valores atuais, uma troca de status
+    no mesmo UPDATE também fica contada (sem record_status_change).
+    """
+    record_contributions(session, before, sign=-1)
+    record_contributions(session, case_contributions(session, 'id', case_id))
+
+
+def rebuild_rollup(session):
+    """Recalcular o rollup a partir de client_cases
+
+    Retorna o número de linhas gravadas.
+    """
+    session.execute(text(CREATE_TABLE_SQL))
+    rollup = _aggregate(session.execute(text(_CASES_SELECT), {"no_category": NO_CATEGORY}))
+
+    session.execute(text("DELETE FROM case_daily_rollup"))
+    if rollup:
+        session.execute(text("""
+            INSERT INTO case_daily_rollup (day, category, opened, concluded, resolution_seconds)
+            VALUES (:day, :category, :opened, :concluded, :seconds)
+        """), [
+            {"day": day, "category": category, "opened": opened, "concluded": concluded, "seconds": seconds}
+            for (day, category), (opened, concluded, seconds) in sorted(rollup.items())
+        ])
+    session.commit()
+    return len(rollup)
+
+
+def ensure_rollup(session):
+    """Criar a tabela e popular a partir de client_cases se estiver vazia"""
+    session.execute(text(CREATE_TABLE_SQL))
+    session.commit()
+    if session.execute(text("SELECT 1 FROM case_daily_rollup LIMIT 1")).fetchone() is None:
+        total = rebuild_rollup(session)
+        logger.info(f"📈 case_daily_rollup populada com {total} linhas")
@@ -0,0 +1,156 @@
+# advbs_shared/db_pool.py
+# Pool de conexões de todos os entry points: opções lidas do ambiente (DB_POOL_*)
+# e métricas de espera por conexão e rotatividade (churn)
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "280"))  # abaixo do wait_timeout típico do MySQL
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Limites (em ms) dos buckets do histograma de espera por conexão
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Contadores do pool: espera por conexão e rotatividade (churn)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.wait_count = 0
+            self.wait_sum_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.timeouts = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.closes = 0
+            self.invalidations = 0
+            self.started_at = time.time()
+
+    def observe_wait(self, elapsed_ms):
+        with self._lock:
+            index = len(WAIT_BUCKETS_MS)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    index = i
+                    break
+            self.wait_buckets[index] += 1
+            self.wait_count += 1
+            self.wait_sum_ms += elapsed_ms
+            if elapsed_ms > self.wait_max_ms:
+                self.wait_max_ms = elapsed_ms
+
+    def incr(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            uptime = max(time.time() - self.started_at, 1e-9)
+            return {
+                "wait_time": {
+                    "count": self.wait_count,
+                    "avg_ms": round(self.wait_sum_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                    "max_ms": round(self.wait_max_ms, 3),
+                    "timeouts": self.timeouts,
+                    "histogram": dict(zip(labels, self.wait_buckets))
+                },
+                "churn": {
+                    "checkouts": self.checkouts,
+                    "checkins": self.checkins,
+                    "connects": self.connects,
+                    "closes": self.closes,
+                    "invalidations": self.invalidations,
+                    "connects_per_minute": round(self.connects * 60 / uptime, 3)
+                },
+                "since": self.started_at
+            }
+
+
+# Um processo = um app = um engine: as métricas são do processo
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede o tempo de espera até obter uma conexão"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.incr("timeouts")
+            raise
+        finally:
+            pool_metrics.observe_wait((time.perf_counter() - start) * 1000)
+
+
+# Eventos registrados na classe: valem para qualquer engine criado com
+# get_pool_options(), inclusive o do Flask-SQLAlchemy
+@event.listens_for(InstrumentedQueuePool, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.incr("connects")
+
+
+@event.listens_for(InstrumentedQueuePool, "close")
+def _on_close(dbapi_connection, connection_record):
+    pool_metrics.incr("closes")
+
+
+@event.listens_for(InstrumentedQueuePool, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.incr("invalidations")
+
+
+@event.listens_for(InstrumentedQueuePool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.incr("checkouts")
+
+
+@event.listens_for(InstrumentedQueuePool, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.incr("checkins")
+
+
+def get_pool_options():
+    """Opções de create_engine (ou SQLALCHEMY_ENGINE_OPTIONS do Flask) lidas do ambiente"""
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+
+
+def get_pool_status(engine):
+    """Estado atual do pool do engine + métricas acumuladas do processo"""
+    pool = engine.pool
+    return {
+        "config": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": DB_POOL_PRE_PING
+        },
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "capacity": DB_POOL_SIZE + DB_MAX_OVERFLOW,
+        **pool_metrics.snapshot()
+    }
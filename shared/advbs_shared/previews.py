@@ -0,0 +1,30 @@
+# advbs_shared/previews.py
+# Cache de miniaturas dos arquivos de processo por SHA-256: caminhos e limpeza
+# quando o blob é removido (a geração fica na API da raiz, src/previews.py).
+# PREVIEW_DIR deve ser o mesmo nos dois apps.
+import os
+import re
+
+PREVIEW_DIR = os.getenv("PREVIEW_DIR", "uploads/previews")
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_sha256(value):
+    return bool(_SHA256.match(value or ""))
+
+
+def preview_path(sha256, base_dir=None):
+    """uploads/previews/ab/<sha256>.jpg"""
+    return os.path.join(base_dir or PREVIEW_DIR, sha256[:2], f"{sha256}.jpg")
+
+
+def discard_previews(trashed, base_dir=None):
+    """Apagar miniaturas de blobs removidos (pares de blob_store.release_references)"""
+    for _, path in trashed:
+        sha256 = os.path.basename(path)
+        if is_sha256(sha256):
+            try:
+                os.remove(preview_path(sha256, base_dir))
+            except FileNotFoundError:
+                pass
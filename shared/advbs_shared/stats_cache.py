@@ -0,0 +1,162 @@
+# advbs_shared/stats_cache.py
+# Cache por cliente das estatísticas do dashboard (/api/client/stats). A API da
+# raiz aplica os eventos nas rotas; o app Flask, nos eventos do ORM (src/stats_cache.py)
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Tempo máximo de vida de uma entrada: limita a defasagem causada por escritas
+# feitas fora deste processo (outros workers, scripts, o outro app)
+CLIENT_STATS_TTL = float(os.getenv("CLIENT_STATS_TTL", "300"))
+
+# Usuários com versão guardada (os de escrita mais antiga são descartados)
+CACHE_VERSIONS_MAX_SIZE = int(os.getenv("CACHE_VERSIONS_MAX_SIZE", "10000"))
+
+STATUS_FIELDS = {
+    'pendente': 'pending_cases',
+    'em_andamento': 'active_cases',
+    'concluido': 'completed_cases'
+}
+
+
+def _status_value(status):
+    # Aceita tanto a string do banco quanto o enum CaseStatus
+    return getattr(status, 'value', status)
+
+
+class WriteVersions:
+    """Sequência da última escrita por chave, com tamanho limitado
+
+    Não é thread-safe: o cache chama com o próprio lock. token() é lido antes
+    da query ao banco; changed_since() diz se a chave foi escrita depois. Acima
+    de max_size as chaves escritas há mais tempo são descartadas e a sequência
+    delas vira o piso: uma chave descartada conta como escrita nesse ponto, o
+    que no pior caso custa um carregamento a mais, nunca um valor velho aceito.
+    """
+
+    def __init__(self, max_size=CACHE_VERSIONS_MAX_SIZE):
+        self.max_size = max_size
+        self._sequence = 0
+        self._floor = 0
+        self._last_write = OrderedDict()
+
+    def __len__(self):
+        return len(self._last_write)
+
+    def token(self):
+        return self._sequence
+
+    def bump(self, key):
+        self._sequence += 1
+        self._last_write[key] = self._sequence
+        self._last_write.move_to_end(key)
+        while len(self._last_write) > self.max_size:
+            _, self._floor = self._last_write.popitem(last=False)
+
+    def discard(self, key):
+        """Esquecer a chave junto com a entrada expirada do cache (sobe o piso)"""
+        sequence = self._last_write.pop(key, None)
+        if sequence is not None:
+            self._floor = max(self._floor, sequence)
+
+    def changed_since(self, key, token):
+        return self._last_write.get(key, self._floor) > token
+
+
+class ClientStatsCache:
+    """Estatísticas por usuário atualizadas incrementalmente nas escritas
+
+    A leitura é uma busca em dicionário; a primeira leitura (ou após expirar)
+    carrega do banco via set(). Eventos sobre usuários sem entrada em cache são
+    ignorados - a próxima leitura já vem do banco com o valor certo.
+
+    Cada evento registra uma versão para o usuário: quem carregou do banco
+    passa a versão lida antes da query para set(), que descarta o valor se
+    alguma escrita aconteceu no meio do caminho. As versões ficam limitadas a
+    CACHE_VERSIONS_MAX_SIZE usuários (ver WriteVersions).
+    """
+
+    def __init__(self, ttl=CLIENT_STATS_TTL, max_versions=CACHE_VERSIONS_MAX_SIZE):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._versions = WriteVersions(max_versions)
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.token()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if self._entries.pop(user_id, None) is not None:
+                    self._versions.discard(user_id)  # expirou: a versão sai junto
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, user_id, stats, version=None):
+        with self._lock:
+            if version is not None and self._versions.changed_since(user_id, version):
+                return False
+            self._entries[user_id] = (time.monotonic() + self.ttl, dict(stats))
+            return True
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions.bump(user_id)
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _apply(self, user_id, deltas):
+        with self._lock:
+            self._versions.bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            stats = entry[1]
+            for field, delta in deltas.items():
+                stats[field] = max(stats.get(field, 0) + delta, 0)
+
+    def case_created(self, user_id, status):
+        deltas = {'total_cases': 1}
+        field = STATUS_FIELDS.get(_status_value(status))
+        if field:
+            deltas[field] = 1
+        self._apply(user_id, deltas)
+
+    def case_deleted(self, user_id, status):
+        deltas = {'total_cases': -1}
+        field = STATUS_FIELDS.get(_status_value(status))
+        if field:
+            deltas[field] = -1
+        self._apply(user_id, deltas)
+
+    def case_status_changed(self, user_id, old_status, new_status):
+        old_field = STATUS_FIELDS.get(_status_value(old_status))
+        new_field = STATUS_FIELDS.get(_status_value(new_status))
+        if old_field == new_field:
+            return
+        deltas = {}
+        if old_field:
+            deltas[old_field] = -1
+        if new_field:
+            deltas[new_field] = 1
+        self._apply(user_id, deltas)
+
+    def file_added(self, user_id):
+        self._apply(user_id, {'total_files': 1})
+
+    def file_removed(self, user_id):
+        self._apply(user_id, {'total_files': -1})
+
+
+client_stats_cache = ClientStatsCache()
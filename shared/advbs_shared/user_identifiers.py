@@ -0,0 +1,267 @@
+# advbs_shared/user_identifiers.py
+# CPF e telefone só com dígitos (users.cpf_digits / users.phone_digits) para busca exata
+# indexada; o app Flask usa LOOKUP_COLUMNS para manter as colunas nas próprias escritas
+import logging
+import re
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+CPF_LENGTH = 11
+MIN_PHONE_DIGITS = 8
+BACKFILL_BATCH_SIZE = 1000
+
+_NON_DIGITS = re.compile(r"\D")
+
+# Índices criados por create_lookup_indexes depois do backfill
+CPF_UNIQUE_INDEX = 'uq_users_cpf_digits'
+CPF_INDEX = 'idx_users_cpf_digits'
+PHONE_INDEX = 'idx_users_phone_digits'
+
+# Pontuação removida na busca sem as colunas (varredura)
+_PUNCTUATION = ".-/ ()+"
+
+
+def cpf_digits(value):
+    """"123.456.789-00" -> "12345678900"; vazio -> None (fora do índice único)"""
+    return _NON_DIGITS.sub("", value or "") or None
+
+
+def phone_digits(value):
+    """DDD + número: sem pontuação, zero de operadora nem código do país (+55)"""
+    number = _NON_DIGITS.sub("", value or "").lstrip("0")
+    if len(number) in (12, 13) and number.startswith("55"):
+        number = number[2:]
+    return number or None
+
+
+# coluna normalizada -> (coluna original, normalização)
+LOOKUP_COLUMNS = {
+    'cpf_digits': ('cpf', cpf_digits),
+    'phone_digits': ('phone', phone_digits),
+}
+
+# Colunas presentes por banco (URL do engine)
+_available = {}
+
+# Colunas já indexadas por banco: (conjunto, próxima verificação). Antes do
+# backfill terminar e criar os índices a busca segue pela coluna original
+_indexed = {}
+INDEX_RECHECK_SECONDS = 60
+
+
+def _engine_key(session):
+    return str(session.get_bind().url)
+
+
+def _existing_columns(session):
+    if session.get_bind().dialect.name == 'mysql':
+        return {row[0] for row in session.execute(text("SHOW COLUMNS FROM users"))}
+    return {row[1] for row in session.execute(text("PRAGMA table_info(users)"))}
+
+
+def _existing_indexes(session):
+    if session.get_bind().dialect.name == 'mysql':
+        return {row.Key_name for row in session.execute(text("SHOW INDEX FROM users"))}
+    return {row[0] for row in session.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users'"))}
+
+
+def _indexed_columns(session):
+    """Colunas normalizadas que já têm índice (criado só depois do backfill)"""
+    existing = _existing_indexes(session)
+    indexed = set()
+    if CPF_UNIQUE_INDEX in existing or CPF_INDEX in existing:
+        indexed.add('cpf_digits')
+    if PHONE_INDEX in existing:
+        indexed.add('phone_digits')
+    _indexed[_engine_key(session)] = (indexed, time.monotonic() + INDEX_RECHECK_SECONDS)
+    return indexed
+
+
+def ensure_lookup_columns(session):
+    """Verificar as colunas normalizadas; retorna se estão disponíveis
+
+    MySQL: as colunas vêm de add_user_lookup_columns.sql (e os dados e
+    índices de backfill_user_lookup_columns.py); sem elas as rotas seguem
+    funcionando e a busca por CPF/telefone varre a tabela. As escritas
+    mantêm as colunas assim que existem, mas a busca só passa a usá-las
+    quando o índice existe (backfill concluído). SQLite: cria, preenche e
+    indexa na hora.
+    """
+    existing = _existing_columns(session)
+    sources = {source for source, _ in LOOKUP_COLUMNS.values()}
+    if not sources <= existing:
+        logger.warning("⚠️ Tabela users sem cpf/phone: busca por CPF/telefone desativada")
+        _available[_engine_key(session)] = False
+        return False
+    missing = set(LOOKUP_COLUMNS) - existing
+    if missing and session.get_bind().dialect.name == 'sqlite':
+        for column in sorted(missing):
+            session.execute(text(f"ALTER TABLE users ADD COLUMN {column} VARCHAR(20)"))
+        session.commit()
+        backfill_lookup_columns(session)
+        create_lookup_indexes(session)
+        missing = set()
+    if missing:
+        logger.warning(f"⚠️ Colunas {', '.join(sorted(missing))} ausentes em users: busca por CPF/telefone "
+                       f"sem índice até aplicar add_user_lookup_columns.sql")
+    elif set(LOOKUP_COLUMNS) - _indexed_columns(session):
+        logger.warning("⚠️ Colunas de CPF/telefone sem índice: busca pela coluna original até "
+                       "backfill_user_lookup_columns.py terminar")
+    _available[_engine_key(session)] = not missing
+    return not missing
+
+
+def lookup_columns_ready(session):
+    """Colunas existem: as escritas devem mantê-las"""
+    return _available.get(_engine_key(session), False)
+
+
+def lookup_column_indexed(session, column):
+    """A busca pode usar a coluna normalizada (existe, foi preenchida e tem índice)?"""
+    if not lookup_columns_ready(session):
+        return False
+    indexed, recheck_at = _indexed.get(_engine_key(session), (set(), 0))
+    if column not in indexed and time.monotonic() >= recheck_at:
+        indexed = _indexed_columns(session)
+    return column in indexed
+
+
+def lookup_values(fields):
+    """{'cpf_digits': ..., 'phone_digits': ...} para os campos presentes em fields"""
+    return {column: normalize(fields[source])
+            for column, (source, normalize) in LOOKUP_COLUMNS.items() if source in fields}
+
+
+def sync_lookup_columns(session, user_id, fields):
+    """Atualizar as colunas normalizadas na mesma transação da escrita (sem commit)"""
+    values = lookup_values(fields)
+    if not values or not lookup_columns_ready(session):
+        return
+    assignments = ", ".join(f"{column} = :{column}" for column in values)
+    session.execute(text(f"UPDATE users SET {assignments} WHERE id = :id"), {**values, "id": user_id})
+
+
+def _match(session, column, value):
+    """Condição de igualdade exata: coluna indexada ou, sem ela, a original sem pontuação"""
+    if lookup_column_indexed(session, column):
+        return f"{column} = :value", {"value": value}
+    expression = LOOKUP_COLUMNS[column][0]
+    for char in _PUNCTUATION:
+        expression = f"REPLACE({expression}, '{char}', '')"
+    return f"{expression} = :value", {"value": value}
+
+
+def find_users(session, column, value, user_type='cliente', limit=20):
+    condition, params = _match(session, column, value)
+    return session.execute(text(
+        f"SELECT id, name, email, phone, cpf, register_date, type FROM users "
+        f"WHERE {condition} AND type = :type ORDER BY id LIMIT :limit"
+    ), {**params, "type": user_type, "limit": limit}).fetchall()
+
+
+def cpf_in_use(session, cpf, exclude_id=None):
+    """Outro usuário já tem este CPF (com qualquer pontuação)?"""
+    value = cpf_digits(cpf)
+    if value is None:
+        return False
+    condition, params = _match(session, 'cpf_digits', value)
+    row = session.execute(text(f"SELECT id FROM users WHERE {condition} AND id != :exclude_id LIMIT 1"),
+                          {**params, "exclude_id": exclude_id or 0}).fetchone()
+    return row is not None
+
+
+def backfill_lookup_columns(session, batch_size=BACKFILL_BATCH_SIZE, pause=0.0, progress=None):
+    """Preencher/corrigir as colunas normalizadas em lotes por id
+
+    Cada lote é uma transação curta que só toca (por chave primária) as
+    linhas cujo valor normalizado mudou, então a tabela segue aceitando
+    escritas durante o backfill. Pode ser rodado de novo a qualquer momento
+    para corrigir linhas escritas por fora da API.
+
+    Retorna {'lidas', 'atualizadas', 'conflitos'}; conflitos são ids cujo CPF
+    repete o de outro usuário quando o índice único já existe.
+    """
+    summary = {'lidas': 0, 'atualizadas': 0, 'conflitos': []}
+    last_id = 0
+    while True:
+        rows = session.execute(text(
+            "SELECT id, cpf, phone, cpf_digits, phone_digits FROM users WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": batch_size}).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        summary['lidas'] += len(rows)
+
+        changes = []
+        for row in rows:
+            values = {column: normalize(getattr(row, source))
+                      for column, (source, normalize) in LOOKUP_COLUMNS.items()}
+            if any(getattr(row, column) != value for column, value in values.items()):
+                changes.append({**values, "id": row.id})
+        if changes:
+            update = text("UPDATE users SET cpf_digits = :cpf_digits, phone_digits = :phone_digits WHERE id = :id")
+            try:
+                session.execute(update, changes)
+                session.commit()
+                summary['atualizadas'] += len(changes)
+            except IntegrityError:
+                # Lote com CPF repetido: linha a linha, pulando só os conflitos
+                session.rollback()
+                for change in changes:
+                    try:
+                        session.execute(update, change)
+                        session.commit()
+                        summary['atualizadas'] += 1
+                    except IntegrityError:
+                        session.rollback()
+                        summary['conflitos'].append(change["id"])
+        session.commit()  # encerra a transação de leitura do lote
+        if progress:
+            progress(summary)
+        if pause:
+            time.sleep(pause)
+    return summary
+
+
+def find_duplicate_cpfs(session, limit=20):
+    """[(cpf_digits, quantidade)] que impedem o índice único"""
+    return [tuple(row) for row in session.execute(text(
+        "SELECT cpf_digits, COUNT(*) as total FROM users WHERE cpf_digits IS NOT NULL "
+        "GROUP BY cpf_digits HAVING COUNT(*) > 1 ORDER BY total DESC LIMIT :limit"
+    ), {"limit": limit})]
+
+
+def create_lookup_indexes(session):
+    """Criar os índices que faltam; retorna (criados, CPFs duplicados)
+
+    O índice de CPF é único; se já houver CPFs repetidos ele fica comum até
+    os cadastros serem corrigidos e o script rodar de novo. No MySQL a criação
+    é online (ALGORITHM=INPLACE, LOCK=NONE).
+    """
+    existing = _existing_indexes(session)
+    duplicates = find_duplicate_cpfs(session)
+    wanted = []
+    if CPF_UNIQUE_INDEX not in existing:
+        if not duplicates:
+            wanted.append((CPF_UNIQUE_INDEX, 'cpf_digits', True))
+        elif CPF_INDEX not in existing:
+            wanted.append((CPF_INDEX, 'cpf_digits', False))
+    if PHONE_INDEX not in existing:
+        wanted.append((PHONE_INDEX, 'phone_digits', False))
+
+    mysql = session.get_bind().dialect.name == 'mysql'
+    for name, column, unique in wanted:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        if mysql:
+            session.execute(text(f"ALTER TABLE users ADD {kind} {name} ({column}), ALGORITHM=INPLACE, LOCK=NONE"))
+        else:
+            session.execute(text(f"CREATE {kind} IF NOT EXISTS {name} ON users ({column})"))
+    session.commit()
+    if duplicates:
+        logger.warning(f"⚠️ {len(duplicates)} CPFs repetidos em users: índice único de CPF não criado")
+    return [name for name, _, _ in wanted], duplicates
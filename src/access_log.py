@@ -0,0 +1,153 @@
+# src/access_log.py
+# Log de acesso estruturado (uma linha JSON por requisição), amostrado e gravado em segundo plano
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from urllib.parse import parse_qsl, urlencode
+
+# Fração das requisições bem-sucedidas registradas (0 = nenhuma, 1 = todas)
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+# Requisições a partir desta duração são sempre registradas
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+# Linhas aguardando gravação; com a fila cheia as novas são descartadas (e contadas)
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+
+REDACTED = "[redacted]"
+REDACTED_HEADERS = frozenset({"authorization", "proxy-authorization", "cookie", "set-cookie",
+                              "x-api-key", "x-auth-token"})
+REDACTED_PARAMS = frozenset({"token", "access_token", "password", "senha"})
+
+
+def redact_headers(headers):
+    """Cabeçalhos da requisição com credenciais substituídas por [redacted]"""
+    return {name: REDACTED if name.lower() in REDACTED_HEADERS else value for name, value in headers.items()}
+
+
+def redact_query(query):
+    """Query string com os valores de token/senha substituídos por [redacted]"""
+    if not query:
+        return query
+    return urlencode([(name, REDACTED if name.lower() in REDACTED_PARAMS else value)
+                      for name, value in parse_qsl(query, keep_blank_values=True)])
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro (o msg do registro é o dicionário da requisição)"""
+
+    def format(self, record):
+        entry = {"ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat()}
+        entry.update(record.msg if isinstance(record.msg, dict) else {"message": record.getMessage()})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler que não formata na thread da requisição e descarta com a fila cheia"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # A formatação (JSON) fica para a thread do QueueListener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AccessLog:
+    """Log de acesso JSON gravado por uma thread (QueueHandler + QueueListener)
+
+    Na requisição só se decide se a linha entra e monta-se um dicionário; a
+    serialização e a escrita no stdout acontecem na thread do listener.
+    Erros (status >= 400) e requisições lentas (>= slow_ms) são sempre
+    registrados; as demais entram com probabilidade sample_rate. Cabeçalhos
+    de credenciais e parâmetros token/senha da query nunca vão para o log.
+    """
+
+    def __init__(self, sample_rate=ACCESS_LOG_SAMPLE_RATE, slow_ms=ACCESS_LOG_SLOW_MS,
+                 queue_size=ACCESS_LOG_QUEUE_SIZE, stream=None):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.queue_size = queue_size
+        self.stream = stream
+        self.logger = logging.getLogger("access")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self._lock = threading.Lock()
+        self._handler = None
+        self._listener = None
+        self.logged = 0
+        self.skipped = 0
+
+    def start(self):
+        """Ligar a fila e a thread de gravação"""
+        with self._lock:
+            if self._listener is None:
+                handler = _DroppingQueueHandler(queue.Queue(self.queue_size))
+                output = logging.StreamHandler(self.stream or sys.stdout)
+                output.setFormatter(JsonFormatter())
+                self._listener = QueueListener(handler.queue, output)
+                self._listener.start()
+                self._handler = handler
+                self.logger.addHandler(handler)
+        return self
+
+    def stop(self):
+        """Parar a thread depois de gravar o que está na fila"""
+        with self._lock:
+            if self._listener is not None:
+                self.logger.removeHandler(self._handler)
+                self._listener.stop()
+                self._listener = None
+
+    def reason(self, status_code, duration_ms):
+        """Motivo para registrar a requisição, ou None se ficou fora da amostra"""
+        if status_code >= 400:
+            return "error"
+        if duration_ms >= self.slow_ms:
+            return "slow"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def record(self, request, status_code, duration_ms):
+        reason = self.reason(status_code, duration_ms)
+        if reason is None:
+            self.skipped += 1
+            return
+        self.logged += 1
+        self.logger.info({
+            "method": request.method,
+            "path": request.url.path,
+            "query": redact_query(request.url.query),
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "reason": reason,
+            "client": request.client.host if request.client else None,
+            "headers": redact_headers(request.headers)
+        })
+
+    def snapshot(self):
+        handler = self._handler
+        return {
+            "started": self._listener is not None,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "logged": self.logged,
+            "skipped": self.skipped,
+            "dropped": handler.dropped if handler else 0,
+            "queued": handler.queue.qsize() if handler else 0
+        }
+
+
+access_log = AccessLog()
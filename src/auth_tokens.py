@@ -0,0 +1,83 @@
+# src/auth_tokens.py
+# Emissão e verificação dos tokens JWT, com cache dos tokens já verificados
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+# Lidos uma vez no import (main.py carrega o .env antes)
+JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
+JWT_ALGORITHM = 'HS256'
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+# Tokens sem exp também saem do cache depois deste tempo
+JWT_CACHE_MAX_TTL = float(os.getenv("JWT_CACHE_MAX_TTL", "3600"))
+
+
+class TokenVerifier:
+    """jwt.decode com LRU limitado dos tokens válidos até o exp de cada um
+
+    A chave do cache é o token inteiro (cabeçalho, payload e assinatura):
+    outro payload com a mesma assinatura nunca reaproveita a entrada. Só
+    tokens válidos entram; inválidos e expirados sempre passam pelo decode.
+    """
+
+    def __init__(self, secret_key=JWT_SECRET_KEY, algorithm=JWT_ALGORITHM,
+                 max_entries=JWT_CACHE_SIZE, max_ttl=JWT_CACHE_MAX_TTL):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def encode(self, payload):
+        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token):
+        """Claims do token; levanta jwt.ExpiredSignatureError / jwt.InvalidTokenError"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[token]
+            self.misses += 1
+
+        claims = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        expires_at = now + self.max_ttl
+        if isinstance(claims.get('exp'), (int, float)):
+            expires_at = min(expires_at, claims['exp'])
+        with self._lock:
+            self._entries[token] = (expires_at, claims)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else None
+            }
+
+
+token_verifier = TokenVerifier()
@@ -0,0 +1,206 @@
+# src/client_typeahead.py
+# Índice em memória para o autocomplete de clientes (/api/admin/clients/search)
+import bisect
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+
+from sqlalchemy import text
+
+# Recarga completa periódica: traz escritas feitas fora deste processo
+# (outros workers, scripts, app Flask)
+TYPEAHEAD_REFRESH_INTERVAL = float(os.getenv("TYPEAHEAD_REFRESH_INTERVAL", "300"))
+
+CLIENT_FIELDS = ('name', 'email', 'phone', 'cpf')
+
+_TOKEN = re.compile(r"\w+")
+_NON_DIGITS = re.compile(r"\D")
+_LETTERS = re.compile(r"[^\W\d_]")
+
+
+def normalize(value):
+    """Minúsculas e sem acentos ("Conceição" -> "conceicao")"""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def digits(value):
+    return _NON_DIGITS.sub("", value or "")
+
+
+def client_keys(client):
+    """Chaves de prefixo de um cliente: palavras do nome e do email, email
+    completo e CPF/telefone só com dígitos"""
+    keys = set(_TOKEN.findall(normalize(client.get('name'))))
+    email = normalize(client.get('email')).strip()
+    if email:
+        keys.add(email)
+        keys.update(_TOKEN.findall(email))
+    for field in ('cpf', 'phone'):
+        value = digits(client.get(field))
+        if value:
+            keys.add(value)
+    return keys
+
+
+def query_terms(q):
+    """Termos da busca; cada um precisa ser prefixo de alguma chave do cliente
+
+    Sem letras ("123.456.789-00", "(51) 9999") vira um só termo de dígitos;
+    com "@" o email inteiro é o termo.
+    """
+    q = normalize(q).strip()
+    if not q:
+        return []
+    if not _LETTERS.search(q):
+        value = digits(q)
+        return [value] if value else []
+    if "@" in q:
+        return [q]
+    return _TOKEN.findall(q)
+
+
+def _row_to_client(row):
+    register_date = row.register_date
+    if isinstance(register_date, datetime):
+        register_date = register_date.isoformat()
+    return {
+        'id': row.id,
+        'name': row.name,
+        'email': row.email,
+        'phone': row.phone,
+        'cpf': row.cpf,
+        'created_at': register_date,
+        'type': 'cliente'
+    }
+
+
+class ClientTypeahead:
+    """Array ordenado de (chave, id) com busca binária por prefixo
+
+    Carregado do banco em load() (startup e recarga periódica) e mantido
+    pelas rotas de cliente via add/update/remove. Até a primeira carga
+    terminar, ready é False e a rota consulta o banco.
+
+    As escritas que chegam durante uma carga ficam num diário e são
+    reaplicadas sobre o índice novo antes da troca, para a recarga não
+    desfazer um cadastro feito no meio dela.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._clients = {}
+        self._client_keys = {}
+        self._journal = None
+        self.ready = False
+
+    def __len__(self):
+        return len(self._clients)
+
+    def load(self, session):
+        with self._lock:
+            self._journal = []
+        try:
+            rows = session.execute(text(
+                "SELECT id, name, email, phone, cpf, register_date FROM users WHERE type = 'cliente'"
+            )).fetchall()
+            clients = {row.id: _row_to_client(row) for row in rows}
+            client_keys_by_id = {client_id: client_keys(client) for client_id, client in clients.items()}
+            keys = sorted((key, client_id) for client_id, keys in client_keys_by_id.items() for key in keys)
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._keys, self._clients, self._client_keys = keys, clients, client_keys_by_id
+            for operation, args in journal:
+                operation(*args)
+            self.ready = True
+        return len(clients)
+
+    def _record(self, operation, *args):
+        # Chamado com o lock; durante load() a operação também vai para o diário
+        if self._journal is not None:
+            self._journal.append((operation, args))
+        operation(*args)
+
+    def _index(self, client_id, client):
+        keys = client_keys(client)
+        self._clients[client_id] = client
+        self._client_keys[client_id] = keys
+        for key in keys:
+            bisect.insort(self._keys, (key, client_id))
+
+    def _unindex(self, client_id):
+        self._clients.pop(client_id, None)
+        for key in self._client_keys.pop(client_id, ()):
+            position = bisect.bisect_left(self._keys, (key, client_id))
+            if position < len(self._keys) and self._keys[position] == (key, client_id):
+                del self._keys[position]
+
+    def _add(self, client):
+        self._unindex(client['id'])
+        self._index(client['id'], client)
+
+    def _update(self, client_id, fields):
+        client = self._clients.get(client_id)
+        if client is None:
+            return
+        client = {**client, **{field: fields[field] for field in CLIENT_FIELDS if field in fields}}
+        self._unindex(client_id)
+        self._index(client_id, client)
+
+    def add(self, client_id, data, created_at=None):
+        client = {field: data.get(field, '') for field in CLIENT_FIELDS}
+        client.update({
+            'id': client_id,
+            'created_at': (created_at or datetime.now()).isoformat(),
+            'type': 'cliente'
+        })
+        with self._lock:
+            self._record(self._add, client)
+
+    def update(self, client_id, fields):
+        """Aplicar campos alterados; ids que não são clientes são ignorados"""
+        with self._lock:
+            self._record(self._update, client_id, dict(fields))
+
+    def remove(self, client_id):
+        with self._lock:
+            self._record(self._unindex, client_id)
+
+    def search(self, q, limit=10):
+        """Clientes em que cada termo é prefixo de alguma chave
+
+        Percorre o intervalo do termo mais longo (o mais seletivo) e confere
+        os demais no conjunto de chaves do cliente; para ao juntar `limit`.
+        """
+        terms = query_terms(q)
+        if not terms or limit < 1:
+            return []
+        driver = max(terms, key=len)
+        others = [term for term in terms if term != driver]
+        found = []
+        seen = set()
+        with self._lock:
+            position = bisect.bisect_left(self._keys, (driver,))
+            while position < len(self._keys) and len(found) < limit:
+                key, client_id = self._keys[position]
+                if not key.startswith(driver):
+                    break
+                position += 1
+                if client_id in seen:
+                    continue
+                seen.add(client_id)
+                keys = self._client_keys[client_id]
+                if all(any(k.startswith(term) for k in keys) for term in others):
+                    found.append(dict(self._clients[client_id]))
+        return found
+
+
+client_typeahead = ClientTypeahead()
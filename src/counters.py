@@ -0,0 +1,150 @@
+# src/counters.py
+# Contadores materializados do sistema (/api/analytics/stats)
+import logging
+import os
+
+from sqlalchemy import text
+
+from advbs_shared.stats_cache import STATUS_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) da reconciliação periódica feita pela API: corrige desvios
+# de escritas que não passam pelas rotas nem pelos eventos do ORM (SQL manual, importações)
+COUNTERS_RECONCILE_INTERVAL = float(os.getenv("COUNTERS_RECONCILE_INTERVAL", "3600"))
+
+# Contador -> query que recalcula o valor do zero
+COUNTER_QUERIES = {
+    'total_clients': "SELECT COUNT(*) FROM users WHERE type = 'cliente'",
+    'total_cases': "SELECT COUNT(*) FROM client_cases",
+    'pending_cases': "SELECT COUNT(*) FROM client_cases WHERE status = 'pendente'",
+    'active_cases': "SELECT COUNT(*) FROM client_cases WHERE status = 'em_andamento'",
+    'completed_cases': "SELECT COUNT(*) FROM client_cases WHERE status = 'concluido'",
+    'total_files': "SELECT COUNT(*) FROM process_files",
+    'total_services': "SELECT COUNT(*) FROM services"
+}
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS system_counters (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+)
+"""
+
+
+def case_deltas(status, sign=1):
+    """Deltas de contadores para um caso criado (sign=1) ou removido (sign=-1)"""
+    deltas = {'total_cases': sign}
+    field = STATUS_FIELDS.get(getattr(status, 'value', status))
+    if field:
+        deltas[field] = sign
+    return deltas
+
+
+def status_change_deltas(old_status, new_status):
+    old_field = STATUS_FIELDS.get(getattr(old_status, 'value', old_status))
+    new_field = STATUS_FIELDS.get(getattr(new_status, 'value', new_status))
+    deltas = {}
+    if old_field != new_field:
+        if old_field:
+            deltas[old_field] = -1
+        if new_field:
+            deltas[new_field] = 1
+    return deltas
+
+
+def merge_deltas(*all_deltas):
+    merged = {}
+    for deltas in all_deltas:
+        for name, delta in deltas.items():
+            merged[name] = merged.get(name, 0) + delta
+    return merged
+
+
+def build_counter_update(deltas):
+    """UPDATE único para aplicar os deltas (None se não houver nada a aplicar)"""
+    deltas = {name: delta for name, delta in deltas.items() if delta and name in COUNTER_QUERIES}
+    if not deltas:
+        return None
+    params = {}
+    whens = []
+    for i, (name, delta) in enumerate(sorted(deltas.items())):
+        params[f"n{i}"] = name
+        params[f"d{i}"] = delta
+        whens.append(f"WHEN :n{i} THEN :d{i}")
+    names = ", ".join(f":n{i}" for i in range(len(deltas)))
+    query = f"""
+    UPDATE system_counters
+    SET value = value + CASE name {' '.join(whens)} ELSE 0 END
+    WHERE name IN ({names})
+    """
+    return text(query), params
+
+
+async def apply_counter_deltas(db_session, deltas):
+    """Aplicar deltas na mesma transação da escrita (commit feito pela rota)"""
+    statement = build_counter_update(deltas)
+    if statement is not None:
+        await db_session.execute(*statement)
+
+
+def read_counters(session):
+    """Valores materializados; None se a tabela ainda não foi populada"""
+    rows = session.execute(text("SELECT name, value FROM system_counters")).fetchall()
+    values = {row.name: int(row.value) for row in rows}
+    if not all(name in values for name in COUNTER_QUERIES):
+        return None
+    return {name: values[name] for name in COUNTER_QUERIES}
+
+
+def recompute_counters(session):
+    """Recalcular todos os contadores do zero (COUNT(*) em cada tabela)"""
+    return {name: int(session.execute(text(query)).scalar() or 0)
+            for name, query in COUNTER_QUERIES.items()}
+
+
+def reconcile_counters(session, apply=True):
+    """Comparar contadores materializados com a contagem real
+
+    Retorna {contador: {"stored", "actual", "drift"}}; com apply=True grava os
+    valores reais. A tabela é criada se ainda não existir.
+
+    No MySQL as linhas dos contadores ficam travadas (FOR UPDATE) antes das
+    contagens: uma escrita concorrente espera o fim da reconciliação para
+    somar seu delta, em vez de o delta ser sobrescrito pelo valor recalculado.
+    """
+    session.execute(text(CREATE_TABLE_SQL))
+    query = "SELECT name, value FROM system_counters"
+    if apply and session.get_bind().dialect.name == 'mysql':
+        query += " FOR UPDATE"
+    rows = session.execute(text(query)).fetchall()
+    stored = {row.name: int(row.value) for row in rows}
+    actual = recompute_counters(session)
+
+    report = {}
+    for name, value in actual.items():
+        current = stored.get(name)
+        report[name] = {
+            "stored": current,
+            "actual": value,
+            "drift": None if current is None else current - value
+        }
+        if apply and current != value:
+            if current is None:
+                session.execute(text("INSERT INTO system_counters (name, value) VALUES (:name, :value)"),
+                                {"name": name, "value": value})
+            else:
+                session.execute(text("UPDATE system_counters SET value = :value WHERE name = :name"),
+                                {"name": name, "value": value})
+    if apply:
+        session.commit()
+    return report
+
+
+def ensure_counters(session):
+    """Criar e popular a tabela na primeira execução (startup da API)"""
+    session.execute(text(CREATE_TABLE_SQL))
+    session.commit()
+    if read_counters(session) is None:
+        logger.info("📊 Populando system_counters a partir das tabelas...")
+        reconcile_counters(session, apply=True)
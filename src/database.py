@@ -0,0 +1,121 @@
+# src/database.py
+# Módulo de banco de dados dos entry points da raiz (main.py e scripts); as opções
+# e métricas do pool vêm de advbs_shared.db_pool, usado também pelo advBS-backend
+import os
+import logging
+from functools import partial
+
+import anyio
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from advbs_shared.db_pool import DB_MAX_OVERFLOW, DB_POOL_SIZE, get_pool_options, get_pool_status as pool_status
+
+# Carregar variáveis de ambiente (opcional - Railway usa variáveis de ambiente)
+try:
+    load_dotenv()
+except:
+    pass  # Em produção (Railway) não há arquivo .env
+
+logger = logging.getLogger(__name__)
+
+# Configuração do banco de dados
+# Usar variáveis de ambiente para produção (Railway) ou localhost para desenvolvimento
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "3306")
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+# Forçar uso do banco railway em produção
+if 'railway' in DB_HOST:
+    DB_NAME = 'railway'  # Forçar banco railway
+    logger.info("🚀 PRODUÇÃO: Usando banco 'railway'")
+else:
+    DB_NAME = os.getenv("DB_NAME", "BS")  # Local usa BS
+    logger.info("🏠 LOCAL: Usando banco 'BS'")
+
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# Threads dedicadas ao acesso síncrono ao banco (por padrão, a capacidade do pool)
+DB_THREADS = int(os.getenv("DB_THREADS", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+logger.info(f"🔗 Conectando ao banco: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+
+# SQLite (testes locais) precisa aceitar conexões usadas pelo pool de threads
+connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+engine = create_engine(DATABASE_URL, connect_args=connect_args, **get_pool_options())
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def get_pool_status():
+    """Estado atual do pool + métricas acumuladas"""
+    return pool_status(engine)
+
+
+_db_limiter = None
+
+
+def _get_db_limiter():
+    # O CapacityLimiter precisa ser criado dentro do event loop
+    global _db_limiter
+    if _db_limiter is None:
+        _db_limiter = anyio.CapacityLimiter(DB_THREADS)
+    return _db_limiter
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """Executar chamada bloqueante do banco fora do event loop, em pool de threads limitado"""
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs), limiter=_get_db_limiter())
+
+
+class ThreadedSession:
+    """Sessão SQLAlchemy síncrona com operações aguardáveis (executadas no pool de threads)
+
+    O PyMySQL bufferiza o resultado inteiro no execute, então fetchone/fetchall
+    sobre o resultado retornado não tocam mais o socket e podem rodar no loop.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def execute(self, statement, params=None):
+        return await run_in_db_thread(self.sync_session.execute, statement, params)
+
+    async def commit(self):
+        await run_in_db_thread(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_db_thread(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_db_thread(self.sync_session.close)
+
+    async def run_sync(self, func, *args, **kwargs):
+        """Executar func(sync_session, ...) numa única ida ao pool de threads"""
+        return await run_in_db_thread(func, self.sync_session, *args, **kwargs)
+
+
+async def get_async_db():
+    """Dependência FastAPI: sessão cujas queries não bloqueiam o event loop"""
+    session = ThreadedSession(SessionLocal())
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def get_db():
+    """Obter sessão do banco de dados"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_db_session():
+    """Criar nova sessão do banco de dados"""
+    return SessionLocal()
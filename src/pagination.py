@@ -0,0 +1,76 @@
+# src/pagination.py
+# Paginação por keyset (cursor) para as listagens admin
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def clamp_limit(limit):
+    """Limitar o tamanho da página a [1, MAX_PAGE_SIZE]"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_value, row_id):
+    """Cursor opaco a partir da última linha da página: (valor de ordenação, id)"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = f"{sort_value if sort_value is not None else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Retorna (datetime, id) do cursor; 400 se o cursor for inválido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        sort_value, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def encode_id_cursor(row_id):
+    """Cursor opaco para listagens ordenadas apenas por id"""
+    return base64.urlsafe_b64encode(str(row_id).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_id_cursor(cursor):
+    """Retorna o id do cursor; 400 se o cursor for inválido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def parse_date_param(value, name):
+    """Converter parâmetro de data (YYYY-MM-DD ou ISO 8601); 400 se inválido"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Data inválida em '{name}'")
+
+
+def keyset_page(rows, limit, sort_attr=None):
+    """Separar a linha extra (limit + 1) e montar o próximo cursor
+
+    Sem sort_attr a listagem é ordenada só por id e o cursor carrega apenas o id.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        if sort_attr is None:
+            next_cursor = encode_id_cursor(last.id)
+        else:
+            next_cursor = encode_cursor(getattr(last, sort_attr), last.id)
+    return rows, next_cursor, has_more
@@ -0,0 +1,150 @@
+# src/password_hashing.py
+# Hash e verificação de senhas (PBKDF2 do werkzeug) num pool de processos dedicado
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Um processo por núcleo: cada hash ocupa um núcleo inteiro por dezenas de ms
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or os.cpu_count() or 1
+# Pedidos aguardando além dos que estão rodando; acima disso a API responde 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def _pool_context():
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    if method == "forkserver":
+        context.set_forkserver_preload(["werkzeug.security"])
+    return context
+
+
+class PasswordHasher:
+    """Pool de processos para o PBKDF2, fora do event loop e do GIL
+
+    O pool usa "forkserver" (ou "spawn" onde não existe): a API já tem threads
+    rodando (pool do banco, anyio) e um fork dela copiaria locks possivelmente
+    presos. O servidor de fork já carrega o werkzeug.security. Como em todo
+    multiprocessing, cada processo importa o script principal como
+    __mp_main__: o servidor sobe via "python -m uvicorn main:app" (Procfile e
+    Dockerfile) e o uvicorn.run de main.py fica atrás do guard de __main__.
+    Todos sobem no startup (start) para o primeiro login não pagar a criação.
+
+    Se um processo morrer (OOM killer, por exemplo) o pool quebra: ele é
+    recriado e o pedido repetido; se quebrar de novo o hash roda numa thread.
+
+    Métricas: pedidos em execução/na fila, pico da fila, rejeitados, recriações
+    do pool e tempo médio por pedido (fila + hash).
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.max_queue_depth = 0
+        self._total_seconds = 0.0
+
+    def start(self):
+        """Criar o pool e subir todos os processos"""
+        with self._start_lock:
+            if self._executor is None:
+                executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                # Os processos nascem nos submits do aquecimento; depois o pool não cria outros
+                futures = [executor.submit(_warm_up) for _ in range(self.workers)]
+                for future in futures:
+                    future.result()
+                self._executor = executor
+        return self
+
+    def _restart(self, broken):
+        """Trocar o pool quebrado por um novo (uma vez, mesmo com vários pedidos falhando)"""
+        with self._start_lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False)
+                self._executor = None
+                self.restarts += 1
+                logger.warning("⚠️ Pool de hash de senhas quebrado, recriando processos")
+        return self.start()
+
+    def shutdown(self):
+        with self._start_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    @property
+    def queue_depth(self):
+        return max(self._in_flight - self.workers, 0)
+
+    async def _run(self, func, *args):
+        with self._lock:
+            if self._in_flight - self.workers >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente")
+            self._in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            if self._executor is None:
+                await loop.run_in_executor(None, self.start)
+            executor = self._executor
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                await loop.run_in_executor(None, self._restart, executor)
+            try:
+                return await loop.run_in_executor(self._executor, func, *args)
+            except BrokenProcessPool:
+                logger.error("❌ Pool de hash de senhas quebrado de novo, calculando numa thread")
+                return await loop.run_in_executor(None, func, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+                self._total_seconds += time.perf_counter() - start
+
+    async def hash(self, password):
+        return await self._run(generate_password_hash, password)
+
+    async def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return await self._run(check_password_hash, password_hash, password)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": self._executor is not None,
+                "in_flight": self._in_flight,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "avg_ms": round(self._total_seconds / self.completed * 1000, 2) if self.completed else None
+            }
+
+
+password_hasher = PasswordHasher()
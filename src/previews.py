@@ -0,0 +1,157 @@
+# src/previews.py
+# Miniaturas dos arquivos de processo (1ª página do PDF, imagem reduzida) por SHA-256;
+# caminhos do cache e limpeza em advbs_shared.previews
+import asyncio
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import OrderedDict
+
+import anyio
+
+from advbs_shared.previews import is_sha256, preview_path
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele não há miniatura de imagens
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_MAX_SIZE = int(os.getenv("PREVIEW_MAX_SIZE", "320"))
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "2"))
+# Hash que falhou só volta para a fila depois desse intervalo; no máximo
+# PREVIEW_FAILED_MAX falhas lembradas (as mais antigas saem primeiro)
+PREVIEW_RETRY_SECONDS = int(os.getenv("PREVIEW_RETRY_SECONDS", "3600"))
+PREVIEW_FAILED_MAX = int(os.getenv("PREVIEW_FAILED_MAX", "10000"))
+# pdftoppm (poppler-utils) renderiza a 1ª página dos PDFs; procurado uma vez só
+PDFTOPPM_BIN = shutil.which(os.getenv("PDFTOPPM_BIN", "pdftoppm"))
+# Conteúdo endereçado por hash nunca muda: cache de um ano
+PREVIEW_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+PDF_EXTENSIONS = {'.pdf'}
+
+def preview_kind(filename):
+    """'pdf', 'image' ou None conforme a extensão e as ferramentas disponíveis"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in PDF_EXTENSIONS and PDFTOPPM_BIN:
+        return 'pdf'
+    if extension in IMAGE_EXTENSIONS and Image is not None:
+        return 'image'
+    return None
+
+
+def _render_image(source_path, dest_path, max_size):
+    with Image.open(source_path) as image:
+        image.draft("RGB", (max_size, max_size))  # JPEG: decodifica já reduzido
+        image.thumbnail((max_size, max_size))
+        image.convert("RGB").save(dest_path, "JPEG", quality=80, optimize=True)
+
+
+def _render_pdf(source_path, dest_path, max_size):
+    prefix = dest_path[:-len(".jpg")]
+    subprocess.run([PDFTOPPM_BIN, "-f", "1", "-l", "1", "-singlefile", "-jpeg",
+                    "-scale-to", str(max_size), source_path, prefix],
+                   check=True, capture_output=True, timeout=60)
+
+
+def render_preview(source_path, sha256, filename, base_dir=None, max_size=PREVIEW_MAX_SIZE):
+    """Gerar a miniatura se ainda não existe; retorna o caminho ou None (tipo sem miniatura)
+
+    Grava num arquivo temporário da mesma pasta e renomeia no final, então
+    leitores nunca veem uma miniatura pela metade.
+    """
+    path = preview_path(sha256, base_dir)
+    if os.path.exists(path):
+        return path
+    kind = preview_kind(filename)
+    if kind is None:
+        return None
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".jpg", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        (_render_pdf if kind == 'pdf' else _render_image)(source_path, temp_path, max_size)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+
+class PreviewWorker:
+    """Fila assíncrona de miniaturas consumida por PREVIEW_WORKERS tarefas
+
+    A renderização roda em threads (anyio), fora do event loop. Cada hash entra
+    uma vez na fila mesmo com uploads repetidos do mesmo conteúdo, e hashes
+    que falharam (hash -> momento da falha, limitado a max_failed) só são
+    tentados de novo após retry_seconds.
+    """
+
+    def __init__(self, workers=PREVIEW_WORKERS, base_dir=None,
+                 retry_seconds=PREVIEW_RETRY_SECONDS, max_failed=PREVIEW_FAILED_MAX):
+        self.workers = workers
+        self.base_dir = base_dir
+        self.retry_seconds = retry_seconds
+        self.max_failed = max_failed
+        self._queue = None
+        self._tasks = []
+        self._pending = set()
+        self.failed = OrderedDict()
+        self.generated = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+
+    def submit(self, sha256, source_path, filename):
+        """Enfileirar sem esperar; retorna True se a miniatura vai ser (ou já foi) gerada"""
+        if not is_sha256(sha256) or self._recently_failed(sha256) or preview_kind(filename) is None:
+            return False
+        if sha256 in self._pending or os.path.exists(preview_path(sha256, self.base_dir)):
+            return True
+        if self._queue is None:
+            return False  # worker não iniciado (scripts, testes sem startup)
+        self._pending.add(sha256)
+        self._queue.put_nowait((sha256, source_path, filename))
+        return True
+
+    async def join(self):
+        await self._queue.join()
+
+    def _recently_failed(self, sha256):
+        failed_at = self.failed.get(sha256)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at < self.retry_seconds:
+            return True
+        del self.failed[sha256]  # intervalo passou: tentar de novo
+        return False
+
+    def _record_failure(self, sha256):
+        self.failed[sha256] = time.monotonic()
+        self.failed.move_to_end(sha256)
+        while len(self.failed) > self.max_failed:
+            self.failed.popitem(last=False)
+
+    async def _run(self):
+        while True:
+            sha256, source_path, filename = await self._queue.get()
+            try:
+                await anyio.to_thread.run_sync(render_preview, source_path, sha256, filename, self.base_dir)
+                self.generated += 1
+            except Exception as e:
+                self._record_failure(sha256)
+                logger.warning(f"⚠️ Erro ao gerar miniatura de {filename} ({sha256[:12]}): {e}")
+            finally:
+                self._pending.discard(sha256)
+                self._queue.task_done()
+
+
+preview_worker = PreviewWorker()
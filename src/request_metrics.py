@@ -0,0 +1,173 @@
+# src/request_metrics.py
+# Métricas por rota (contagem, latência, status, SQL por requisição) no formato texto do Prometheus
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites (em segundos) dos buckets de latência e de tempo de SQL por requisição
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites dos buckets de quantidade de statements SQL por requisição
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+# Com METRICS_TOKEN definido, /metrics exige "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Rota sem correspondência (404): um rótulo só, para não criar uma série por URL
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """Histograma cumulativo no estilo Prometheus (buckets le=..., soma e contagem)"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(le, contagem acumulada)] incluindo +Inf"""
+        total, result = 0, []
+        for bound, count in zip(list(self.bounds) + ["+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class RequestStats:
+    """SQL executado durante uma requisição (preenchido pelos eventos do engine)"""
+
+    __slots__ = ("sql_count", "sql_seconds")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+
+
+class RouteMetrics:
+    __slots__ = ("statuses", "latency", "sql_count", "sql_time")
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sql_count = Histogram(SQL_COUNT_BUCKETS)
+        self.sql_time = Histogram(LATENCY_BUCKETS)
+
+
+_current_request = contextvars.ContextVar("request_metrics_stats", default=None)
+
+
+class RequestMetrics:
+    """Contadores e histogramas por (método, rota) expostos em /metrics
+
+    A rota é o template registrado (/api/admin/clients/{client_id}), não a URL,
+    então o número de séries é limitado pelo número de rotas. O SQL é
+    atribuído à requisição por um ContextVar: o anyio copia o contexto para as
+    threads do banco (run_in_db_thread), e os eventos before/after_cursor_execute
+    de todos os engines somam no RequestStats da requisição corrente. A
+    latência vai até o início da resposta (cabeçalhos), não até o fim do corpo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self.in_flight = 0
+        self.started_at = time.time()
+
+    def start_request(self):
+        """Abrir a coleta de uma requisição; retorna o RequestStats dela"""
+        stats = RequestStats()
+        _current_request.set(stats)
+        with self._lock:
+            self.in_flight += 1
+        return stats
+
+    def finish_request(self, method, route, status_code, duration, stats):
+        key = (method, route or UNMATCHED_ROUTE)
+        with self._lock:
+            self.in_flight -= 1
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = RouteMetrics()
+            metrics.statuses[status_code] = metrics.statuses.get(status_code, 0) + 1
+            metrics.latency.observe(duration)
+            metrics.sql_count.observe(stats.sql_count)
+            metrics.sql_time.observe(stats.sql_seconds)
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self.started_at = time.time()
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP http_requests_in_flight Requisições em andamento.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP http_requests_total Requisições concluídas por rota e status.",
+                "# TYPE http_requests_total counter"
+            ]
+            for (method, route), metrics in routes:
+                for status_code, count in sorted(metrics.statuses.items()):
+                    lines.append(f'http_requests_total{{{_labels(method, route)},status="{status_code}"}} {count}')
+            for name, attribute, description in (
+                    ("http_request_duration_seconds", "latency", "Latência das requisições por rota."),
+                    ("http_request_sql_statements", "sql_count", "Statements SQL executados por requisição."),
+                    ("http_request_sql_duration_seconds", "sql_time", "Tempo gasto em SQL por requisição.")):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), metrics in routes:
+                    _histogram_lines(lines, name, _labels(method, route), getattr(metrics, attribute))
+            lines.append("# HELP process_start_time_seconds Início da coleta (epoch).")
+            lines.append("# TYPE process_start_time_seconds gauge")
+            lines.append(f"process_start_time_seconds {self.started_at}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(method, route):
+    return f'method="{_escape(method)}",route="{_escape(route)}"'
+
+
+def _histogram_lines(lines, name, labels, histogram):
+    for bound, count in histogram.cumulative():
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+request_metrics = RequestMetrics()
+
+# ==================== EVENTOS DO ENGINE ====================
+# Registrados na classe Engine: valem para o engine principal e os criados em scripts/testes
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None and context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += time.perf_counter() - started
@@ -0,0 +1,222 @@
+# src/resumable_uploads.py
+# Upload retomável em partes numeradas para arquivos de processo
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime
+
+import anyio
+from fastapi import HTTPException
+
+from uploads import UPLOAD_CHUNK_SIZE, MAX_UPLOAD_SIZE, upload_too_large
+
+UPLOAD_SESSIONS_DIR = os.getenv("UPLOAD_SESSIONS_DIR", "uploads/sessions")
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) * 3600
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+_SHA256 = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+class UploadSessionStore:
+    """Sessões de upload guardadas em disco (UPLOAD_SESSIONS_DIR/<upload_id>/)
+
+    Cada sessão tem meta.json (imutável após a criação), o arquivo de dados
+    onde cada parte é gravada no seu offset e um marcador por parte recebida
+    em chunks/. O marcador só é criado depois que a parte inteira foi gravada,
+    então partes fora de ordem ou repetidas (reenvio após falha de rede) são
+    idempotentes e o estado pode ser consultado por qualquer worker.
+    """
+
+    def __init__(self, base_dir=UPLOAD_SESSIONS_DIR, ttl=UPLOAD_SESSION_TTL):
+        self.base_dir = base_dir
+        self.ttl = ttl
+
+    def _session_dir(self, upload_id):
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+        return os.path.join(self.base_dir, upload_id)
+
+    def create(self, client_id, filename, size, chunk_size=None, case_id=None, sha256=None,
+               description="", created_by=None, max_size=MAX_UPLOAD_SIZE):
+        chunk_size = int(chunk_size or UPLOAD_CHUNK_SIZE)
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="Tamanho do arquivo inválido")
+        if size > max_size:
+            raise upload_too_large(max_size)
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise HTTPException(status_code=400,
+                                detail=f"chunk_size deve estar entre {MIN_CHUNK_SIZE} e {MAX_CHUNK_SIZE} bytes")
+        if sha256 and not (isinstance(sha256, str) and _SHA256.match(sha256)):
+            raise HTTPException(status_code=400, detail="sha256 deve ter 64 caracteres hexadecimais")
+
+        upload_id = uuid.uuid4().hex
+        session_dir = os.path.join(self.base_dir, upload_id)
+        os.makedirs(os.path.join(session_dir, "chunks"))
+        meta = {
+            "upload_id": upload_id,
+            "client_id": int(client_id),
+            "case_id": int(case_id) if case_id else None,
+            "filename": os.path.basename(filename),
+            "size": int(size),
+            "chunk_size": chunk_size,
+            "total_chunks": -(-int(size) // chunk_size),
+            "sha256": sha256.lower() if sha256 else None,
+            "description": description or "",
+            "created_by": created_by,
+            "created_at": datetime.now().isoformat()
+        }
+        with open(os.path.join(session_dir, "meta.json"), "w") as handle:
+            json.dump(meta, handle)
+        open(os.path.join(session_dir, "data"), "wb").close()
+        return meta
+
+    def meta(self, upload_id):
+        try:
+            with open(os.path.join(self._session_dir(upload_id), "meta.json")) as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+
+    def chunk_length(self, meta, index):
+        if not 0 <= index < meta["total_chunks"]:
+            raise HTTPException(status_code=400, detail=f"Parte deve estar entre 0 e {meta['total_chunks'] - 1}")
+        return min(meta["chunk_size"], meta["size"] - index * meta["chunk_size"])
+
+    def received(self, upload_id):
+        try:
+            return sorted(int(name) for name in os.listdir(os.path.join(self._session_dir(upload_id), "chunks")))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+
+    def status(self, upload_id):
+        meta = self.meta(upload_id)
+        received = self.received(upload_id)
+        ranges = []
+        for index in received:
+            start = index * meta["chunk_size"]
+            end = start + self.chunk_length(meta, index)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        received_set = set(received)
+        return {
+            "upload_id": upload_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "chunk_size": meta["chunk_size"],
+            "total_chunks": meta["total_chunks"],
+            "received_chunks": len(received),
+            "received_bytes": sum(end - start for start, end in ranges),
+            "received_ranges": ranges,
+            "missing_chunks": [i for i in range(meta["total_chunks"]) if i not in received_set],
+            "complete": len(received) == meta["total_chunks"]
+        }
+
+    async def write_chunk(self, upload_id, index, body_stream):
+        """Gravar a parte `index` a partir do corpo da requisição (em pedaços)"""
+        meta = await anyio.to_thread.run_sync(self.meta, upload_id)
+        expected = self.chunk_length(meta, index)
+        session_dir = self._session_dir(upload_id)
+        offset = index * meta["chunk_size"]
+
+        try:
+            handle = await anyio.to_thread.run_sync(open, os.path.join(session_dir, "data"), "r+b")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+        written = 0
+        try:
+            await anyio.to_thread.run_sync(handle.seek, offset)
+            async for piece in body_stream:
+                if not piece:
+                    continue
+                written += len(piece)
+                if written > expected:
+                    raise HTTPException(status_code=400, detail=f"Parte {index} deve ter {expected} bytes")
+                await anyio.to_thread.run_sync(handle.write, piece)
+            await anyio.to_thread.run_sync(handle.flush)
+        finally:
+            await anyio.to_thread.run_sync(handle.close)
+
+        if written != expected:
+            raise HTTPException(status_code=400, detail=f"Parte {index} deve ter {expected} bytes (recebidos {written})")
+        await anyio.to_thread.run_sync(self._mark_received, session_dir, index)
+        return await anyio.to_thread.run_sync(self.status, upload_id)
+
+    def _mark_received(self, session_dir, index):
+        """Criar o marcador da parte, se a sessão ainda existir
+
+        A sessão pode ter sido finalizada (claim) ou descartada enquanto a parte
+        era gravada; sem o diretório o open falha, a gravação não vale e o
+        cliente recebe 409.
+        """
+        try:
+            open(os.path.join(session_dir, "chunks", str(index)), "w").close()
+        except FileNotFoundError:
+            raise HTTPException(status_code=409, detail="Sessão de upload finalizada ou descartada durante o envio")
+
+    def claim(self, upload_id):
+        """Reservar a sessão para finalizar (rename atômico evita finalização dupla)"""
+        session_dir = self._session_dir(upload_id)
+        claimed_dir = session_dir + ".finalizing"
+        try:
+            os.rename(session_dir, claimed_dir)
+        except FileNotFoundError:
+            if os.path.isdir(claimed_dir):
+                raise HTTPException(status_code=409, detail="Upload já está sendo finalizado")
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+        os.utime(claimed_dir)  # finalização em andamento conta como atividade para a coleta
+        return claimed_dir
+
+    def release(self, claimed_dir):
+        """Devolver a sessão reservada (finalização falhou; o cliente pode tentar de novo)"""
+        os.rename(claimed_dir, claimed_dir[:-len(".finalizing")])
+
+    def assemble(self, claimed_dir, dest_path, chunk_size=UPLOAD_CHUNK_SIZE):
+        """Validar o arquivo montado e movê-lo para dest_path; retorna (tamanho, sha256)"""
+        with open(os.path.join(claimed_dir, "meta.json")) as handle:
+            meta = json.load(handle)
+        digest = hashlib.sha256()
+        with open(os.path.join(claimed_dir, "data"), "rb") as handle:
+            while True:
+                chunk = handle.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        file_sha256 = digest.hexdigest()
+        if meta["sha256"] and meta["sha256"] != file_sha256:
+            raise HTTPException(status_code=422, detail="SHA-256 do arquivo montado não confere")
+        os.replace(os.path.join(claimed_dir, "data"), dest_path)
+        return meta["size"], file_sha256
+
+    def discard(self, upload_id=None, session_dir=None):
+        shutil.rmtree(session_dir or self._session_dir(upload_id), ignore_errors=True)
+
+    def collect_garbage(self, now=None):
+        """Remover sessões sem atividade há mais de `ttl` segundos; retorna quantas"""
+        now = now or time.time()
+        removed = 0
+        try:
+            names = os.listdir(self.base_dir)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            session_dir = os.path.join(self.base_dir, name)
+            try:
+                last_activity = max(os.path.getmtime(session_dir),
+                                    os.path.getmtime(os.path.join(session_dir, "chunks")))
+            except FileNotFoundError:
+                continue
+            if now - last_activity > self.ttl:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+upload_sessions = UploadSessionStore()
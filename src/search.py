@@ -0,0 +1,218 @@
+# src/search.py
+# Busca unificada (/api/admin/search) em clientes, casos e arquivos de processo
+import logging
+import os
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TYPES = ('clients', 'cases', 'files')
+# innodb_ft_min_token_size: termos menores não estão no índice FULLTEXT
+FULLTEXT_MIN_TOKEN_SIZE = int(os.getenv("FULLTEXT_MIN_TOKEN_SIZE", "3"))
+# Resultados ordenados por relevância não têm cursor: limitar a profundidade
+MAX_SEARCH_DEPTH = 1000
+MAX_TERMS = 8
+
+_TERM = re.compile(r"\w+")
+
+# Colunas indexadas por tabela (nome do índice FULLTEXT no MySQL / tabela FTS5 no SQLite)
+SEARCH_INDEXES = {
+    'users': ('ft_users_search', 'users_fts', ('name', 'email', 'cpf')),
+    'client_cases': ('ft_client_cases_search', 'client_cases_fts', ('title', 'description')),
+    'process_files': ('ft_process_files_search', 'process_files_fts', ('original_filename',)),
+}
+
+# Uma consulta por tipo; {match} e {score} vêm do backend (FULLTEXT, FTS5 ou LIKE)
+_SCOPES = {
+    'clients': {
+        'table': 'users', 'alias': 'u',
+        'select': "u.id, u.name as title, u.email as subtitle, u.id as client_id, NULL as case_id",
+        'where': "u.type = 'cliente'",
+        'like': "(LOWER(u.name) LIKE :like OR LOWER(u.email) LIKE :like OR u.cpf LIKE :like)",
+    },
+    'cases': {
+        'table': 'client_cases', 'alias': 'cc',
+        'select': "cc.id, cc.title, SUBSTR(cc.description, 1, 160) as subtitle, "
+                  "cc.user_id as client_id, cc.id as case_id",
+        'where': "1 = 1",
+        'like': "(LOWER(cc.title) LIKE :like OR LOWER(cc.description) LIKE :like)",
+    },
+    'files': {
+        'table': 'process_files', 'alias': 'pf',
+        'select': "pf.id, pf.original_filename as title, NULL as subtitle, "
+                  "pf.user_id as client_id, pf.case_id",
+        'where': "1 = 1",
+        'like': "LOWER(pf.original_filename) LIKE :like",
+    },
+}
+
+_SCOPE_TYPES = {'clients': 'client', 'cases': 'case', 'files': 'file'}
+
+
+def _fts_ddl(table, fts_table, columns):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({cols}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+# Backend por banco (URL do engine): 'mysql', 'sqlite' ou 'like'
+_backends = {}
+
+
+def _engine_key(session):
+    return str(session.get_bind().url)
+
+
+def ensure_search_index(session):
+    """Preparar a busca e escolher o backend
+
+    MySQL: usa os índices FULLTEXT de add_fulltext_search.sql (com collation
+    utf8mb4_general_ci a comparação já ignora acentos e maiúsculas); sem eles,
+    avisa e usa LIKE. SQLite: cria tabelas FTS5 de conteúdo externo mantidas
+    por triggers e popula na primeira vez.
+    """
+    dialect = session.get_bind().dialect.name
+    backend = 'like'
+    if dialect == 'mysql':
+        missing = []
+        for table, (index_name, _, _) in SEARCH_INDEXES.items():
+            row = session.execute(text(f"SHOW INDEX FROM {table} WHERE Key_name = :name"),
+                                  {"name": index_name}).fetchone()
+            if row is None:
+                missing.append(f"{table}.{index_name}")
+        if missing:
+            logger.warning(f"⚠️ Índices FULLTEXT ausentes ({', '.join(missing)}): "
+                           f"busca usando LIKE até aplicar add_fulltext_search.sql")
+        else:
+            backend = 'mysql'
+    elif dialect == 'sqlite':
+        # DDL no SQLite não volta atrás com rollback: conferir as colunas antes de criar algo
+        for table, (_, _, columns) in SEARCH_INDEXES.items():
+            existing = {row[1] for row in session.execute(text(f"PRAGMA table_info({table})"))}
+            if not set(columns) <= existing:
+                logger.warning(f"⚠️ Tabela {table} sem as colunas da busca: usando LIKE")
+                _backends[_engine_key(session)] = backend
+                return backend
+        for table, (_, fts_table, columns) in SEARCH_INDEXES.items():
+            exists = session.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                                     {"name": fts_table}).fetchone()
+            for statement in _fts_ddl(table, fts_table, columns):
+                session.execute(text(statement))
+            if not exists:
+                session.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+        session.commit()
+        backend = 'sqlite'
+    _backends[_engine_key(session)] = backend
+    return backend
+
+
+def search_terms(q):
+    return [term.lower() for term in _TERM.findall(q or "")][:MAX_TERMS]
+
+
+def _match_query(backend, terms):
+    """Todos os termos, cada um como prefixo (busca enquanto digita)"""
+    if backend == 'mysql':
+        return " ".join(f"+{term}*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _scope_sql(scope, backend):
+    spec = _SCOPES[scope]
+    table, alias = spec['table'], spec['alias']
+    index_name, fts_table, columns = SEARCH_INDEXES[table]
+    if backend == 'mysql':
+        match = f"MATCH({', '.join(f'{alias}.{c}' for c in columns)}) AGAINST (:match IN BOOLEAN MODE)"
+        return (f"SELECT {spec['select']}, {match} as score FROM {table} {alias} "
+                f"WHERE {spec['where']} AND {match} "
+                f"ORDER BY score DESC, {alias}.id DESC LIMIT :limit")
+    if backend == 'sqlite':
+        return (f"SELECT {spec['select']}, -bm25({fts_table}) as score "
+                f"FROM {fts_table} CROSS JOIN {table} {alias} ON {alias}.id = {fts_table}.rowid "
+                f"WHERE {fts_table} MATCH :match AND {spec['where']} "
+                f"ORDER BY score DESC, {alias}.id DESC LIMIT :limit")
+    return (f"SELECT {spec['select']}, 0 as score FROM {table} {alias} "
+            f"WHERE {spec['where']} AND {spec['like']} ORDER BY {alias}.id DESC LIMIT :limit")
+
+
+def parse_types(types):
+    if not types:
+        return list(SEARCH_TYPES)
+    selected = [t.strip() for t in types.split(",") if t.strip()]
+    invalid = [t for t in selected if t not in SEARCH_TYPES]
+    if invalid or not selected:
+        raise HTTPException(status_code=400, detail=f"types deve conter: {', '.join(SEARCH_TYPES)}")
+    return selected
+
+
+def run_search(session, q, types=SEARCH_TYPES, page=1, limit=20, backend=None):
+    """Resultados de todos os tipos intercalados por relevância, paginados
+
+    Cada tipo devolve no máximo page * limit + 1 linhas já ordenadas pelo
+    índice; a página é recortada da junção. Retorna (resultados, has_more, backend).
+
+    As pontuações do índice não são comparáveis entre tipos (número de
+    colunas, tamanho dos textos), então a de cada linha é dividida pela maior
+    do seu tipo: o melhor resultado de cada tipo vale 1.0 e a intercalação
+    compara relevâncias relativas. O melhor de cada tipo é sempre a primeira
+    linha buscada, então a escala não muda de uma página para outra.
+    """
+    if page < 1 or limit < 1:
+        raise HTTPException(status_code=400, detail="page e limit devem ser positivos")
+    if page * limit > MAX_SEARCH_DEPTH:
+        raise HTTPException(status_code=400, detail=f"Busca limitada aos {MAX_SEARCH_DEPTH} primeiros resultados")
+
+    terms = search_terms(q)
+    if not terms:
+        return [], False, None
+
+    backend = backend or _backends.get(_engine_key(session), 'like')
+    if backend == 'mysql':
+        # Termos curtos não estão no índice: ficam de fora (ou LIKE, se só houver eles)
+        indexed = [term for term in terms if len(term) >= FULLTEXT_MIN_TOKEN_SIZE]
+        if indexed:
+            terms = indexed
+        else:
+            backend = 'like'
+
+    depth = page * limit + 1
+    params = {"limit": depth}
+    if backend == 'like':
+        params["like"] = f"%{(q or '').strip().lower()}%"
+    else:
+        params["match"] = _match_query(backend, terms)
+
+    results = []
+    for order, scope in enumerate(types):
+        rows = session.execute(text(_scope_sql(scope, backend)), params).fetchall()
+        top = max((float(row.score or 0) for row in rows), default=0)
+        for row in rows:
+            results.append({
+                'type': _SCOPE_TYPES[scope],
+                'id': row.id,
+                'title': row.title,
+                'subtitle': row.subtitle,
+                'client_id': row.client_id,
+                'case_id': row.case_id,
+                'score': round(float(row.score or 0) / top, 4) if top > 0 else 0.0,
+                '_order': order
+            })
+
+    results.sort(key=lambda r: (-r['score'], r['_order'], -r['id']))
+    start = (page - 1) * limit
+    page_results = results[start:start + limit]
+    for result in page_results:
+        del result['_order']
+    return page_results, len(results) > start + limit, backend
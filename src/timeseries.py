@@ -0,0 +1,106 @@
+# src/timeseries.py
+# Série temporal de casos (/api/analytics/timeseries) lida do rollup diário por
+# categoria, que é mantido por advbs_shared.case_rollup
+from datetime import date, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+BUCKETS = ('day', 'week', 'month')
+DEFAULT_RANGE_DAYS = 90
+MAX_RANGE_DAYS = 3660  # ~10 anos
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def parse_range(start, end):
+    """(start, end) como date; padrão: últimos DEFAULT_RANGE_DAYS dias"""
+    try:
+        end_day = date.fromisoformat(end) if end else date.today()
+        start_day = date.fromisoformat(start) if start else end_day - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Datas devem estar no formato AAAA-MM-DD")
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="start deve ser anterior a end")
+    if (end_day - start_day).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Intervalo máximo de {MAX_RANGE_DAYS} dias")
+    return start_day, end_day
+
+
+def _summary(opened, concluded, seconds):
+    return {
+        'opened': opened,
+        'concluded': concluded,
+        'avg_resolution_hours': round(seconds / concluded / 3600, 2) if concluded else None
+    }
+
+
+# Início do bucket calculado no banco: a agregação por semana/mês devolve
+# poucas linhas mesmo para intervalos de vários anos
+BUCKET_SQL = {
+    'mysql': {
+        'day': "day",
+        'week': "DATE_SUB(day, INTERVAL WEEKDAY(day) DAY)",
+        'month': "DATE_FORMAT(day, '%Y-%m-01')"
+    },
+    'sqlite': {
+        'day': "day",
+        'week': "date(day, 'weekday 0', '-6 days')",
+        'month': "date(day, 'start of month')"
+    }
+}
+
+
+def build_timeseries(session, start_day, end_day, bucket='day', category=None):
+    """Série com um ponto por bucket (buckets sem eventos vêm zerados)"""
+    dialect = session.get_bind().dialect.name
+    period_sql = BUCKET_SQL.get(dialect, BUCKET_SQL['mysql'])[bucket]
+    query = f"""
+        SELECT {period_sql} as period, category,
+               SUM(opened) as opened, SUM(concluded) as concluded,
+               SUM(resolution_seconds) as resolution_seconds
+        FROM case_daily_rollup
+        WHERE day BETWEEN :start AND :end
+    """
+    params = {"start": start_day, "end": end_day}
+    if category:
+        query += " AND category = :category"
+        params["category"] = category
+    query += f" GROUP BY {period_sql}, category"
+
+    points = {}
+    parsed = {}
+    for period, row_category, opened, concluded, seconds in session.execute(text(query), params).fetchall():
+        key = parsed.get(period)
+        if key is None:
+            key = parsed[period] = period if isinstance(period, date) else date.fromisoformat(str(period))
+        points.setdefault(key, {})[row_category] = (int(opened), int(concluded), int(seconds))
+
+    series = []
+    period = bucket_start(start_day, bucket)
+    while period <= end_day:
+        by_category = points.get(period, {})
+        opened = sum(t[0] for t in by_category.values())
+        concluded = sum(t[1] for t in by_category.values())
+        seconds = sum(t[2] for t in by_category.values())
+        series.append({
+            'period': period.isoformat(),
+            **_summary(opened, concluded, seconds),
+            'by_category': {name: _summary(*t) for name, t in sorted(by_category.items())}
+        })
+        period = next_bucket(period, bucket)
+    return series
@@ -0,0 +1,63 @@
+# src/uploads.py
+# Gravação de uploads em disco por partes, fora do event loop
+import hashlib
+import os
+
+import anyio
+from fastapi import HTTPException
+
+UPLOAD_DIR = os.getenv("PROCESS_FILES_DIR", "uploads/process_files")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE_MB", "300")) * 1024 * 1024
+
+
+def upload_limit_message(max_size=MAX_UPLOAD_SIZE):
+    return f"Arquivo excede o limite de {max_size // (1024 * 1024)} MB"
+
+
+def upload_too_large(max_size=MAX_UPLOAD_SIZE):
+    return HTTPException(status_code=413, detail=upload_limit_message(max_size))
+
+
+def exceeds_upload_limit(headers, max_size=MAX_UPLOAD_SIZE):
+    """Content-Length já passa do limite (folga para os campos do multipart)"""
+    content_length = headers.get("content-length")
+    return bool(content_length and content_length.isdigit() and int(content_length) > max_size + 64 * 1024)
+
+
+def _write_chunk(handle, digest, chunk):
+    handle.write(chunk)
+    digest.update(chunk)
+
+
+async def stream_upload_to_disk(upload, dest_path, max_size=MAX_UPLOAD_SIZE, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Copiar o UploadFile para dest_path em partes de chunk_size
+
+    Escrita e hash rodam em threads, então o event loop só espera I/O; no máximo
+    uma parte fica em memória por requisição. O arquivo é gravado em
+    dest_path + ".part" e renomeado no final, sem deixar arquivo parcial em
+    caso de erro ou de estouro do limite (413).
+
+    Retorna (tamanho em bytes, sha256 em hexadecimal).
+    """
+    temp_path = dest_path + ".part"
+    digest = hashlib.sha256()
+    size = 0
+    handle = await anyio.to_thread.run_sync(open, temp_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise upload_too_large(max_size)
+            await anyio.to_thread.run_sync(_write_chunk, handle, digest, chunk)
+        await anyio.to_thread.run_sync(handle.close)
+        await anyio.to_thread.run_sync(os.replace, temp_path, dest_path)
+    except BaseException:
+        handle.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size, digest.hexdigest()
@@ -0,0 +1,82 @@
+"""
+Regressão: log de acesso JSON amostrado (src/access_log.py)
+
+Verifica que erros e requisições lentas são sempre registrados, que as
+bem-sucedidas seguem a amostragem, que credenciais (Authorization, Cookie,
+?token=) não chegam ao log e que a fila cheia descarta em vez de bloquear.
+"""
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from access_log import REDACTED, AccessLog, redact_query
+
+
+def read_lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def with_access_log(log, scenario):
+    """Roda o cenário com o middleware de main.py gravando em log"""
+    original = main.access_log
+    main.access_log = log.start()
+    try:
+        scenario(TestClient(main.app))
+    finally:
+        log.stop()
+        main.access_log = original
+
+
+def test_errors_always_logged_and_headers_redacted():
+    stream = io.StringIO()
+    log = AccessLog(sample_rate=0, slow_ms=60000, stream=stream)
+
+    def scenario(client):
+        assert client.get("/api/health").status_code == 200
+        response = client.get("/api/auth/verify?token=segredo&page=2",
+                              headers={"Authorization": "Bearer abc.def.ghi", "Cookie": "sessao=1",
+                                       "User-Agent": "teste"})
+        assert response.status_code == 401
+
+    with_access_log(log, scenario)
+    lines = read_lines(stream)
+    assert len(lines) == 1 and log.skipped == 1
+    entry = lines[0]
+    assert entry["path"] == "/api/auth/verify" and entry["status"] == 401 and entry["reason"] == "error"
+    assert entry["headers"]["authorization"] == REDACTED and entry["headers"]["cookie"] == REDACTED
+    assert entry["headers"]["user-agent"] == "teste"
+    assert entry["query"] == "token=%5Bredacted%5D&page=2"
+    assert "abc.def.ghi" not in stream.getvalue() and "segredo" not in stream.getvalue()
+
+
+def test_sampling_and_slow_requests():
+    stream = io.StringIO()
+    with_access_log(AccessLog(sample_rate=1, slow_ms=60000, stream=stream),
+                    lambda client: [client.get("/api/health") for _ in range(3)])
+    assert [e["reason"] for e in read_lines(stream)] == ["sample"] * 3
+
+    stream = io.StringIO()
+    with_access_log(AccessLog(sample_rate=0, slow_ms=0, stream=stream),
+                    lambda client: client.get("/api/health"))
+    assert [e["reason"] for e in read_lines(stream)] == ["slow"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    log = AccessLog(sample_rate=1, queue_size=1, stream=io.StringIO()).start()
+    log._listener.stop()  # ninguém consumindo a fila
+    log._listener = None
+
+    class FakeRequest:
+        method, client, headers = "GET", None, {}
+
+        class url:
+            path, query = "/x", ""
+
+    for _ in range(3):
+        log.record(FakeRequest, 200, 1.0)
+    assert log.snapshot()["dropped"] == 2 and log.logged == 3
+    log.logger.removeHandler(log._handler)
+    assert redact_query("") == "" and redact_query("senha=1&q=a") == "senha=%5Bredacted%5D&q=a"
+
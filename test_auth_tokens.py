@@ -0,0 +1,123 @@
+"""
+Regressão: cache de verificação dos tokens JWT (src/auth_tokens.py)
+
+Verifica hits/misses, expiração pelo exp do token, limite do LRU, que um
+token adulterado nunca aproveita a entrada de outro, o verify_token das rotas
+e que a verificação em cache custa uma fração do jwt.decode.
+"""
+import base64
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import jwt
+from fastapi.testclient import TestClient
+
+import main
+from auth_tokens import TokenVerifier, token_verifier
+
+SECRET = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
+
+
+def make_token(user_id=1, user_type='admin', expires_in=3600):
+    return jwt.encode({'user_id': user_id, 'type': user_type, 'exp': int(time.time()) + expires_in},
+                      SECRET, algorithm='HS256')
+
+
+def test_cache_hits_and_expiry():
+    verifier = TokenVerifier(secret_key=SECRET)
+    token = make_token()
+    assert verifier.decode(token)['user_id'] == 1
+    assert verifier.decode(token)['user_id'] == 1
+    snapshot = verifier.snapshot()
+    assert (snapshot['hits'], snapshot['misses'], snapshot['entries']) == (1, 1, 1)
+
+    # Vencido o exp, a entrada é descartada e o decode recusa o token
+    short = make_token(expires_in=1)
+    verifier.decode(short)
+    time.sleep(1.1)
+    try:
+        verifier.decode(short)
+        assert False, "token expirado aceito"
+    except jwt.ExpiredSignatureError:
+        pass
+    assert verifier.snapshot()['entries'] == 1
+
+    # Tokens inválidos não entram no cache
+    for _ in range(2):
+        try:
+            verifier.decode("a.b.c")
+            assert False
+        except jwt.InvalidTokenError:
+            pass
+    assert verifier.snapshot()['entries'] == 1
+
+
+def test_lru_is_bounded():
+    verifier = TokenVerifier(secret_key=SECRET, max_entries=3)
+    tokens = [make_token(user_id=i) for i in range(5)]
+    for token in tokens:
+        verifier.decode(token)
+    verifier.decode(tokens[2])  # uso recente: fica
+    verifier.decode(make_token(user_id=99))
+    snapshot = verifier.snapshot()
+    assert snapshot['entries'] == 3 and snapshot['evictions'] == 3
+    hits = snapshot['hits']
+    verifier.decode(tokens[2])
+    assert verifier.snapshot()['hits'] == hits + 1
+
+
+def test_tampered_payload_is_not_a_hit():
+    verifier = TokenVerifier(secret_key=SECRET)
+    token = make_token(user_id=2, user_type='cliente')
+    verifier.decode(token)
+    header, payload, signature = token.split(".")
+    claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    claims['type'] = 'admin'
+    forged_payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    try:
+        verifier.decode(f"{header}.{forged_payload}.{signature}")
+        assert False, "payload adulterado aceito"
+    except jwt.InvalidSignatureError:
+        pass
+
+
+def test_verify_token_dependency():
+    token_verifier.clear()
+    client = TestClient(main.app)
+    admin = {"Authorization": f"Bearer {make_token()}"}
+    before = token_verifier.snapshot()
+    for _ in range(3):
+        response = client.get("/api/auth/verify", headers=admin)
+        assert response.status_code == 200, response.text
+        assert response.json()["user"]["id"] == 1
+    after = token_verifier.snapshot()
+    assert after['misses'] - before['misses'] == 1 and after['hits'] - before['hits'] == 2
+
+    expired = jwt.encode({'user_id': 1, 'type': 'admin', 'exp': datetime.utcnow() - timedelta(minutes=1)},
+                         SECRET, algorithm='HS256')
+    assert client.get("/api/auth/verify", headers={"Authorization": f"Bearer {expired}"}).status_code == 401
+    assert client.get("/api/auth/verify").status_code == 401
+
+    metrics = client.get("/api/admin/metrics/auth-cache", headers=admin)
+    assert metrics.status_code == 200 and metrics.json()["data"]["hits"] >= 2
+    cliente = {"Authorization": f"Bearer {make_token(user_id=2, user_type='cliente')}"}
+    assert client.get("/api/admin/metrics/auth-cache", headers=cliente).status_code == 403
+
+
+def test_cached_verification_is_cheaper():
+    verifier = TokenVerifier(secret_key=SECRET)
+    token = make_token()
+    rounds = 2000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        jwt.decode(token, SECRET, algorithms=['HS256'])
+    uncached = time.perf_counter() - start
+    verifier.decode(token)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        verifier.decode(token)
+    cached = time.perf_counter() - start
+    assert cached * 3 < uncached, f"cache {cached:.4f}s vs decode {uncached:.4f}s"
+
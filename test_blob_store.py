@@ -0,0 +1,171 @@
+"""
+Regressão: arquivos de processo deduplicados por conteúdo (uploads/blobs)
+
+Num SQLite temporário: uploads idênticos compartilham um blob com contagem de
+referências; excluir um arquivo só apaga o blob na última referência
+(inclusive via exclusão em cascata do caso) e, se a exclusão falha, o blob
+é restaurado numa thread, fora do event loop; a migração converte arquivos
+antigos de uploads/process_files e pode ser executada de novo sem efeito.
+"""
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import text
+
+import database
+import main
+from advbs_shared.blob_store import add_reference, discard_unreferenced_blob, finish_release, temp_upload_path
+from counters import ensure_counters
+from migrate_uploads_to_blobs import migrate
+
+SEED = """
+INSERT INTO users (id, name, email, type) VALUES (1, 'Admin', 'admin@exemplo.com', 'admin');
+INSERT INTO users (id, name, email, type) VALUES (2, 'Cliente A', 'a@exemplo.com', 'cliente');
+INSERT INTO users (id, name, email, type) VALUES (3, 'Cliente B', 'b@exemplo.com', 'cliente');
+INSERT INTO client_cases (id, user_id, status) VALUES (1, 2, 'pendente');
+INSERT INTO client_cases (id, user_id, status) VALUES (2, 3, 'pendente');
+"""
+
+
+@pytest.fixture
+def engine(make_database, work_dir):
+    engine = make_database(SEED, foreign_keys=True)
+    session = database.SessionLocal()
+    ensure_counters(session)
+    session.close()
+    return engine
+
+
+def blob_files():
+    return sorted(os.path.join(root, name) for root, _, names in os.walk("uploads/blobs")
+                  for name in names if "tmp" not in root.split(os.sep))
+
+
+def ref_counts(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT sha256, ref_count FROM file_blobs")).fetchall())
+
+
+def test_identical_uploads_share_one_blob(engine, client, admin_headers):
+    headers = admin_headers
+    cnh = b"%PDF-1.4 copia da CNH" * 1000
+
+    def upload(client_id, case_id, content):
+        response = client.post("/api/admin/process-files", headers=headers,
+                               data={"client_id": str(client_id), "case_id": str(case_id)},
+                               files={"file": ("cnh.pdf", content, "application/pdf")})
+        assert response.status_code == 200, response.text
+
+    upload(2, 1, cnh)
+    upload(3, 2, cnh)
+    upload(3, 2, b"auto de infracao")
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, file_path, sha256 FROM process_files ORDER BY id")).fetchall()
+    assert rows[0].file_path == rows[1].file_path != rows[2].file_path
+    assert len(blob_files()) == 2
+    assert sorted(ref_counts(engine).values()) == [1, 2]
+
+    # Primeira exclusão mantém o blob compartilhado
+    assert client.delete(f"/api/admin/process-files/{rows[0].id}", headers=headers).status_code == 200
+    assert os.path.exists(rows[1].file_path)
+    assert ref_counts(engine)[rows[1].sha256] == 1
+
+    # Excluir o caso remove os arquivos em cascata e libera os blobs
+    assert client.delete("/api/admin/processes/2", headers=headers).status_code == 200
+    assert blob_files() == []
+    assert ref_counts(engine) == {}
+
+
+def test_failed_delete_restores_blob_off_the_event_loop(engine, client, admin_headers, monkeypatch):
+    response = client.post("/api/admin/process-files", headers=admin_headers,
+                           data={"client_id": "2", "case_id": "1"},
+                           files={"file": ("cnh.pdf", b"%PDF-1.4 CNH", "application/pdf")})
+    assert response.status_code == 200, response.text
+    blobs = blob_files()
+
+    releases = []
+
+    def watched_finish_release(trashed, committed=True):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()  # roda numa thread, não no event loop
+        releases.append(committed)
+        return finish_release(trashed, committed)
+
+    async def failing_deltas(*args, **kwargs):
+        raise RuntimeError("falha depois de liberar o blob")
+
+    monkeypatch.setattr(main, "finish_release", watched_finish_release)
+    monkeypatch.setattr(main, "apply_counter_deltas", failing_deltas)
+    assert client.delete("/api/admin/processes/1", headers=admin_headers).status_code == 500
+    assert releases == [False]
+    assert blob_files() == blobs  # rollback: o blob volta do lixo
+    assert list(ref_counts(engine).values()) == [1]
+
+
+def test_failed_insert_discards_placed_blob(engine):
+    session = database.SessionLocal()
+    try:
+        def place(content):
+            source = temp_upload_path()
+            with open(source, "wb") as handle:
+                handle.write(content)
+            return add_reference(session, source, "ab" * 32, len(content))
+
+        # Referência existente: o rollback de um segundo upload não pode apagar o arquivo
+        path = place(b"contrato")
+        session.commit()
+        place(b"contrato")
+        session.rollback()
+        assert discard_unreferenced_blob(session, "ab" * 32) is False and os.path.exists(path)
+        assert ref_counts(engine) == {"ab" * 32: 1}
+
+        # Primeira referência desfeita pelo rollback: o arquivo movido sai junto
+        session.execute(text("DELETE FROM file_blobs"))
+        session.commit()
+        place(b"contrato")
+        session.rollback()
+        assert discard_unreferenced_blob(session, "ab" * 32) is True
+        assert blob_files() == []
+    finally:
+        session.close()
+
+
+def test_migration_deduplicates_legacy_files(engine):
+    os.makedirs("uploads/process_files")
+    legacy = {
+        "uploads/process_files/20240101_2_multa.pdf": b"multa",
+        "uploads/process_files/20240102_3_multa.pdf": b"multa",
+        "uploads/process_files/20240103_3_cnh.pdf": b"cnh",
+        "uploads/process_files/20240104_3_sobra.pdf": b"sem linha no banco",
+    }
+    for path, content in legacy.items():
+        with open(path, "wb") as handle:
+            handle.write(content)
+    with engine.begin() as conn:
+        for i, path in enumerate(list(legacy)[:3], start=1):
+            conn.execute(text("INSERT INTO process_files (id, user_id, filename, original_filename, file_path) "
+                              "VALUES (:id, 3, :name, :name, :path)"),
+                         {"id": i, "name": os.path.basename(path), "path": path})
+
+    session = database.SessionLocal()
+    try:
+        dry = migrate(session, dry_run=True)
+        assert dry["blobs"] == 2 and os.path.exists(list(legacy)[0])
+        summary = migrate(session)
+        again = migrate(session)
+    finally:
+        session.close()
+
+    assert summary["arquivos"] == 3 and summary["blobs"] == 2
+    assert summary["orfaos"] == ["uploads/process_files/20240104_3_sobra.pdf"]
+    assert again["arquivos"] == 0
+    assert len(blob_files()) == 2
+    assert sorted(ref_counts(engine).values()) == [1, 2]
+    with engine.connect() as conn:
+        paths = [row.file_path for row in conn.execute(text("SELECT file_path FROM process_files ORDER BY id"))]
+    assert paths[0] == paths[1] != paths[2]
+    with open(paths[0], "rb") as handle:
+        assert handle.read() == b"multa"
+    assert not any(os.path.exists(path) for path in list(legacy)[:3])
+
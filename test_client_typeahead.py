@@ -0,0 +1,157 @@
+"""
+Regressão: autocomplete de clientes em memória (src/client_typeahead.py)
+
+Verifica a busca por prefixo (nome sem acento, email, CPF/telefone com ou sem
+pontuação), as atualizações em cadastro/edição/exclusão, o diário de escritas
+durante a carga, a rota /api/admin/clients/search (índice e fallback no banco)
+e que uma busca no índice com 50 mil clientes fica abaixo de 1 ms.
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import main
+from client_typeahead import ClientTypeahead, client_typeahead
+
+SEED = """
+INSERT INTO users (id, name, email, type) VALUES (1, 'Admin', 'admin@exemplo.com', 'admin');
+INSERT INTO users (id, name, email, phone, cpf, type) VALUES
+    (2, 'João Conceição', 'joao@exemplo.com', '(51) 99999-1234', '123.456.789-00', 'cliente'),
+    (3, 'Maria Antônia Silva', 'maria@exemplo.com', '51 98888-0000', '987.654.321-00', 'cliente'),
+    (4, 'Mariana Souza', 'mari@outro.com', NULL, NULL, 'cliente');
+"""
+
+
+@pytest.fixture
+def engine(make_database):
+    return make_database(SEED)
+
+
+def ids(results):
+    return [client['id'] for client in results]
+
+
+def test_prefix_search(engine):
+    index = ClientTypeahead()
+    with Session(engine) as session:
+        assert index.load(session) == 3
+    assert index.ready
+
+    assert ids(index.search("joao")) == [2]
+    assert ids(index.search("CONCEIC")) == [2]
+    assert ids(index.search("conceição jo")) == [2]
+    assert set(ids(index.search("mari"))) == {3, 4}
+    assert ids(index.search("mari silva")) == [3]
+    assert ids(index.search("maria@exemplo")) == [3]
+    # CPF e telefone com ou sem pontuação
+    assert ids(index.search("123.456")) == [2]
+    assert ids(index.search("12345678900")) == [2]
+    assert ids(index.search("(51) 9888")) == [3]
+    # Administradores não entram; termo vazio não busca
+    assert index.search("admin") == []
+    assert index.search("  ") == []
+    assert len(index.search("mari", limit=1)) == 1
+    assert index.search("joao")[0]['cpf'] == '123.456.789-00'
+
+
+def test_writes_update_index(engine):
+    index = ClientTypeahead()
+    with Session(engine) as session:
+        index.load(session)
+
+    index.add(5, {"name": "Sebastião Frota", "email": "s@exemplo.com", "cpf": "111.222.333-44"})
+    assert ids(index.search("sebast")) == [5]
+    assert ids(index.search("11122")) == [5]
+
+    index.update(2, {"name": "João Batista", "phone": "(11) 3333-4444"})
+    assert index.search("conceicao") == []
+    assert ids(index.search("batista")) == [2]
+    assert ids(index.search("113333")) == [2]
+    assert ids(index.search("joao@exemplo")) == [2]  # campos não enviados continuam
+    index.update(1, {"name": "Zacarias Admin"})  # não é cliente: ignorado
+    assert index.search("zacarias") == []
+
+    index.remove(3)
+    assert ids(index.search("mari")) == [4]
+    assert index.search("987654") == []
+    assert len(index) == 3
+
+
+def test_writes_during_load_are_kept(engine):
+    index = ClientTypeahead()
+
+    class SlowSession:
+        """Cadastro e exclusão acontecem entre a leitura do banco e a troca do índice"""
+
+        def __init__(self, session):
+            self.session = session
+
+        def execute(self, *args, **kwargs):
+            result = self.session.execute(*args, **kwargs)
+            index.add(9, {"name": "Novo Durante Carga"})
+            index.remove(4)
+            return result
+
+    with Session(engine) as session:
+        index.load(SlowSession(session))
+    assert ids(index.search("durante")) == [9]
+    assert index.search("mariana") == []
+
+
+def test_search_endpoint_and_fallback(engine, client, admin_headers):
+    headers = admin_headers
+    client_typeahead.ready = False
+    # Sem startup (índice frio): busca no banco
+    response = client.get("/api/admin/clients/search", params={"q": "Silva"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert ids(response.json()["data"]) == [3]
+
+    with TestClient(main.app) as client:
+        deadline = time.time() + 10
+        while not client_typeahead.ready and time.time() < deadline:
+            time.sleep(0.01)
+        assert client_typeahead.ready
+
+        def search(q):
+            response = client.get("/api/admin/clients/search", params={"q": q}, headers=headers)
+            assert response.status_code == 200, response.text
+            return ids(response.json()["data"])
+
+        assert search("conceicao") == [2]
+
+        created = client.post("/api/admin/clients", headers=headers,
+                              json={"name": "Inês Guimarães", "email": "ines@exemplo.com", "cpf": "555.666.777-88"})
+        assert created.status_code == 200, created.text
+        new_id = created.json()["data"]["id"]
+        assert search("ines guim") == [new_id]
+        assert search("555666") == [new_id]
+
+        assert client.put(f"/api/admin/clients/{new_id}", headers=headers,
+                          json={"name": "Inês Magalhães"}).status_code == 200
+        assert search("guimaraes") == []
+        assert search("magalh") == [new_id]
+
+        assert client.delete(f"/api/admin/clients/{new_id}", headers=headers).status_code == 200
+        assert search("ines") == []
+
+
+def test_search_under_a_millisecond(engine):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (name, email, cpf, type) VALUES (:name, :email, :cpf, 'cliente')"), [
+            {"name": f"Cliente {i} Sobrenome{i % 997}", "email": f"cliente{i}@exemplo.com", "cpf": f"{i:011d}"}
+            for i in range(50000)])
+    index = ClientTypeahead()
+    with Session(engine) as session:
+        index.load(session)
+    queries = ["c", "cliente 4", "sobrenome12", "joao", "0000001", "cliente4@exemplo", "inexistente"]
+    start = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        for q in queries:
+            index.search(q, 10)
+    average = (time.perf_counter() - start) / (rounds * len(queries))
+    assert average < 0.001, f"{average * 1000:.3f} ms por busca"
+
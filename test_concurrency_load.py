@@ -0,0 +1,92 @@
+"""
+Teste de carga: uma query lenta não pode serializar as demais requisições
+
+Simula uma query de 1s em /api/admin/process-files (sessão falsa com time.sleep,
+que bloqueia como o PyMySQL) e dispara várias requisições concorrentes em
+/api/health e /api/services. Com o acesso ao banco no pool de threads, essas
+requisições terminam enquanto a query lenta ainda está rodando.
+"""
+import asyncio
+import time
+
+import httpx
+
+import main
+from database import ThreadedSession, get_async_db
+
+SLOW_QUERY_SECONDS = 1.0
+CONCURRENT_REQUESTS = 20
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeSession:
+    """Sessão síncrona falsa: a listagem de process_files é lenta, o resto é instantâneo"""
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "FROM process_files" in sql:
+            time.sleep(SLOW_QUERY_SECONDS)
+            return FakeResult([])
+        return FakeResult([])
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+async def fake_async_db():
+    session = ThreadedSession(FakeSession())
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def run_load(admin_headers):
+    """Retorna (latência da query lenta, latências das requisições rápidas)"""
+    main.app.dependency_overrides[get_async_db] = fake_async_db
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def timed(method, url, **kwargs):
+                start = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                assert response.status_code == 200, response.text
+                return time.perf_counter() - start
+
+            slow = asyncio.create_task(timed("GET", "/api/admin/process-files", headers=admin_headers))
+            await asyncio.sleep(0.05)  # garantir que a query lenta já começou
+
+            fast = []
+            for i in range(CONCURRENT_REQUESTS):
+                url = "/api/health" if i % 2 == 0 else "/api/services"
+                fast.append(asyncio.create_task(timed("GET", url)))
+
+            fast_latencies = await asyncio.gather(*fast)
+            slow_latency = await slow
+            return slow_latency, fast_latencies
+    finally:
+        main.app.dependency_overrides.pop(get_async_db, None)
+
+
+def test_slow_query_does_not_block_event_loop(admin_headers):
+    slow_latency, fast_latencies = asyncio.run(run_load(admin_headers))
+    assert slow_latency >= SLOW_QUERY_SECONDS
+    # Nenhuma requisição rápida pode ter esperado a query lenta terminar
+    assert max(fast_latencies) < SLOW_QUERY_SECONDS / 2, fast_latencies
+
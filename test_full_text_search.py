@@ -0,0 +1,139 @@
+"""
+Regressão: busca unificada /api/admin/search (src/search.py)
+
+Monta um SQLite temporário com índices FTS5 mantidos por triggers e verifica
+busca sem acento, prefixo, ranking, paginação, filtro por tipo, índice
+atualizado em INSERT/UPDATE/DELETE e o fallback LIKE.
+"""
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import main
+from search import ensure_search_index, run_search
+
+SEED = """
+INSERT INTO users (id, name, email, cpf, type) VALUES
+    (1, 'Admin', 'admin@exemplo.com', NULL, 'admin'),
+    (2, 'João Conceição', 'joao@exemplo.com', '123.456.789-00', 'cliente'),
+    (3, 'Maria Antônia', 'maria@exemplo.com', '987.654.321-00', 'cliente');
+INSERT INTO client_cases (id, user_id, title, description, status) VALUES
+    (1, 2, 'Recurso de multa por velocidade', 'Radar na rodovia, defesa prévia', 'pendente'),
+    (2, 3, 'Suspensão da CNH', 'Recurso contra suspensão por pontuação', 'pendente'),
+    (3, 3, 'Indenização por acidente', 'Danos materiais', 'pendente');
+INSERT INTO process_files (id, user_id, case_id, filename, original_filename, file_path) VALUES
+    (1, 2, 1, 'a.pdf', 'procuração_joão.pdf', 'uploads/a.pdf'),
+    (2, 3, 2, 'b.pdf', 'notificação_autuação.pdf', 'uploads/b.pdf');
+"""
+
+
+@pytest.fixture
+def engine(make_database):
+    return make_database(SEED)
+
+
+def search(session, q, types=('clients', 'cases', 'files'), page=1, limit=20, backend=None):
+    results, has_more, _ = run_search(session, q, types, page, limit, backend=backend)
+    return [(r['type'], r['id']) for r in results], has_more
+
+
+def test_accent_insensitive_prefix_and_types(engine):
+    with Session(engine) as session:
+        assert ensure_search_index(session) == 'sqlite'
+
+        # Sem acento e com prefixo encontra cliente e arquivo
+        found, _ = search(session, "joao conceic")
+        assert found == [('client', 2)], found
+        found, _ = search(session, "JOÃO")
+        assert set(found) == {('client', 2), ('file', 1)}, found
+        found, _ = search(session, "notificacao")
+        assert found == [('file', 2)]
+        # Administradores não aparecem como clientes
+        assert search(session, "admin")[0] == []
+        # CPF e email
+        assert search(session, "987")[0] == [('client', 3)]
+        assert search(session, "maria@exemplo")[0] == [('client', 3)]
+
+        found, _ = search(session, "recurso", types=['cases'])
+        assert set(found) == {('case', 1), ('case', 2)}
+        assert search(session, "   ")[0] == []
+
+
+def test_ranking_and_pagination(engine):
+    with Session(engine) as session:
+        ensure_search_index(session)
+        session.execute(text(
+            "INSERT INTO client_cases (id, user_id, title, description, status) VALUES (4, 2, 'Consulta geral', "
+            "'Cliente pergunta sobre prazos, documentos, licenciamento, transferência e uma possível suspensão', "
+            "'pendente')"))
+        # Casos sem o termo: com quase todos os documentos casando, o IDF do bm25 zera
+        session.execute(text("INSERT INTO client_cases (user_id, title, description, status) "
+                             "VALUES (2, :title, 'Sem relação', 'pendente')"),
+                        [{"title": f"Outro caso {i}"} for i in range(10)])
+        session.commit()
+        # Termo no título e repetido na descrição ganha de uma menção em texto longo
+        found, _ = search(session, "suspensao")
+        assert found == [('case', 2), ('case', 4)], found
+
+        first, has_more = search(session, "exemplo", limit=1)
+        assert len(first) == 1 and has_more
+        second, has_more = search(session, "exemplo", page=2, limit=1)
+        assert len(second) == 1 and not has_more
+        assert first != second
+
+        try:
+            run_search(session, "x", page=1000, limit=100)
+            assert False, "profundidade sem limite"
+        except HTTPException as e:
+            assert e.status_code == 400
+
+
+def test_scores_are_normalised_per_type(engine):
+    with Session(engine) as session:
+        ensure_search_index(session)
+
+        def scores(q):
+            results, _, _ = run_search(session, q)
+            return [(r['type'], r['score']) for r in results]
+
+        # O melhor de cada tipo vale 1.0, qualquer que seja a escala do bm25 na tabela
+        assert sorted(scores("joao")) == [('client', 1.0), ('file', 1.0)]
+        (first_type, first), (second_type, second) = scores("recurso")
+        assert first_type == second_type == 'case' and first == 1.0 and 0 < second < 1.0
+
+
+def test_index_follows_writes(engine):
+    with Session(engine) as session:
+        ensure_search_index(session)
+        session.execute(text("INSERT INTO users (id, name, email, type) "
+                             "VALUES (4, 'Sebastião Frota', 's@exemplo.com', 'cliente')"))
+        session.execute(text("UPDATE client_cases SET title = 'Cassação do direito de dirigir' WHERE id = 3"))
+        session.execute(text("DELETE FROM process_files WHERE id = 2"))
+        session.commit()
+
+        assert search(session, "sebastiao")[0] == [('client', 4)]
+        assert search(session, "cassacao")[0] == [('case', 3)]
+        assert search(session, "indenizacao")[0] == []
+        assert search(session, "notificacao")[0] == []
+
+
+def test_like_fallback(engine):
+    with Session(engine) as session:
+        found, _ = search(session, "Conceição", backend='like')
+        assert found == [('client', 2)]
+
+
+def test_search_endpoint(engine, admin_headers):
+    with TestClient(main.app) as client:
+        response = client.get("/api/admin/search", params={"q": "joao", "types": "clients,files"},
+                              headers=admin_headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["backend"] == "sqlite"
+        assert {(r["type"], r["id"]) for r in body["data"]} == {("client", 2), ("file", 1)}
+
+        response = client.get("/api/admin/search", params={"q": "joao", "types": "outros"},
+                              headers=admin_headers)
+        assert response.status_code == 400
@@ -0,0 +1,124 @@
+"""
+Regressão: hash de senhas no pool de processos (src/password_hashing.py)
+
+Verifica hash/verificação pelo pool, as métricas, o 503 com a fila cheia, a
+subida dos processos sem reexecutar o app, a recriação do pool quebrado,
+o login verificando pelo pool e o cadastro de cliente gravando a senha com
+hash (antes ia em texto puro para password_hash).
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+import main
+from password_hashing import PasswordHasher, password_hasher
+
+
+def test_pool_hash_verify_and_queue_limit():
+    hasher = PasswordHasher(workers=1, max_queue=0).start()
+    try:
+        async def scenario():
+            password_hash = await hasher.hash("senha")
+            assert password_hash.startswith("pbkdf2:")
+            assert await hasher.verify(password_hash, "senha")
+            assert not await hasher.verify(password_hash, "outra")
+            assert not await hasher.verify(None, "senha")
+
+            # Um rodando e nenhuma vaga na fila: os demais recebem 503
+            results = await asyncio.gather(*[hasher.verify(password_hash, "senha") for _ in range(3)],
+                                           return_exceptions=True)
+            rejected = [r for r in results if isinstance(r, HTTPException)]
+            assert results[0] is True and len(rejected) == 2
+            assert all(r.status_code == 503 for r in rejected)
+
+        asyncio.run(scenario())
+        snapshot = hasher.snapshot()
+        assert snapshot["completed"] == 4 and snapshot["rejected"] == 2 and snapshot["in_flight"] == 0
+    finally:
+        hasher.shutdown()
+
+
+def _write_app(directory):
+    """Módulo de app que imprime uma marca toda vez que é importado"""
+    with open(os.path.join(directory, "app_main.py"), "w") as f:
+        f.write("import sys\n"
+                f"sys.path.insert(0, {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')!r})\n"
+                "print('app importado', flush=True)\n"
+                "import asyncio\n"
+                "from password_hashing import PasswordHasher\n"
+                "def serve():\n"
+                "    hasher = PasswordHasher(workers=2).start()\n"
+                "    print(asyncio.run(hasher.hash('senha'))[:7], flush=True)\n"
+                "    hasher.shutdown()\n"
+                "if __name__ == '__main__':\n"
+                "    serve()\n")
+
+
+def test_workers_start_from_entry_module():
+    # Como python -m uvicorn main:app: o __main__ é de um pacote e o app só é importado
+    directory = tempfile.mkdtemp()
+    _write_app(directory)
+    os.makedirs(os.path.join(directory, "servidor"))
+    with open(os.path.join(directory, "servidor", "__main__.py"), "w") as f:
+        f.write("import app_main\napp_main.serve()\n")
+    result = subprocess.run([sys.executable, "-m", "servidor"], capture_output=True, text=True, timeout=60,
+                            cwd=directory, env={**os.environ, "PYTHONPATH": directory})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["app", "importado", "pbkdf2:"], result.stdout
+
+
+def test_workers_respect_main_guard():
+    # Como python main.py: os processos importam o script, mas o guard não sobe o servidor de novo
+    directory = tempfile.mkdtemp()
+    _write_app(directory)
+    result = subprocess.run([sys.executable, os.path.join(directory, "app_main.py")],
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split().count("pbkdf2:") == 1, result.stdout
+
+
+def test_broken_pool_is_recreated():
+    hasher = PasswordHasher(workers=1).start()
+    try:
+        for pid in list(hasher._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        password_hash = asyncio.run(hasher.hash("senha"))
+        assert password_hash.startswith("pbkdf2:")
+        assert asyncio.run(hasher.verify(password_hash, "senha"))
+        assert hasher.snapshot()["restarts"] == 1
+    finally:
+        hasher.shutdown()
+
+
+def test_login_and_create_client_use_pool(make_database, admin_headers):
+    engine = make_database(f"INSERT INTO users (id, name, email, type, password_hash) VALUES "
+                           f"(1, 'Admin', 'admin@exemplo.com', 'admin', '{generate_password_hash('segredo')}');")
+    headers = admin_headers
+    with TestClient(main.app) as client:
+        before = password_hasher.snapshot()["completed"]
+        assert client.post("/api/auth/login", json={"email": "admin@exemplo.com",
+                                                    "password": "segredo"}).status_code == 200
+        assert client.post("/api/auth/login", json={"email": "admin@exemplo.com",
+                                                    "password": "errada"}).status_code == 401
+
+        created = client.post("/api/admin/clients", headers=headers,
+                              json={"name": "Nova", "email": "nova@exemplo.com", "password": "minha-senha"})
+        assert created.status_code == 200, created.text
+        with engine.connect() as connection:
+            stored = connection.execute(text("SELECT password_hash FROM users WHERE email = 'nova@exemplo.com'")
+                                        ).scalar()
+        assert stored.startswith("pbkdf2:") and "minha-senha" not in stored
+        assert client.post("/api/auth/login", json={"email": "nova@exemplo.com",
+                                                    "password": "minha-senha"}).status_code == 200
+        assert password_hasher.snapshot()["completed"] - before == 4
+
+        metrics = client.get("/api/admin/metrics/password-hashing", headers=headers)
+        assert metrics.status_code == 200 and metrics.json()["data"]["started"]
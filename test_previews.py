@@ -0,0 +1,131 @@
+"""
+Regressão: miniaturas dos arquivos de processo (src/previews.py, advbs_shared/previews.py)
+
+O pdftoppm é substituído por um script que grava um JPEG falso, para testar
+a fila, o cache por SHA-256 em disco, as falhas com nova tentativa após o
+intervalo, o endpoint com cache longo/304 e a remoção da miniatura junto com
+o blob, sem depender do poppler instalado.
+"""
+import asyncio
+import hashlib
+import os
+import stat
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+import previews
+
+FAKE_PDFTOPPM = """#!{python}
+import sys
+with open({calls!r}, "a") as calls:
+    calls.write(sys.argv[-2] + "\\n")
+with open(sys.argv[-1] + ".jpg", "wb") as handle:
+    handle.write(b"\\xff\\xd8miniatura")
+"""
+
+
+def install_fake_pdftoppm():
+    """Retorna o arquivo onde o script registra cada chamada"""
+    work_dir = tempfile.mkdtemp()
+    calls = os.path.join(work_dir, "calls.txt")
+    script = os.path.join(work_dir, "pdftoppm")
+    with open(script, "w") as handle:
+        handle.write(FAKE_PDFTOPPM.format(python=sys.executable, calls=calls))
+    os.chmod(script, os.stat(script).st_mode | stat.S_IEXEC)
+    previews.PDFTOPPM_BIN = script
+    return calls
+
+
+SEED = "INSERT INTO users (id, name, email, type) VALUES (2, 'Cliente', 'cliente@exemplo.com', 'cliente');"
+
+
+def wait_for_preview(client, url, headers, timeout=10):
+    deadline = time.time() + timeout
+    while True:
+        response = client.get(url, headers=headers)
+        if response.status_code != 202 or time.time() > deadline:
+            return response
+        time.sleep(0.05)
+
+
+def test_render_preview_is_cached_by_hash():
+    calls = install_fake_pdftoppm()
+    base_dir = tempfile.mkdtemp()
+    sha256 = hashlib.sha256(b"pdf").hexdigest()
+    path = previews.render_preview("/tmp/qualquer.pdf", sha256, "dossie.pdf", base_dir)
+    assert path == previews.preview_path(sha256, base_dir)
+    with open(path, "rb") as handle:
+        assert handle.read().startswith(b"\xff\xd8")
+    # Mesmo conteúdo com outro nome: reaproveita a miniatura
+    assert previews.render_preview("/tmp/outro.pdf", sha256, "copia.pdf", base_dir) == path
+    with open(calls) as handle:
+        assert len(handle.read().splitlines()) == 1
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]  # sem temporários
+    assert previews.render_preview("/tmp/x.zip", hashlib.sha256(b"zip").hexdigest(), "x.zip", base_dir) is None
+
+
+def test_failed_previews_expire_and_stay_bounded():
+    previews.PDFTOPPM_BIN = "/bin/false"  # toda renderização falha
+    worker = previews.PreviewWorker(workers=1, base_dir=tempfile.mkdtemp(), retry_seconds=60, max_failed=2)
+    hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(3)]
+
+    async def scenario():
+        worker.start()
+        assert worker.submit(hashes[0], "/tmp/a.pdf", "a.pdf")
+        await worker.join()
+        assert list(worker.failed) == [hashes[0]]
+        assert not worker.submit(hashes[0], "/tmp/a.pdf", "a.pdf")  # ainda no intervalo
+
+        worker.retry_seconds = 0
+        assert worker.submit(hashes[0], "/tmp/a.pdf", "a.pdf")  # intervalo passou: tenta de novo
+        for sha256 in hashes[1:]:
+            worker.submit(sha256, "/tmp/b.pdf", "b.pdf")
+        await worker.join()
+        assert list(worker.failed) == hashes[1:]  # a falha mais antiga saiu
+
+    asyncio.run(scenario())
+
+
+def test_upload_preview_endpoint_and_delete(make_database, work_dir, admin_headers):
+    install_fake_pdftoppm()
+    make_database(SEED)
+    with TestClient(main.app) as client:
+        payload = b"%PDF-1.4 conteudo"
+        sha256 = hashlib.sha256(payload).hexdigest()
+        response = client.post("/api/admin/process-files", headers=admin_headers, data={"client_id": "2"},
+                               files={"file": ("dossie.pdf", payload, "application/pdf")})
+        assert response.status_code == 200, response.text
+        client.post("/api/admin/process-files", headers=admin_headers, data={"client_id": "2"},
+                    files={"file": ("notas.zip", b"PK zip", "application/zip")})
+
+        files = client.get("/api/admin/process-files", headers=admin_headers).json()["data"]
+        by_name = {f["original_filename"]: f for f in files}
+        url = by_name["dossie.pdf"]["preview_url"]
+        assert url == f"/api/admin/process-files/previews/{sha256}"
+        assert by_name["notas.zip"]["preview_url"] is None
+
+        response = wait_for_preview(client, url, admin_headers)
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"] == "image/jpeg"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.content.startswith(b"\xff\xd8")
+
+        cached = client.get(url, headers={**admin_headers, "If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304 and cached.content == b""
+
+        zip_sha = by_name["notas.zip"]["sha256"]
+        assert client.get(f"/api/admin/process-files/previews/{zip_sha}",
+                          headers=admin_headers).status_code == 404
+        assert client.get("/api/admin/process-files/previews/nao-e-hash",
+                          headers=admin_headers).status_code == 404
+
+        # Último uso do blob removido: a miniatura vai junto
+        response = client.delete(f"/api/admin/process-files/{by_name['dossie.pdf']['id']}",
+                                 headers=admin_headers)
+        assert response.status_code == 200, response.text
+        assert not os.path.exists(previews.preview_path(sha256))
+        assert client.get(url, headers=admin_headers).status_code == 404
@@ -0,0 +1,60 @@
+"""
+Regressão: /api/admin/process-files executa um número fixo de queries por página
+
+Popula um SQLite temporário com arquivos de clientes (e alguns de usuários que
+não são clientes, que antes disparavam uma query extra por linha), percorre
+todas as páginas seguindo o cursor e conta os statements SQL de cada página.
+"""
+import pytest
+from sqlalchemy import event, text
+
+TOTAL_FILES = 250
+PAGE_SIZE = 40
+MAX_QUERIES_PER_PAGE = 1
+
+
+@pytest.fixture
+def engine(make_database):
+    engine = make_database()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, name, email, type) VALUES (:id, :name, :email, :type)"), [
+            {"id": i, "name": f"Cliente {i}", "email": f"c{i}@exemplo.com",
+             "type": "admin" if i % 10 == 0 else "cliente"}
+            for i in range(1, 51)
+        ])
+        conn.execute(text("INSERT INTO client_cases (id, user_id, title, status) VALUES (:id, :id, :title, 'pendente')"),
+                     [{"id": i, "title": f"Caso {i}"} for i in range(1, 51)])
+        conn.execute(text("INSERT INTO process_files (id, user_id, case_id, filename, original_filename, file_path) "
+                          "VALUES (:id, :user_id, :case_id, :filename, :original, :path)"), [
+            {"id": i, "user_id": (i % 60) + 1, "case_id": (i % 50) + 1 if i % 3 else None,
+             "filename": f"f{i}.pdf", "original": f"doc{i}.pdf", "path": f"uploads/f{i}.pdf"}
+            for i in range(1, TOTAL_FILES + 1)
+        ])
+    return engine
+
+
+def collect_pages(engine, client, admin_headers):
+    """Retorna (ids em ordem, queries por página)"""
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, params, context, executemany: statements.append(sql))
+    ids, queries_per_page, cursor = [], [], None
+    while True:
+        params = {"limit": PAGE_SIZE}
+        if cursor:
+            params["after"] = cursor
+        statements.clear()
+        response = client.get("/api/admin/process-files", params=params, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        queries_per_page.append(len(statements))
+        ids.extend(item["id"] for item in body["data"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids, queries_per_page
+
+
+def test_process_files_query_count_is_bounded(engine, client, admin_headers):
+    ids, queries_per_page = collect_pages(engine, client, admin_headers)
+    assert ids == list(range(TOTAL_FILES, 0, -1))
+    assert max(queries_per_page) <= MAX_QUERIES_PER_PAGE, queries_per_page
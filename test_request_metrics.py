@@ -0,0 +1,70 @@
+"""
+Regressão: /metrics no formato do Prometheus (src/request_metrics.py)
+
+Verifica contagem por rota (template, não a URL) e status, histogramas de
+latência, statements e tempo de SQL atribuídos à requisição que os executou,
+o rótulo único para rotas inexistentes e o METRICS_TOKEN.
+"""
+import re
+
+import main
+from request_metrics import Histogram, request_metrics
+
+SEED = "INSERT INTO users (id, name, email, type) VALUES (7, 'Cliente', 'cliente@exemplo.com', 'cliente');"
+
+
+def sample(text, name, **labels):
+    """Valor de uma série do texto exposto (None se não existir)"""
+    selector = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}\{{{re.escape(selector)}\}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 5))
+    for value in (0, 1, 3, 9):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(1, 2), (5, 3), ("+Inf", 4)]
+    assert histogram.sum == 13 and histogram.count == 4
+
+
+def test_metrics_per_route_with_sql_breakdown(make_database, client, admin_headers):
+    make_database(SEED)
+    request_metrics.reset()
+    for _ in range(2):
+        assert client.get("/api/admin/clients/7", headers=admin_headers).status_code == 200
+    assert client.get("/api/admin/clients/8", headers=admin_headers).status_code == 404
+    assert client.get("/api/health").status_code == 200
+    assert client.get("/nao/existe/123").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    route = {"method": "GET", "route": "/api/admin/clients/{client_id}"}
+    assert sample(text, "http_requests_total", **route, status="200") == 2
+    assert sample(text, "http_requests_total", **route, status="404") == 1
+    assert sample(text, "http_request_duration_seconds_count", **route) == 3
+    assert sample(text, "http_request_duration_seconds_bucket", **route, le="+Inf") == 3
+
+    # Uma query por requisição na rota com banco, nenhuma no health check
+    assert sample(text, "http_request_sql_statements_sum", **route) == 3
+    assert sample(text, "http_request_sql_statements_bucket", **route, le="1") == 3
+    assert sample(text, "http_request_sql_duration_seconds_sum", **route) > 0
+    health = {"method": "GET", "route": "/api/health"}
+    assert sample(text, "http_request_sql_statements_sum", **health) == 0
+
+    assert sample(text, "http_requests_total", method="GET", route="unmatched", status="404") == 1
+    assert "/nao/existe" not in text
+    assert re.search(r"^http_requests_in_flight 1$", text, re.MULTILINE)  # a própria requisição de /metrics
+
+
+def test_metrics_token(client):
+    original = main.METRICS_TOKEN
+    main.METRICS_TOKEN = "segredo"
+    try:
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer segredo"}).status_code == 200
+    finally:
+        main.METRICS_TOKEN = original
+
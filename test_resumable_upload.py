@@ -0,0 +1,138 @@
+"""
+Regressão: upload retomável de arquivos de processo
+
+Cria uma sessão, envia as partes fora de ordem e com reenvios, consulta os
+intervalos recebidos, finaliza e confere o arquivo montado e a linha em
+process_files (SQLite temporário). Cobre também finalize incompleto, parte
+com tamanho errado, SHA-256 divergente e a coleta de sessões abandonadas.
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+import anyio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from resumable_uploads import UploadSessionStore, upload_sessions
+
+CHUNK_SIZE = 64 * 1024
+FILE_SIZE = CHUNK_SIZE * 5 + 1234  # última parte menor
+
+SEED = "INSERT INTO users (id, name, email, type) VALUES (2, 'Cliente', 'cliente@exemplo.com', 'cliente');"
+
+
+@pytest.fixture
+def engine(make_database, work_dir):
+    return make_database(SEED)
+
+
+def chunk(payload, index):
+    return payload[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+
+
+def test_out_of_order_and_duplicate_chunks(engine, client, admin_headers):
+    headers = admin_headers
+    payload = os.urandom(FILE_SIZE)
+
+    response = client.post("/api/admin/process-files/uploads", headers=headers, json={
+        "client_id": 2, "filename": "dossie.pdf", "size": FILE_SIZE, "chunk_size": CHUNK_SIZE,
+        "sha256": hashlib.sha256(payload).hexdigest()
+    })
+    assert response.status_code == 200, response.text
+    upload_id = response.json()["data"]["upload_id"]
+
+    def put(index):
+        response = client.put(f"/api/admin/process-files/uploads/{upload_id}/chunks/{index}",
+                              headers=headers, content=chunk(payload, index))
+        assert response.status_code == 200, response.text
+        return response.json()["data"]
+
+    # Fora de ordem, com reenvio de partes já recebidas
+    for index in (4, 0, 1, 4, 5):
+        put(index)
+    partial_status = client.get(f"/api/admin/process-files/uploads/{upload_id}", headers=headers).json()["data"]
+
+    early = client.post(f"/api/admin/process-files/uploads/{upload_id}/finalize", headers=headers)
+    assert early.status_code == 409, early.text
+
+    for index in (3, 2, 0):
+        put(index)
+    finalized = client.post(f"/api/admin/process-files/uploads/{upload_id}/finalize", headers=headers)
+    assert finalized.status_code == 200, finalized.text
+
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT file_path, file_size, sha256 FROM process_files")).fetchone()
+    with open(row.file_path, "rb") as saved:
+        content = saved.read()
+    assert not os.listdir(upload_sessions.base_dir)
+    finalized = finalized.json()["file"]
+    assert partial_status["received_chunks"] == 4
+    assert partial_status["missing_chunks"] == [2, 3]
+    assert partial_status["received_ranges"] == [[0, 2 * CHUNK_SIZE], [4 * CHUNK_SIZE, FILE_SIZE]]
+    assert content == payload
+    assert row.file_size == FILE_SIZE == finalized["file_size"]
+    assert row.sha256 == hashlib.sha256(payload).hexdigest() == finalized["sha256"]
+
+
+def test_chunk_size_and_checksum_are_validated(engine, client, admin_headers):
+    headers = admin_headers
+    payload = os.urandom(CHUNK_SIZE * 2)
+
+    for sha256 in (123, ["0" * 64], "0" * 63, "z" * 64):
+        invalid = client.post("/api/admin/process-files/uploads", headers=headers, json={
+            "client_id": 2, "filename": "multa.pdf", "size": len(payload), "sha256": sha256})
+        assert invalid.status_code == 400, (sha256, invalid.text)
+
+    upload_id = client.post("/api/admin/process-files/uploads", headers=headers, json={
+        "client_id": 2, "filename": "multa.pdf", "size": len(payload), "chunk_size": CHUNK_SIZE,
+        "sha256": "0" * 64
+    }).json()["data"]["upload_id"]
+
+    short = client.put(f"/api/admin/process-files/uploads/{upload_id}/chunks/0", headers=headers,
+                       content=payload[:100])
+    assert short.status_code == 400
+    out_of_range = client.put(f"/api/admin/process-files/uploads/{upload_id}/chunks/2", headers=headers,
+                              content=payload[:100])
+    assert out_of_range.status_code == 400
+
+    for index in (0, 1):
+        client.put(f"/api/admin/process-files/uploads/{upload_id}/chunks/{index}", headers=headers,
+                   content=chunk(payload, index))
+    mismatch = client.post(f"/api/admin/process-files/uploads/{upload_id}/finalize", headers=headers)
+    assert mismatch.status_code == 422
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM process_files")).scalar() == 0
+    assert client.get(f"/api/admin/process-files/uploads/{upload_id}", headers=headers).status_code == 404
+
+
+def test_abandoned_sessions_are_collected():
+    store = UploadSessionStore(base_dir=tempfile.mkdtemp(), ttl=3600)
+    old = store.create(2, "velho.pdf", CHUNK_SIZE, chunk_size=CHUNK_SIZE)
+    fresh = store.create(2, "novo.pdf", CHUNK_SIZE, chunk_size=CHUNK_SIZE)
+
+    # Última atividade da sessão antiga há 2 horas (TTL de 1 hora)
+    two_hours_ago = time.time() - 7200
+    for path in ("", "chunks"):
+        os.utime(os.path.join(store.base_dir, old["upload_id"], path), (two_hours_ago, two_hours_ago))
+
+    assert store.collect_garbage() == 1
+    assert os.listdir(store.base_dir) == [fresh["upload_id"]]
+
+
+
+def test_chunk_for_a_finalized_session_is_rejected():
+    store = UploadSessionStore(base_dir=tempfile.mkdtemp())
+    upload_id = store.create(2, "multa.pdf", CHUNK_SIZE * 2, chunk_size=CHUNK_SIZE)["upload_id"]
+
+    async def body():
+        yield b"x" * (CHUNK_SIZE // 2)
+        store.claim(upload_id)  # finalize de outra requisição no meio da parte
+        yield b"x" * (CHUNK_SIZE // 2)
+
+    with pytest.raises(HTTPException) as error:
+        anyio.run(store.write_chunk, upload_id, 0, body())
+    assert error.value.status_code == 409
+    assert os.listdir(os.path.join(store.base_dir, upload_id + ".finalizing", "chunks")) == []
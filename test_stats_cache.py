@@ -0,0 +1,62 @@
+"""
+Testes do cache de estatísticas por cliente (src/stats_cache.py)
+
+Verifica os deltas aplicados pelas escritas, que um carregamento do banco
+que cruzou com uma escrita não é guardado e que as versões por usuário
+ficam limitadas.
+"""
+from advbs_shared.stats_cache import ClientStatsCache, WriteVersions
+
+STATS = {'total_cases': 2, 'pending_cases': 1, 'active_cases': 1, 'completed_cases': 0, 'total_files': 3}
+
+
+def test_writes_update_cached_stats():
+    cache = ClientStatsCache()
+    cache.case_created(1, 'pendente')  # sem entrada: ignorado
+    assert cache.get(1) is None
+
+    assert cache.set(1, STATS, cache.version(1))
+    cache.case_created(1, 'pendente')
+    cache.case_status_changed(1, 'pendente', 'concluido')
+    cache.file_removed(1)
+    assert cache.get(1) == dict(STATS, total_cases=3, completed_cases=1, total_files=2)
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+
+def test_load_racing_a_write_is_not_stored():
+    cache = ClientStatsCache()
+    version = cache.version(1)
+    cache.file_added(1)  # escrita entre a leitura da versão e o set()
+    assert not cache.set(1, STATS, version)
+    assert cache.get(1) is None
+
+    # Escrita em outro usuário não atrapalha
+    version = cache.version(1)
+    cache.file_added(2)
+    assert cache.set(1, STATS, version)
+    assert cache.get(1) == STATS
+
+
+def test_versions_are_bounded():
+    cache = ClientStatsCache(max_versions=3)
+    for user_id in range(10):
+        cache.invalidate(user_id)
+    assert len(cache._versions) == 3
+
+    # Carregamento iniciado antes de escritas já descartadas continua recusado
+    versions = WriteVersions(max_size=2)
+    token = versions.token()
+    versions.bump(1)
+    versions.bump(2)
+    versions.bump(3)
+    assert len(versions) == 2 and versions.changed_since(1, token)
+    assert not versions.changed_since(1, versions.token())
+
+    # Entrada expirada leva a versão junto
+    cache = ClientStatsCache(ttl=-1)
+    cache.invalidate(1)
+    cache.set(1, STATS)
+    assert cache.get(1) is None and len(cache._versions) == 0
+
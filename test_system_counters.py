@@ -0,0 +1,49 @@
+"""
+Regressão: contadores materializados (system_counters) acompanham as escritas
+
+Executa uma sequência de escritas pelas rotas admin num SQLite temporário
+(criar cliente e casos, mudar status, anexar arquivo, excluir caso e cliente)
+e compara /api/analytics/stats com a contagem real das tabelas.
+"""
+import database
+from counters import ensure_counters, recompute_counters
+from advbs_shared.case_rollup import ensure_rollup
+
+SEED = """
+INSERT INTO users (id, name, email, type) VALUES (1, 'Admin', 'admin@exemplo.com', 'admin');
+INSERT INTO users (id, name, email, type) VALUES (2, 'Cliente', 'cliente@exemplo.com', 'cliente');
+INSERT INTO services (id, name, category) VALUES (1, 'Recurso de multa', 'multas');
+INSERT INTO client_cases (id, user_id, title, status) VALUES (1, 2, 'Caso antigo', 'em_andamento');
+"""
+
+
+def test_counters_match_table_counts(make_database, work_dir, client, admin_headers):
+    make_database(SEED, foreign_keys=True)
+    session = database.SessionLocal()
+    ensure_counters(session)
+    ensure_rollup(session)
+    session.close()
+
+    def call(method, url, **kwargs):
+        response = client.request(method, url, headers=admin_headers, **kwargs)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    new_client = call("POST", "/api/admin/clients", json={"name": "Novo", "email": "novo@exemplo.com"})["data"]
+    case_a = call("POST", f"/api/admin/clients/{new_client['id']}/cases", json={"title": "A"})["data"]
+    case_b = call("POST", "/api/admin/clients/2/cases", json={"title": "B", "status": "concluido"})["data"]
+    call("PUT", f"/api/admin/processes/{case_a['id']}", json={"status": "em_andamento"})
+    call("PUT", "/api/admin/processes/1", json={"status": "concluido"})
+    for case_id in (case_a["id"], case_b["id"], case_b["id"]):
+        call("POST", "/api/admin/process-files",
+             data={"client_id": "2" if case_id == case_b["id"] else str(new_client["id"]),
+                   "case_id": str(case_id)},
+             files={"file": ("doc.pdf", b"%PDF-1.4", "application/pdf")})
+    call("DELETE", f"/api/admin/processes/{case_b['id']}")
+    call("DELETE", f"/api/admin/clients/{new_client['id']}")
+
+    stats = call("GET", "/api/analytics/stats")["data"]
+    session = database.SessionLocal()
+    actual = recompute_counters(session)
+    session.close()
+    assert stats == actual, (stats, actual)
@@ -0,0 +1,133 @@
+"""
+Regressão: /api/analytics/timeseries e o rollup diário de casos
+(src/timeseries.py e advbs_shared/case_rollup.py)
+
+Num SQLite temporário com casos em datas fixas verifica a saída da rota por
+dia, semana e mês (buckets sem eventos zerados), o filtro por categoria e a
+média de resolução; e que concluir, reabrir e concluir de novo um caso, trocar
+o serviço e excluir casos e clientes pelas rotas deixa case_daily_rollup igual
+ao que rebuild_rollup calcula.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import database
+from counters import ensure_counters
+from advbs_shared.case_rollup import ensure_rollup, rebuild_rollup
+
+SEED = """
+INSERT INTO users (id, name, email, type) VALUES (1, 'Admin', 'admin@exemplo.com', 'admin');
+INSERT INTO users (id, name, email, type) VALUES (2, 'Cliente', 'cliente@exemplo.com', 'cliente');
+INSERT INTO services (id, name, category) VALUES (1, 'Recurso de multa', 'multas');
+INSERT INTO services (id, name, category) VALUES (2, 'Renovação', 'cnh');
+INSERT INTO client_cases (id, user_id, service_id, title, status, created_at, updated_at) VALUES
+    (1, 2, 1, 'Multa A', 'concluido', '2024-03-04 10:00:00', '2024-03-06 10:00:00'),
+    (2, 2, 1, 'Multa B', 'pendente', '2024-03-04 12:00:00', '2024-03-04 12:00:00'),
+    (3, 2, 2, 'CNH', 'concluido', '2024-03-05 08:00:00', '2024-03-05 20:00:00'),
+    (4, 2, NULL, 'Sem serviço', 'em_andamento', '2024-03-20 09:00:00', '2024-03-20 09:00:00');
+"""
+
+
+@pytest.fixture
+def engine(make_database):
+    engine = make_database(SEED, foreign_keys=True)
+    session = database.SessionLocal()
+    ensure_counters(session)
+    ensure_rollup(session)
+    session.close()
+    return engine
+
+
+def totals(point):
+    return point["opened"], point["concluded"], point["avg_resolution_hours"]
+
+
+def test_timeseries_output(engine, client, admin_headers):
+    def series(**params):
+        response = client.get("/api/analytics/timeseries", headers=admin_headers, params=params)
+        assert response.status_code == 200, response.text
+        return response.json()["data"]
+
+    days = series(start="2024-03-04", end="2024-03-08")
+    assert [point["period"] for point in days] == [f"2024-03-0{day}" for day in range(4, 9)]
+    assert [totals(point) for point in days] == [(2, 0, None), (1, 1, 12.0), (0, 1, 48.0),
+                                                 (0, 0, None), (0, 0, None)]
+    assert days[1]["by_category"] == {"cnh": {"opened": 1, "concluded": 1, "avg_resolution_hours": 12.0}}
+    assert days[3]["by_category"] == {}
+
+    # Semana começa na segunda (04/03); o início do intervalo cai na semana de 26/02
+    weeks = series(start="2024-03-01", end="2024-03-31", bucket="week")
+    assert [point["period"] for point in weeks] == ["2024-02-26", "2024-03-04", "2024-03-11",
+                                                    "2024-03-18", "2024-03-25"]
+    assert [totals(point) for point in weeks] == [(0, 0, None), (3, 2, 30.0), (0, 0, None),
+                                                  (1, 0, None), (0, 0, None)]
+    assert weeks[3]["by_category"] == {"sem_categoria": {"opened": 1, "concluded": 0,
+                                                         "avg_resolution_hours": None}}
+
+    months = series(start="2024-02-10", end="2024-03-31", bucket="month")
+    assert [(point["period"], totals(point)) for point in months] == [("2024-02-01", (0, 0, None)),
+                                                                      ("2024-03-01", (4, 2, 30.0))]
+
+    multas = series(start="2024-03-04", end="2024-03-06", category="multas")
+    assert [totals(point) for point in multas] == [(2, 0, None), (0, 0, None), (0, 1, 48.0)]
+    assert set(multas[0]["by_category"]) == {"multas"}
+
+    bad = client.get("/api/analytics/timeseries", headers=admin_headers, params={"bucket": "ano"})
+    assert bad.status_code == 400
+
+
+def rollup_rows(engine):
+    with engine.connect() as conn:
+        return {(str(row.day), row.category): (row.opened, row.concluded, row.resolution_seconds)
+                for row in conn.execute(text("SELECT * FROM case_daily_rollup"))
+                if (row.opened, row.concluded, row.resolution_seconds) != (0, 0, 0)}
+
+
+def assert_matches_rebuild(engine):
+    live = rollup_rows(engine)
+    session = database.SessionLocal()
+    try:
+        rebuild_rollup(session)
+    finally:
+        session.close()
+    rebuilt = rollup_rows(engine)
+    assert set(live) == set(rebuilt), (live, rebuilt)
+    for key, (opened, concluded, seconds) in rebuilt.items():
+        # Segundos: relógio da rota e do gatilho podem diferir na fração
+        assert live[key][:2] == (opened, concluded) and abs(live[key][2] - seconds) <= 1, (key, live, rebuilt)
+
+
+def test_reopened_case_matches_rebuild(engine, client, admin_headers):
+    created = (datetime.now() - timedelta(days=2)).replace(microsecond=0)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO client_cases (id, user_id, service_id, title, status, created_at, updated_at) "
+                          "VALUES (5, 2, 1, 'Reaberto', 'em_andamento', :created, :created)"),
+                     {"created": created.isoformat(" ")})
+    session = database.SessionLocal()
+    rebuild_rollup(session)
+    session.close()
+    for status in ("concluido", "em_andamento", "concluido", "arquivado"):
+        response = client.put("/api/admin/processes/5", headers=admin_headers, json={"status": status})
+        assert response.status_code == 200, response.text
+        assert_matches_rebuild(engine)
+
+
+def test_recategorised_and_deleted_cases_match_rebuild(engine, client, admin_headers):
+    # Caso concluído muda de categoria; outro muda de categoria e conclui no mesmo PUT
+    response = client.put("/api/admin/processes/1", headers=admin_headers, json={"service_id": 2})
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(engine)
+    response = client.put("/api/admin/processes/2", headers=admin_headers,
+                          json={"service_id": 2, "status": "concluido"})
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(engine)
+
+    assert client.delete("/api/admin/processes/3", headers=admin_headers).status_code == 200
+    assert_matches_rebuild(engine)
+
+    # Casos do cliente saem em cascata
+    assert client.delete("/api/admin/clients/2", headers=admin_headers).status_code == 200
+    assert_matches_rebuild(engine)
+    assert rollup_rows(engine) == {}
@@ -0,0 +1,96 @@
+"""
+Regressão: upload de arquivos de processo gravado em partes
+
+Envia um arquivo para /api/admin/process-files (SQLite temporário) e verifica
+que o tamanho e o SHA-256 gravados na linha batem com o conteúdo, que a cópia
+de 100 MB usa memória da ordem de uma parte (não do arquivo) e que o limite de
+tamanho é aplicado tanto pelo Content-Length quanto durante a cópia.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import tracemalloc
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+import main
+from uploads import stream_upload_to_disk
+
+FILE_SIZE = 5 * 1024 * 1024
+STREAM_SIZE = 100 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+SEED = "INSERT INTO users (id, name, email, type) VALUES (2, 'Cliente', 'cliente@exemplo.com', 'cliente');"
+
+
+class FakeUpload:
+    """UploadFile mínimo sem Content-Length (só o limite durante a cópia vale)"""
+
+    def __init__(self, size):
+        self.remaining = size
+
+    async def read(self, size):
+        size = min(size, self.remaining)
+        self.remaining -= size
+        return b"x" * size
+
+
+def stream_peak_memory():
+    """Pico de memória (bytes) ao copiar STREAM_SIZE bytes em partes de CHUNK_SIZE"""
+    dest = os.path.join(tempfile.mkdtemp(), "grande.pdf")
+    tracemalloc.start()
+    size, _ = asyncio.run(stream_upload_to_disk(FakeUpload(STREAM_SIZE), dest, max_size=STREAM_SIZE,
+                                                chunk_size=CHUNK_SIZE))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    os.remove(dest)
+    assert size == STREAM_SIZE
+    return peak
+
+
+def test_upload_stores_size_and_sha256(make_database, work_dir, client, admin_headers):
+    engine = make_database(SEED)
+    payload = os.urandom(FILE_SIZE)
+    expected = hashlib.sha256(payload).hexdigest()
+
+    response = client.post("/api/admin/process-files", headers=admin_headers,
+                           data={"client_id": "2"}, files={"file": ("dossie.pdf", payload, "application/pdf")})
+    assert response.status_code == 200, response.text
+
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT file_path, file_size, sha256 FROM process_files")).fetchone()
+    with open(row.file_path, "rb") as saved:
+        assert hashlib.sha256(saved.read()).hexdigest() == expected
+    assert row.file_size == FILE_SIZE
+    assert row.sha256 == expected
+
+
+def test_stream_memory_is_bounded_by_chunk():
+    assert stream_peak_memory() < CHUNK_SIZE * 4
+
+
+def test_upload_limit_by_content_length(client, admin_headers):
+    original = main.MAX_UPLOAD_SIZE
+    main.MAX_UPLOAD_SIZE = 1024 * 1024
+    try:
+        response = client.post("/api/admin/process-files", headers=admin_headers, data={"client_id": "2"},
+                               files={"file": ("grande.pdf", io.BytesIO(b"x" * 2 * 1024 * 1024), "application/pdf")})
+    finally:
+        main.MAX_UPLOAD_SIZE = original
+    assert response.status_code == 413
+
+
+def test_upload_limit_while_streaming():
+    dest = os.path.join(tempfile.mkdtemp(), "arquivo.pdf")
+    try:
+        asyncio.run(stream_upload_to_disk(FakeUpload(3 * 1024 * 1024), dest, max_size=1024 * 1024,
+                                          chunk_size=256 * 1024))
+        raised = False
+    except HTTPException as e:
+        raised = e.status_code == 413
+    assert raised
+    assert not os.path.exists(dest) and not os.path.exists(dest + ".part")
+
@@ -0,0 +1,155 @@
+"""
+Regressão: busca exata por CPF e telefone (advbs_shared/user_identifiers.py)
+
+Verifica a normalização, o backfill em lotes (só linhas alteradas, conflitos
+com o índice único), a criação dos índices com CPFs repetidos, a busca pela
+coluna original até o backfill criar os índices e as rotas
+/api/admin/clients/by-cpf e /by-phone, incluindo as colunas mantidas nos
+cadastros/edições e o 409 para CPF repetido.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import main
+from advbs_shared.user_identifiers import (CPF_INDEX, CPF_UNIQUE_INDEX, PHONE_INDEX, backfill_lookup_columns,
+                                           cpf_digits, create_lookup_indexes, ensure_lookup_columns, find_users,
+                                           lookup_column_indexed, phone_digits)
+
+# Banco anterior a add_user_lookup_columns.sql
+SEED = """
+ALTER TABLE users DROP COLUMN cpf_digits;
+ALTER TABLE users DROP COLUMN phone_digits;
+INSERT INTO users (id, name, email, type) VALUES (1, 'Admin', 'admin@exemplo.com', 'admin');
+INSERT INTO users (id, name, email, phone, cpf, type) VALUES
+    (2, 'João', 'joao@exemplo.com', '(51) 99999-1234', '123.456.789-00', 'cliente'),
+    (3, 'Maria', 'maria@exemplo.com', '+55 51 99999-1234', '98765432100', 'cliente'),
+    (4, 'Ana', 'ana@exemplo.com', '', '', 'cliente');
+"""
+
+
+@pytest.fixture
+def engine(make_database):
+    return make_database(SEED)
+
+
+def digits_by_id(session):
+    return {row.id: (row.cpf_digits, row.phone_digits)
+            for row in session.execute(text("SELECT id, cpf_digits, phone_digits FROM users"))}
+
+
+def indexes(session):
+    return {row[0] for row in session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+
+def test_normalization():
+    assert cpf_digits("123.456.789-00") == "12345678900"
+    assert cpf_digits("") is None and cpf_digits(None) is None
+    assert phone_digits("(51) 99999-1234") == "51999991234"
+    assert phone_digits("+55 (51) 99999-1234") == "51999991234"
+    assert phone_digits("051 3333-4444") == "5133334444"
+    assert phone_digits(" - ") is None
+
+
+def test_backfill_in_batches(engine):
+    with Session(engine) as session:
+        for column in ('cpf_digits', 'phone_digits'):
+            session.execute(text(f"ALTER TABLE users ADD COLUMN {column} VARCHAR(20)"))
+        session.commit()
+
+        batches = []
+        summary = backfill_lookup_columns(session, batch_size=2, progress=lambda s: batches.append(dict(s)))
+        assert summary['lidas'] == 4 and summary['atualizadas'] == 2, summary  # vazios já são NULL
+        assert len(batches) == 2
+        assert digits_by_id(session) == {1: (None, None), 2: ("12345678900", "51999991234"),
+                                         3: ("98765432100", "51999991234"), 4: (None, None)}
+
+        # Rodar de novo não reescreve nada; corrige o que mudou por fora
+        assert backfill_lookup_columns(session)['atualizadas'] == 0
+        session.execute(text("UPDATE users SET cpf = '111.111.111-11' WHERE id = 4"))
+        session.commit()
+        assert backfill_lookup_columns(session)['atualizadas'] == 1
+
+        created, duplicates = create_lookup_indexes(session)
+        assert set(created) == {CPF_UNIQUE_INDEX, PHONE_INDEX} and duplicates == []
+        assert create_lookup_indexes(session) == ([], [])
+
+        # Com o índice único, a linha que repete um CPF fica de fora e é reportada
+        session.execute(text("INSERT INTO users (id, name, cpf, type) VALUES (6, 'Outro', '123-456-789/00', 'cliente')"))
+        session.commit()
+        summary = backfill_lookup_columns(session)
+        assert summary['conflitos'] == [6] and summary['atualizadas'] == 0, summary
+
+
+def test_duplicate_cpfs_keep_index_non_unique(engine):
+    with Session(engine) as session:
+        session.execute(text("INSERT INTO users (id, name, email, cpf, type) "
+                             "VALUES (5, 'Repetido', 'r@exemplo.com', '123 456 789 00', 'cliente')"))
+        session.commit()
+        assert ensure_lookup_columns(session)
+        assert digits_by_id(session)[5] == ("12345678900", None)
+        found = indexes(session)
+        assert CPF_INDEX in found and CPF_UNIQUE_INDEX not in found and PHONE_INDEX in found
+
+
+def test_lookup_waits_for_backfill_indexes(engine):
+    with Session(engine) as session:
+        # Colunas recém-criadas (add_user_lookup_columns.sql), ainda vazias
+        for column in ('cpf_digits', 'phone_digits'):
+            session.execute(text(f"ALTER TABLE users ADD COLUMN {column} VARCHAR(20)"))
+        session.commit()
+        assert ensure_lookup_columns(session)
+        assert not lookup_column_indexed(session, 'cpf_digits')
+        assert [row.id for row in find_users(session, 'cpf_digits', "12345678900")] == [2]
+        assert [row.id for row in find_users(session, 'phone_digits', "51999991234")] == [2]  # sem o +55
+
+        backfill_lookup_columns(session)
+        create_lookup_indexes(session)
+        assert ensure_lookup_columns(session)
+        assert lookup_column_indexed(session, 'cpf_digits') and lookup_column_indexed(session, 'phone_digits')
+        # Agora pela coluna normalizada: uma linha gravada por fora sem backfill não aparece
+        session.execute(text("UPDATE users SET cpf = '111.111.111-11' WHERE id = 4"))
+        session.commit()
+        assert find_users(session, 'cpf_digits', "11111111111") == []
+        assert [row.id for row in find_users(session, 'cpf_digits', "12345678900")] == [2]
+
+
+def test_lookup_endpoints(engine, admin_headers):
+    headers = admin_headers
+    with TestClient(main.app) as client:
+        def get(url):
+            return client.get(url, headers=headers)
+
+        for cpf in ("123.456.789-00", "12345678900"):
+            response = get(f"/api/admin/clients/by-cpf/{cpf}")
+            assert response.status_code == 200, response.text
+            assert response.json()["data"]["id"] == 2
+        assert get("/api/admin/clients/by-cpf/000.000.000-00").status_code == 404
+        assert get("/api/admin/clients/by-cpf/123").status_code == 400
+
+        response = get("/api/admin/clients/by-phone/51999991234")
+        assert [c["id"] for c in response.json()["data"]] == [2, 3]
+        assert get("/api/admin/clients/by-phone/123").status_code == 400
+
+        created = client.post("/api/admin/clients", headers=headers,
+                              json={"name": "Nova", "email": "nova@exemplo.com",
+                                    "cpf": "555.666.777-88", "phone": "(11) 3333-4444"})
+        assert created.status_code == 200, created.text
+        new_id = created.json()["data"]["id"]
+        assert get("/api/admin/clients/by-cpf/55566677788").json()["data"]["id"] == new_id
+        assert [c["id"] for c in get("/api/admin/clients/by-phone/1133334444").json()["data"]] == [new_id]
+
+        duplicate = client.post("/api/admin/clients", headers=headers,
+                                json={"name": "Cópia", "email": "copia@exemplo.com", "cpf": "55566677788"})
+        assert duplicate.status_code == 409
+        assert client.put(f"/api/admin/clients/{new_id}", headers=headers,
+                          json={"cpf": "123.456.789-00"}).status_code == 409
+
+        assert client.put(f"/api/admin/clients/{new_id}", headers=headers,
+                          json={"cpf": "222.333.444-55"}).status_code == 200
+        assert get("/api/admin/clients/by-cpf/55566677788").status_code == 404
+        assert get("/api/admin/clients/by-cpf/22233344455").json()["data"]["id"] == new_id
+        # O próprio CPF (com outra pontuação) não conta como repetido
+        assert client.put(f"/api/admin/clients/{new_id}", headers=headers,
+                          json={"cpf": "22233344455"}).status_code == 200